@@ -62,6 +62,9 @@ if os.path.exists(translation_path):
         raise Exception(message)
     # noinspection PyTypeChecker,PyCallByClass
     QCoreApplication.installTranslator(translator)
+    # The translations cached by safe.utilities.i18n.tr are outdated.
+    from safe.utilities.i18n import clear_translation_cache
+    clear_translation_cache()
 
 
 # noinspection PyDocstring,PyPep8Naming
@@ -447,6 +447,13 @@ class ProcessingInstallationError(InaSAFEError):
     pass
 
 
+class AnalysisCancelledError(InaSAFEError):
+
+    """When the analysis has been cancelled by the user."""
+
+    pass
+
+
 class AlignRastersError(Exception):
 
     """Raised if alignment of hazard and exposure rasters failed."""
@@ -0,0 +1,147 @@
+# coding=utf-8
+
+"""Throttled progress reporting.
+
+Algorithms report their progress with a callback, possibly for each feature,
+and each report may re-render the message viewer of the dock. The progress
+aggregator sits between the algorithms and the listener: it keeps the latest
+progress and forwards it to the listener at most PROGRESS_RATE times per
+second. A new step, or the end of a step, is always forwarded, so no step is
+missed by the listener.
+"""
+
+import time
+from collections import namedtuple
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+# Maximum number of progress updates per second sent to the listener.
+PROGRESS_RATE = 10
+
+Progress = namedtuple('Progress', ['message', 'step', 'current', 'maximum'])
+Progress.__doc__ = """Structured progress of an analysis.
+
+The message is the message dictionary of the step, see
+safe.definitions.analysis_steps, and the step the name of a processing step.
+"""
+
+
+class ProgressAggregator(object):
+
+    """Progress callback forwarding coalesced updates to a listener.
+
+    The aggregator has the signature of the impact function callback, so it
+    can be used in place of the listener, and cheap enough to be called in
+    the inner loop of an algorithm.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, listener, rate=PROGRESS_RATE):
+        """Constructor.
+
+        :param listener: The callback receiving the progress, with the
+            signature callback(current, maximum, message=None).
+        :type listener: function
+
+        :param rate: Maximum number of updates per second. Default to
+            PROGRESS_RATE.
+        :type rate: float
+        """
+        self.listener = listener
+        self.interval = 1.0 / rate
+        self.progress = None
+        self._last_update = 0
+        self._pending = False
+
+    def __call__(self, current, maximum, message=None, step=None):
+        """Record the progress and forward it if it is time to.
+
+        :param current: Current progress.
+        :type current: int
+
+        :param maximum: Maximum range.
+        :type maximum: int
+
+        :param message: The message dictionary of the step.
+        :type message: dict
+
+        :param step: The name of the processing step, used by the vector
+            algorithms instead of the message.
+        :type step: str
+        """
+        previous = self.progress
+        self.progress = Progress(message, step, current, maximum)
+
+        new_step = previous is None or (
+            previous.message is not message or previous.step != step)
+        now = time.time()
+        if (new_step
+                or current >= maximum
+                or now - self._last_update >= self.interval):
+            self._forward(now)
+        else:
+            self._pending = True
+
+    def step_callback(self, resolution=100):
+        """Progress callback for the progress within the current step.
+
+        The algorithms report their progress from 0 to their own maximum,
+        for instance the number of features. This callback scales it between
+        the current step and the next one, so the progress of the analysis
+        does not jump back and forth within a step.
+
+        :param resolution: Number of increments within the step.
+        :type resolution: int
+
+        :return: A callback with the signature of the impact function
+            callback: callback(current, maximum, message=None).
+        :rtype: function
+
+        .. versionadded:: 5.0
+        """
+        index = self.progress.current
+        count = self.progress.maximum
+
+        def callback(current, maximum, message=None, step=None):
+            """Record the progress within the step.
+
+            :param current: Current progress within the step.
+            :type current: int
+
+            :param maximum: Maximum range within the step.
+            :type maximum: int
+
+            :param message: The message dictionary of the step.
+            :type message: dict
+
+            :param step: The name of the processing step.
+            :type step: str
+            """
+            fraction = min(float(current) / maximum, 1) if maximum else 1
+            self(
+                int((index + fraction) * resolution),
+                count * resolution,
+                message,
+                step)
+
+        return callback
+
+    def flush(self):
+        """Forward the latest progress if it has not been forwarded yet."""
+        if self._pending:
+            self._forward(time.time())
+
+    def _forward(self, now):
+        """Forward the latest progress to the listener.
+
+        :param now: The current time.
+        :type now: float
+        """
+        self._pending = False
+        self._last_update = now
+        progress = self.progress
+        self.listener(progress.current, progress.maximum, progress.message)
@@ -0,0 +1,72 @@
+# coding=utf-8
+
+"""Tests for the progress aggregator."""
+
+import unittest
+
+from safe.common.progress import ProgressAggregator
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestProgressAggregator(unittest.TestCase):
+
+    """Tests for the progress aggregator."""
+
+    def setUp(self):
+        self.updates = []
+        self.aggregator = ProgressAggregator(
+            lambda current, maximum, message: self.updates.append(
+                (current, maximum, message)),
+            rate=0.001)
+
+    def test_throttle(self):
+        """Test the updates within a step are coalesced."""
+        step = {'name': 'step'}
+        for i in range(100):
+            self.aggregator(i, 100, step)
+        # Only the first update of the step is forwarded.
+        self.assertEqual(self.updates, [(0, 100, step)])
+        self.assertEqual(self.aggregator.progress.current, 99)
+
+        self.aggregator.flush()
+        self.assertEqual(self.updates[-1], (99, 100, step))
+        self.aggregator.flush()
+        self.assertEqual(len(self.updates), 2)
+
+        # The end of the step is always forwarded.
+        self.aggregator(100, 100, step)
+        self.assertEqual(self.updates[-1], (100, 100, step))
+
+    def test_new_step(self):
+        """Test a new step is always forwarded."""
+        self.aggregator(0, 10, {'name': 'first'})
+        self.aggregator(1, 10, {'name': 'second'})
+        self.aggregator(2, 10, step='reproject')
+        self.assertEqual(len(self.updates), 3)
+        self.assertIsNone(self.updates[-1][2])
+        self.assertEqual(self.aggregator.progress.step, 'reproject')
+
+    def test_step_callback(self):
+        """Test the progress within a step is scaled to the step."""
+        step = {'name': 'step'}
+        self.aggregator(7, 10, step)
+        callback = self.aggregator.step_callback()
+        callback(0, 1000, step)
+        callback(500, 1000, step)
+        callback(1000, 1000, step)
+        self.aggregator.flush()
+        self.assertEqual(self.updates[0], (7, 10, step))
+        self.assertEqual(self.updates[-1], (800, 1000, step))
+        self.assertEqual(self.aggregator.progress.current, 800)
+
+        # The next step is forwarded on the scale of the steps.
+        self.aggregator(8, 10, {'name': 'next'})
+        self.assertEqual(self.updates[-1][:2], (8, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
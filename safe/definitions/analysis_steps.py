@@ -175,3 +175,36 @@ analysis_steps['profiling'] = {
         }
     ]
 }
+
+# The steps which are not part of every analysis. They are not counted in the
+# progress of an analysis and they are not shown in the definitions help.
+extra_analysis_steps = OrderedDict()
+
+extra_analysis_steps['partitioned_analysis'] = {
+    'key': 'partitioned_analysis',
+    'name': tr('Partitioned analysis'),
+    'description': tr(
+        'For a very large analysis extent, the hazard and exposure '
+        'preparation, their intersection and the post processing are done '
+        'for each partition of the analysis extent. The results of the '
+        'partitions are merged before the summary calculation.'),
+    'citations': [
+        {
+            'text': tr(''),
+            'link': ''
+        }
+    ]
+}
+extra_analysis_steps['report_export'] = {
+    'key': 'report_export',
+    'name': tr('Report export'),
+    'description': tr(
+        'In this phase we export the pages of the atlas report, one page '
+        'for each aggregation area.'),
+    'citations': [
+        {
+            'text': tr(''),
+            'link': ''
+        }
+    ]
+}
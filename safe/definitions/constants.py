@@ -52,6 +52,7 @@ PREPARE_FAILED_BAD_LAYER = 6
 ANALYSIS_SUCCESS = 0
 ANALYSIS_FAILED_BAD_INPUT = 3
 ANALYSIS_FAILED_BAD_CODE = 4
+ANALYSIS_CANCELLED = 5
 
 # GLOBAL is to indicate that a setting is stored as a global default
 GLOBAL = 'global'
@@ -14,6 +14,13 @@ inasafe_default_settings = {
     'setZoomToImpactFlag': True,
     'set_show_only_impact_on_report': False,
     'print_atlas_report': False,
+    'atlas_export_workers': 1,
+    'atlas_export_thumbnails': False,
+    'analysis_partitions': 1,
+    'analysis_partition_workers': 1,
+    'analysis_crs_from_exposure': False,
+    'incremental_analysis': False,
+    'analysis_timeout': 0,
     'setHideExposureFlag': False,
     'useSelectedFeaturesOnly': True,
     'useSentry': False,
@@ -12,6 +12,13 @@ __license__ = "GPL version 3"
 __email__ = "info@inasafe.org"
 __revision__ = '$Format:%H$'
 
+# The fatality rate tables are indexed by MMI class, from 0 to MAXIMUM_MMI.
+MAXIMUM_MMI = 10
+
+# The fatality rates and the fatality rate tables by model key, computed once.
+_fatality_rates = {}
+_fatality_rate_tables = {}
+
 
 def earthquake_fatality_rate(hazard_level):
     """Earthquake fatality ratio for a given hazard level.
@@ -25,14 +32,176 @@ def earthquake_fatality_rate(hazard_level):
     :return: The fatality rate.
     :rtype: float
     """
-    earthquake_function = setting(
+    earthquake_function = current_earthquake_function()
+    if earthquake_model(earthquake_function) is None:
+        return 0
+    return fatality_rates(earthquake_function).get(hazard_level)
+
+
+def current_earthquake_function():
+    """The key of the earthquake fatality model in the user settings.
+
+    .. versionadded:: 5.0
+
+    :return: The key of the model.
+    :rtype: str
+    """
+    return setting(
         'earthquake_function', EARTHQUAKE_FUNCTIONS[0]['key'], str)
-    ratio = 0
+
+
+def earthquake_model(key):
+    """The definition of an earthquake fatality model.
+
+    .. versionadded:: 5.0
+
+    :param key: The key of the model.
+    :type key: str
+
+    :return: The model definition, or None if the key is unknown.
+    :rtype: dict
+    """
     for model in EARTHQUAKE_FUNCTIONS:
-        if model['key'] == earthquake_function:
-            eq_function = model['fatality_rates']
-            ratio = eq_function().get(hazard_level)
-    return ratio
+        if model['key'] == key:
+            return model
+    return None
+
+
+def fatality_rates(key):
+    """The fatality rates of a model by MMI class, computed once.
+
+    .. versionadded:: 5.0
+
+    :param key: The key of the model.
+    :type key: str
+
+    :return: The fatality rate by MMI class.
+    :rtype: dict
+    """
+    rates = _fatality_rates.get(key)
+    if rates is None:
+        rates = earthquake_model(key)['fatality_rates']()
+        _fatality_rates[key] = rates
+    return rates
+
+
+def fatality_rate_table(key=None):
+    """The fatality rates of a model as an array indexed by MMI class.
+
+    The rates of the MMI classes not covered by the model are 0.
+
+    .. versionadded:: 5.0
+
+    :param key: The key of the model. Default to the model in the settings.
+    :type key: str
+
+    :return: The array of MAXIMUM_MMI + 1 fatality rates. It is shared, it
+        must not be modified.
+    :rtype: numpy.ndarray
+    """
+    if key is None:
+        key = current_earthquake_function()
+    table = _fatality_rate_tables.get(key)
+    if table is None:
+        table = numpy.zeros(MAXIMUM_MMI + 1)
+        for mmi, rate in list(fatality_rates(key).items()):
+            if 0 <= mmi <= MAXIMUM_MMI and rate:
+                table[mmi] = rate
+        table.flags.writeable = False
+        _fatality_rate_tables[key] = table
+    return table
+
+
+def mmi_classes(mmi):
+    """The MMI classes of continuous MMI values.
+
+    A class covers the values from its MMI minus 0.5 to its MMI plus 0.5,
+    like the numeric defaults of the earthquake MMI scale.
+
+    .. versionadded:: 5.0
+
+    :param mmi: The MMI values.
+    :type mmi: numpy.ndarray
+
+    :return: The MMI classes, from 0 to MAXIMUM_MMI. Invalid values are 0.
+    :rtype: numpy.ndarray
+    """
+    mmi = numpy.nan_to_num(numpy.asarray(mmi, dtype=numpy.float64))
+    classes = numpy.floor(mmi + 0.5)
+    return numpy.clip(classes, 0, MAXIMUM_MMI).astype(numpy.intp)
+
+
+def fatality_rates_array(mmi, key=None):
+    """The fatality rates of a model for an array of continuous MMI values.
+
+    .. versionadded:: 5.0
+
+    :param mmi: The MMI values.
+    :type mmi: numpy.ndarray
+
+    :param key: The key of the model. Default to the model in the settings.
+    :type key: str
+
+    :return: The fatality rates, with the shape of the MMI values.
+    :rtype: numpy.ndarray
+    """
+    if key is None:
+        key = current_earthquake_function()
+    mmi = numpy.asarray(mmi, dtype=numpy.float64)
+    return earthquake_model(key)['fatality_rates_array'](mmi)
+
+
+def earthquake_fatalities(
+        mmi, population, key=None, mmi_nodata=None, population_nodata=None):
+    """Expected fatalities for arrays of MMI and population.
+
+    The arrays are aligned cells, for instance the bands of a MMI raster and
+    of a population raster on the same grid. The cells with no data, an
+    invalid MMI or a negative population have no fatalities.
+
+    .. versionadded:: 5.0
+
+    :param mmi: The MMI values.
+    :type mmi: numpy.ndarray
+
+    :param population: The population counts.
+    :type population: numpy.ndarray
+
+    :param key: The key of the model. Default to the model in the settings.
+    :type key: str
+
+    :param mmi_nodata: The no data value of the MMI.
+    :type mmi_nodata: float
+
+    :param population_nodata: The no data value of the population.
+    :type population_nodata: float
+
+    :return: The expected fatalities of each cell.
+    :rtype: numpy.ndarray
+    """
+    mmi = numpy.asarray(mmi, dtype=numpy.float64)
+    population = numpy.asarray(population, dtype=numpy.float64)
+
+    invalid = ~numpy.isfinite(mmi) | ~numpy.isfinite(population)
+    invalid |= population < 0
+    if mmi_nodata is not None:
+        invalid |= mmi == mmi_nodata
+    if population_nodata is not None:
+        invalid |= population == population_nodata
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        fatalities = fatality_rates_array(mmi, key) * population
+    fatalities[invalid] = 0
+    return fatalities
+
+
+# Coefficients of the ITB fatality model.
+ITB_X = 0.62275231
+ITB_Y = 8.03314466
+
+# Coefficients of the USGS Pager fatality model, v2.0.
+PAGER_THETA = 13.249
+PAGER_BETA = 0.151
 
 
 def itb_fatality_rates():
@@ -45,13 +214,29 @@ def itb_fatality_rates():
     # a fatality rate of 0 - Tim
     mmi_range = list(range(2, 11))
     # Model coefficients
-    x = 0.62275231
-    y = 8.03314466
+    x = ITB_X
+    y = ITB_Y
     fatality_rate = {
         mmi: 0 if mmi < 4 else 10 ** (x * mmi - y) for mmi in mmi_range}
     return fatality_rate
 
 
+def itb_fatality_rates_array(mmi):
+    """Indonesian Earthquake Fatality Model over continuous MMI values.
+
+    .. versionadded:: 5.0
+
+    :param mmi: The MMI values.
+    :type mmi: numpy.ndarray
+
+    :returns: Fatality rates.
+    :rtype: numpy.ndarray
+    """
+    with numpy.errstate(over='ignore'):
+        rates = 10 ** (ITB_X * mmi - ITB_Y)
+    return numpy.where(mmi < 4, 0.0, rates)
+
+
 def pager_fatality_rates():
     """USGS Pager fatality estimation model.
 
@@ -79,14 +264,31 @@ def pager_fatality_rates():
     :rtype: dic
     """
     # Model coefficients
-    theta = 13.249
-    beta = 0.151
+    theta = PAGER_THETA
+    beta = PAGER_BETA
     mmi_range = list(range(2, 11))
     fatality_rate = {mmi: 0 if mmi < 4 else log_normal_cdf(
         mmi, median=theta, sigma=beta) for mmi in mmi_range}
     return fatality_rate
 
 
+def pager_fatality_rates_array(mmi):
+    """USGS Pager fatality estimation model over continuous MMI values.
+
+    .. versionadded:: 5.0
+
+    :param mmi: The MMI values.
+    :type mmi: numpy.ndarray
+
+    :returns: Fatality rates.
+    :rtype: numpy.ndarray
+    """
+    # The MMI below 4 are set to 4 to avoid the log of invalid values.
+    rates = log_normal_cdf(
+        numpy.maximum(mmi, 4), median=PAGER_THETA, sigma=PAGER_BETA)
+    return numpy.where(mmi < 4, 0.0, rates)
+
+
 def itb_bayesian_fatality_rates():
     """ITB fatality model based on a Bayesian approach.
 
@@ -114,6 +316,24 @@ def itb_bayesian_fatality_rates():
     return fatality_rate
 
 
+def itb_bayesian_fatality_rates_array(mmi):
+    """ITB bayesian fatality model over continuous MMI values.
+
+    The model only gives a rate for each MMI class, so the rate of a value
+    is the rate of its class.
+
+    .. versionadded:: 5.0
+
+    :param mmi: The MMI values.
+    :type mmi: numpy.ndarray
+
+    :returns: Fatality rates.
+    :rtype: numpy.ndarray
+    """
+    table = fatality_rate_table('itb_bayesian_fatality_rates')
+    return table[mmi_classes(mmi)]
+
+
 EARTHQUAKE_FUNCTIONS = (
     {
         'key': 'itb_bayesian_fatality_rates',
@@ -140,7 +360,8 @@ EARTHQUAKE_FUNCTIONS = (
                 'link': ''
             }
         ],
-        'fatality_rates': itb_bayesian_fatality_rates
+        'fatality_rates': itb_bayesian_fatality_rates,
+        'fatality_rates_array': itb_bayesian_fatality_rates_array
     }, {
         'key': 'itb_fatality_rates',
         'name': tr('ITB fatality model'),
@@ -216,7 +437,8 @@ EARTHQUAKE_FUNCTIONS = (
                 'link': ''
             }
         ],
-        'fatality_rates': itb_fatality_rates
+        'fatality_rates': itb_fatality_rates,
+        'fatality_rates_array': itb_fatality_rates_array
     }, {
         'key': 'pager_fatality_rates',
         'name': tr('Pager fatality model'),
@@ -241,7 +463,8 @@ EARTHQUAKE_FUNCTIONS = (
                 'link': 'https://pubs.usgs.gov/of/2009/1136/pdf/'
             }
         ],
-        'fatality_rates': pager_fatality_rates
+        'fatality_rates': pager_fatality_rates,
+        'fatality_rates_array': pager_fatality_rates_array
     }
 )
 
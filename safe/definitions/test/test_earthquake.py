@@ -0,0 +1,66 @@
+# coding=utf-8
+
+"""Tests for the earthquake fatality models."""
+
+import unittest
+
+import numpy
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from safe.definitions.earthquake import (  # NOQA
+    EARTHQUAKE_FUNCTIONS,
+    earthquake_fatalities,
+    fatality_rate_table,
+    fatality_rates,
+    fatality_rates_array,
+)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestEarthquake(unittest.TestCase):
+
+    """Tests for the earthquake fatality models."""
+
+    def test_fatality_rate_tables(self):
+        """Test the tables and the arrays match the fatality rates."""
+        mmi = numpy.arange(2, 11, dtype=numpy.float64)
+        for model in EARTHQUAKE_FUNCTIONS:
+            key = model['key']
+            rates = model['fatality_rates']()
+            expected = [rates[i] for i in range(2, 11)]
+
+            table = fatality_rate_table(key)
+            self.assertIs(fatality_rate_table(key), table)
+            self.assertIs(fatality_rates(key), fatality_rates(key))
+            self.assertEqual(table[0], 0)
+            self.assertEqual(table[1], 0)
+            numpy.testing.assert_allclose(table[2:], expected)
+            numpy.testing.assert_allclose(
+                fatality_rates_array(mmi, key), expected)
+
+    def test_earthquake_fatalities(self):
+        """Test the expected fatalities of MMI and population arrays."""
+        key = EARTHQUAKE_FUNCTIONS[0]['key']
+        table = fatality_rate_table(key)
+        mmi = numpy.array([[9.2, 7.6], [numpy.nan, 6.0]])
+        population = numpy.array([[100.0, 10.0], [100.0, -9999.0]])
+
+        fatalities = earthquake_fatalities(
+            mmi, population, key, population_nodata=-9999)
+        self.assertEqual(fatalities.shape, (2, 2))
+        self.assertAlmostEqual(fatalities[0, 0], table[9] * 100)
+        self.assertAlmostEqual(fatalities[0, 1], table[8] * 10)
+        self.assertEqual(fatalities[1, 0], 0)
+        self.assertEqual(fatalities[1, 1], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
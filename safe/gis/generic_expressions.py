@@ -6,16 +6,19 @@ from dateutil.parser import parse
 from qgis.core import (
     qgsfunction,
     QgsExpressionContextUtils,
+    QgsFeatureRequest,
     QgsProject
 )
 
 from safe.definitions.extra_keywords import all_extra_keywords_description
 from safe.definitions.provenance import (
+    provenance_layer_analysis_impacted,
     provenance_layer_analysis_impacted_id,
     provenance_multi_exposure_analysis_summary_layers_id)
 from safe.definitions.utilities import definition
 from safe.gis.tools import load_layer
 from safe.report.expressions.map_report import exposure_summary_layer
+from safe.utilities.expression_cache import expression_cache
 from safe.utilities.i18n import tr
 from safe.utilities.keyword_io import KeywordIO
 from safe.utilities.rounding import denomination, round_affected_number
@@ -26,6 +29,34 @@ __license__ = "GPL version 3"
 __email__ = "info@inasafe.org"
 __revision__ = '$Format:%H$'
 
+
+def first_feature_values(layer):
+    """Get the values of the first feature of a summary layer as a dict.
+
+    The values are cached until the layer data changes, the expressions
+    using it are evaluated many times per layout render.
+
+    :param layer: A layer with one feature, like the analysis summary.
+    :type layer: QgsVectorLayer
+
+    :return: Dictionary of field name and value.
+    :rtype: dict
+    """
+    def read_values():
+        """Read the first feature."""
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setLimit(1)
+        for feature in layer.getFeatures(request):
+            return dict(
+                zip(layer.fields().names(), feature.attributes()))
+        return {}
+
+    return expression_cache.get(
+        ('first_feature_values', ) + expression_cache.layer_key(layer),
+        read_values)
+
+
 ##
 # For QGIS < 2.18.13 and QGIS < 2.14.19, docstrings are used in the QGIS GUI
 # in the Expression dialog and also in the InaSAFE Help dialog.
@@ -66,12 +97,7 @@ def inasafe_analysis_summary_field_value(field, feature, parent):
     if not layer:
         return None
 
-    index = layer.fields().lookupField(field)
-    if index < 0:
-        return None
-
-    feature = next(layer.getFeatures())
-    return feature[index]
+    return first_feature_values(layer).get(field)
 
 
 description = tr('Retrieve a value from a field in the sub analysis summary '
@@ -108,12 +134,7 @@ def inasafe_sub_analysis_summary_field_value(
     if not analysis_summary_layer:
         return None
 
-    index = analysis_summary_layer.fields().lookupField(field)
-    if index < 0:
-        return None
-
-    feature = next(analysis_summary_layer.getFeatures())
-    return feature[index]
+    return first_feature_values(analysis_summary_layer).get(field)
 
 
 description = tr(
@@ -132,20 +153,38 @@ def inasafe_exposure_summary_field_values(field, feature, parent):
     """
     _ = feature, parent  # NOQA
 
-    layer = exposure_summary_layer()
+    project_context_scope = QgsExpressionContextUtils.projectScope(
+        QgsProject.instance())
+    layer = expression_cache.get(
+        ('exposure_summary_layer', ) + tuple(
+            project_context_scope.variable(provenance['provenance_key'])
+            for provenance in (
+                provenance_layer_analysis_impacted_id,
+                provenance_layer_analysis_impacted)),
+        exposure_summary_layer)
     if not layer:
         return None
 
-    index = layer.fields().lookupField(field)
-    if index < 0:
-        return None
-
-    values = []
-    for feat in layer.getFeatures():
-        value = feat[index]
-        values.append(value)
-
-    return str(values)
+    def field_values():
+        """Read all values of the field."""
+        index = layer.fields().lookupField(field)
+        if index < 0:
+            return None
+
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([index])
+        values = []
+        for feat in layer.getFeatures(request):
+            value = feat[index]
+            values.append(value)
+
+        return str(values)
+
+    return expression_cache.get(
+        ('exposure_summary_field_values', ) + expression_cache.layer_key(
+            layer) + (field, ),
+        field_values)
 
 
 description = tr(
@@ -1,6 +1,15 @@
 # coding=utf-8
 
-"""Processing utilities and tools."""
+"""Processing utilities and tools.
+
+An analysis shares a single AnalysisFeedback with all the algorithms. It is
+the processing feedback of the processing algorithms and the progress
+callback of GDAL. The other algorithms check it regularly with
+check_cancelled. An analysis is stopped when the feedback is cancelled, e.g.
+by the user, or when its deadline is passed.
+"""
+
+import time
 
 import processing
 
@@ -12,6 +21,9 @@ from qgis.core import (
     QgsProject)
 from qgis.analysis import QgsNativeAlgorithms
 
+from safe.common.exceptions import AnalysisCancelledError
+from safe.utilities.i18n import tr
+
 __copyright__ = "Copyright 2018, The InaSAFE Project"
 __license__ = "GPL version 3"
 __email__ = "info@inasafe.org"
@@ -49,11 +61,96 @@ def create_processing_context(feedback):
     return context
 
 
-def create_processing_feedback():
+def create_processing_feedback(feedback=None):
     """
     Creates a default processing feedback object
 
+    :param feedback: The feedback of the analysis, returned if any.
+    :type feedback: AnalysisFeedback
+
     :return: Processing feedback
     :rtype: QgsProcessingFeedback
     """
+    if feedback is not None:
+        return feedback
     return QgsProcessingFeedback()
+
+
+class AnalysisFeedback(QgsProcessingFeedback):
+
+    """Cancellation and progress token of an analysis, with a deadline.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, timeout=None):
+        """Constructor.
+
+        :param timeout: Optional maximum duration of the analysis in seconds.
+            The feedback is cancelled once the duration is passed.
+        :type timeout: float
+        """
+        super(AnalysisFeedback, self).__init__()
+        self.deadline = None
+        if timeout:
+            self.deadline = time.time() + timeout
+        # Processing algorithms only check if they are cancelled, the
+        # deadline is checked each time they report their progress.
+        self.progressChanged.connect(self.expired)
+
+    def expired(self, *args):
+        """Cancel the feedback if the deadline is passed.
+
+        :return: True if the deadline is passed.
+        :rtype: bool
+        """
+        if self.deadline is not None and time.time() > self.deadline:
+            if not self.isCanceled():
+                self.cancel()
+            return True
+        return False
+
+    def check(self):
+        """Stop the analysis if it is cancelled.
+
+        :raises: AnalysisCancelledError if the feedback is cancelled or its
+            deadline is passed.
+        """
+        if self.expired():
+            raise AnalysisCancelledError(
+                tr('The analysis has been stopped, it was too long.'))
+        if self.isCanceled():
+            raise AnalysisCancelledError(
+                tr('The analysis has been cancelled.'))
+
+    def gdal_callback(self, complete, message, data):
+        """Progress callback for GDAL functions.
+
+        :param complete: Progress, from 0 to 1.
+        :type complete: float
+
+        :param message: Message from GDAL.
+        :type message: str
+
+        :param data: User data, not used.
+
+        :return: 0 to stop the GDAL function, 1 to continue.
+        :rtype: int
+        """
+        self.setProgress(complete * 100)
+        return 0 if self.isCanceled() else 1
+
+
+def check_cancelled(feedback):
+    """Stop the analysis if its feedback is cancelled.
+
+    .. versionadded:: 5.0
+
+    :param feedback: The feedback of the analysis, or None.
+    :type feedback: AnalysisFeedback
+
+    :raises: AnalysisCancelledError if the feedback is cancelled or its
+        deadline is passed.
+    """
+    if feedback is not None:
+        feedback.check()
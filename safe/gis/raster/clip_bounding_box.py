@@ -7,7 +7,8 @@ import logging
 import processing
 from qgis.core import QgsRasterLayer
 
-from safe.common.exceptions import ProcessingInstallationError
+from safe.common.exceptions import (
+    AnalysisCancelledError, ProcessingInstallationError)
 from safe.common.utilities import unique_filename, temp_dir
 from safe.definitions.processing_steps import quick_clip_steps
 from safe.gis.sanity_check import check_layer
@@ -15,6 +16,7 @@ from safe.utilities.gis import is_raster_y_inverted
 from safe.utilities.profiling import profile
 from safe.utilities.utilities import get_error_message
 from safe.gis.processing_tools import (
+    check_cancelled,
     create_processing_context,
     create_processing_feedback,
     initialize_processing)
@@ -28,7 +30,7 @@ LOGGER = logging.getLogger('InaSAFE')
 
 
 @profile
-def clip_by_extent(layer, extent):
+def clip_by_extent(layer, extent, feedback=None):
     """Clip a raster using a bounding box using processing.
 
     Issue https://github.com/inasafe/inasafe/issues/3183
@@ -39,6 +41,10 @@ def clip_by_extent(layer, extent):
     :param extent: The extent.
     :type extent: QgsRectangle
 
+    :param feedback: The feedback of the analysis, to stop the clip if the
+        analysis is cancelled.
+    :type feedback: AnalysisFeedback
+
     :return: Clipped layer.
     :rtype: QgsRasterLayer
 
@@ -95,13 +101,15 @@ def clip_by_extent(layer, extent):
         parameters['OUTPUT'] = output_raster
 
         initialize_processing()
-        feedback = create_processing_feedback()
+        feedback = create_processing_feedback(feedback)
         context = create_processing_context(feedback=feedback)
 
         result = processing.run(
             "gdal:cliprasterbyextent",
             parameters,
+            feedback=feedback,
             context=context)
+        check_cancelled(feedback)
 
         if result is None:
             raise ProcessingInstallationError
@@ -114,6 +122,9 @@ def clip_by_extent(layer, extent):
 
         check_layer(clipped)
 
+    except AnalysisCancelledError:
+        raise
+
     except Exception as e:
         # This step clip_raster_by_extent was nice to speedup the analysis.
         # As we got an exception because the layer is invalid, we are not going
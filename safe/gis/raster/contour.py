@@ -2,15 +2,15 @@
 """Create contour from shakemap raster layer."""
 
 import logging
+import math
 import os
 import shutil
 from datetime import datetime
 
 import numpy as np
 from osgeo import gdal, ogr
-from osgeo.gdalconst import GA_ReadOnly
+from osgeo.gdalconst import GA_ReadOnly, GA_Update
 
-from qgis.core import QgsFeatureRequest, QgsVectorLayer
 from safe.common.exceptions import (
     ContourCreationError,
     FileNotFoundError,
@@ -26,6 +26,7 @@ from safe.definitions.fields import (
     contour_colour_field,
     contour_fields,
     contour_halign_field,
+    contour_id_field,
     contour_length_field, contour_mmi_field,
     contour_roman_field, contour_valign_field,
     contour_x_field, contour_y_field
@@ -33,10 +34,7 @@ from safe.definitions.fields import (
 from safe.definitions.layer_geometry import layer_geometry_line
 from safe.definitions.layer_modes import layer_mode_classified
 from safe.definitions.layer_purposes import layer_purpose_earthquake_contour
-from safe.gis.vector.tools import (
-    create_ogr_field_from_definition,
-    field_index_from_definition
-)
+from safe.gis.vector.tools import create_ogr_field_from_definition
 from safe.utilities.i18n import tr
 from safe.utilities.metadata import write_iso19115_metadata
 from safe.utilities.resources import resources_path
@@ -49,6 +47,9 @@ __revision__ = '$Format:%H$'
 
 LOGGER = logging.getLogger('InaSAFE')
 
+# The default interval between two MMI contours.
+CONTOUR_INTERVAL = 0.5
+
 
 def gaussian_kernel(sigma, truncate=4.0):
     """Return Gaussian that truncates at the given number of std deviations.
@@ -339,7 +340,11 @@ def smooth_shakemap(
     return output_file_path
 
 
-def shakemap_contour(shakemap_layer_path, output_file_path='', active_band=1):
+def shakemap_contour(
+        shakemap_layer_path,
+        output_file_path='',
+        active_band=1,
+        contour_intervals=None):
     """Creating contour from a shakemap layer.
 
     :param shakemap_layer_path: The shake map raster layer path.
@@ -351,6 +356,10 @@ def shakemap_contour(shakemap_layer_path, output_file_path='', active_band=1):
     :param active_band: The band which the data located, default to 1.
     :type active_band: int
 
+    :param contour_intervals: The intervals between the contours, all the
+        contours are generated in one pass. Default to CONTOUR_INTERVAL.
+    :type contour_intervals: list(float)
+
     :returns: The contour of the shake map layer path.
     :rtype: basestring
     """
@@ -379,28 +388,11 @@ def shakemap_contour(shakemap_layer_path, output_file_path='', active_band=1):
         layer.CreateField(field_definition)
 
     shakemap_data = gdal.Open(shakemap_layer_path, GA_ReadOnly)
-    # see http://gdal.org/java/org/gdal/gdal/gdal.html for these options
-    contour_interval = 0.5
-    contour_base = 0
-    fixed_level_list = []
-    use_no_data_flag = 0
-    no_data_value = -9999
-    id_field = 0  # first field defined above
-    elevation_field = 1  # second (MMI) field defined above
     try:
-        gdal.ContourGenerate(
+        generate_contours(
             shakemap_data.GetRasterBand(active_band),
-            contour_interval,
-            contour_base,
-            fixed_level_list,
-            use_no_data_flag,
-            no_data_value,
             layer,
-            id_field,
-            elevation_field)
-    except Exception as e:
-        LOGGER.exception('Contour creation failed')
-        raise ContourCreationError(str(e))
+            contour_intervals)
     finally:
         ogr_dataset.Release()
 
@@ -421,20 +413,208 @@ def shakemap_contour(shakemap_layer_path, output_file_path='', active_band=1):
     # Create metadata file
     create_contour_metadata(output_file_path)
 
-    # Now update the additional columns - X,Y, ROMAN and RGB
-    try:
-        set_contour_properties(output_file_path)
-    except InvalidLayerError:
-        raise
-
     del shakemap_data
 
     return output_file_path
 
 
+def contour_levels(band, contour_intervals, contour_base=0):
+    """The levels of the contours for several intervals.
+
+    .. versionadded:: 5.0
+
+    :param band: The raster band.
+    :type band: gdal.Band
+
+    :param contour_intervals: The intervals between the contours.
+    :type contour_intervals: list(float)
+
+    :param contour_base: The level from which the intervals are counted.
+    :type contour_base: float
+
+    :returns: The sorted levels of the contours within the band values.
+    :rtype: list(float)
+    """
+    minimum, maximum = band.ComputeRasterMinMax(False)
+    levels = set()
+    for interval in contour_intervals:
+        first = math.ceil((minimum - contour_base) / interval)
+        last = math.floor((maximum - contour_base) / interval)
+        # Rounded, so the same level from two intervals is kept once.
+        levels.update(np.round(
+            contour_base + interval * np.arange(first, last + 1), 10))
+    return sorted(float(level) for level in levels)
+
+
+def contour_line_properties(geometry):
+    """The label position and the length of a contour line.
+
+    The label is placed at the middle of the line horizontally and at its
+    lowest point vertically, so the labels line up nicely.
+
+    .. versionadded:: 5.0
+
+    :param geometry: The contour line.
+    :type geometry: ogr.Geometry
+
+    :returns: A tuple with the X and Y of the label and the length of the
+        line, or None if the line is empty.
+    :rtype: tuple
+    """
+    points = geometry.GetPoints()
+    if points is None:
+        # A multi line string.
+        points = []
+        for index in range(geometry.GetGeometryCount()):
+            points.extend(geometry.GetGeometryRef(index).GetPoints() or [])
+    if not points:
+        return None
+
+    coordinates = np.array(points, dtype=np.float64)[:, :2]
+    x_min, y_min = coordinates.min(axis=0)
+    x_max = coordinates[:, 0].max()
+    x = x_min + ((x_max - x_min) / 2)
+    return float(x), float(y_min), geometry.Length()
+
+
+def contour_label(mmi_value):
+    """The colour and the roman numeral label of a contour.
+
+    .. versionadded:: 5.0
+
+    :param mmi_value: The MMI of the contour.
+    :type mmi_value: float
+
+    :returns: A tuple with the colour and the roman numeral.
+    :rtype: tuple
+    """
+    # We only want labels on the whole number contours
+    if mmi_value != round(mmi_value):
+        roman = ''
+    else:
+        roman = romanise(mmi_value)
+
+    # RGB from http://en.wikipedia.org/wiki/Mercalli_intensity_scale
+    rgb = mmi_colour(mmi_value)
+    return rgb, roman
+
+
+def set_contour_feature_properties(feature, labels=None):
+    """Set the X, Y, RGB, ROMAN, ALIGN, VALIGN and LEN of a contour feature.
+
+    .. versionadded:: 5.0
+
+    :param feature: The contour feature, with the contour fields.
+    :type feature: ogr.Feature
+
+    :param labels: The colours and the roman numerals of the contours
+        by MMI, filled with the labels computed by this function.
+    :type labels: dict
+    """
+    geometry = feature.GetGeometryRef()
+    if geometry is not None:
+        properties = contour_line_properties(geometry)
+        if properties is not None:
+            x, y, length = properties
+            feature.SetField(contour_x_field['field_name'], x)
+            feature.SetField(contour_y_field['field_name'], y)
+            feature.SetField(contour_length_field['field_name'], length)
+
+    mmi_value = float(feature.GetField(contour_mmi_field['field_name']))
+    if labels is None:
+        labels = {}
+    if mmi_value not in labels:
+        labels[mmi_value] = contour_label(mmi_value)
+    rgb, roman = labels[mmi_value]
+    feature.SetField(contour_colour_field['field_name'], rgb)
+    feature.SetField(contour_roman_field['field_name'], roman)
+    feature.SetField(contour_halign_field['field_name'], 'Center')
+    feature.SetField(contour_valign_field['field_name'], 'HALF')
+
+
+def generate_contours(
+        band, layer, contour_intervals=None, no_data_value=None):
+    """Generate the MMI contours of a raster band in a layer.
+
+    The contours are generated in memory, then written to the layer with
+    their X, Y, RGB, ROMAN, ALIGN, VALIGN and LEN attributes, so the layer
+    does not need to be updated afterwards.
+
+    .. versionadded:: 5.0
+
+    :param band: The raster band.
+    :type band: gdal.Band
+
+    :param layer: The output layer, with the contour fields.
+    :type layer: ogr.Layer
+
+    :param contour_intervals: The intervals between the contours, all the
+        contours are generated in one pass. Default to CONTOUR_INTERVAL.
+    :type contour_intervals: list(float)
+
+    :param no_data_value: The no data value of the band, if any.
+    :type no_data_value: float
+
+    :raise: ContourCreationError if the contours can not be generated.
+    """
+    if not contour_intervals:
+        contour_intervals = [CONTOUR_INTERVAL]
+
+    memory_dataset = ogr.GetDriverByName('Memory').CreateDataSource(
+        'contour')
+    memory_layer = memory_dataset.CreateLayer('contour')
+    memory_layer.CreateField(
+        create_ogr_field_from_definition(contour_id_field))
+    memory_layer.CreateField(
+        create_ogr_field_from_definition(contour_mmi_field))
+
+    # see http://gdal.org/java/org/gdal/gdal/gdal.html for these options
+    contour_interval = contour_intervals[0]
+    contour_base = 0
+    if len(contour_intervals) > 1:
+        fixed_level_list = contour_levels(band, contour_intervals)
+    else:
+        fixed_level_list = []
+    use_no_data_flag = 0 if no_data_value is None else 1
+    if no_data_value is None:
+        no_data_value = -9999
+    id_field = 0  # first field defined above
+    elevation_field = 1  # second (MMI) field defined above
+    try:
+        gdal.ContourGenerate(
+            band,
+            contour_interval,
+            contour_base,
+            fixed_level_list,
+            use_no_data_flag,
+            no_data_value,
+            memory_layer,
+            id_field,
+            elevation_field)
+    except Exception as e:
+        LOGGER.exception('Contour creation failed')
+        raise ContourCreationError(str(e))
+
+    definition = layer.GetLayerDefn()
+    labels = {}
+    memory_layer.ResetReading()
+    for contour in memory_layer:
+        feature = ogr.Feature(definition)
+        feature.SetGeometry(contour.GetGeometryRef())
+        feature.SetField(
+            contour_id_field['field_name'], contour.GetField(id_field))
+        feature.SetField(
+            contour_mmi_field['field_name'], contour.GetField(elevation_field))
+        set_contour_feature_properties(feature, labels)
+        layer.CreateFeature(feature)
+
+
 def set_contour_properties(contour_file_path):
     """Set the X, Y, RGB, ROMAN attributes of the contour layer.
 
+    The contours created by generate_contours have these attributes
+    already, this is only needed for the contours created otherwise.
+
     :param contour_file_path: Path of the contour layer.
     :type contour_file_path: str
 
@@ -442,70 +622,17 @@ def set_contour_properties(contour_file_path):
     """
     LOGGER.debug(
         'Set_contour_properties requested for %s.' % contour_file_path)
-    layer = QgsVectorLayer(contour_file_path, 'mmi-contours', "ogr")
-    if not layer.isValid():
+    dataset = ogr.Open(contour_file_path, GA_Update)
+    if dataset is None:
         raise InvalidLayerError(contour_file_path)
 
-    layer.startEditing()
-    # Now loop through the db adding selected features to mem layer
-    request = QgsFeatureRequest()
-
-    for feature in layer.getFeatures(request):
-        if not feature.isValid():
-            LOGGER.debug('Skipping feature')
-            continue
-        # Work out x and y
-        line = feature.geometry().asPolyline()
-        y = line[0].y()
-
-        x_max = line[0].x()
-        x_min = x_max
-        for point in line:
-            if point.y() < y:
-                y = point.y()
-            x = point.x()
-            if x < x_min:
-                x_min = x
-            if x > x_max:
-                x_max = x
-        x = x_min + ((x_max - x_min) / 2)
-
-        # Get length
-        length = feature.geometry().length()
-
-        mmi_value = float(feature[contour_mmi_field['field_name']])
-        # We only want labels on the whole number contours
-        if mmi_value != round(mmi_value):
-            roman = ''
-        else:
-            roman = romanise(mmi_value)
-
-        # RGB from http://en.wikipedia.org/wiki/Mercalli_intensity_scale
-        rgb = mmi_colour(mmi_value)
-
-        # Now update the feature
-        feature_id = feature.id()
-        layer.changeAttributeValue(
-            feature_id, field_index_from_definition(layer, contour_x_field), x)
-        layer.changeAttributeValue(
-            feature_id, field_index_from_definition(layer, contour_y_field), y)
-        layer.changeAttributeValue(
-            feature_id,
-            field_index_from_definition(layer, contour_colour_field), rgb)
-        layer.changeAttributeValue(
-            feature_id,
-            field_index_from_definition(layer, contour_roman_field), roman)
-        layer.changeAttributeValue(
-            feature_id,
-            field_index_from_definition(layer, contour_halign_field), 'Center')
-        layer.changeAttributeValue(
-            feature_id,
-            field_index_from_definition(layer, contour_valign_field), 'HALF')
-        layer.changeAttributeValue(
-            feature_id,
-            field_index_from_definition(layer, contour_length_field), length)
-
-    layer.commitChanges()
+    layer = dataset.GetLayer()
+    labels = {}
+    for feature in layer:
+        set_contour_feature_properties(feature, labels)
+        layer.SetFeature(feature)
+    # Close the dataset to write the changes.
+    dataset = None
 
 
 def create_contour_metadata(contour_path):
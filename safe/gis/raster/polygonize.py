@@ -15,6 +15,7 @@ from safe.definitions.fields import hazard_value_field, exposure_type_field
 from safe.definitions.layer_geometry import (
     layer_geometry, layer_geometry_polygon)
 from safe.definitions.processing_steps import polygonize_steps
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.utilities.profiling import profile
 
@@ -25,7 +26,7 @@ __revision__ = '$Format:%H$'
 
 
 @profile
-def polygonize(layer):
+def polygonize(layer, feedback=None):
     """Polygonize a raster layer into a vector layer using GDAL.
 
     Issue https://github.com/inasafe/inasafe/issues/3183
@@ -33,6 +34,10 @@ def polygonize(layer):
     :param layer: The layer to reproject.
     :type layer: QgsRasterLayer
 
+    :param feedback: The feedback of the analysis, to stop GDAL if the
+        analysis is cancelled.
+    :type feedback: AnalysisFeedback
+
     :return: Reprojected memory layer.
     :rtype: QgsRasterLayer
 
@@ -68,9 +73,17 @@ def polygonize(layer):
 
     active_band = layer.keywords.get('active_band', 1)
     input_band = input_raster.GetRasterBand(active_band)
-    # Fixme : add our own callback to Polygonize
-    gdal.Polygonize(input_band, None, output_layer, 0, [], callback=None)
+    callback = feedback.gdal_callback if feedback is not None else None
+    try:
+        gdal.Polygonize(
+            input_band, None, output_layer, 0, [], callback=callback)
+    except RuntimeError:
+        # GDAL raises an error if exceptions are enabled and the callback
+        # stopped it.
+        check_cancelled(feedback)
+        raise
     destination.Destroy()
+    check_cancelled(feedback)
 
     vector_layer = QgsVectorLayer(out_shapefile, output_layer_name, 'ogr')
 
@@ -14,6 +14,7 @@ from safe.common.utilities import unique_filename, temp_dir
 from safe.definitions.constants import no_data_value
 from safe.definitions.processing_steps import reclassify_raster_steps
 from safe.definitions.utilities import definition
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.utilities.metadata import (
     active_thresholds_value_maps, active_classification)
@@ -26,7 +27,8 @@ __revision__ = '$Format:%H$'
 
 
 @profile
-def reclassify(layer, exposure_key=None, overwrite_input=False):
+def reclassify(
+        layer, exposure_key=None, overwrite_input=False, feedback=None):
     """Reclassify a continuous raster layer.
 
     Issue https://github.com/inasafe/inasafe/issues/3182
@@ -59,6 +61,9 @@ def reclassify(layer, exposure_key=None, overwrite_input=False):
     :param exposure_key: The exposure key.
     :type exposure_key: str
 
+    :param feedback: The feedback of the analysis, checked between classes.
+    :type feedback: AnalysisFeedback
+
     :return: The classified raster layer.
     :rtype: QgsRasterLayer
 
@@ -107,6 +112,7 @@ def reclassify(layer, exposure_key=None, overwrite_input=False):
     destination = source.copy()
 
     for value, interval in list(ranges.items()):
+        check_cancelled(feedback)
         v_min = interval[0]
         v_max = interval[1]
 
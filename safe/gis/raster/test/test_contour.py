@@ -8,8 +8,12 @@ from safe.definitions.constants import INASAFE_TEST
 from safe.test.utilities import (
     load_test_raster_layer, standard_data_path)
 import unittest
+from osgeo import ogr
 from safe.gis.raster.contour import (
-    create_smooth_contour, smooth_shakemap, shakemap_contour)
+    contour_line_properties,
+    create_smooth_contour,
+    smooth_shakemap,
+    shakemap_contour)
 from safe.common.utilities import unique_filename
 
 from safe.test.utilities import get_qgis_app
@@ -71,6 +75,41 @@ class TestContour(unittest.TestCase):
         self.assertTrue(os.path.exists(contour_path))
         print(contour_path)
 
+    def test_contour_properties(self):
+        """Test the label attributes are written with the contours."""
+        shakemap_layer_path = standard_data_path(
+            'hazard',
+            'shake_data',
+            '20131105060809',
+            'output',
+            'grid-use_ascii.tif')
+        contour_path = shakemap_contour(
+            shakemap_layer_path, contour_intervals=[1, 0.5])
+
+        dataset = ogr.Open(contour_path)
+        layer = dataset.GetLayer()
+        self.assertGreater(layer.GetFeatureCount(), 0)
+        levels = set()
+        for feature in layer:
+            mmi = feature.GetField('MMI')
+            levels.add(mmi)
+            self.assertIsNotNone(feature.GetField('X'))
+            self.assertIsNotNone(feature.GetField('Y'))
+            self.assertGreater(feature.GetField('LEN'), 0)
+            self.assertEqual(feature.GetField('ALIGN'), 'Center')
+            if mmi == round(mmi):
+                self.assertNotEqual(feature.GetField('ROMAN'), '')
+        # The levels of both intervals are generated once.
+        self.assertTrue(any(level != round(level) for level in levels))
+
+    def test_contour_line_properties(self):
+        """Test the label position and the length of a contour line."""
+        line = ogr.CreateGeometryFromWkt('LINESTRING(0 2, 4 1, 6 3)')
+        x, y, length = contour_line_properties(line)
+        self.assertEqual(x, 3)
+        self.assertEqual(y, 1)
+        self.assertAlmostEqual(length, line.Length())
+
 
 if __name__ == '__main__':
     unittest.main()
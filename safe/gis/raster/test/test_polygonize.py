@@ -10,6 +10,8 @@ QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
 
 from qgis.core import QgsFeatureRequest
 
+from safe.common.exceptions import AnalysisCancelledError
+from safe.gis.processing_tools import AnalysisFeedback
 from safe.gis.raster.polygonize import polygonize
 from safe.definitions.layer_geometry import (
     layer_geometry, layer_geometry_polygon)
@@ -64,3 +66,11 @@ class TestPolygonizeRaster(unittest.TestCase):
             request = QgsFeatureRequest().setFilterExpression(expression)
             self.assertEqual(
                 sum(1 for _ in polygonized.getFeatures(request)), count)
+
+    def test_polygonize_cancelled(self):
+        """Test GDAL stops when the feedback is cancelled."""
+        layer = load_test_raster_layer('hazard', 'classified_flood_20_20.asc')
+        feedback = AnalysisFeedback()
+        feedback.cancel()
+        with self.assertRaises(AnalysisCancelledError):
+            polygonize(layer, feedback=feedback)
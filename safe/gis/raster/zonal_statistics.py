@@ -12,6 +12,7 @@ from safe.definitions.fields import exposure_count_field, total_field
 from safe.definitions.layer_purposes import (
     layer_purpose_aggregate_hazard_impacted)
 from safe.definitions.processing_steps import zonal_stats_steps
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.gis.vector.reproject import reproject
 from safe.gis.vector.tools import (
@@ -34,7 +35,7 @@ LOGGER = logging.getLogger('InaSAFE')
 
 
 @profile
-def zonal_stats(raster, vector):
+def zonal_stats(raster, vector, feedback=None):
     """Reclassify a continuous raster layer.
 
     Issue https://github.com/inasafe/inasafe/issues/3190
@@ -50,6 +51,10 @@ def zonal_stats(raster, vector):
     :param vector: The vector layer.
     :type vector: QgsVectorLayer
 
+    :param feedback: The feedback of the analysis, to stop the zonal
+        statistics if the analysis is cancelled.
+    :type feedback: AnalysisFeedback
+
     :return: The output of the zonal stats.
     :rtype: QgsVectorLayer
 
@@ -60,6 +65,7 @@ def zonal_stats(raster, vector):
     exposure = raster.keywords['exposure']
     if raster.crs().authid() != vector.crs().authid():
         layer = reproject(vector, raster.crs())
+        check_cancelled(feedback)
 
         # We prepare the copy
         output_layer = create_memory_layer(
@@ -85,8 +91,9 @@ def zonal_stats(raster, vector):
         'exposure_',
         input_band,
         QgsZonalStatistics.Sum)
-    result = analysis.calculateStatistics(None)
+    result = analysis.calculateStatistics(feedback)
     LOGGER.debug(tr('Zonal stats on %s : %s' % (raster.source(), result)))
+    check_cancelled(feedback)
 
     output_field = exposure_count_field['field_name'] % exposure
     if raster.crs().authid() != vector.crs().authid():
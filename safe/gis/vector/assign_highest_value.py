@@ -16,6 +16,7 @@ from safe.definitions.hazard_classifications import (
     hazard_classification, not_exposed_class)
 from safe.definitions.layer_purposes import layer_purpose_exposure_summary
 from safe.definitions.processing_steps import assign_highest_value_steps
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.gis.vector.tools import create_spatial_index
 from safe.utilities.profiling import profile
@@ -30,7 +31,7 @@ LOGGER = logging.getLogger('InaSAFE')
 
 
 @profile
-def assign_highest_value(exposure, hazard):
+def assign_highest_value(exposure, hazard, feedback=None):
     """Assign the highest hazard value to an indivisible feature.
 
     For indivisible polygon exposure layers such as buildings, we need to
@@ -49,6 +50,10 @@ def assign_highest_value(exposure, hazard):
     :param hazard: The vector layer to use for hazard.
     :type hazard: QgsVectorLayer
 
+    :param feedback: The feedback of the analysis, checked for each hazard
+        area.
+    :type feedback: AnalysisFeedback
+
     :return: The new impact layer.
     :rtype: QgsVectorLayer
 
@@ -78,9 +83,6 @@ def assign_highest_value(exposure, hazard):
     for f in exposure.getFeatures():
         exposure_features[f.id()] = f
 
-    # Todo callback
-    # total = 100.0 / len(selectionA)
-
     hazard_field = hazard_inasafe_fields[hazard_class_field['key']]
 
     layer_classification = None
@@ -99,6 +101,7 @@ def assign_highest_value(exposure, hazard):
         hazard_request = QgsFeatureRequest().setFilterExpression(expression)
         update_map = {}
         for area in hazard.getFeatures(hazard_request):
+            check_cancelled(feedback)
             geometry = area.geometry().constGet()
             intersects = spatial_index.intersects(geometry.boundingBox())
 
@@ -1,17 +1,32 @@
 # coding=utf-8
 
-"""Try to make a layer valid."""
+"""Try to make a layer valid.
+
+The geometries are checked without their attributes and the repaired
+geometries are written back in bulk. The validity of the geometries of a file
+based layer is cached by feature id, as long as the file is not modified.
+"""
+
+import glob
+import os
+
+from qgis.core import QgsFeatureRequest
 
 from safe.common.custom_logging import LOGGER
 from safe.definitions.processing_steps import clean_geometry_steps
 from safe.gis.sanity_check import check_layer
-from safe.utilities.profiling import profile
+from safe.utilities.profiling import profile, profile_count
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
 __license__ = "GPL version 3"
 __email__ = "info@inasafe.org"
 __revision__ = '$Format:%H$'
 
+# Cache of the geometry checks, by layer source and modification time of
+# its files, then by feature id. The value is True for a valid geometry, the
+# repaired geometry or None if the geometry can not be repaired.
+_validity_cache = {}
+
 
 @profile
 def clean_layer(layer):
@@ -26,37 +41,125 @@ def clean_layer(layer):
     output_layer_name = clean_geometry_steps['output_layer_name']
     output_layer_name = output_layer_name % layer.keywords['layer_purpose']
 
-    # start editing
-    layer.startEditing()
-    count = 0
+    repaired, dropped = check_geometries(layer)
 
-    # iterate through all features
-    for feature in layer.getFeatures():
-        geom = feature.geometry()
-        geometry_cleaned = geometry_checker(geom)
-        if geometry_cleaned:
-            feature.setGeometry(geometry_cleaned)
-        else:
-            count += 1
-            layer.deleteFeature(feature.id())
+    provider = layer.dataProvider()
+    if repaired:
+        provider.changeGeometryValues(repaired)
+    if dropped:
+        provider.deleteFeatures(dropped)
 
-    if count:
+    if dropped:
         LOGGER.critical(
             '%s features have been removed from %s because of invalid '
-            'geometries.' % (count, layer.name()))
+            'geometries.' % (len(dropped), layer.name()))
     else:
         LOGGER.info(
             'No feature has been removed from the layer: %s' % layer.name())
 
-    # save changes
-    layer.commitChanges()
-
     layer.keywords['title'] = output_layer_name
 
     check_layer(layer)
     return layer
 
 
+def check_geometries(layer, request=None, cache=False):
+    """Check and repair the geometries of a layer.
+
+    The counts of repaired and dropped features are added to the profiling
+    log.
+
+    .. versionadded:: 5.0
+
+    :param layer: The vector layer.
+    :type layer: QgsVectorLayer
+
+    :param request: Optional request to check only some features.
+    :type request: QgsFeatureRequest
+
+    :param cache: If the result should be cached, for a file based layer.
+        Default to False.
+    :type cache: bool
+
+    :return: A tuple with the dictionary of repaired geometries by feature id
+        and the list of feature ids with a geometry which can not be repaired.
+        Features without geometry are dropped as well.
+    :rtype: tuple
+    """
+    results = {}
+    if cache:
+        key = _cache_key(layer)
+        if key:
+            results = _validity_cache.get(key)
+            if results is None:
+                # The file has been modified, the previous checks are stale.
+                for old_key in list(_validity_cache.keys()):
+                    if old_key[0] == key[0]:
+                        del _validity_cache[old_key]
+                results = _validity_cache.setdefault(key, {})
+
+    if request is None:
+        request = QgsFeatureRequest()
+    else:
+        request = QgsFeatureRequest(request)
+    request.setSubsetOfAttributes([])
+
+    repaired = {}
+    dropped = []
+    checked = 0
+    for feature in layer.getFeatures(request):
+        if feature.id() in results:
+            result = results[feature.id()]
+        else:
+            checked += 1
+            result = None
+            if feature.hasGeometry():
+                geometry = feature.geometry()
+                result = geometry_checker(geometry)
+                if result is geometry:
+                    result = True
+            results[feature.id()] = result
+
+        if result is None:
+            dropped.append(feature.id())
+        elif result is not True:
+            repaired[feature.id()] = result
+
+    profile_count('checked', checked)
+    profile_count('repaired', len(repaired))
+    profile_count('dropped', len(dropped))
+    return repaired, dropped
+
+
+def _cache_key(layer):
+    """The key of a layer in the validity cache.
+
+    :param layer: The vector layer.
+    :type layer: QgsVectorLayer
+
+    :return: A tuple with the layer source and the modification time of its
+        files, including the sidecar files, or None if the layer is not file
+        based or has unsaved edits.
+    :rtype: tuple
+    """
+    if layer.providerType() != 'ogr':
+        return None
+    if layer.isModified():
+        # The features of the edit buffer are not in the files.
+        return None
+    path = layer.source().split('|')[0]
+    if not os.path.isfile(path):
+        return None
+    files = sorted(glob.glob(
+        glob.escape(os.path.splitext(path)[0]) + '.*'))
+    if path not in files:
+        files.append(path)
+    modified = tuple(
+        (name, os.path.getmtime(name)) for name in files
+        if os.path.isfile(name))
+    return layer.source(), modified
+
+
 def geometry_checker(geometry):
     """Perform a cleaning if the geometry is not valid.
 
@@ -9,6 +9,7 @@ from safe.definitions.processing_steps import clip_steps
 from safe.gis.sanity_check import check_layer
 from safe.utilities.profiling import profile
 from safe.gis.processing_tools import (
+    check_cancelled,
     create_processing_context,
     create_processing_feedback,
     initialize_processing)
@@ -20,7 +21,7 @@ __revision__ = '$Format:%H$'
 
 
 @profile
-def clip(layer_to_clip, mask_layer):
+def clip(layer_to_clip, mask_layer, feedback=None):
     """Clip a vector layer with another.
 
     Issue https://github.com/inasafe/inasafe/issues/3186
@@ -31,6 +32,10 @@ def clip(layer_to_clip, mask_layer):
     :param mask_layer: The vector layer to use for clipping.
     :type mask_layer: QgsVectorLayer
 
+    :param feedback: The feedback of the analysis, to stop the clip if the
+        analysis is cancelled.
+    :type feedback: AnalysisFeedback
+
     :return: The clip vector layer.
     :rtype: QgsVectorLayer
 
@@ -44,13 +49,14 @@ def clip(layer_to_clip, mask_layer):
                   'OVERLAY': mask_layer,
                   'OUTPUT': 'memory:'}
 
-    # TODO implement callback through QgsProcessingFeedback object
-
     initialize_processing()
 
-    feedback = create_processing_feedback()
+    feedback = create_processing_feedback(feedback)
     context = create_processing_context(feedback=feedback)
-    result = processing.run('native:clip', parameters, context=context)
+    result = processing.run(
+        'native:clip', parameters, feedback=feedback, context=context)
+    # The algorithm stops without error if it is cancelled.
+    check_cancelled(feedback)
     if result is None:
         raise ProcessingInstallationError
 
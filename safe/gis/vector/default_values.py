@@ -4,12 +4,15 @@
 
 import logging
 
+from qgis.core import QgsFeatureRequest
+
 from safe.common.exceptions import (
     InvalidKeywordsForProcessingAlgorithm)
 from safe.definitions.processing_steps import assign_default_values_steps
 from safe.definitions.utilities import definition
 from safe.gis.sanity_check import check_layer
-from safe.gis.vector.tools import create_field_from_definition
+from safe.gis.vector.tools import (
+    create_field_from_definition, AttributeWriter)
 from safe.utilities.profiling import profile
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
@@ -58,11 +61,14 @@ def add_default_values(layer):
             'ratios for this layer.')
         return layer
 
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+
+    writer = AttributeWriter(layer)
     for default in list(defaults.keys()):
 
         field = fields.get(default)
         target_field = definition(default)
-        layer.startEditing()
 
         if not field:
             # Case 3
@@ -76,12 +82,10 @@ def add_default_values(layer):
 
             new_field = create_field_from_definition(target_field)
 
-            layer.addAttribute(new_field)
-
-            new_index = layer.fields().lookupField(new_field.name())
+            new_index = writer.addAttribute(new_field)
 
-            for feature in layer.getFeatures():
-                layer.changeAttributeValue(
+            for feature in layer.getFeatures(request):
+                writer.changeAttributeValue(
                     feature.id(), new_index, defaults[default])
 
             layer.keywords['inasafe_fields'][target_field['key']] = (
@@ -96,15 +100,15 @@ def add_default_values(layer):
 
             index = layer.fields().lookupField(field)
 
-            for feature in layer.getFeatures():
+            for feature in layer.getFeatures(request):
                 attr_val = feature.attributes()[index]
                 if (attr_val is None or attr_val == '' or (
                         hasattr(attr_val, 'isNull') and attr_val.isNull())):
-                    layer.changeAttributeValue(
+                    writer.changeAttributeValue(
                         feature.id(), index, defaults[default])
 
-        layer.commitChanges()
-        layer.keywords['title'] = output_layer_name
+    writer.commitChanges()
+    layer.keywords['title'] = output_layer_name
 
     check_layer(layer)
     return layer
@@ -4,6 +4,8 @@
 
 import logging
 
+from qgis.core import QgsFeatureRequest
+
 from safe.definitions import count_ratio_mapping
 from safe.definitions.fields import population_count_field
 from safe.definitions.layer_purposes import layer_purpose_exposure
@@ -11,7 +13,8 @@ from safe.definitions.processing_steps import (
     recompute_counts_steps)
 from safe.definitions.utilities import definition, get_non_compulsory_fields
 from safe.gis.sanity_check import check_layer
-from safe.gis.vector.tools import create_field_from_definition
+from safe.gis.vector.tools import (
+    create_field_from_definition, AttributeWriter)
 from safe.utilities.profiling import profile
 
 LOGGER = logging.getLogger('InaSAFE')
@@ -53,7 +56,7 @@ def from_counts_to_ratios(layer):
                 population_count_field=population_count_field['key']))
         return layer
 
-    layer.startEditing()
+    writer = AttributeWriter(layer)
 
     mapping = {}
     non_compulsory_fields = get_non_compulsory_fields(
@@ -64,11 +67,9 @@ def from_counts_to_ratios(layer):
             ratio_field = definition(count_ratio_mapping[count_field['key']])
 
             field = create_field_from_definition(ratio_field)
-            layer.addAttribute(field)
             name = ratio_field['field_name']
             layer.keywords['inasafe_fields'][ratio_field['key']] = name
-            mapping[count_field['field_name']
-                    ] = layer.fields().lookupField(name)
+            mapping[count_field['field_name']] = writer.addAttribute(field)
             LOGGER.info(
                 'Count field {count_field} detected in the exposure, we are '
                 'going to create a equivalent field {ratio_field} in the '
@@ -83,10 +84,11 @@ def from_counts_to_ratios(layer):
 
     if len(mapping) == 0:
         # There is not a subset count field. Let's skip this layer.
-        layer.commitChanges()
         return layer
 
-    for feature in layer.getFeatures():
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    for feature in layer.getFeatures(request):
         total_count = feature[inasafe_fields[population_count_field['key']]]
 
         for count_field, index in list(mapping.items()):
@@ -98,8 +100,8 @@ def from_counts_to_ratios(layer):
                 new_value = ''
             except ZeroDivisionError:
                 new_value = 0
-            layer.changeAttributeValue(feature.id(), index, new_value)
+            writer.changeAttributeValue(feature.id(), index, new_value)
 
-    layer.commitChanges()
+    writer.commitChanges()
     check_layer(layer)
     return layer
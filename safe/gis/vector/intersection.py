@@ -1,20 +1,38 @@
 # coding=utf-8
 
-"""Intersect two layers."""
+"""Intersect the exposure with the aggregate hazard.
+
+The aggregate hazard features are indexed with a spatial index, bulk loaded
+as a STR-tree, so each exposure feature is only tested against the aggregate
+hazard polygons with an intersecting bounding box. A prepared geometry is
+built once for each of these polygons. Exposure features wholly inside a
+polygon are copied without computing the intersection.
+
+Only the InaSAFE fields of both layers are copied to the output.
+"""
 
 import logging
 
-import processing
+from qgis.core import (
+    QgsFeature,
+    QgsFields,
+    QgsGeometry,
+)
 
-from safe.common.exceptions import ProcessingInstallationError
+from safe.definitions.analysis_steps import analysis_steps
+from safe.definitions.fields import size_field
 from safe.definitions.layer_purposes import layer_purpose_exposure_summary
 from safe.definitions.processing_steps import intersection_steps
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
+from safe.gis.vector.tools import (
+    SizeCalculator,
+    combine_fields,
+    create_memory_layer,
+    create_spatial_index,
+    geometry_part,
+)
 from safe.utilities.profiling import profile
-from safe.gis.processing_tools import (
-    create_processing_context,
-    create_processing_feedback,
-    initialize_processing)
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
 __license__ = "GPL version 3"
@@ -23,9 +41,15 @@ __revision__ = '$Format:%H$'
 
 LOGGER = logging.getLogger('InaSAFE')
 
+BATCH_SIZE = 10000
+
+# Number of source features between two calls of the progress callback and
+# two checks of the feedback.
+PROGRESS_INTERVAL = 1000
+
 
 @profile
-def intersection(source, mask):
+def intersection(source, mask, callback=None, sizes=None, feedback=None):
     """Intersect two layers.
 
     Issue https://github.com/inasafe/inasafe/issues/3186
@@ -36,6 +60,19 @@ def intersection(source, mask):
     :param mask: The vector layer to use for clipping.
     :type mask: QgsVectorLayer
 
+    :param callback: Progress callback with the same signature as
+        ImpactFunction.callback: callback(current, maximum, message).
+    :type callback: function
+
+    :param sizes: Optional dictionary filled with the new size of each output
+        feature, by feature id, if the source has a size field. It can be
+        given to recompute_counts.
+    :type sizes: dict
+
+    :param feedback: The feedback of the analysis, checked every
+        PROGRESS_INTERVAL features.
+    :type feedback: AnalysisFeedback
+
     :return: The clip vector layer.
     :rtype: QgsVectorLayer
 
@@ -45,22 +82,96 @@ def intersection(source, mask):
     output_layer_name = output_layer_name % (
         source.keywords['layer_purpose'])
 
-    parameters = {'INPUT': source,
-                  'OVERLAY': mask,
-                  'OUTPUT': 'memory:'}
-
-    # TODO implement callback through QgsProcessingFeedback object
+    source_indexes = _inasafe_field_indexes(source)
+    mask_indexes = _inasafe_field_indexes(mask)
+    source_fields = QgsFields()
+    for index in source_indexes:
+        source_fields.append(source.fields().at(index))
+    mask_fields = QgsFields()
+    for index in mask_indexes:
+        mask_fields.append(mask.fields().at(index))
+    fields = combine_fields(source_fields, mask_fields)
+
+    geometry_type = source.geometryType()
+    intersect = create_memory_layer(
+        output_layer_name, geometry_type, source.crs(), fields)
+    provider = intersect.dataProvider()
+
+    masks = {}
+    for feature in mask.getFeatures():
+        if feature.hasGeometry():
+            attributes = feature.attributes()
+            masks[feature.id()] = (
+                feature.geometry(),
+                [attributes[index] for index in mask_indexes])
+    spatial_index = create_spatial_index(mask)
+    engines = {}
+
+    size_calculator = None
+    if sizes is not None and size_field['key'] in (
+            source.keywords['inasafe_fields']):
+        size_calculator = SizeCalculator(
+            source.crs(), geometry_type, source.keywords['exposure'])
+
+    features = []
+
+    def write_features():
+        """Write the features of the batch and keep their new size."""
+        result, added = provider.addFeatures(features)
+        if size_calculator:
+            new_sizes = size_calculator.measure_many(
+                [feature.geometry() for feature in added])
+            for feature, new_size in zip(added, new_sizes):
+                sizes[feature.id()] = new_size
+        del features[:]
+
+    total = source.featureCount()
+    for i, source_feature in enumerate(source.getFeatures()):
+        if i % PROGRESS_INTERVAL == 0:
+            check_cancelled(feedback)
+            if callback:
+                callback(
+                    i, total, analysis_steps['combine_hazard_exposure'])
+
+        geometry = source_feature.geometry()
+        if geometry.isNull():
+            continue
+        attributes = source_feature.attributes()
+        attributes = [attributes[index] for index in source_indexes]
+
+        for mask_id in spatial_index.intersects(geometry.boundingBox()):
+            mask_geometry, mask_attributes = masks[mask_id]
+            engine = engines.get(mask_id)
+            if engine is None:
+                # noinspection PyArgumentList
+                engine = QgsGeometry.createGeometryEngine(
+                    mask_geometry.constGet())
+                engine.prepareGeometry()
+                engines[mask_id] = engine
+
+            if not engine.intersects(geometry.constGet()):
+                continue
+            if engine.contains(geometry.constGet()):
+                piece = QgsGeometry(geometry)
+            else:
+                piece = geometry_part(
+                    geometry.intersection(mask_geometry), geometry_type)
+                if not piece:
+                    continue
+
+            piece.convertToMultiType()
+            feature = QgsFeature()
+            feature.setGeometry(piece)
+            feature.setAttributes(attributes + mask_attributes)
+            features.append(feature)
+            if len(features) == BATCH_SIZE:
+                write_features()
+
+    write_features()
+    intersect.updateExtents()
+    if callback:
+        callback(total, total, analysis_steps['combine_hazard_exposure'])
 
-    initialize_processing()
-
-    feedback = create_processing_feedback()
-    context = create_processing_context(feedback=feedback)
-    result = processing.run('native:intersection', parameters, context=context)
-    if result is None:
-        raise ProcessingInstallationError
-
-    intersect = result['OUTPUT']
-    intersect.setName(output_layer_name)
     intersect.keywords = dict(source.keywords)
     intersect.keywords['title'] = output_layer_name
     intersect.keywords['layer_purpose'] = \
@@ -77,3 +188,23 @@ def intersection(source, mask):
 
     check_layer(intersect)
     return intersect
+
+
+def _inasafe_field_indexes(layer):
+    """Indexes of the fields of a layer used in its inasafe_fields keyword.
+
+    :param layer: The vector layer with its keywords.
+    :type layer: QgsVectorLayer
+
+    :return: The sorted list of field indexes.
+    :rtype: list
+    """
+    names = []
+    for value in list(layer.keywords['inasafe_fields'].values()):
+        if isinstance(value, list):
+            names.extend(value)
+        else:
+            names.append(value)
+    indexes = set(layer.fields().lookupField(name) for name in names)
+    indexes.discard(-1)
+    return sorted(indexes)
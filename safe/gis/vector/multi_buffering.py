@@ -18,7 +18,9 @@ from safe.definitions.processing_steps import buffer_steps
 from safe.gis.sanity_check import check_layer
 from safe.gis.vector.tools import (
     create_memory_layer,
-    create_field_from_definition)
+    create_field_from_definition,
+    geometry_part)
+from safe.utilities.metadata import copy_layer_keywords
 from safe.utilities.profiling import profile
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
@@ -27,8 +29,12 @@ __email__ = "info@inasafe.org"
 __revision__ = '$Format:%H$'
 
 
+# Number of segments used to approximate a quarter of circle.
+SEGMENTS = 30
+
+
 @profile
-def multi_buffering(layer, radii, callback=None):
+def multi_buffering(layer, radii, callback=None, keep_sources=False):
     """Buffer a vector layer using many buffers (for volcanoes or rivers).
 
     This processing algorithm will keep the original attribute table and
@@ -40,6 +46,13 @@ def multi_buffering(layer, radii, callback=None):
     radii[1000] = 'medium'
     radii[2000] = 'low'
 
+    Each source is buffered once per radius, in a projected CRS chosen once
+    for the whole layer. The buffers of the same radius are dissolved and the
+    rings are the differences between consecutive buffers, so the rings do
+    not overlap. The attributes of the sources are then empty and their
+    inasafe_fields keywords are removed. If keep_sources is True, the rings
+    are computed for each source and keep its attributes.
+
     Issue https://github.com/inasafe/inasafe/issues/3185
 
     :param layer: The layer to polygonize.
@@ -53,6 +66,10 @@ def multi_buffering(layer, radii, callback=None):
         Defaults to None.
     :type callback: function
 
+    :param keep_sources: If the rings are kept for each source feature
+        instead of being dissolved. Defaults to False.
+    :type keep_sources: bool
+
     :return: The buffered vector layer.
     :rtype: QgsVectorLayer
     """
@@ -64,6 +81,7 @@ def multi_buffering(layer, radii, callback=None):
     feature_count = layer.featureCount()
 
     fields = layer.fields()
+    empty_attributes = [None] * fields.count()
     # Set the new hazard class field.
     new_field = create_field_from_definition(hazard_class_field)
     fields.append(new_field)
@@ -73,64 +91,99 @@ def multi_buffering(layer, radii, callback=None):
 
     buffered = create_memory_layer(
         output_layer_name, QgsWkbTypes.PolygonGeometry, input_crs, fields)
-    buffered.startEditing()
+    provider = buffered.dataProvider()
 
-    # Reproject features if needed into UTM if the layer is in 4326.
-    if layer.crs().authid() == 'EPSG:4326':
+    # Reproject features into UTM if the layer is not projected.
+    if input_crs.isGeographic():
         center = layer.extent().center()
         utm = QgsCoordinateReferenceSystem(
             get_utm_epsg(center.x(), center.y(), input_crs))
         transform = QgsCoordinateTransform(
-            layer.crs(), utm, QgsProject.instance())
+            input_crs, utm, QgsProject.instance())
         reverse_transform = QgsCoordinateTransform(
-            utm, layer.crs(), QgsProject.instance())
+            utm, input_crs, QgsProject.instance())
     else:
         transform = None
         reverse_transform = None
 
-    for i, feature in enumerate(layer.getFeatures()):
-        geom = QgsGeometry(feature.geometry())
-
-        if transform:
-            geom.transform(transform)
-
-        inner_ring = None
-
-        for radius in radii:
-            attributes = feature.attributes()
-
-            # We add the hazard value name to the attribute table.
-            attributes.append(radii[radius])
-            # We add the value of buffer distance to the attribute table.
-            attributes.append(radius)
-
-            circle = geom.buffer(radius, 30)
-
-            if inner_ring:
-                circle.addRing(inner_ring)
+    distances = sorted(radii)
+    features = []
 
-            inner_ring = circle.asPolygon()[0]
-
-            new_feature = QgsFeature()
+    def add_rings(buffers, attributes):
+        """Add the rings between consecutive buffers to the output."""
+        for radius, ring in zip(distances, rings(buffers)):
+            if not ring:
+                continue
             if reverse_transform:
-                circle.transform(reverse_transform)
-
-            new_feature.setGeometry(circle)
-            new_feature.setAttributes(attributes)
-
-            buffered.addFeature(new_feature)
+                ring.transform(reverse_transform)
+            ring.convertToMultiType()
+            feature = QgsFeature()
+            feature.setGeometry(ring)
+            # We add the hazard value name and the buffer distance to the
+            # attribute table.
+            feature.setAttributes(attributes + [radii[radius], radius])
+            features.append(feature)
+
+    dissolved = [[] for _ in distances]
+    for i, feature in enumerate(layer.getFeatures()):
+        if feature.hasGeometry():
+            geom = QgsGeometry(feature.geometry())
+            if transform:
+                geom.transform(transform)
+
+            buffers = [geom.buffer(radius, SEGMENTS) for radius in distances]
+            if keep_sources:
+                add_rings(buffers, feature.attributes())
+            else:
+                for radius_buffers, circle in zip(dissolved, buffers):
+                    radius_buffers.append(circle)
 
         if callback:
             callback(current=i, maximum=feature_count, step=processing_step)
 
-    buffered.commitChanges()
+    if not keep_sources and feature_count:
+        buffers = [
+            QgsGeometry.unaryUnion(radius_buffers)
+            for radius_buffers in dissolved]
+        add_rings(buffers, empty_attributes)
+
+    provider.addFeatures(features)
+    buffered.updateExtents()
 
     # We transfer keywords to the output.
-    buffered.keywords = layer.keywords
+    buffered.keywords = copy_layer_keywords(layer.keywords)
     buffered.keywords['layer_geometry'] = 'polygon'
     buffered.keywords['layer_purpose'] = layer_purpose_hazard['key']
+    if not keep_sources:
+        # The fields of the sources are empty once dissolved.
+        buffered.keywords['inasafe_fields'] = {}
     buffered.keywords['inasafe_fields'][hazard_class_field['key']] = (
         hazard_class_field['field_name'])
 
     check_layer(buffered)
     return buffered
+
+
+def rings(buffers):
+    """Compute the rings between buffers of increasing radius.
+
+    :param buffers: The buffers, sorted by radius.
+    :type buffers: list(QgsGeometry)
+
+    :return: The first buffer then the differences between consecutive
+        buffers, None if a ring is empty.
+    :rtype: list(QgsGeometry)
+    """
+    results = []
+    inner = None
+    for circle in buffers:
+        if circle.isEmpty():
+            results.append(None)
+            continue
+        if inner is None:
+            results.append(QgsGeometry(circle))
+        else:
+            results.append(geometry_part(
+                circle.difference(inner), QgsWkbTypes.PolygonGeometry))
+        inner = circle
+    return results
@@ -0,0 +1,547 @@
+# coding=utf-8
+
+"""Prepare a vector exposure layer in a single pass.
+
+The step by step preparation of the exposure is:
+smart_clip, prepare_vector_layer, reproject, from_counts_to_ratios, clip,
+add_default_values and update_value_map. Each of these steps creates a new
+memory layer or iterates over the whole previous one.
+
+This module produces the same layer and the same keywords. The source layer
+is read once, with the extent of the analysis, and every feature goes through
+a list of transforms before being written to a single output layer.
+"""
+
+import logging
+
+from qgis.core import (
+    QgsCoordinateTransform,
+    QgsExpression,
+    QgsExpressionContext,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsField,
+    QgsFields,
+    QgsGeometry,
+    QgsProject,
+    QgsWkbTypes,
+)
+
+from safe.common.exceptions import InvalidKeywordsForProcessingAlgorithm
+from safe.definitions import count_ratio_mapping
+from safe.definitions.exposure import indivisible_exposure
+from safe.definitions.exposure_classifications import data_driven_classes
+from safe.definitions.fields import (
+    displaced_field,
+    exposure_class_field,
+    exposure_id_field,
+    exposure_type_field,
+    population_count_field,
+    size_field,
+)
+from safe.definitions.layer_purposes import layer_purpose_exposure
+from safe.definitions.processing_steps import (
+    assign_default_values_steps,
+    assign_inasafe_values_steps,
+    clip_steps,
+    recompute_counts_steps,
+)
+from safe.definitions.utilities import (
+    definition,
+    get_compulsory_fields,
+    get_fields,
+    get_non_compulsory_fields,
+)
+from safe.gis.sanity_check import check_layer
+from safe.gis.vector.prepare_vector_layer import _size_is_needed
+from safe.gis.vector.tools import (
+    PreparedMask,
+    SizeCalculator,
+    create_field_from_definition,
+    create_memory_layer,
+)
+from safe.processors.post_processor_functions import size
+from safe.utilities.i18n import tr
+from safe.utilities.metadata import copy_layer_keywords
+from safe.utilities.profiling import profile
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+LOGGER = logging.getLogger('InaSAFE')
+
+# Number of features sent to the data provider at once.
+BATCH_SIZE = 10000
+
+
+def _is_null(value):
+    """Check if an attribute value is NULL.
+
+    :param value: The attribute value.
+
+    :return: True if the value is None or a NULL QVariant.
+    :rtype: bool
+    """
+    return value is None or (hasattr(value, 'isNull') and value.isNull())
+
+
+class _Schema():
+
+    """The fields of the output layer, built while reading the keywords."""
+
+    def __init__(self, fields):
+        """Constructor.
+
+        :param fields: The fields of the source layer.
+        :type fields: QgsFields
+        """
+        self.fields = [QgsField(field) for field in fields]
+
+    def names(self):
+        """Names of the fields.
+
+        :rtype: list
+        """
+        return [field.name() for field in self.fields]
+
+    def field(self, name):
+        """Get a field by its name, None if it does not exist.
+
+        :rtype: QgsField
+        """
+        for field in self.fields:
+            if field.name() == name:
+                return field
+        return None
+
+    def add(self, field):
+        """Add a field if it does not exist yet.
+
+        :param field: The new field.
+        :type field: QgsField
+        """
+        if field.name() not in self.names():
+            self.fields.append(field)
+
+    def remove(self, names):
+        """Remove fields.
+
+        :param names: The names of the fields to remove.
+        :type names: list
+        """
+        self.fields = [f for f in self.fields if f.name() not in names]
+
+    def qgs_fields(self):
+        """The fields as a QgsFields.
+
+        :rtype: QgsFields
+        """
+        fields = QgsFields()
+        for field in self.fields:
+            fields.append(field)
+        return fields
+
+
+@profile
+def prepare_exposure_layer(layer, analysis, output_crs, owner=None):
+    """Prepare a vector exposure layer in a single pass.
+
+    The output is the same as running smart_clip, prepare_vector_layer,
+    reproject, from_counts_to_ratios, clip, add_default_values and
+    update_value_map one after the other.
+
+    :param layer: The vector exposure layer with its keywords.
+    :type layer: QgsVectorLayer
+
+    :param analysis: The analysis layer, in the output CRS. Only its first
+        feature is used, like in smart_clip.
+    :type analysis: QgsVectorLayer
+
+    :param output_crs: The CRS of the analysis.
+    :type output_crs: QgsCoordinateReferenceSystem
+
+    :param owner: Optional function taking a geometry in the output CRS and
+        returning False if the feature belongs to another partition of a
+        partitioned analysis. Default to None, all features are kept.
+    :type owner: function
+
+    :return: The prepared exposure layer.
+    :rtype: QgsVectorLayer
+
+    .. versionadded:: 5.0
+    """
+    keywords = copy_layer_keywords(layer.keywords)
+    if not keywords.get('inasafe_fields'):
+        msg = 'inasafe_fields is missing in keywords from %s' % layer.name()
+        raise InvalidKeywordsForProcessingAlgorithm(msg)
+
+    purpose = keywords['layer_purpose']
+    exposure = keywords['exposure']
+    inasafe_fields = keywords['inasafe_fields']
+    geometry_type = layer.geometryType()
+    schema = _Schema(layer.fields())
+
+    # Each transform takes the dictionary of values and the geometry of a
+    # feature and returns the new geometry, None to drop the feature.
+    transforms = []
+
+    # Analysis geometry in both CRS.
+    request = QgsFeatureRequest().setSubsetOfAttributes([])
+    analysis_geometry = QgsGeometry(
+        next(analysis.getFeatures(request)).geometry())
+    mask = QgsGeometry(analysis_geometry)
+    same_projection = layer.crs().authid() == output_crs.authid()
+    if not same_projection:
+        mask.transform(QgsCoordinateTransform(
+            output_crs, layer.crs(), QgsProject.instance()))
+
+    # Smart clip, with the prepared parts of the analysis.
+    prepared_mask = PreparedMask([mask])
+
+    def smart_clip(values, geometry):
+        """Keep only features intersecting the analysis."""
+        if geometry.isNull():
+            return None
+        if prepared_mask.intersects(geometry):
+            return geometry
+        return None
+
+    transforms.append(smart_clip)
+
+    # Null values in the compulsory field, from _remove_features.
+    compulsory_field = get_compulsory_fields(purpose, exposure)
+    compulsory_names = inasafe_fields.get(compulsory_field['key'])
+    if not isinstance(compulsory_names, list):
+        compulsory_names = [compulsory_names]
+    for name in compulsory_names:
+        if not name:
+            message = 'Keyword %s is missing from %s' % (
+                compulsory_field['key'], purpose)
+            raise InvalidKeywordsForProcessingAlgorithm(message)
+
+    def remove_features(values, geometry):
+        """Replace null values and remove empty geometries."""
+        for name in compulsory_names:
+            if _is_null(values.get(name)):
+                values[name] = ''
+        if not geometry or geometry.isEmpty():
+            return None
+        return geometry
+
+    transforms.append(remove_features)
+
+    # ID column, from _add_id_column.
+    if not inasafe_fields.get(exposure_id_field['key']):
+        schema.add(create_field_from_definition(exposure_id_field))
+        inasafe_fields[exposure_id_field['key']] = (
+            exposure_id_field['field_name'])
+        id_name = exposure_id_field['field_name']
+        counter = [0]
+
+        def add_id(values, geometry):
+            """Number the features."""
+            counter[0] += 1
+            values[id_name] = counter[0]
+            return geometry
+
+        transforms.append(add_id)
+
+    # Standard field names, from clean_inasafe_fields.
+    expected = get_fields(purpose, exposure)
+    if inasafe_fields.get(displaced_field['key']):
+        expected.append(displaced_field)
+    expected_fields = {field['key']: field['field_name'] for field in expected}
+
+    copies = []
+    sums = []
+    new_keywords = {}
+    source_fields = layer.fields()
+    for key, value in list(inasafe_fields.items()):
+        if key not in expected_fields:
+            continue
+        target = expected_fields[key]
+        names = value if isinstance(value, list) else [value]
+        new_keywords[key] = target
+        if len(names) == 1:
+            source = schema.field(names[0])
+            if names[0] != target and source:
+                new_field = QgsField(source)
+                new_field.setName(target)
+                schema.add(new_field)
+                copies.append((names[0], target))
+        else:
+            expression = QgsExpression(
+                ' + '.join(['"%s"' % name for name in names]))
+            context = QgsExpressionContext()
+            context.setFields(source_fields)
+            expression.prepare(context)
+            if not schema.field(target):
+                schema.add(create_field_from_definition(definition(key)))
+            sums.append((expression, context, target))
+
+    inasafe_fields.update(new_keywords)
+    kept = list(inasafe_fields.values())
+    schema.remove([n for n in schema.names() if n not in kept])
+
+    if copies or sums:
+        def rename_fields(values, geometry):
+            """Copy or sum the fields to their standard names."""
+            for source, target in copies:
+                values[target] = values.get(source)
+            if sums:
+                feature = QgsFeature(source_fields)
+                feature.setAttributes(
+                    [values.get(f.name()) for f in source_fields])
+                for expression, context, target in sums:
+                    context.setFeature(feature)
+                    values[target] = expression.evaluate(context)
+            return geometry
+
+        transforms.append(rename_fields)
+
+    # Size of the original feature, from the size post processor.
+    if _size_is_needed(layer):
+        size_name = size_field['field_name']
+        inasafe_fields[size_field['key']] = size_name
+        if not schema.field(size_name):
+            schema.add(create_field_from_definition(size_field))
+            size_calculator = SizeCalculator(
+                layer.crs(), geometry_type, exposure)
+
+            def compute_size(values, geometry):
+                """Compute the size before clipping the feature."""
+                values[size_name] = size(
+                    size_calculator=size_calculator, geometry=geometry)
+                return geometry
+
+            transforms.append(compute_size)
+
+    # Default exposure class, from _add_default_exposure_class.
+    if purpose == layer_purpose_exposure['key'] and (
+            exposure_type_field['key'] not in inasafe_fields):
+        default_class_name = exposure_class_field['field_name']
+        inasafe_fields[exposure_class_field['key']] = default_class_name
+        schema.add(create_field_from_definition(exposure_class_field))
+
+        def add_class(values, geometry):
+            """Use the exposure as the class."""
+            values[default_class_name] = exposure
+            return geometry
+
+        transforms.append(add_class)
+
+    # Values of the exposure type, from _check_value_mapping.
+    type_name = exposure_type_field['field_name']
+    unique_types = set()
+    if schema.field(type_name):
+        def collect_types(values, geometry):
+            """Collect the exposure types to update the value map."""
+            unique_types.add(values.get(type_name))
+            return geometry
+
+        transforms.append(collect_types)
+
+    # Reprojection.
+    if not same_projection:
+        transform = QgsCoordinateTransform(
+            layer.crs(), output_crs, QgsProject.instance())
+
+        def reproject(values, geometry):
+            """Reproject the geometry to the analysis CRS."""
+            geometry.transform(transform)
+            return geometry
+
+        transforms.append(reproject)
+
+    # Ownership, for a partitioned analysis.
+    if owner is not None:
+        def keep_owned(values, geometry):
+            """Drop the features belonging to another partition."""
+            if owner(geometry):
+                return geometry
+            return None
+
+        transforms.append(keep_owned)
+
+    # Ratios, from from_counts_to_ratios.
+    title = recompute_counts_steps['output_layer_name']
+    if population_count_field['key'] in inasafe_fields:
+        ratios = []
+        for count_field in get_non_compulsory_fields(purpose, exposure):
+            if count_field['key'] in count_ratio_mapping and (
+                    count_field['key'] in inasafe_fields):
+                ratio_field = definition(
+                    count_ratio_mapping[count_field['key']])
+                schema.add(create_field_from_definition(ratio_field))
+                inasafe_fields[ratio_field['key']] = ratio_field['field_name']
+                ratios.append(
+                    (count_field['field_name'], ratio_field['field_name']))
+
+        if ratios:
+            total_name = inasafe_fields[population_count_field['key']]
+
+            def compute_ratios(values, geometry):
+                """Compute the ratios from the counts."""
+                total_count = values.get(total_name)
+                for count_name, ratio_name in ratios:
+                    try:
+                        values[ratio_name] = (
+                            values.get(count_name) / float(total_count))
+                    except TypeError:
+                        values[ratio_name] = ''
+                    except ZeroDivisionError:
+                        values[ratio_name] = 0
+                return geometry
+
+            transforms.append(compute_ratios)
+
+    # Clip, only for divisible exposures which are not points.
+    indivisible_keys = [f['key'] for f in indivisible_exposure]
+    if exposure not in indivisible_keys and (
+            geometry_type != QgsWkbTypes.PointGeometry):
+        title = clip_steps['output_layer_name'] % purpose
+        # noinspection PyArgumentList
+        clip_engine = QgsGeometry.createGeometryEngine(
+            analysis_geometry.constGet())
+        clip_engine.prepareGeometry()
+
+        def clip(values, geometry):
+            """Clip the geometry with the analysis."""
+            if not clip_engine.intersects(geometry.constGet()):
+                return None
+            if clip_engine.contains(geometry.constGet()):
+                return geometry
+            clipped = geometry.intersection(analysis_geometry)
+            if clipped.type() != geometry_type:
+                clipped.convertGeometryCollectionToSubclass(geometry_type)
+            if clipped.isEmpty() or clipped.type() != geometry_type:
+                return None
+            return clipped
+
+        transforms.append(clip)
+
+    # Default values, from add_default_values.
+    defaults = keywords.get('inasafe_default_values')
+    if defaults:
+        title = assign_default_values_steps['output_layer_name'] % purpose
+        constants = {}
+        replacements = {}
+        for key, default_value in list(defaults.items()):
+            name = inasafe_fields.get(key)
+            if not name:
+                target_field = definition(key)
+                schema.add(create_field_from_definition(target_field))
+                inasafe_fields[key] = target_field['field_name']
+                constants[target_field['field_name']] = default_value
+            elif schema.field(name):
+                replacements[name] = default_value
+
+        def add_defaults(values, geometry):
+            """Fill the default values."""
+            values.update(constants)
+            for name, default_value in list(replacements.items()):
+                value = values.get(name)
+                if _is_null(value) or value == '':
+                    values[name] = default_value
+            return geometry
+
+        transforms.append(add_defaults)
+
+    # Value mapping, from update_value_map.
+    value_map = keywords.get('value_map')
+    other = None
+    if value_map:
+        classification = definition(keywords['classification'])
+        if classification['key'] != data_driven_classes['key']:
+            other = classification['classes'][-1]['key']
+
+    if exposure_class_field['key'] not in inasafe_fields:
+        if not inasafe_fields.get(exposure_type_field['key']):
+            raise InvalidKeywordsForProcessingAlgorithm
+        if not value_map:
+            raise InvalidKeywordsForProcessingAlgorithm
+
+        title = assign_inasafe_values_steps['output_layer_name'] % purpose
+        reversed_value_map = {}
+        for exposure_class, group in list(value_map.items()):
+            for value in group:
+                reversed_value_map[value] = exposure_class
+
+        classified_field = QgsField()
+        classified_field.setType(exposure_class_field['type'])
+        classified_field.setName(exposure_class_field['field_name'])
+        classified_field.setLength(exposure_class_field['length'])
+        classified_field.setPrecision(exposure_class_field['precision'])
+        schema.add(classified_field)
+        class_name = exposure_class_field['field_name']
+        unclassified_name = inasafe_fields[exposure_type_field['key']]
+        schema.remove([unclassified_name])
+
+        def update_value_map(values, geometry):
+            """Map the exposure type to the exposure class.
+
+            Values not in the value map belong to the last class of the
+            classification, see _check_value_mapping.
+            """
+            values[class_name] = reversed_value_map.get(
+                values.get(unclassified_name), other) or ''
+            return geometry
+
+        transforms.append(update_value_map)
+
+        inasafe_fields[exposure_class_field['key']] = class_name
+        inasafe_fields.pop(exposure_type_field['key'])
+        keywords.pop('value_map')
+        value_map = None
+
+    # Write the output layer.
+    output_names = schema.names()
+    output = create_memory_layer(
+        title, geometry_type, output_crs, schema.qgs_fields())
+    provider = output.dataProvider()
+    source_names = source_fields.names()
+
+    extent = mask.boundingBox()
+    features = []
+    for source_feature in layer.getFeatures(QgsFeatureRequest(extent)):
+        values = dict(zip(source_names, source_feature.attributes()))
+        geometry = source_feature.geometry()
+        for transform_feature in transforms:
+            geometry = transform_feature(values, geometry)
+            if geometry is None:
+                break
+        else:
+            geometry.convertToMultiType()
+            feature = QgsFeature()
+            feature.setGeometry(geometry)
+            feature.setAttributes([values.get(n) for n in output_names])
+            features.append(feature)
+            if len(features) == BATCH_SIZE:
+                provider.addFeatures(features)
+                features = []
+    provider.addFeatures(features)
+    output.updateExtents()
+
+    if output.featureCount() == 0:
+        LOGGER.warning(
+            tr('No feature has been found in the {purpose}'
+                .format(purpose=purpose)))
+
+    # Unmapped values are added to the last class, from _check_value_mapping.
+    if value_map:
+        mapped = []
+        for group in list(value_map.values()):
+            mapped.extend(group)
+        diff = list(unique_types - set(mapped))
+        if other in list(value_map.keys()):
+            value_map[other].extend(diff)
+        else:
+            value_map[other] = diff
+        keywords['value_map'] = value_map
+
+    keywords['title'] = title
+    output.keywords = keywords
+    check_layer(output)
+    return output
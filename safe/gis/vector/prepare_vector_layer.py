@@ -43,7 +43,8 @@ from safe.gis.vector.tools import (
     remove_fields,
     copy_fields,
     copy_layer,
-    create_field_from_definition
+    create_field_from_definition,
+    AttributeWriter
 )
 from safe.impact_function.postprocessors import run_single_post_processor
 from safe.processors import post_processor_size
@@ -393,8 +394,6 @@ def _add_id_column(layer):
         LOGGER.info(
             'We add an ID column in {purpose}'.format(purpose=layer_purpose))
 
-        layer.startEditing()
-
         id_field = QgsField()
         id_field.setName(safe_id['field_name'])
         if isinstance(safe_id['type'], list):
@@ -405,15 +404,18 @@ def _add_id_column(layer):
         id_field.setPrecision(safe_id['precision'])
         id_field.setLength(safe_id['length'])
 
-        layer.addAttribute(id_field)
-
-        new_index = layer.fields().lookupField(id_field.name())
+        writer = AttributeWriter(layer)
+        new_index = writer.addAttribute(id_field)
 
-        for feature in layer.getFeatures():
-            layer.changeAttributeValue(
-                feature.id(), new_index, feature.id())
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([])
+        writer.changeColumn(
+            new_index,
+            {feature.id(): feature.id()
+             for feature in layer.getFeatures(request)})
 
-        layer.commitChanges()
+        writer.commitChanges()
 
         layer.keywords['inasafe_fields'][safe_id['key']] = (
             safe_id['field_name'])
@@ -426,23 +428,22 @@ def _add_default_exposure_class(layer):
     :param layer: The vector layer.
     :type layer: QgsVectorLayer
     """
-    layer.startEditing()
+    writer = AttributeWriter(layer)
 
     field = create_field_from_definition(exposure_class_field)
     layer.keywords['inasafe_fields'][exposure_class_field['key']] = (
         exposure_class_field['field_name'])
-    layer.addAttribute(field)
-
-    index = layer.fields().lookupField(exposure_class_field['field_name'])
+    index = writer.addAttribute(field)
 
     exposure = layer.keywords['exposure']
 
     request = QgsFeatureRequest()
     request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes([])
     for feature in layer.getFeatures(request):
-        layer.changeAttributeValue(feature.id(), index, exposure)
+        writer.changeAttributeValue(feature.id(), index, exposure)
 
-    layer.commitChanges()
+    writer.commitChanges()
     return
 
 
@@ -486,17 +487,17 @@ def sum_fields(layer, output_field_key, input_fields):
         # Get the output field index
         output_idx = layer.fields().lookupField(output_field_name)
         # Output index is not found
-        layer.startEditing()
+        writer = AttributeWriter(layer)
         if output_idx == -1:
             output_field = create_field_from_definition(field_definition)
-            layer.addAttribute(output_field)
-            output_idx = layer.fields().lookupField(output_field_name)
+            output_idx = writer.addAttribute(output_field)
 
         # Iterate to all features
-        for feature in layer.getFeatures():
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        for feature in layer.getFeatures(request):
             context.setFeature(feature)
             result = sum_expression.evaluate(context)
-            feature[output_idx] = result
-            layer.updateFeature(feature)
+            writer.changeAttributeValue(feature.id(), output_idx, result)
 
-        layer.commitChanges()
+        writer.commitChanges()
@@ -2,14 +2,16 @@
 
 """Reclassify a continuous vector layer."""
 
-from qgis.core import QgsField
+from qgis.core import QgsField, QgsFeatureRequest
 
 from safe.common.exceptions import InvalidKeywordsForProcessingAlgorithm
 from safe.definitions.fields import hazard_class_field, hazard_value_field
 from safe.definitions.processing_steps import reclassify_vector_steps
 from safe.definitions.utilities import definition
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.gis.tools import reclassify_value
+from safe.gis.vector.tools import AttributeWriter
 from safe.utilities.metadata import (
     active_thresholds_value_maps, active_classification)
 from safe.utilities.profiling import profile
@@ -21,7 +23,7 @@ __revision__ = '$Format:%H$'
 
 
 @profile
-def reclassify(layer, exposure_key=None):
+def reclassify(layer, exposure_key=None, feedback=None):
     """Reclassify a continuous vector layer.
 
     This function will modify the input.
@@ -46,6 +48,9 @@ def reclassify(layer, exposure_key=None):
     :param exposure_key: The exposure key.
     :type exposure_key: str
 
+    :param feedback: The feedback of the analysis, checked for each feature.
+    :type feedback: AnalysisFeedback
+
     :return: The classified vector layer.
     :rtype: QgsVectorLayer
 
@@ -81,25 +86,26 @@ def reclassify(layer, exposure_key=None):
     classified_field.setLength(hazard_class_field['length'])
     classified_field.setPrecision(hazard_class_field['precision'])
 
-    layer.startEditing()
-    layer.addAttribute(classified_field)
-
-    classified_field_index = layer.fields(). \
-        lookupField(classified_field.name())
+    writer = AttributeWriter(layer)
+    classified_field_index = writer.addAttribute(classified_field)
 
-    for feature in layer.getFeatures():
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes([continuous_index])
+    for feature in layer.getFeatures(request):
+        check_cancelled(feedback)
         attributes = feature.attributes()
         source_value = attributes[continuous_index]
         classified_value = reclassify_value(source_value, thresholds)
         if classified_value is None or \
                 (hasattr(classified_value, 'isNull') and
                     classified_value.isNull()):
-            layer.deleteFeature(feature.id())
+            writer.deleteFeature(feature.id())
         else:
-            layer.changeAttributeValue(
+            writer.changeAttributeValue(
                 feature.id(), classified_field_index, classified_value)
 
-    layer.commitChanges()
+    writer.commitChanges()
     layer.updateFields()
 
     # We transfer keywords to the output.
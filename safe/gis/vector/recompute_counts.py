@@ -4,6 +4,8 @@
 
 import logging
 
+from qgis.core import QgsFeatureRequest
+
 from safe.common.exceptions import InvalidKeywordsForProcessingAlgorithm
 from safe.definitions.fields import (
     size_field,
@@ -12,7 +14,7 @@ from safe.definitions.fields import (
 from safe.definitions.processing_steps import (
     recompute_counts_steps)
 from safe.gis.sanity_check import check_layer
-from safe.gis.vector.tools import SizeCalculator
+from safe.gis.vector.tools import SizeCalculator, AttributeWriter
 from safe.processors.post_processor_functions import size
 from safe.utilities.profiling import profile
 
@@ -25,7 +27,7 @@ __revision__ = '$Format:%H$'
 
 
 @profile
-def recompute_counts(layer):
+def recompute_counts(layer, new_sizes=None):
     """Recompute counts according to the size field and the new size.
 
     This function will also take care of updating the size field. The size
@@ -34,6 +36,11 @@ def recompute_counts(layer):
     :param layer: The vector layer.
     :type layer: QgsVectorLayer
 
+    :param new_sizes: Optional dictionary of the new size of each feature, by
+        feature id, e.g. computed by the intersection. If provided, the
+        geometries are not measured again.
+    :type new_sizes: dict
+
     :return: The layer with updated counts.
     :rtype: QgsVectorLayer
 
@@ -67,18 +74,26 @@ def recompute_counts(layer):
     size_field_name = fields[size_field['key']]
     size_field_index = layer.fields().lookupField(size_field_name)
 
-    layer.startEditing()
+    writer = AttributeWriter(layer)
 
-    exposure_key = layer.keywords['exposure_keywords']['exposure']
-    size_calculator = SizeCalculator(
-        layer.crs(), layer.geometryType(), exposure_key)
+    request = QgsFeatureRequest()
+    if new_sizes is None:
+        exposure_key = layer.keywords['exposure_keywords']['exposure']
+        size_calculator = SizeCalculator(
+            layer.crs(), layer.geometryType(), exposure_key)
+    else:
+        request.setFlags(QgsFeatureRequest.NoGeometry)
 
-    for feature in layer.getFeatures():
+    for feature in layer.getFeatures(request):
         old_size = feature[size_field_name]
-        new_size = size(
-            size_calculator=size_calculator, geometry=feature.geometry())
+        if new_sizes is None:
+            new_size = size(
+                size_calculator=size_calculator, geometry=feature.geometry())
+        else:
+            new_size = new_sizes[feature.id()]
 
-        layer.changeAttributeValue(feature.id(), size_field_index, new_size)
+        writer.changeAttributeValue(
+            feature.id(), size_field_index, new_size)
 
         # Cross multiplication for each field
         for index in indexes:
@@ -89,9 +104,9 @@ def recompute_counts(layer):
                 new_value = ''
             except ZeroDivisionError:
                 new_value = 0
-            layer.changeAttributeValue(feature.id(), index, new_value)
+            writer.changeAttributeValue(feature.id(), index, new_value)
 
-    layer.commitChanges()
+    writer.commitChanges()
 
     layer.keywords['title'] = output_layer_name
 
@@ -1,10 +1,23 @@
 # coding=utf-8
 
-"""Reproject a vector layer to a specific CRS."""
+"""Reproject a vector layer to a specific CRS.
 
+The geometries are reprojected by batch. The coordinates of all the
+geometries of a batch are read from their WKB and transformed with a single
+PROJ call, then written back in the WKB. If the project defines a specific
+datum transformation between the two CRS, or if a geometry can not be read
+this way, e.g. a curve, the batch is reprojected feature by feature with
+QgsCoordinateTransform.
+"""
+
+import logging
+import struct
+import time
+
+from osgeo import osr
 from qgis.core import (
     QgsCoordinateTransform,
-    QgsFeature,
+    QgsGeometry,
     QgsProject,
 )
 
@@ -18,6 +31,16 @@ __license__ = "GPL version 3"
 __email__ = "info@inasafe.org"
 __revision__ = '$Format:%H$'
 
+LOGGER = logging.getLogger('InaSAFE')
+
+BATCH_SIZE = 10000
+
+# Minimum time in seconds between two calls of the progress callback.
+PROGRESS_INTERVAL = 0.5
+
+# WKB flag of the legacy 2.5D geometry types.
+WKB_25D = 0x80000000
+
 
 @profile
 def reproject(layer, output_crs, callback=None):
@@ -33,6 +56,7 @@ def reproject(layer, output_crs, callback=None):
 
     :param callback: A function to all to indicate progress. The function
         should accept params 'current' (int), 'maximum' (int) and 'step' (str).
+        It is called at most every PROGRESS_INTERVAL seconds.
         Defaults to None.
     :type callback: function
 
@@ -51,24 +75,36 @@ def reproject(layer, output_crs, callback=None):
 
     reprojected = create_memory_layer(
         output_layer_name, layer.geometryType(), output_crs, input_fields)
-    reprojected.startEditing()
+    provider = reprojected.dataProvider()
 
-    crs_transform = QgsCoordinateTransform(
-        input_crs, output_crs, QgsProject.instance())
-
-    out_feature = QgsFeature()
+    project = QgsProject.instance()
+    crs_transform = QgsCoordinateTransform(input_crs, output_crs, project)
+    transformation = None
+    if not project.transformContext().hasTransform(input_crs, output_crs):
+        transformation = coordinate_transformation(input_crs, output_crs)
 
+    last_progress = time.time()
+    features = []
     for i, feature in enumerate(layer.getFeatures()):
-        geom = feature.geometry()
-        geom.transform(crs_transform)
-        out_feature.setGeometry(geom)
-        out_feature.setAttributes(feature.attributes())
-        reprojected.addFeature(out_feature)
+        features.append(feature)
+        if len(features) == BATCH_SIZE:
+            _reproject_features(features, crs_transform, transformation)
+            provider.addFeatures(features)
+            features = []
 
-        if callback:
+        if callback and time.time() - last_progress > PROGRESS_INTERVAL:
             callback(current=i, maximum=feature_count, step=processing_step)
+            last_progress = time.time()
+
+    _reproject_features(features, crs_transform, transformation)
+    provider.addFeatures(features)
+    reprojected.updateExtents()
 
-    reprojected.commitChanges()
+    if callback:
+        callback(
+            current=feature_count,
+            maximum=feature_count,
+            step=processing_step)
 
     # We transfer keywords to the output.
     # We don't need to update keywords as the CRS is dynamic.
@@ -76,3 +112,176 @@ def reproject(layer, output_crs, callback=None):
     reprojected.keywords['title'] = output_layer_name
     check_layer(reprojected)
     return reprojected
+
+
+def coordinate_transformation(input_crs, output_crs):
+    """Create an OSR coordinate transformation between two CRS.
+
+    The axis order is always easting, northing like in QGIS.
+
+    :param input_crs: The source CRS.
+    :type input_crs: QgsCoordinateReferenceSystem
+
+    :param output_crs: The destination CRS.
+    :type output_crs: QgsCoordinateReferenceSystem
+
+    :return: The transformation.
+    :rtype: osr.CoordinateTransformation
+    """
+    references = []
+    for crs in [input_crs, output_crs]:
+        reference = osr.SpatialReference()
+        reference.ImportFromWkt(crs.toWkt())
+        if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+            # GDAL 3 uses the axis order of the authority by default.
+            reference.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        references.append(reference)
+    return osr.CoordinateTransformation(*references)
+
+
+def coordinate_segments(wkb, offset=0):
+    """Find the coordinates in a WKB geometry.
+
+    :param wkb: The WKB geometry.
+    :type wkb: bytearray
+
+    :param offset: Offset of the geometry in the WKB.
+    :type offset: int
+
+    :return: A tuple with the offset of the end of the geometry and the list
+        of coordinate sequences, each as a tuple with the offset, the number
+        of points, the number of dimensions and the byte order.
+    :rtype: tuple
+
+    :raises: ValueError if the geometry type is not supported.
+    """
+    byte_order = '<' if wkb[offset] == 1 else '>'
+    wkb_type = struct.unpack_from(byte_order + 'I', wkb, offset + 1)[0]
+    offset += 5
+
+    dimensions = 2
+    if wkb_type & WKB_25D:
+        wkb_type &= ~WKB_25D
+        dimensions = 3
+    geometry_type, extra = wkb_type % 1000, wkb_type // 1000
+    if extra > 3:
+        raise ValueError('Unsupported WKB type %s' % wkb_type)
+    # Z, M or ZM
+    dimensions += [0, 1, 1, 2][extra]
+
+    segments = []
+    if geometry_type == 1:
+        # Point
+        segments.append((offset, 1, dimensions, byte_order))
+        offset += 8 * dimensions
+    elif geometry_type == 2:
+        # LineString
+        points = struct.unpack_from(byte_order + 'I', wkb, offset)[0]
+        offset += 4
+        segments.append((offset, points, dimensions, byte_order))
+        offset += 8 * dimensions * points
+    elif geometry_type == 3:
+        # Polygon
+        rings = struct.unpack_from(byte_order + 'I', wkb, offset)[0]
+        offset += 4
+        for _ in range(rings):
+            points = struct.unpack_from(byte_order + 'I', wkb, offset)[0]
+            offset += 4
+            segments.append((offset, points, dimensions, byte_order))
+            offset += 8 * dimensions * points
+    elif geometry_type in [4, 5, 6, 7]:
+        # Multi geometries and geometry collection
+        count = struct.unpack_from(byte_order + 'I', wkb, offset)[0]
+        offset += 4
+        for _ in range(count):
+            offset, parts = coordinate_segments(wkb, offset)
+            segments.extend(parts)
+    else:
+        raise ValueError('Unsupported WKB type %s' % wkb_type)
+    return offset, segments
+
+
+def transform_geometries(geometries, transformation):
+    """Reproject geometries with a single call to PROJ.
+
+    :param geometries: The geometries, they are not modified.
+    :type geometries: list(QgsGeometry)
+
+    :param transformation: The coordinate transformation.
+    :type transformation: osr.CoordinateTransformation
+
+    :return: The reprojected geometries.
+    :rtype: list(QgsGeometry)
+
+    :raises: ValueError if a geometry type is not supported, RuntimeError if
+        PROJ can not transform a point.
+    """
+    buffers = []
+    sequences = []
+    points = []
+    for geometry in geometries:
+        wkb = bytearray(geometry.asWkb().data())
+        segments = coordinate_segments(wkb)[1]
+        for offset, count, dimensions, byte_order in segments:
+            values = list(struct.unpack_from(
+                '%s%sd' % (byte_order, count * dimensions), wkb, offset))
+            sequences.append(
+                (len(buffers), offset, dimensions, byte_order, values))
+            points.extend(zip(
+                values[0::dimensions], values[1::dimensions]))
+        buffers.append(wkb)
+
+    transformed = transformation.TransformPoints(points) if points else []
+
+    start = 0
+    for index, offset, dimensions, byte_order, values in sequences:
+        count = len(values) // dimensions
+        for i, point in enumerate(transformed[start:start + count]):
+            values[i * dimensions] = point[0]
+            values[i * dimensions + 1] = point[1]
+        start += count
+        struct.pack_into(
+            '%s%sd' % (byte_order, len(values)),
+            buffers[index],
+            offset,
+            *values)
+
+    results = []
+    for wkb in buffers:
+        geometry = QgsGeometry()
+        geometry.fromWkb(bytes(wkb))
+        results.append(geometry)
+    return results
+
+
+def _reproject_features(features, crs_transform, transformation):
+    """Reproject the geometries of features in place.
+
+    :param features: The features.
+    :type features: list(QgsFeature)
+
+    :param crs_transform: The QGIS transform, used feature by feature if the
+        batch can not be reprojected at once.
+    :type crs_transform: QgsCoordinateTransform
+
+    :param transformation: The OSR transformation or None to reproject
+        feature by feature.
+    :type transformation: osr.CoordinateTransformation
+    """
+    features = [feature for feature in features if feature.hasGeometry()]
+    if transformation is not None:
+        try:
+            geometries = transform_geometries(
+                [feature.geometry() for feature in features], transformation)
+        except (ValueError, RuntimeError) as e:
+            LOGGER.debug(
+                'Reprojection feature by feature: {error}'.format(error=e))
+        else:
+            for feature, geometry in zip(features, geometries):
+                feature.setGeometry(geometry)
+            return
+
+    for feature in features:
+        geometry = feature.geometry()
+        geometry.transform(crs_transform)
+        feature.setGeometry(geometry)
@@ -5,15 +5,11 @@
 
 import logging
 
-from qgis.core import (
-    QgsGeometry,
-    QgsFeatureRequest,
-    QgsFeature,
-)
+from qgis.core import QgsFeatureRequest
 
 from safe.definitions.processing_steps import smart_clip_steps
 from safe.gis.sanity_check import check_layer
-from safe.gis.vector.tools import create_memory_layer
+from safe.gis.vector.tools import PreparedMask, create_memory_layer
 from safe.utilities.profiling import profile
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
@@ -24,6 +20,8 @@ __revision__ = '$Format:%H$'
 
 LOGGER = logging.getLogger('InaSAFE')
 
+BATCH_SIZE = 10000
+
 
 @profile
 def smart_clip(layer_to_clip, mask_layer):
@@ -31,6 +29,9 @@ def smart_clip(layer_to_clip, mask_layer):
 
     Issue https://github.com/inasafe/inasafe/issues/3186
 
+    The features intersecting any feature of the mask layer are kept,
+    without being split.
+
     :param layer_to_clip: The vector layer to clip.
     :type layer_to_clip: QgsVectorLayer
 
@@ -44,38 +45,38 @@ def smart_clip(layer_to_clip, mask_layer):
     """
     output_layer_name = smart_clip_steps['output_layer_name']
 
-    writer = create_memory_layer(
+    output_layer = create_memory_layer(
         output_layer_name,
         layer_to_clip.geometryType(),
         layer_to_clip.crs(),
         layer_to_clip.fields()
     )
-    writer.startEditing()
+    provider = output_layer.dataProvider()
 
-    # first build up a list of clip geometries
+    # Index the parts of every mask feature, with prepared geometries.
     request = QgsFeatureRequest().setSubsetOfAttributes([])
-    iterator = mask_layer.getFeatures(request)
-    feature = next(iterator)
-    geometries = QgsGeometry(feature.geometry())
-
-    # use prepared geometries for faster intersection tests
-    # noinspection PyArgumentList
-    engine = QgsGeometry.createGeometryEngine(geometries.constGet())
-    engine.prepareGeometry()
-
-    extent = mask_layer.extent()
-
-    for feature in layer_to_clip.getFeatures(QgsFeatureRequest(extent)):
-
-        if engine.intersects(feature.geometry().constGet()):
-            out_feat = QgsFeature()
-            out_feat.setGeometry(feature.geometry())
-            out_feat.setAttributes(feature.attributes())
-            writer.addFeature(out_feat)
-
-    writer.commitChanges()
-
-    writer.keywords = layer_to_clip.keywords.copy()
-    writer.keywords['title'] = output_layer_name
-    check_layer(writer)
-    return writer
+    mask = PreparedMask(
+        [feature.geometry() for feature in mask_layer.getFeatures(request)])
+
+    features = []
+    request = QgsFeatureRequest(mask.extent)
+    for feature in layer_to_clip.getFeatures(request):
+        geometry = feature.geometry()
+        if geometry.isNull() or not mask.intersects(geometry):
+            continue
+
+        # The feature from the iterator is added as is.
+        if not geometry.isMultipart():
+            geometry.convertToMultiType()
+            feature.setGeometry(geometry)
+        features.append(feature)
+        if len(features) == BATCH_SIZE:
+            provider.addFeatures(features)
+            features = []
+    provider.addFeatures(features)
+    output_layer.updateExtents()
+
+    output_layer.keywords = layer_to_clip.keywords.copy()
+    output_layer.keywords['title'] = output_layer_name
+    check_layer(output_layer)
+    return output_layer
@@ -24,12 +24,14 @@ from safe.definitions.hazard_classifications import not_exposed_class
 from safe.definitions.layer_purposes import (
     layer_purpose_aggregate_hazard_impacted)
 from safe.definitions.utilities import definition
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.gis.vector.summary_tools import (
     check_inputs, create_absolute_values_structure, add_fields)
+from safe.gis.vector.tools import AttributeWriter
 from safe.processors import post_processor_affected_function
 from safe.utilities.gis import qgis_version
-from safe.utilities.i18n import tr
+from safe.utilities.i18n import TranslationTable
 from safe.utilities.pivot_table import FlatTable
 from safe.utilities.profiling import profile
 
@@ -42,7 +44,7 @@ LOGGER = logging.getLogger('InaSAFE')
 
 
 @profile
-def aggregate_hazard_summary(impact, aggregate_hazard):
+def aggregate_hazard_summary(impact, aggregate_hazard, feedback=None):
     """Compute the summary from the source layer to the aggregate_hazard layer.
 
     Source layer :
@@ -62,6 +64,9 @@ def aggregate_hazard_summary(impact, aggregate_hazard):
         statistics.
     :type aggregate_hazard: QgsVectorLayer
 
+    :param feedback: The feedback of the analysis, checked for each feature.
+    :type feedback: AnalysisFeedback
+
     :return: The new aggregate_hazard layer with summary.
     :rtype: QgsVectorLayer
 
@@ -104,14 +109,14 @@ def aggregate_hazard_summary(impact, aggregate_hazard):
     # the size, or the number of features or population.
     field_index = report_on_field(impact)
 
-    aggregate_hazard.startEditing()
+    writer = AttributeWriter(aggregate_hazard)
 
     shift = aggregate_hazard.fields().count()
     dynamic_structure = [
         [exposure_count_field, unique_exposure],
     ]
     add_fields(
-        aggregate_hazard,
+        writer,
         absolute_values,
         [affected_field, total_field],
         dynamic_structure,
@@ -123,6 +128,7 @@ def aggregate_hazard_summary(impact, aggregate_hazard):
     request.setFlags(QgsFeatureRequest.NoGeometry)
     LOGGER.debug('Computing the aggregate hazard summary.')
     for feature in impact.getFeatures(request):
+        check_cancelled(feedback)
         # Field_index can be equal to 0.
         if field_index is not None:
             value = feature[field_index]
@@ -168,6 +174,9 @@ def aggregate_hazard_summary(impact, aggregate_hazard):
     exposure_keywords = impact.keywords['exposure_keywords']
     exposure = exposure_keywords['exposure']
 
+    # The affected value is True, False or None, translated once.
+    affected_translations = TranslationTable()
+
     for area in aggregate_hazard.getFeatures(request):
         aggregation_value = area[aggregation_id]
         feature_hazard_id = area[hazard_id]
@@ -184,18 +193,18 @@ def aggregate_hazard_summary(impact, aggregate_hazard):
                 exposure_class=val
             )
             total += sum
-            aggregate_hazard.changeAttributeValue(area.id(), shift + i, sum)
+            writer.changeAttributeValue(area.id(), shift + i, sum)
 
         affected = post_processor_affected_function(
             exposure=exposure,
             hazard=hazard,
             classification=classification,
             hazard_class=feature_hazard_value)
-        affected = tr(str(affected))
-        aggregate_hazard.changeAttributeValue(
+        affected = affected_translations[affected]
+        writer.changeAttributeValue(
             area.id(), shift + len(unique_exposure), affected)
 
-        aggregate_hazard.changeAttributeValue(
+        writer.changeAttributeValue(
             area.id(), shift + len(unique_exposure) + 1, total)
 
         for i, field in enumerate(absolute_values.values()):
@@ -203,10 +212,10 @@ def aggregate_hazard_summary(impact, aggregate_hazard):
                 aggregation_id=aggregation_value,
                 hazard_id=feature_hazard_id
             )
-            aggregate_hazard.changeAttributeValue(
+            writer.changeAttributeValue(
                 area.id(), shift + len(unique_exposure) + 2 + i, value)
 
-    aggregate_hazard.commitChanges()
+    writer.commitChanges()
 
     aggregate_hazard.keywords['title'] = (
         layer_purpose_aggregate_hazard_impacted['name'])
@@ -16,10 +16,12 @@ from safe.definitions.fields import (
 )
 from safe.definitions.layer_purposes import (
     layer_purpose_aggregation_summary)
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.gis.vector.summary_tools import (
     check_inputs, create_absolute_values_structure, add_fields)
-from safe.gis.vector.tools import read_dynamic_inasafe_field
+from safe.gis.vector.tools import (
+    read_dynamic_inasafe_field, AttributeWriter)
 from safe.utilities.gis import qgis_version
 from safe.utilities.i18n import tr
 from safe.utilities.pivot_table import FlatTable
@@ -32,7 +34,7 @@ __revision__ = '$Format:%H$'
 
 
 @profile
-def aggregation_summary(aggregate_hazard, aggregation):
+def aggregation_summary(aggregate_hazard, aggregation, feedback=None):
     """Compute the summary from the aggregate hazard to the analysis layer.
 
     Source layer :
@@ -50,6 +52,9 @@ def aggregation_summary(aggregate_hazard, aggregation):
     :param aggregation: The aggregation vector layer where to write statistics.
     :type aggregation: QgsVectorLayer
 
+    :param feedback: The feedback of the analysis, checked for each feature.
+    :type feedback: AnalysisFeedback
+
     :return: The new aggregation layer with summary.
     :rtype: QgsVectorLayer
 
@@ -93,6 +98,7 @@ def aggregation_summary(aggregate_hazard, aggregation):
         affected_field['field_name'], tr('True'))
     request.setFilterExpression(expression)
     for area in aggregate_hazard.getFeatures(request):
+        check_cancelled(feedback)
 
         for key, name_field in list(source_fields.items()):
             if key.endswith(pattern):
@@ -118,12 +124,12 @@ def aggregation_summary(aggregate_hazard, aggregation):
 
     shift = aggregation.fields().count()
 
-    aggregation.startEditing()
+    writer = AttributeWriter(aggregation)
     dynamic_structure = [
         [affected_exposure_count_field, unique_exposure],
     ]
     add_fields(
-        aggregation,
+        writer,
         absolute_values,
         [total_affected_field],
         dynamic_structure)
@@ -141,9 +147,9 @@ def aggregation_summary(aggregate_hazard, aggregation):
                 exposure_class=val
             )
             total += sum
-            aggregation.changeAttributeValue(area.id(), shift + i, sum)
+            writer.changeAttributeValue(area.id(), shift + i, sum)
 
-        aggregation.changeAttributeValue(
+        writer.changeAttributeValue(
             area.id(), shift + len(unique_exposure), total)
 
         for i, field in enumerate(absolute_values.values()):
@@ -151,10 +157,10 @@ def aggregation_summary(aggregate_hazard, aggregation):
                 aggregation_id=aggregation_value,
             )
             target_index = shift + len(unique_exposure) + 1 + i
-            aggregation.changeAttributeValue(
+            writer.changeAttributeValue(
                 area.id(), target_index, value)
 
-    aggregation.commitChanges()
+    writer.commitChanges()
 
     aggregation.keywords['title'] = layer_purpose_aggregation_summary['name']
     if qgis_version() >= 21800:
@@ -22,10 +22,12 @@ from safe.definitions.fields import (
 )
 from safe.definitions.hazard_classifications import not_exposed_class
 from safe.definitions.layer_purposes import layer_purpose_analysis_impacted
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.gis.vector.summary_tools import (
     check_inputs, create_absolute_values_structure, add_fields)
-from safe.gis.vector.tools import create_field_from_definition
+from safe.gis.vector.tools import (
+    create_field_from_definition, AttributeWriter)
 from safe.processors import post_processor_affected_function
 from safe.utilities.gis import qgis_version
 from safe.utilities.pivot_table import FlatTable
@@ -38,7 +40,7 @@ __revision__ = '$Format:%H$'
 
 
 @profile
-def analysis_summary(aggregate_hazard, analysis):
+def analysis_summary(aggregate_hazard, analysis, feedback=None):
     """Compute the summary from the aggregate hazard to analysis.
 
     Source layer :
@@ -56,6 +58,9 @@ def analysis_summary(aggregate_hazard, analysis):
     :param analysis: The target vector layer where to write statistics.
     :type analysis: QgsVectorLayer
 
+    :param feedback: The feedback of the analysis, checked for each feature.
+    :type feedback: AnalysisFeedback
+
     :return: The new target layer with summary.
     :rtype: QgsVectorLayer
 
@@ -102,6 +107,7 @@ def analysis_summary(aggregate_hazard, analysis):
         [hazard_class, total], aggregate_hazard.fields())
     request.setFlags(QgsFeatureRequest.NoGeometry)
     for area in aggregate_hazard.getFeatures():
+        check_cancelled(feedback)
         hazard_value = area[hazard_class_index]
         value = area[total]
         if (value == '' or value is None or isnan(value) or
@@ -128,7 +134,7 @@ def analysis_summary(aggregate_hazard, analysis):
                 all='all'
             )
 
-    analysis.startEditing()
+    writer = AttributeWriter(analysis)
 
     shift = analysis.fields().count()
 
@@ -143,7 +149,7 @@ def analysis_summary(aggregate_hazard, analysis):
         [hazard_count_field, unique_hazard],
     ]
     add_fields(
-        analysis,
+        writer,
         absolute_values,
         counts,
         dynamic_structure)
@@ -166,6 +172,7 @@ def analysis_summary(aggregate_hazard, analysis):
 
         summary_value = 0
         for area in aggregate_hazard.getFeatures():
+            check_cancelled(feedback)
             case_value = area[case_field['field_name']]
             if case_value in summary_rule['case_values']:
                 summary_value += area[input_field['field_name']]
@@ -180,7 +187,7 @@ def analysis_summary(aggregate_hazard, analysis):
                 val = 'NULL'
             sum = flat_table.get_value(hazard_class=val)
             total += sum
-            analysis.changeAttributeValue(area.id(), shift + i, sum)
+            writer.changeAttributeValue(area.id(), shift + i, sum)
 
             affected = post_processor_affected_function(
                 exposure=exposure,
@@ -195,23 +202,23 @@ def analysis_summary(aggregate_hazard, analysis):
                 not_affected_sum += sum
 
         # Total Affected field
-        analysis.changeAttributeValue(
+        writer.changeAttributeValue(
             area.id(), shift + len(unique_hazard), affected_sum)
 
         # Total Not affected field
-        analysis.changeAttributeValue(
+        writer.changeAttributeValue(
             area.id(), shift + len(unique_hazard) + 1, not_affected_sum)
 
         # Total Exposed field
-        analysis.changeAttributeValue(
+        writer.changeAttributeValue(
             area.id(), shift + len(unique_hazard) + 2, total - not_exposed_sum)
 
         # Total Not exposed field
-        analysis.changeAttributeValue(
+        writer.changeAttributeValue(
             area.id(), shift + len(unique_hazard) + 3, not_exposed_sum)
 
         # Total field
-        analysis.changeAttributeValue(
+        writer.changeAttributeValue(
             area.id(), shift + len(unique_hazard) + 4, total)
 
         # Any absolute postprocessors
@@ -219,20 +226,19 @@ def analysis_summary(aggregate_hazard, analysis):
             value = field[0].get_value(
                 all='all'
             )
-            analysis.changeAttributeValue(
+            writer.changeAttributeValue(
                 area.id(), shift + len(unique_hazard) + 5 + i, value)
 
         # Summarizer of custom attributes
         for key, summary_value in list(summary_values.items()):
             summary_field = summary_rules[key]['summary_field']
             field = create_field_from_definition(summary_field)
-            analysis.addAttribute(field)
-            field_index = analysis.fields().lookupField(field.name())
+            field_index = writer.addAttribute(field)
             # noinspection PyTypeChecker
             analysis.keywords['inasafe_fields'][summary_field['key']] = (
                 summary_field['field_name'])
 
-            analysis.changeAttributeValue(
+            writer.changeAttributeValue(
                 area.id(), field_index, summary_value)
 
     # Sanity check ± 1 to the result. Disabled for now as it seems ± 1 is not
@@ -242,7 +248,7 @@ def analysis_summary(aggregate_hazard, analysis):
     # if not -1 < (total_computed - total) < 1:
     #     raise ComputationError
 
-    analysis.commitChanges()
+    writer.commitChanges()
 
     analysis.keywords['title'] = layer_purpose_analysis_impacted['name']
     if qgis_version() >= 21600:
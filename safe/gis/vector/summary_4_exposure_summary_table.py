@@ -28,13 +28,15 @@ from safe.definitions.layer_purposes import \
 from safe.definitions.processing_steps import (
     summary_4_exposure_summary_table_steps)
 from safe.definitions.utilities import definition
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
 from safe.gis.vector.summary_tools import (
     check_inputs, create_absolute_values_structure)
 from safe.gis.vector.tools import (
     create_field_from_definition,
     read_dynamic_inasafe_field,
-    create_memory_layer)
+    create_memory_layer,
+    AttributeWriter)
 from safe.processors import post_processor_affected_function
 from safe.utilities.gis import qgis_version
 from safe.utilities.pivot_table import FlatTable
@@ -48,7 +50,8 @@ __revision__ = '$Format:%H$'
 
 @profile
 def exposure_summary_table(
-        aggregate_hazard, exposure_summary=None, callback=None):
+        aggregate_hazard, exposure_summary=None, callback=None,
+        feedback=None):
     """Compute the summary from the aggregate hazard to analysis.
 
     Source layer :
@@ -68,6 +71,9 @@ def exposure_summary_table(
         Defaults to None.
     :type callback: function
 
+    :param feedback: The feedback of the analysis, checked for each feature.
+    :type feedback: AnalysisFeedback
+
     :return: The new tabular table, without geometry.
     :rtype: QgsVectorLayer
 
@@ -103,6 +109,7 @@ def exposure_summary_table(
     request = QgsFeatureRequest()
     request.setFlags(QgsFeatureRequest.NoGeometry)
     for area in aggregate_hazard.getFeatures():
+        check_cancelled(feedback)
         hazard_value = area[hazard_class_index]
         for exposure in unique_exposure:
             key_name = exposure_count_field['key'] % exposure
@@ -128,10 +135,10 @@ def exposure_summary_table(
             )
 
     tabular = create_memory_layer(output_layer_name, QgsWkbTypes.NullGeometry)
-    tabular.startEditing()
+    writer = AttributeWriter(tabular)
 
     field = create_field_from_definition(exposure_type_field)
-    tabular.addAttribute(field)
+    writer.addAttribute(field)
     tabular.keywords['inasafe_fields'][exposure_type_field['key']] = (
         exposure_type_field['field_name'])
 
@@ -149,7 +156,7 @@ def exposure_summary_table(
                     hazard_class.isNull())):
             hazard_class = 'NULL'
         field = create_field_from_definition(hazard_count_field, hazard_class)
-        tabular.addAttribute(field)
+        writer.addAttribute(field)
         key = hazard_count_field['key'] % hazard_class
         value = hazard_count_field['field_name'] % hazard_class
         tabular.keywords['inasafe_fields'][key] = value
@@ -162,7 +169,7 @@ def exposure_summary_table(
         )
 
     field = create_field_from_definition(total_affected_field)
-    tabular.addAttribute(field)
+    writer.addAttribute(field)
     tabular.keywords['inasafe_fields'][total_affected_field['key']] = (
         total_affected_field['field_name'])
 
@@ -170,17 +177,17 @@ def exposure_summary_table(
     # but with this, make sure that it exists in layer so it can be used for
     # reporting, and can be referenced to fields.py to take the label.
     field = create_field_from_definition(total_not_affected_field)
-    tabular.addAttribute(field)
+    writer.addAttribute(field)
     tabular.keywords['inasafe_fields'][total_not_affected_field['key']] = (
         total_not_affected_field['field_name'])
 
     field = create_field_from_definition(total_not_exposed_field)
-    tabular.addAttribute(field)
+    writer.addAttribute(field)
     tabular.keywords['inasafe_fields'][total_not_exposed_field['key']] = (
         total_not_exposed_field['field_name'])
 
     field = create_field_from_definition(total_field)
-    tabular.addAttribute(field)
+    writer.addAttribute(field)
     tabular.keywords['inasafe_fields'][total_field['key']] = (
         total_field['field_name'])
 
@@ -193,7 +200,7 @@ def exposure_summary_table(
     for key in sorted_keys:
         summary_field = summary_rules[key]['summary_field']
         field = create_field_from_definition(summary_field)
-        tabular.addAttribute(field)
+        writer.addAttribute(field)
         tabular.keywords['inasafe_fields'][
             summary_field['key']] = (
             summary_field['field_name'])
@@ -205,7 +212,7 @@ def exposure_summary_table(
         for absolute_field in list(absolute_values.keys()):
             field_definition = definition(absolute_values[absolute_field][1])
             field = create_field_from_definition(field_definition)
-            tabular.addAttribute(field)
+            writer.addAttribute(field)
             key = field_definition['key']
             value = field_definition['field_name']
             tabular.keywords['inasafe_fields'][key] = value
@@ -252,7 +259,7 @@ def exposure_summary_table(
                 attributes.append(value)
 
         feature.setAttributes(attributes)
-        tabular.addFeature(feature)
+        writer.addFeature(feature)
 
         # Sanity check ± 1 to the result. Disabled for now as it seems ± 1 is
         # not enough. ET 13/02/17
@@ -261,7 +268,7 @@ def exposure_summary_table(
         # if not -1 < (total_computed - total) < 1:
         #     raise ComputationError
 
-    tabular.commitChanges()
+    writer.commitChanges()
 
     tabular.keywords['title'] = layer_purpose_exposure_summary_table['name']
     if qgis_version() >= 21800:
@@ -31,6 +31,7 @@ from safe.definitions.layer_purposes import (
 from safe.gis.vector.tools import (
     create_field_from_definition,
     read_dynamic_inasafe_field,
+    AttributeWriter,
 )
 from safe.utilities.gis import qgis_version
 
@@ -63,7 +64,7 @@ def multi_exposure_analysis_summary(analysis, intermediate_analysis):
 
     .. versionadded:: 4.3
     """
-    analysis.startEditing()
+    writer = AttributeWriter(analysis)
 
     request = QgsFeatureRequest()
     request.setFlags(QgsFeatureRequest.NoGeometry)
@@ -82,11 +83,10 @@ def multi_exposure_analysis_summary(analysis, intermediate_analysis):
         for hazard_zone in hazards:
             field = create_field_from_definition(
                 exposure_hazard_count_field, exposure, hazard_zone)
-            analysis.addAttribute(field)
-            index = analysis.fields().lookupField(field.name())
+            index = writer.addAttribute(field)
             value = feature[analysis_result.fields().lookupField(
                 hazard_count_field['field_name'] % hazard_zone)]
-            analysis.changeAttributeValue(target_id, index, value)
+            writer.changeAttributeValue(target_id, index, value)
             # keywords
             key = exposure_hazard_count_field['key'] % (exposure, hazard_zone)
             value = exposure_hazard_count_field['field_name'] % (
@@ -98,9 +98,8 @@ def multi_exposure_analysis_summary(analysis, intermediate_analysis):
             total_affected_field['field_name'])
         field = create_field_from_definition(
             exposure_total_affected_field, exposure)
-        analysis.addAttribute(field)
-        index = analysis.fields().lookupField(field.name())
-        analysis.changeAttributeValue(target_id, index, feature[source_index])
+        index = writer.addAttribute(field)
+        writer.changeAttributeValue(target_id, index, feature[source_index])
         # keywords
         key = exposure_total_affected_field['key'] % exposure
         value = exposure_total_affected_field['field_name'] % exposure
@@ -111,9 +110,8 @@ def multi_exposure_analysis_summary(analysis, intermediate_analysis):
             total_not_affected_field['field_name'])
         field = create_field_from_definition(
             exposure_total_not_affected_field, exposure)
-        analysis.addAttribute(field)
-        index = analysis.fields().lookupField(field.name())
-        analysis.changeAttributeValue(target_id, index, feature[source_index])
+        index = writer.addAttribute(field)
+        writer.changeAttributeValue(target_id, index, feature[source_index])
         # keywords
         key = exposure_total_not_affected_field['key'] % exposure
         value = exposure_total_not_affected_field['field_name'] % exposure
@@ -124,9 +122,8 @@ def multi_exposure_analysis_summary(analysis, intermediate_analysis):
             total_exposed_field['field_name'])
         field = create_field_from_definition(
             exposure_total_exposed_field, exposure)
-        analysis.addAttribute(field)
-        index = analysis.fields().lookupField(field.name())
-        analysis.changeAttributeValue(target_id, index, feature[source_index])
+        index = writer.addAttribute(field)
+        writer.changeAttributeValue(target_id, index, feature[source_index])
         # keywords
         key = exposure_total_exposed_field['key'] % exposure
         value = exposure_total_exposed_field['field_name'] % exposure
@@ -137,9 +134,8 @@ def multi_exposure_analysis_summary(analysis, intermediate_analysis):
             total_not_exposed_field['field_name'])
         field = create_field_from_definition(
             exposure_total_not_exposed_field, exposure)
-        analysis.addAttribute(field)
-        index = analysis.fields().lookupField(field.name())
-        analysis.changeAttributeValue(target_id, index, feature[source_index])
+        index = writer.addAttribute(field)
+        writer.changeAttributeValue(target_id, index, feature[source_index])
         # keywords
         key = exposure_total_not_exposed_field['key'] % exposure
         value = exposure_total_not_exposed_field['field_name'] % exposure
@@ -150,15 +146,14 @@ def multi_exposure_analysis_summary(analysis, intermediate_analysis):
             total_field['field_name'])
         field = create_field_from_definition(
             exposure_total_field, exposure)
-        analysis.addAttribute(field)
-        index = analysis.fields().lookupField(field.name())
-        analysis.changeAttributeValue(target_id, index, feature[source_index])
+        index = writer.addAttribute(field)
+        writer.changeAttributeValue(target_id, index, feature[source_index])
         # keywords
         key = exposure_total_field['key'] % exposure
         value = exposure_total_field['field_name'] % exposure
         analysis.keywords['inasafe_fields'][key] = value
 
-    analysis.commitChanges()
+    writer.commitChanges()
     analysis.keywords['title'] = (
         layer_purpose_analysis_impacted['multi_exposure_name'])
     analysis.keywords['layer_purpose'] = layer_purpose_analysis_impacted['key']
@@ -203,7 +198,7 @@ def multi_exposure_aggregation_summary(aggregation, intermediate_layers):
     target_index_field_name = (
         aggregation.keywords['inasafe_fields'][aggregation_id_field['key']])
 
-    aggregation.startEditing()
+    writer = AttributeWriter(aggregation)
 
     request = QgsFeatureRequest()
     request.setFlags(QgsFeatureRequest.NoGeometry)
@@ -221,19 +216,17 @@ def multi_exposure_aggregation_summary(aggregation, intermediate_layers):
                 exposure_affected_exposure_type_count_field,
                 name=exposure, sub_name=exposure_class
             )
-            aggregation.addAttribute(field)
+            target_field_index = writer.addAttribute(field)
             source_field_index = layer.fields().lookupField(
                 affected_exposure_count_field['field_name'] % exposure_class)
-            target_field_index = aggregation.fields().lookupField(field.name())
             field_map[source_field_index] = target_field_index
 
         # Total affected field
         field = create_field_from_definition(
             exposure_total_not_affected_field, exposure)
-        aggregation.addAttribute(field)
+        target_field_index = writer.addAttribute(field)
         source_field_index = layer.fields().lookupField(
             total_affected_field['field_name'])
-        target_field_index = aggregation.fields().lookupField(field.name())
         field_map[source_field_index] = target_field_index
 
         # Get Aggregation ID from original feature
@@ -254,7 +247,7 @@ def multi_exposure_aggregation_summary(aggregation, intermediate_layers):
             target_feature = next(iterator)  # It must return only 1 feature.
 
             for source_field, target_field in list(field_map.items()):
-                aggregation.changeAttributeValue(
+                writer.changeAttributeValue(
                     target_feature.id(),
                     target_field,
                     source_feature[source_field])
@@ -271,7 +264,7 @@ def multi_exposure_aggregation_summary(aggregation, intermediate_layers):
                     'Aggregation IDs are duplicated in the aggregation layer. '
                     'We can\'t make any joins.')
 
-    aggregation.commitChanges()
+    writer.commitChanges()
     aggregation.keywords['title'] = (
         layer_purpose_aggregation_summary['multi_exposure_name'])
     aggregation.keywords['layer_purpose'] = (
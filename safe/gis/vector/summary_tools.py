@@ -63,8 +63,8 @@ def add_fields(
         layer, absolute_values, static_fields, dynamic_structure):
     """Function to add fields needed in the output layer.
 
-    :param layer: The vector layer.
-    :type layer: QgsVectorLayer
+    :param layer: The vector layer or the attribute writer of the layer.
+    :type layer: QgsVectorLayer, AttributeWriter
 
     :param absolute_values: The absolute value structure.
     :type absolute_values: dict
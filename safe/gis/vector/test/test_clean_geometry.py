@@ -0,0 +1,78 @@
+# coding=utf-8
+
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import (
+    get_qgis_app,
+    load_test_vector_layer)
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import QgsFeature, QgsGeometry
+
+from safe.gis.vector.clean_geometry import (
+    check_geometries,
+    clean_layer,
+    _validity_cache,
+)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestCleanGeometry(unittest.TestCase):
+
+    def test_clean_layer(self):
+        """Test the repaired geometries are written to the layer."""
+        layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson',
+            clone_to_memory=True)
+        count = layer.featureCount()
+
+        # A bowtie, which can be repaired, and a feature without geometry.
+        bowtie = QgsFeature(layer.fields())
+        bowtie.setGeometry(QgsGeometry.fromWkt(
+            'MultiPolygon (((0 0, 1 1, 1 0, 0 1, 0 0)))'))
+        empty = QgsFeature(layer.fields())
+        layer.dataProvider().addFeatures([bowtie, empty])
+
+        repaired, dropped = check_geometries(layer)
+        self.assertEqual(len(repaired), 1)
+        self.assertEqual(len(dropped), 1)
+
+        clean_layer(layer)
+        self.assertEqual(layer.featureCount(), count + 1)
+        for feature in layer.getFeatures():
+            self.assertTrue(feature.geometry().isGeosValid())
+
+    def test_check_geometries_cache(self):
+        """Test the checks of a file based layer are cached."""
+        layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+        check_geometries(layer, cache=True)
+        key = [k for k in _validity_cache if k[0] == layer.source()]
+        self.assertEqual(len(key), 1)
+        self.assertEqual(
+            len(_validity_cache[key[0]]), layer.featureCount())
+
+        # The checks of the edit buffer are not cached.
+        _validity_cache.clear()
+        feature = next(layer.getFeatures())
+        layer.startEditing()
+        layer.changeGeometry(feature.id(), QgsGeometry.fromWkt(
+            'MultiPolygon (((0 0, 1 1, 1 0, 0 1, 0 0)))'))
+        repaired, dropped = check_geometries(layer, cache=True)
+        layer.rollBack()
+        self.assertListEqual(list(repaired.keys()), [feature.id()])
+        self.assertDictEqual(_validity_cache, {})
+
+        # Without cache, nothing is added.
+        _validity_cache.clear()
+        check_geometries(layer)
+        self.assertDictEqual(_validity_cache, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,8 @@ from safe.test.utilities import (
     load_test_vector_layer)
 QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
 
+from safe.common.exceptions import AnalysisCancelledError
+from safe.gis.processing_tools import AnalysisFeedback
 from safe.gis.vector.intersection import intersection
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
@@ -42,7 +44,59 @@ class TestIntersectionVector(unittest.TestCase):
         layer = intersection(exposure, aggregation)
 
         self.assertEqual(layer.featureCount(), 6)
-        self.assertEqual(
-            aggregation.fields().count() + exposure.fields().count(),
-            layer.fields().count()
+
+        # Only the InaSAFE fields are copied.
+        self.assertSetEqual(
+            set(exposure.keywords['inasafe_fields'].values()),
+            set(layer.fields().names())
         )
+
+    def test_intersection_progress(self):
+        """Test the intersection reports its progress."""
+        exposure = load_test_vector_layer(
+            'gisv4', 'exposure', 'roads.geojson')
+        aggregation = load_test_vector_layer(
+            'gisv4', 'hazard', 'classified_vector.geojson')
+        aggregation.keywords = {
+            'aggregation_keywords': {},
+            'hazard_keywords': {},
+            'inasafe_fields': {}
+        }
+
+        progress = []
+
+        def callback(current, maximum, message=None):
+            progress.append((current, maximum))
+
+        intersection(exposure, aggregation, callback=callback)
+        count = exposure.featureCount()
+        self.assertEqual(progress[0], (0, count))
+        self.assertEqual(progress[-1], (count, count))
+
+    def test_intersection_cancelled(self):
+        """Test the intersection stops when the feedback is cancelled."""
+        exposure = load_test_vector_layer(
+            'gisv4', 'exposure', 'roads.geojson')
+        aggregation = load_test_vector_layer(
+            'gisv4', 'hazard', 'classified_vector.geojson')
+        aggregation.keywords = {
+            'aggregation_keywords': {},
+            'hazard_keywords': {},
+            'inasafe_fields': {}
+        }
+
+        feedback = AnalysisFeedback()
+        feedback.cancel()
+        with self.assertRaises(AnalysisCancelledError):
+            intersection(exposure, aggregation, feedback=feedback)
+
+        # A passed deadline cancels the feedback.
+        feedback = AnalysisFeedback(timeout=1)
+        feedback.deadline -= 2
+        with self.assertRaises(AnalysisCancelledError):
+            intersection(exposure, aggregation, feedback=feedback)
+        self.assertTrue(feedback.isCanceled())
+
+        layer = intersection(
+            exposure, aggregation, feedback=AnalysisFeedback(timeout=60))
+        self.assertEqual(layer.featureCount(), 6)
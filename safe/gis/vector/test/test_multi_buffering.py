@@ -9,9 +9,10 @@ from safe.test.utilities import (
     load_test_vector_layer)
 QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
 
-from qgis.core import QgsWkbTypes
+from qgis.core import QgsGeometry, QgsPointXY, QgsWkbTypes
 from safe.gis.vector.multi_buffering import multi_buffering
 from safe.definitions.fields import hazard_class_field, buffer_distance_field
+from safe.utilities.metadata import copy_layer_keywords
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
 __license__ = "GPL version 3"
@@ -46,7 +47,8 @@ class TestMultiBuffering(unittest.TestCase):
             expected_name_field)
         result = multi_buffering(
             layer=layer,
-            radii=radii)
+            radii=radii,
+            keep_sources=True)
 
         self.assertDictEqual(result.keywords, expected_keywords)
         self.assertEqual(result.geometryType(), QgsWkbTypes.PolygonGeometry)
@@ -68,3 +70,41 @@ class TestMultiBuffering(unittest.TestCase):
         new_field_names = actual_field_names[-2:]
 
         self.assertEqual(expected_fields_name, new_field_names)
+
+    def test_multi_buffer_dissolved(self):
+        """Test the rings are dissolved and do not overlap."""
+        radii = OrderedDict()
+        radii[500] = 'high'
+        radii[1000] = 'medium'
+        radii[2000] = 'low'
+
+        layer = load_test_vector_layer(
+            'hazard', 'volcano_point.geojson', clone_to_memory=True)
+        # A second volcano, close enough for the buffers to overlap.
+        feature = next(layer.getFeatures())
+        point = feature.geometry().asPoint()
+        geometry = QgsGeometry.fromPointXY(
+            QgsPointXY(point.x() + 0.01, point.y()))
+        feature.setGeometry(geometry)
+        layer.dataProvider().addFeatures([feature])
+
+        keywords = copy_layer_keywords(layer.keywords)
+        result = multi_buffering(layer=layer, radii=radii)
+        self.assertEqual(result.featureCount(), len(radii))
+        # Only the hazard class is left in the inasafe fields.
+        self.assertDictEqual(
+            result.keywords['inasafe_fields'],
+            {hazard_class_field['key']: hazard_class_field['field_name']})
+        self.assertDictEqual(layer.keywords, keywords)
+
+        distances = [f[buffer_distance_field['field_name']]
+                     for f in result.getFeatures()]
+        self.assertListEqual(distances, list(radii.keys()))
+        classes = [f[hazard_class_field['field_name']]
+                   for f in result.getFeatures()]
+        self.assertListEqual(classes, list(radii.values()))
+
+        rings = [f.geometry() for f in result.getFeatures()]
+        for i, ring in enumerate(rings):
+            for other in rings[i + 1:]:
+                self.assertAlmostEqual(ring.intersection(other).area(), 0)
@@ -0,0 +1,59 @@
+# coding=utf-8
+
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import (
+    get_qgis_app,
+    load_test_vector_layer)
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from safe.definitions.fields import exposure_class_field
+from safe.gis.vector.default_values import add_default_values
+from safe.gis.vector.from_counts_to_ratios import from_counts_to_ratios
+from safe.gis.vector.prepare_exposure import prepare_exposure_layer
+from safe.gis.vector.prepare_vector_layer import prepare_vector_layer
+from safe.gis.vector.smart_clip import smart_clip
+from safe.gis.vector.update_value_map import update_value_map
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestPrepareExposure(unittest.TestCase):
+
+    def test_prepare_exposure_layer(self):
+        """Test the single pass gives the same layer as each step."""
+        analysis = load_test_vector_layer(
+            'gisv4', 'analysis', 'analysis.geojson')
+
+        exposure = load_test_vector_layer(
+            'gisv4', 'exposure', 'buildings.geojson')
+        expected = smart_clip(exposure, analysis)
+        expected = prepare_vector_layer(expected)
+        expected = from_counts_to_ratios(expected)
+        expected = add_default_values(expected)
+        expected = update_value_map(expected)
+
+        exposure = load_test_vector_layer(
+            'gisv4', 'exposure', 'buildings.geojson')
+        layer = prepare_exposure_layer(exposure, analysis, analysis.crs())
+
+        self.assertEqual(layer.featureCount(), expected.featureCount())
+        self.assertSetEqual(
+            set(layer.fields().names()), set(expected.fields().names()))
+        self.assertDictEqual(
+            layer.keywords['inasafe_fields'],
+            expected.keywords['inasafe_fields'])
+        self.assertEqual(layer.keywords['title'], expected.keywords['title'])
+
+        class_name = exposure_class_field['field_name']
+        self.assertListEqual(
+            sorted(f[class_name] for f in layer.getFeatures()),
+            sorted(f[class_name] for f in expected.getFeatures()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,9 +8,17 @@ from safe.test.utilities import (
     load_test_vector_layer)
 QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
 
-from qgis.core import QgsCoordinateReferenceSystem
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsProject,
+)
 
-from safe.gis.vector.reproject import reproject
+from safe.gis.vector.reproject import (
+    coordinate_transformation,
+    reproject,
+    transform_geometries,
+)
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
 __license__ = "GPL version 3"
@@ -39,3 +47,21 @@ class TestReprojectVector(unittest.TestCase):
         self.assertEqual(
             reprojected.featureCount(), layer.featureCount())
         self.assertDictEqual(layer.keywords, reprojected.keywords)
+
+    def test_transform_geometries(self):
+        """Test the batch reprojection matches QgsCoordinateTransform."""
+        layer = load_test_vector_layer('exposure', 'buildings.shp')
+        output_crs = QgsCoordinateReferenceSystem(3857)
+
+        geometries = [f.geometry() for f in layer.getFeatures()]
+        transformation = coordinate_transformation(layer.crs(), output_crs)
+        reprojected = transform_geometries(geometries, transformation)
+        self.assertEqual(len(reprojected), len(geometries))
+
+        crs_transform = QgsCoordinateTransform(
+            layer.crs(), output_crs, QgsProject.instance())
+        for geometry, expected in zip(reprojected, geometries):
+            expected.transform(crs_transform)
+            self.assertEqual(geometry.wkbType(), expected.wkbType())
+            self.assertTrue(geometry.isGeosEqual(expected) or (
+                geometry.symDifference(expected).area() < 1e-3))
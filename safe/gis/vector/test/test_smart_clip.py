@@ -38,3 +38,22 @@ class TestClipVector(unittest.TestCase):
 
         # Add test about keywords
         # todo
+
+    def test_clip_vector_many_features(self):
+        """Test we can smart clip with a mask made of many features."""
+
+        aggregation = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+
+        exposure = load_test_vector_layer(
+            'gisv4', 'exposure', 'buildings.geojson')
+
+        layer = smart_clip(exposure, aggregation)
+
+        expected = 0
+        for feature in exposure.getFeatures():
+            for area in aggregation.getFeatures():
+                if area.geometry().intersects(feature.geometry()):
+                    expected += 1
+                    break
+        self.assertEqual(layer.featureCount(), expected)
@@ -4,7 +4,14 @@
 
 import unittest
 
-from qgis.core import QgsWkbTypes
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsField,
+    QgsGeometry,
+    QgsPointXY,
+    QgsRectangle,
+    QgsWkbTypes)
+from qgis.PyQt.QtCore import QVariant
 
 from safe.definitions.constants import INASAFE_TEST
 from safe.test.utilities import (
@@ -13,7 +20,12 @@ from safe.test.utilities import (
 QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
 
 
-from safe.gis.vector.tools import create_memory_layer
+from safe.gis.vector.tools import (
+    create_memory_layer,
+    AttributeWriter,
+    PreparedMask,
+    SizeCalculator,
+    SIZE_TOLERANCE)
 
 __copyright__ = "Copyright 2018, The InaSAFE Project"
 __license__ = "GPL version 3"
@@ -47,6 +59,91 @@ class TestVectorTools(unittest.TestCase):
         self.assertEqual(new_layer.crs(), layer.crs())
         self.assertEqual(new_layer.wkbType(), QgsWkbTypes.MultiPolygon)
 
+    def test_attribute_writer(self):
+        """Test we can write attributes in bulk."""
+        layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson', clone=True)
+        field_count = layer.fields().count()
+        feature_ids = [feature.id() for feature in layer.getFeatures()]
+
+        writer = AttributeWriter(layer)
+        index = writer.addAttribute(QgsField('bulk', QVariant.Int))
+        self.assertEqual(index, field_count)
+        self.assertEqual(writer.fields().count(), field_count + 1)
+        # Nothing is written before the commit.
+        self.assertEqual(layer.fields().count(), field_count)
+
+        writer.changeColumn(index, {fid: fid * 2 for fid in feature_ids})
+        writer.deleteFeature(feature_ids[0])
+        self.assertTrue(writer.commitChanges())
+
+        self.assertEqual(layer.fields().count(), field_count + 1)
+        self.assertFalse(layer.isEditable())
+        self.assertEqual(layer.featureCount(), len(feature_ids) - 1)
+        for feature in layer.getFeatures():
+            self.assertEqual(feature['bulk'], feature.id() * 2)
+
+    def test_prepared_mask(self):
+        """Test the mask handles many features and multi parts."""
+        square = QgsGeometry.fromRect(QgsRectangle(0, 0, 10, 10))
+        multi = QgsGeometry.fromWkt(
+            'MultiPolygon (((20 0, 30 0, 30 10, 20 10, 20 0)),'
+            '((40 0, 50 0, 50 10, 40 10, 40 0)))')
+        mask = PreparedMask([square, multi])
+        self.assertEqual(len(mask.parts), 3)
+        self.assertEqual(mask.extent, QgsRectangle(0, 0, 50, 10))
+
+        # In the interior, on the border and outside of the parts.
+        inside = QgsGeometry.fromRect(QgsRectangle(44, 4, 45, 5))
+        self.assertTrue(mask.intersects(inside))
+        crossing = QgsGeometry.fromRect(QgsRectangle(8, 2, 22, 3))
+        self.assertTrue(mask.intersects(crossing))
+        between = QgsGeometry.fromRect(QgsRectangle(32, 2, 38, 3))
+        self.assertFalse(mask.intersects(between))
+        point = QgsGeometry.fromPointXY(QgsPointXY(35, 5))
+        self.assertFalse(mask.intersects(point))
+
+    def test_size_calculator(self):
+        """Test the planar and the ellipsoidal sizes."""
+        utm = QgsCoordinateReferenceSystem('EPSG:32748')
+        planar = SizeCalculator(utm, QgsWkbTypes.PolygonGeometry, None)
+        self.assertIsNotNone(planar.planar_factor)
+        ellipsoidal = SizeCalculator(utm, QgsWkbTypes.PolygonGeometry, None)
+        ellipsoidal.planar_factor = None
+
+        square = QgsGeometry.fromRect(
+            QgsRectangle(700000, 9300000, 701000, 9301000))
+        self.assertEqual(planar.measure(square), 1000000)
+        self.assertAlmostEqual(
+            planar.measure(square) / ellipsoidal.measure(square),
+            1,
+            delta=SIZE_TOLERANCE)
+
+        # Web Mercator is far too distorted.
+        mercator = SizeCalculator(
+            QgsCoordinateReferenceSystem('EPSG:3857'),
+            QgsWkbTypes.PolygonGeometry,
+            None)
+        self.assertIsNone(mercator.planar_factor)
+
+        # The parts of a multipart are measured one by one.
+        geographic = SizeCalculator(
+            QgsCoordinateReferenceSystem('EPSG:4326'),
+            QgsWkbTypes.PolygonGeometry,
+            None)
+        self.assertIsNone(geographic.planar_factor)
+        parts = [
+            'Polygon ((106 -6, 106.1 -6, 106.1 -6.1, 106 -6))',
+            'Polygon ((107 -6, 107.1 -6, 107.1 -6.1, 107 -6.1, 107 -6),'
+            '(107.02 -6.02, 107.02 -6.04, 107.04 -6.04, 107.02 -6.02))',
+        ]
+        multi = QgsGeometry.collectGeometry(
+            [QgsGeometry.fromWkt(wkt) for wkt in parts])
+        sizes = geographic.measure_many(
+            [QgsGeometry.fromWkt(wkt) for wkt in parts])
+        self.assertEqual(len(sizes), 2)
+        self.assertAlmostEqual(geographic.measure(multi), sum(sizes), delta=1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -11,6 +11,7 @@ QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
 
 from safe.gis.vector.union import union
 from safe.definitions.fields import hazard_class_field, hazard_value_field
+from safe.definitions.hazard_classifications import not_exposed_class
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
 __license__ = "GPL version 3"
@@ -45,6 +46,31 @@ class TestUnionVector(unittest.TestCase):
             layer.fields().count()
         )
 
+    def test_union_threads(self):
+        """Test the union is the same with threads and tags the class."""
+
+        union_a = load_test_vector_layer(
+            'gisv4', 'hazard', 'classified_vector.geojson')
+        union_a.keywords['inasafe_fields'][hazard_class_field['key']] = (
+            union_a.keywords['inasafe_fields'][hazard_value_field['key']])
+
+        union_b = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+
+        layer = union(union_a, union_b)
+        threaded_layer = union(union_a, union_b, workers=4)
+
+        self.assertEqual(
+            layer.featureCount(), threaded_layer.featureCount())
+        self.assertListEqual(
+            layer.fields().names(), threaded_layer.fields().names())
+
+        hazard_class = union_a.keywords['inasafe_fields'][
+            hazard_class_field['key']]
+        values = [feature[hazard_class] for feature in layer.getFeatures()]
+        self.assertNotIn(None, values)
+        self.assertIn(not_exposed_class['key'], values)
+
     @unittest.expectedFailure
     def test_union_error(self):
         """Test we can union two layers like hazard and aggregation (2)."""
@@ -4,7 +4,7 @@
 
 
 import logging
-from math import isnan
+from math import floor, isnan
 
 import ogr
 from qgis.core import (
@@ -17,7 +17,13 @@ from qgis.core import (
     QgsWkbTypes,
     QgsCoordinateReferenceSystem,
     QgsMemoryProviderUtils,
-    QgsFields
+    QgsFields,
+    QgsGeometry,
+    QgsRectangle,
+    QgsCoordinateTransform,
+    QgsCsException,
+    QgsPointXY,
+    QgsUnitTypes,
 )
 
 from qgis.PyQt.QtCore import QVariant
@@ -28,7 +34,7 @@ from safe.common.exceptions import (
 )
 from safe.definitions.units import unit_metres, unit_square_metres
 from safe.definitions.utilities import definition
-from safe.gis.vector.clean_geometry import geometry_checker, clean_layer
+from safe.gis.vector.clean_geometry import check_geometries, clean_layer
 from safe.utilities.profiling import profile
 from safe.utilities.rounding import convert_unit
 
@@ -39,6 +45,13 @@ __revision__ = '$Format:%H$'
 
 LOGGER = logging.getLogger('InaSAFE')
 
+BATCH_SIZE = 10000
+
+# Maximum relative error of a size measured on the plane instead of the
+# ellipsoid. The size calculator only measures on the plane if the error is
+# below this tolerance all over the area of use of the CRS.
+SIZE_TOLERANCE = 0.005
+
 wkb_type_groups = {
     'Point': (
         QgsWkbTypes.Point,
@@ -163,7 +176,6 @@ def copy_layer(source, target):
     :param target: The destination.
     :type source: QgsVectorLayer
     """
-    out_feature = QgsFeature()
     target.startEditing()
 
     request = QgsFeatureRequest()
@@ -182,20 +194,33 @@ def copy_layer(source, target):
 
         aggregation_layer = True
 
-    for i, feature in enumerate(source.getFeatures(request)):
-        geom = feature.geometry()
-        if aggregation_layer and feature.hasGeometry():
-            # See issue https://github.com/inasafe/inasafe/issues/3713
-            # and issue https://github.com/inasafe/inasafe/issues/3927
-            # Also handle if feature has no geometry.
-            geom = geometry_checker(geom)
-            if not geom:
-                LOGGER.info(
-                    'One geometry in the aggregation layer is still invalid '
-                    'after cleaning.')
-        out_feature.setGeometry(geom)
+    repaired = {}
+    dropped = set()
+    if aggregation_layer:
+        # See issue https://github.com/inasafe/inasafe/issues/3713
+        # and issue https://github.com/inasafe/inasafe/issues/3927
+        # The checks are cached, so we don't check the same aggregation layer
+        # again for the next analysis.
+        repaired, dropped = check_geometries(source, request, cache=True)
+        dropped = set(dropped)
+
+    features = []
+    for feature in source.getFeatures(request):
+        out_feature = QgsFeature()
+        if feature.id() in repaired:
+            out_feature.setGeometry(repaired[feature.id()])
+        elif feature.id() in dropped and feature.hasGeometry():
+            LOGGER.info(
+                'One geometry in the aggregation layer is still invalid '
+                'after cleaning.')
+        else:
+            out_feature.setGeometry(feature.geometry())
         out_feature.setAttributes(feature.attributes())
-        target.addFeature(out_feature)
+        features.append(out_feature)
+        if len(features) == BATCH_SIZE:
+            target.addFeatures(features)
+            features = []
+    target.addFeatures(features)
 
     target.commitChanges()
 
@@ -236,29 +261,33 @@ def copy_fields(layer, fields_to_copy):
     :param fields_to_copy: Dictionary of fields to copy.
     :type fields_to_copy: dict
     """
+    writer = AttributeWriter(layer)
+    copies = {}
     for field in fields_to_copy:
 
         index = layer.fields().lookupField(field)
         if index != -1:
 
-            layer.startEditing()
-
             source_field = layer.fields().at(index)
             new_field = QgsField(source_field)
             new_field.setName(fields_to_copy[field])
 
-            layer.addAttribute(new_field)
+            copies[writer.addAttribute(new_field)] = index
 
-            new_index = layer.fields().lookupField(fields_to_copy[field])
+    if not copies:
+        return
 
-            for feature in layer.getFeatures():
-                attributes = feature.attributes()
-                source_value = attributes[index]
-                layer.changeAttributeValue(
-                    feature.id(), new_index, source_value)
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes(list(copies.values()))
+    for feature in layer.getFeatures(request):
+        attributes = feature.attributes()
+        for new_index, index in list(copies.items()):
+            writer.changeAttributeValue(
+                feature.id(), new_index, attributes[index])
 
-            layer.commitChanges()
-            layer.updateFields()  # Avoid crash #4729
+    writer.commitChanges()
+    layer.updateFields()  # Avoid crash #4729
 
 
 @profile
@@ -424,9 +453,354 @@ def read_dynamic_inasafe_field(inasafe_fields, dynamic_field, black_list=None):
     return unique_exposure
 
 
+def geometry_part(geometry, geometry_type):
+    """Keep only the part of an overlay result with the expected type.
+
+    An intersection or a difference can return a geometry collection, or a
+    geometry of a lower dimension, e.g. a line where two polygons touch.
+
+    :param geometry: The geometry, result of an overlay.
+    :type geometry: QgsGeometry
+
+    :param geometry_type: The expected geometry type.
+    :type geometry_type: QgsWkbTypes.GeometryType
+
+    :return: The geometry or None if nothing is left.
+    :rtype: QgsGeometry
+    """
+    if geometry.type() != geometry_type:
+        geometry.convertGeometryCollectionToSubclass(geometry_type)
+    if geometry.isEmpty() or geometry.type() != geometry_type:
+        return None
+    return geometry
+
+
+def combine_fields(fields_a, fields_b):
+    """Combine the fields of two layers, like QgsProcessingUtils.
+
+    A field of the second layer with a name already used is renamed with a
+    numeric suffix, e.g. "name_2".
+
+    :param fields_a: The fields of the first layer.
+    :type fields_a: QgsFields
+
+    :param fields_b: The fields of the second layer.
+    :type fields_b: QgsFields
+
+    :return: The combined fields.
+    :rtype: QgsFields
+    """
+    fields = QgsFields(fields_a)
+    for field in fields_b:
+        if fields.lookupField(field.name()) != -1:
+            suffix = 2
+            name = '%s_%s' % (field.name(), suffix)
+            while fields.lookupField(name) != -1:
+                suffix += 1
+                name = '%s_%s' % (field.name(), suffix)
+            field.setName(name)
+        fields.append(field)
+    return fields
+
+
+class AttributeWriter():
+
+    """Collect attribute updates and write them in bulk.
+
+    The updates are written with a single ``addAttributes`` and a single
+    ``changeAttributeValues`` call on the data provider. There is no edit
+    session, so no undo stack entry for each cell.
+
+    The method names mirror QgsVectorLayer so the writer can replace the
+    layer in an algorithm writing cell by cell::
+
+        writer = AttributeWriter(layer)
+        index = writer.addAttribute(field)
+        for feature in layer.getFeatures():
+            writer.changeAttributeValue(feature.id(), index, value)
+        writer.commitChanges()
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, layer):
+        """Constructor for the writer.
+
+        :param layer: The vector layer to write to. It must not be in an
+            edit session.
+        :type layer: QgsVectorLayer
+        """
+        self.layer = layer
+        self._provider = layer.dataProvider()
+        self._new_fields = []
+        self._changes = {}
+        self._new_features = []
+        self._deleted = []
+
+    @property
+    def keywords(self):
+        """Keywords of the layer.
+
+        :return: The keywords.
+        :rtype: dict
+        """
+        return self.layer.keywords
+
+    def fields(self):
+        """Fields of the layer, including the pending new fields.
+
+        :return: The fields.
+        :rtype: QgsFields
+        """
+        fields = QgsFields(self.layer.fields())
+        for field in self._new_fields:
+            fields.append(field)
+        return fields
+
+    def addAttribute(self, field):
+        """Add a new field, it is created when the changes are committed.
+
+        :param field: The new field.
+        :type field: QgsField
+
+        :return: The index of the new field.
+        :rtype: int
+        """
+        index = self._provider.fields().count() + len(self._new_fields)
+        self._new_fields.append(field)
+        return index
+
+    def changeAttributeValue(self, feature_id, index, value):
+        """Change the value of a single cell.
+
+        :param feature_id: The feature id.
+        :type feature_id: int
+
+        :param index: The field index.
+        :type index: int
+
+        :param value: The new value.
+        """
+        self._changes.setdefault(feature_id, {})[index] = value
+
+    def changeColumn(self, index, values):
+        """Change the values of a column for several features.
+
+        :param index: The field index.
+        :type index: int
+
+        :param values: Dictionary of feature id and value.
+        :type values: dict
+        """
+        for feature_id, value in list(values.items()):
+            self._changes.setdefault(feature_id, {})[index] = value
+
+    def addFeature(self, feature):
+        """Add a new feature when the changes are committed.
+
+        The feature is added after the new fields, it can have their values.
+
+        :param feature: The new feature.
+        :type feature: QgsFeature
+        """
+        self._new_features.append(feature)
+
+    def deleteFeature(self, feature_id):
+        """Delete a feature when the changes are committed.
+
+        :param feature_id: The feature id.
+        :type feature_id: int
+        """
+        self._deleted.append(feature_id)
+
+    def commitChanges(self):
+        """Write all the pending changes to the data provider.
+
+        :return: True if all the changes have been written.
+        :rtype: bool
+        """
+        success = True
+        if self._new_fields:
+            success &= self._provider.addAttributes(self._new_fields)
+            self._new_fields = []
+            self.layer.updateFields()
+        if self._changes:
+            success &= self._provider.changeAttributeValues(self._changes)
+            self._changes = {}
+        if self._new_features:
+            success &= self._provider.addFeatures(self._new_features)[0]
+            self._new_features = []
+        if self._deleted:
+            success &= self._provider.deleteFeatures(self._deleted)
+            self._deleted = []
+        if not success:
+            LOGGER.warning(
+                'Some attribute changes could not be written to {name}: '
+                '{errors}'.format(
+                    name=self.layer.name(),
+                    errors=self._provider.errors()))
+        return success
+
+
+class PreparedMask():
+
+    """Fast intersection tests against a mask made of many polygons.
+
+    The mask is split into its polygon parts. The parts are in a spatial
+    index so a geometry is only tested against the parts near it. Each part
+    has a prepared geometry and a coarse grid of the cells fully inside the
+    part, both built on first use. A geometry with a bounding box covered by
+    interior cells is inside the mask without any GEOS call.
+
+    .. versionadded:: 5.0
+    """
+
+    # Maximum number of grid cells checked for the interior fast path.
+    max_cells = 16
+
+    def __init__(self, geometries, grid_size=16):
+        """Constructor.
+
+        :param geometries: The geometries of the mask.
+        :type geometries: list(QgsGeometry)
+
+        :param grid_size: Number of rows and columns of the interior grid of
+            each part.
+        :type grid_size: int
+        """
+        self.grid_size = grid_size
+        self.parts = []
+        for geometry in geometries:
+            if geometry.isNull() or geometry.isEmpty():
+                continue
+            if geometry.isMultipart():
+                self.parts.extend(geometry.asGeometryCollection())
+            else:
+                self.parts.append(QgsGeometry(geometry))
+
+        self.extent = QgsRectangle()
+        self._index = QgsSpatialIndex()
+        for i, part in enumerate(self.parts):
+            feature = QgsFeature()
+            feature.setId(i)
+            feature.setGeometry(part)
+            self._index.insertFeature(feature)
+            if i == 0:
+                self.extent = part.boundingBox()
+            else:
+                self.extent.combineExtentWith(part.boundingBox())
+
+        self._engines = {}
+        self._grids = {}
+
+    def _engine(self, part_id):
+        """The prepared geometry of a part.
+
+        :param part_id: The index of the part.
+        :type part_id: int
+
+        :return: The geometry engine.
+        :rtype: QgsGeometryEngine
+        """
+        engine = self._engines.get(part_id)
+        if engine is None:
+            # noinspection PyArgumentList
+            engine = QgsGeometry.createGeometryEngine(
+                self.parts[part_id].constGet())
+            engine.prepareGeometry()
+            self._engines[part_id] = engine
+        return engine
+
+    def _grid(self, part_id):
+        """The interior grid of a part.
+
+        :param part_id: The index of the part.
+        :type part_id: int
+
+        :return: A tuple with the extent of the part, the width and the
+            height of a cell and the set of cells, as (column, row), fully
+            inside the part. None if the part has no area.
+        :rtype: tuple
+        """
+        if part_id in self._grids:
+            return self._grids[part_id]
+
+        extent = self.parts[part_id].boundingBox()
+        width = extent.width() / self.grid_size
+        height = extent.height() / self.grid_size
+        grid = None
+        if width > 0 and height > 0:
+            engine = self._engine(part_id)
+            cells = set()
+            for column in range(self.grid_size):
+                for row in range(self.grid_size):
+                    x = extent.xMinimum() + column * width
+                    y = extent.yMinimum() + row * height
+                    cell = QgsGeometry.fromRect(
+                        QgsRectangle(x, y, x + width, y + height))
+                    if engine.contains(cell.constGet()):
+                        cells.add((column, row))
+            if cells:
+                grid = (extent, width, height, cells)
+        self._grids[part_id] = grid
+        return grid
+
+    def _in_interior(self, part_id, box):
+        """Check if a bounding box is covered by interior cells of a part.
+
+        :param part_id: The index of the part.
+        :type part_id: int
+
+        :param box: The bounding box.
+        :type box: QgsRectangle
+
+        :return: True if the box is inside the part.
+        :rtype: bool
+        """
+        grid = self._grid(part_id)
+        if grid is None:
+            return False
+        extent, width, height, cells = grid
+        column_min = floor((box.xMinimum() - extent.xMinimum()) / width)
+        column_max = floor((box.xMaximum() - extent.xMinimum()) / width)
+        row_min = floor((box.yMinimum() - extent.yMinimum()) / height)
+        row_max = floor((box.yMaximum() - extent.yMinimum()) / height)
+        if (column_max - column_min + 1) * (row_max - row_min + 1) > (
+                self.max_cells):
+            return False
+        for column in range(column_min, column_max + 1):
+            for row in range(row_min, row_max + 1):
+                if (column, row) not in cells:
+                    return False
+        return True
+
+    def intersects(self, geometry):
+        """Check if a geometry intersects the mask.
+
+        :param geometry: The geometry, in the CRS of the mask.
+        :type geometry: QgsGeometry
+
+        :return: True if the geometry intersects the mask.
+        :rtype: bool
+        """
+        box = geometry.boundingBox()
+        for part_id in self._index.intersects(box):
+            if self._in_interior(part_id, box):
+                return True
+            if self._engine(part_id).intersects(geometry.constGet()):
+                return True
+        return False
+
+
 class SizeCalculator():
 
-    """Special object to handle size calculation with an output unit."""
+    """Special object to handle size calculation with an output unit.
+
+    Sizes are measured on the WGS84 ellipsoid. If the CRS is projected and
+    its scale error is below SIZE_TOLERANCE over its area of use, like an
+    equal-area projection or a local projection such as UTM, sizes are
+    measured on the plane, which is much faster.
+    """
 
     def __init__(
             self, coordinate_reference_system, geometry_type, exposure_key):
@@ -460,6 +834,83 @@ class SizeCalculator():
             exposure_definition = definition(exposure_key)
             self.output_unit = exposure_definition['size_unit']
 
+        # Computed once instead of calling convert_unit for each feature.
+        self.unit_factor = 1
+        if self.output_unit and self.output_unit != self.default_unit:
+            self.unit_factor = convert_unit(
+                1.0, self.default_unit, self.output_unit)
+
+        self.planar_factor = self._planar_factor(coordinate_reference_system)
+        if self.planar_factor:
+            LOGGER.info('The size calculator is measuring on the plane.')
+
+    def _planar_factor(self, crs):
+        """Factor to convert a planar size in the CRS to the default unit.
+
+        Small squares and segments are sampled over the area of use of the
+        CRS and measured both on the plane and on the ellipsoid.
+
+        :param crs: The Coordinate Reference System of the layer.
+        :type crs: QgsCoordinateReferenceSystem
+
+        :return: The factor or None if the sizes must be measured on the
+            ellipsoid.
+        :rtype: float
+        """
+        if not crs.isValid() or crs.isGeographic():
+            return None
+        if crs.mapUnits() == QgsUnitTypes.DistanceUnknownUnit:
+            return None
+        bounds = crs.bounds()
+        if bounds.isEmpty():
+            return None
+
+        lines = self.geometry_type == QgsWkbTypes.LineGeometry
+        factor = QgsUnitTypes.fromUnitToUnitFactor(
+            crs.mapUnits(), QgsUnitTypes.DistanceMeters)
+        if not lines:
+            factor **= 2
+
+        transform = QgsCoordinateTransform(
+            QgsCoordinateReferenceSystem('EPSG:4326'),
+            crs,
+            QgsProject.instance())
+        step = 0.01
+        for x_ratio in [0.05, 0.5, 0.95]:
+            for y_ratio in [0.05, 0.5, 0.95]:
+                x = bounds.xMinimum() + x_ratio * bounds.width()
+                y = bounds.yMinimum() + y_ratio * bounds.height()
+                square = QgsGeometry.fromPolygonXY([[
+                    QgsPointXY(x, y),
+                    QgsPointXY(x + step, y),
+                    QgsPointXY(x + step, y + step),
+                    QgsPointXY(x, y + step),
+                    QgsPointXY(x, y)]])
+                try:
+                    square.transform(transform)
+                except QgsCsException:
+                    return None
+                if lines:
+                    ring = square.asPolygon()[0]
+                    samples = [
+                        QgsGeometry.fromPolylineXY(ring[0:2]),
+                        QgsGeometry.fromPolylineXY(ring[1:3])]
+                else:
+                    samples = [square]
+                for sample in samples:
+                    if lines:
+                        planar = sample.length()
+                        ellipsoidal = self.calculator.measureLength(sample)
+                    else:
+                        planar = sample.area()
+                        ellipsoidal = self.calculator.measureArea(sample)
+                    if isnan(ellipsoidal) or not ellipsoidal:
+                        return None
+                    error = abs(planar * factor / ellipsoidal - 1)
+                    if error > SIZE_TOLERANCE:
+                        return None
+        return factor
+
     def measure_distance(self, point_a, point_b):
         """Measure the distance between two points.
 
@@ -485,25 +936,85 @@ class SizeCalculator():
         :return: The geometric size in the expected exposure unit.
         :rtype: float
         """
+        return self.measure_many([geometry])[0]
+
+    def measure_many(self, geometries):
+        """Measure the length or the area of many geometries.
+
+        .. versionadded:: 5.0
+
+        :param geometries: The geometries.
+        :type geometries: list(QgsGeometry)
+
+        :return: The geometric sizes in the expected exposure unit.
+        :rtype: list(float)
+        """
+        lines = self.geometry_type == QgsWkbTypes.LineGeometry
+        sizes = []
+        for geometry in geometries:
+            if self.planar_factor:
+                if lines:
+                    feature_size = geometry.length() * self.planar_factor
+                else:
+                    feature_size = geometry.area() * self.planar_factor
+            else:
+                feature_size = self._measure_ellipsoid(geometry, lines)
+
+            feature_size = round(feature_size)
+            if self.unit_factor is None:
+                # The units can not be converted.
+                feature_size = None
+            elif self.unit_factor != 1:
+                feature_size *= self.unit_factor
+            sizes.append(feature_size)
+        return sizes
+
+    def _measure_ellipsoid(self, geometry, lines):
+        """Measure a geometry on the ellipsoid.
+
+        :param geometry: The geometry.
+        :type geometry: QgsGeometry
+
+        :param lines: If we measure a length instead of an area.
+        :type lines: bool
+
+        :return: The geometric size in the default unit.
+        :rtype: float
+        """
         message = 'Size with NaN value : geometry valid={valid}, WKT={wkt}'
         feature_size = 0
-        if geometry.isMultipart():
+        if geometry.isMultipart() and not QgsWkbTypes.isCurvedType(
+                geometry.wkbType()):
             # Be careful, the size calculator is not working well on a
-            # multipart.
-            # So we compute the size part per part. See ticket #3812
+            # multipart. See ticket #3812
+            # So we compute the size part per part, from their vertices.
+            sizes = []
+            if lines:
+                for line in geometry.asMultiPolyline():
+                    sizes.append(self.calculator.measureLine(line))
+            elif self.geometry_type == QgsWkbTypes.PolygonGeometry:
+                for polygon in geometry.asMultiPolygon():
+                    area = self.calculator.measurePolygon(polygon[0])
+                    for ring in polygon[1:]:
+                        area -= self.calculator.measurePolygon(ring)
+                    sizes.append(area)
+            for geometry_size in sizes:
+                if not isnan(geometry_size):
+                    feature_size += geometry_size
+                else:
+                    LOGGER.debug(message.format(
+                        valid=geometry.isGeosValid(),
+                        wkt=geometry.asWkt()))
+        elif geometry.isMultipart():
             for single in geometry.asGeometryCollection():
-                if self.geometry_type == QgsWkbTypes.LineGeometry:
+                if lines:
                     geometry_size = self.calculator.measureLength(single)
                 else:
                     geometry_size = self.calculator.measureArea(single)
                 if not isnan(geometry_size):
                     feature_size += geometry_size
-                else:
-                    LOGGER.debug(message.format(
-                        valid=single.isGeosValid(),
-                        wkt=single.asWkt()))
         else:
-            if self.geometry_type == QgsWkbTypes.LineGeometry:
+            if lines:
                 geometry_size = self.calculator.measureLength(geometry)
             else:
                 geometry_size = self.calculator.measureArea(geometry)
@@ -513,12 +1024,4 @@ class SizeCalculator():
                 LOGGER.debug(message.format(
                     valid=geometry.isGeosValid(),
                     wkt=geometry.asWkt()))
-
-        feature_size = round(feature_size)
-
-        if self.output_unit:
-            if self.output_unit != self.default_unit:
-                feature_size = convert_unit(
-                    feature_size, self.default_unit, self.output_unit)
-
         return feature_size
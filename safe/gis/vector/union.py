@@ -1,25 +1,35 @@
 # coding=utf-8
 
-"""Clip and mask a hazard layer."""
+"""Union of the hazard and the aggregation layers.
 
-import logging
+The aggregation areas do not overlap, so the union is computed area by area.
+For each aggregation area, the hazard candidates are found with a spatial
+index and intersected with the prepared geometry of the area. The part of
+the area not covered by any hazard is the difference between the area and
+the hazard pieces, it is tagged as not exposed in the same pass.
+"""
 
-import processing
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from qgis.core import (
-    QgsFeatureRequest
+    QgsFeature,
+    QgsGeometry,
+    QgsWkbTypes,
 )
 
-from safe.common.exceptions import ProcessingInstallationError
 from safe.definitions.fields import hazard_class_field
 from safe.definitions.hazard_classifications import not_exposed_class
 from safe.definitions.processing_steps import union_steps
+from safe.gis.processing_tools import check_cancelled
 from safe.gis.sanity_check import check_layer
+from safe.gis.vector.tools import (
+    combine_fields,
+    create_memory_layer,
+    create_spatial_index,
+    geometry_part,
+)
 from safe.utilities.profiling import profile
-from safe.gis.processing_tools import (
-    create_processing_context,
-    create_processing_feedback,
-    initialize_processing)
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
 __license__ = "GPL version 3"
@@ -28,20 +38,39 @@ __revision__ = '$Format:%H$'
 
 LOGGER = logging.getLogger('InaSAFE')
 
+BATCH_SIZE = 10000
+
+# Relative tolerance to decide if a hazard polygon is fully inside the
+# aggregation areas.
+AREA_TOLERANCE = 1e-9
+
 
 @profile
-def union(union_a, union_b):
-    """Union of two vector layers.
+def union(union_a, union_b, workers=1, feedback=None):
+    """Union of the hazard layer and the aggregation layer.
 
     Issue https://github.com/inasafe/inasafe/issues/3186
 
-    :param union_a: The vector layer for the union.
+    The output has the same schema as the native:union algorithm: the fields
+    of the hazard then the fields of the aggregation, renamed with a suffix
+    if the name is already used. The hazard class is set to not exposed
+    where there is no hazard.
+
+    :param union_a: The hazard layer.
     :type union_a: QgsVectorLayer
 
-    :param union_b: The vector layer for the union.
+    :param union_b: The aggregation layer. Its polygons must not overlap.
     :type union_b: QgsVectorLayer
 
-    :return: The clip vector layer.
+    :param workers: Number of threads used to process the aggregation
+        areas. Default to 1.
+    :type workers: int
+
+    :param feedback: The feedback of the analysis, checked for each
+        aggregation area.
+    :type feedback: AnalysisFeedback
+
+    :return: The union vector layer.
     :rtype: QgsVectorLayer
 
     .. versionadded:: 4.0
@@ -54,27 +83,102 @@ def union(union_a, union_b):
 
     keywords_union_1 = union_a.keywords
     keywords_union_2 = union_b.keywords
-    inasafe_fields_union_1 = keywords_union_1['inasafe_fields']
-    inasafe_fields_union_2 = keywords_union_2['inasafe_fields']
-    inasafe_fields = inasafe_fields_union_1
-    inasafe_fields.update(inasafe_fields_union_2)
-
-    parameters = {'INPUT': union_a,
-                  'OVERLAY': union_b,
-                  'OUTPUT': 'memory:'}
-
-    # TODO implement callback through QgsProcessingFeedback object
-
-    initialize_processing()
-
-    feedback = create_processing_feedback()
-    context = create_processing_context(feedback=feedback)
-    result = processing.run('native:union', parameters, context=context)
-    if result is None:
-        raise ProcessingInstallationError
-
-    union_layer = result['OUTPUT']
-    union_layer.setName(output_layer_name)
+    inasafe_fields = dict(keywords_union_1['inasafe_fields'])
+    inasafe_fields.update(keywords_union_2['inasafe_fields'])
+
+    fields = combine_fields(union_a.fields(), union_b.fields())
+    hazard_name = inasafe_fields[hazard_class_field['key']]
+    hazard_index = fields.lookupField(hazard_name)
+    hazard_count = union_a.fields().count()
+    empty_hazard = [None] * hazard_count
+    empty_aggregation = [None] * union_b.fields().count()
+
+    hazards = {}
+    for feature in union_a.getFeatures():
+        if feature.hasGeometry():
+            hazards[feature.id()] = (
+                feature.geometry(), feature.attributes())
+    spatial_index = create_spatial_index(union_a)
+
+    areas = [
+        (feature.geometry(), feature.attributes())
+        for feature in union_b.getFeatures() if feature.hasGeometry()]
+
+    def candidates(area, copy=False):
+        """The aggregation area and its hazard candidates.
+
+        The spatial index is only used by the calling thread. With a copy,
+        the geometries are not shared with another thread.
+        """
+        geometry = area[0]
+        hazard_ids = spatial_index.intersects(geometry.boundingBox())
+        if not copy:
+            return geometry, [
+                (hazard_id, hazards[hazard_id][0])
+                for hazard_id in hazard_ids]
+        return QgsGeometry(geometry.constGet().clone()), [
+            (hazard_id, QgsGeometry(hazards[hazard_id][0].constGet().clone()))
+            for hazard_id in hazard_ids]
+
+    def overlay(area_and_candidates):
+        """Split an aggregation area by the hazard."""
+        check_cancelled(feedback)
+        return overlay_area(*area_and_candidates)
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                overlay, [candidates(area, copy=True) for area in areas]))
+    else:
+        results = [overlay(candidates(area)) for area in areas]
+
+    union_layer = create_memory_layer(
+        output_layer_name,
+        QgsWkbTypes.PolygonGeometry,
+        union_a.crs(),
+        fields)
+    provider = union_layer.dataProvider()
+
+    features = []
+    covered_areas = {}
+
+    def add_feature(geometry, attributes):
+        """Add a feature to the output, by batch."""
+        value = attributes[hazard_index]
+        if value is None or value == '' or (
+                hasattr(value, 'isNull') and value.isNull()):
+            attributes[hazard_index] = not_exposed_class['key']
+        geometry.convertToMultiType()
+        feature = QgsFeature()
+        feature.setGeometry(geometry)
+        feature.setAttributes(attributes)
+        features.append(feature)
+        if len(features) == BATCH_SIZE:
+            provider.addFeatures(features)
+            del features[:]
+
+    for (_, area_attributes), (pieces, remainder) in zip(areas, results):
+        for hazard_id, piece in pieces:
+            covered_areas[hazard_id] = (
+                covered_areas.get(hazard_id, 0) + piece.area())
+            add_feature(piece, hazards[hazard_id][1] + area_attributes)
+        if remainder:
+            add_feature(remainder, empty_hazard + area_attributes)
+
+    # Parts of the hazard outside of the aggregation, like native:union.
+    aggregation_geometries = [area[0] for area in areas]
+    for hazard_id, (geometry, attributes) in list(hazards.items()):
+        check_cancelled(feedback)
+        hazard_area = geometry.area()
+        covered = covered_areas.get(hazard_id, 0)
+        if hazard_area - covered <= AREA_TOLERANCE * hazard_area:
+            continue
+        outside = outside_areas(geometry, aggregation_geometries)
+        if outside:
+            add_feature(outside, attributes + empty_aggregation)
+
+    provider.addFeatures(features)
+    union_layer.updateExtents()
 
     # use to avoid modifying original source
     union_layer.keywords = dict(union_a.keywords)
@@ -84,36 +188,67 @@ def union(union_a, union_b):
     union_layer.keywords['hazard_keywords'] = keywords_union_1.copy()
     union_layer.keywords['aggregation_keywords'] = keywords_union_2.copy()
 
-    fill_hazard_class(union_layer)
-
     check_layer(union_layer)
     return union_layer
 
 
-@profile
-def fill_hazard_class(layer):
-    """We need to fill hazard class when it's empty.
+def overlay_area(area, hazards):
+    """Split an aggregation area by the hazard polygons.
 
-    :param layer: The vector layer.
-    :type layer: QgsVectorLayer
+    :param area: The geometry of the aggregation area.
+    :type area: QgsGeometry
 
-    :return: The updated vector layer.
-    :rtype: QgsVectorLayer
+    :param hazards: List of tuples with the feature id and the geometry of
+        the hazard features which may intersect the area.
+    :type hazards: list
 
-    .. versionadded:: 4.0
+    :return: A tuple with the list of hazard pieces, as tuples of hazard
+        feature id and geometry, and the part of the area without hazard or
+        None.
+    :rtype: tuple
     """
-    hazard_field = layer.keywords['inasafe_fields'][hazard_class_field['key']]
-
-    expression = '"%s" is NULL OR  "%s" = \'\'' % (hazard_field, hazard_field)
-    index = layer.fields().lookupField(hazard_field)
-    request = QgsFeatureRequest().setFilterExpression(expression)
-    layer.startEditing()
-
-    for feature in layer.getFeatures(request):
-        layer.changeAttributeValue(
-            feature.id(),
-            index,
-            not_exposed_class['key'])
-    layer.commitChanges()
-
-    return layer
+    # noinspection PyArgumentList
+    engine = QgsGeometry.createGeometryEngine(area.constGet())
+    engine.prepareGeometry()
+
+    pieces = []
+    for hazard_id, geometry in hazards:
+        if not engine.intersects(geometry.constGet()):
+            continue
+        if engine.contains(geometry.constGet()):
+            piece = QgsGeometry(geometry)
+        else:
+            piece = geometry_part(
+                geometry.intersection(area), QgsWkbTypes.PolygonGeometry)
+        if piece:
+            pieces.append((hazard_id, piece))
+
+    if not pieces:
+        return pieces, QgsGeometry(area)
+
+    covered = QgsGeometry.unaryUnion([piece for _, piece in pieces])
+    remainder = geometry_part(
+        area.difference(covered), QgsWkbTypes.PolygonGeometry)
+    return pieces, remainder
+
+
+def outside_areas(geometry, areas):
+    """The part of a hazard polygon outside of the aggregation areas.
+
+    :param geometry: The hazard geometry.
+    :type geometry: QgsGeometry
+
+    :param areas: The geometries of the aggregation areas.
+    :type areas: list(QgsGeometry)
+
+    :return: The part outside of the areas or None.
+    :rtype: QgsGeometry
+    """
+    box = geometry.boundingBox()
+    candidates = [
+        area for area in areas if area.boundingBox().intersects(box)]
+    if not candidates:
+        return QgsGeometry(geometry)
+    return geometry_part(
+        geometry.difference(QgsGeometry.unaryUnion(candidates)),
+        QgsWkbTypes.PolygonGeometry)
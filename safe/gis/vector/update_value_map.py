@@ -2,7 +2,7 @@
 
 """Reclassify a continuous vector layer."""
 
-from qgis.core import QgsField
+from qgis.core import QgsField, QgsFeatureRequest
 
 from safe.common.exceptions import InvalidKeywordsForProcessingAlgorithm
 from safe.definitions.fields import (
@@ -15,7 +15,7 @@ from safe.definitions.layer_purposes import (
     layer_purpose_hazard, layer_purpose_exposure)
 from safe.definitions.processing_steps import assign_inasafe_values_steps
 from safe.gis.sanity_check import check_layer
-from safe.gis.vector.tools import remove_fields
+from safe.gis.vector.tools import remove_fields, AttributeWriter
 from safe.utilities.metadata import (
     active_thresholds_value_maps, active_classification)
 from safe.utilities.profiling import profile
@@ -88,13 +88,13 @@ def update_value_map(layer, exposure_key=None):
     classified_field.setLength(new_field['length'])
     classified_field.setPrecision(new_field['precision'])
 
-    layer.startEditing()
-    layer.addAttribute(classified_field)
+    writer = AttributeWriter(layer)
+    classified_field_index = writer.addAttribute(classified_field)
 
-    classified_field_index = layer.fields(). \
-        lookupField(classified_field.name())
-
-    for feature in layer.getFeatures():
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes([unclassified_index])
+    for feature in layer.getFeatures(request):
         attributes = feature.attributes()
         source_value = attributes[unclassified_index]
         classified_value = reversed_value_map.get(source_value)
@@ -102,10 +102,10 @@ def update_value_map(layer, exposure_key=None):
         if not classified_value:
             classified_value = ''
 
-        layer.changeAttributeValue(
+        writer.changeAttributeValue(
             feature.id(), classified_field_index, classified_value)
 
-    layer.commitChanges()
+    writer.commitChanges()
 
     remove_fields(layer, [unclassified_column])
 
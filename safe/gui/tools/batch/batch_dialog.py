@@ -44,6 +44,7 @@ from safe.common.signals import send_error_message
 from safe.common.utilities import temp_dir
 from safe.datastore.folder import Folder
 from safe.definitions.constants import (
+    ANALYSIS_CANCELLED,
     ANALYSIS_FAILED_BAD_CODE,
     ANALYSIS_FAILED_BAD_INPUT,
     ANALYSIS_SUCCESS,
@@ -61,6 +62,7 @@ from safe.definitions.reports.components import (
 )
 from safe.definitions.utilities import update_template_component
 from safe.gui.tools.help.batch_help import batch_help
+from safe.impact_function.analysis_task import AnalysisTask, run_and_wait
 from safe.impact_function.impact_function import ImpactFunction
 from safe.messaging import styles
 from safe.report.impact_report import ImpactReport
@@ -157,6 +159,9 @@ class BatchDialog(QDialog, FORM_CLASS):
         # Set up new project settings
         self.start_in_new_project = False
 
+        # The status of the scenario being analysed in a background task.
+        self.running_status_item = None
+
         # Set up context help
         self.help_button = self.button_box.button(QDialogButtonBox.Help)
         # Allow toggling the help button
@@ -501,7 +506,14 @@ class BatchDialog(QDialog, FORM_CLASS):
             prepare_status, prepare_message = impact_function.prepare()
             if prepare_status == PREPARE_SUCCESS:
                 LOGGER.info('Impact function ready')
-                status, message = impact_function.run()
+                # The analysis runs in a background task, its progress is
+                # displayed in the status of the scenario.
+                task = AnalysisTask(impact_function)
+                self.running_status_item = status_item
+                task.progressChanged.connect(
+                    self.task_progress, Qt.QueuedConnection)
+                status, message = run_and_wait(task)
+                self.running_status_item = None
                 if status == ANALYSIS_SUCCESS:
                     status_item.setText(self.tr('Analysis Success'))
                     impact_layer = impact_function.impact
@@ -549,6 +561,10 @@ class BatchDialog(QDialog, FORM_CLASS):
                     else:
                         LOGGER.info('Impact layer is invalid')
 
+                elif status == ANALYSIS_CANCELLED:
+                    status_item.setText(self.tr('Analysis cancelled'))
+                    LOGGER.info('Analysis cancelled')
+
                 elif status == ANALYSIS_FAILED_BAD_INPUT:
                     LOGGER.info('Bad input detected')
 
@@ -567,6 +583,21 @@ class BatchDialog(QDialog, FORM_CLASS):
         self.disable_busy_cursor()
         return result
 
+    @pyqtSlot(float)
+    def task_progress(self, progress):
+        """Display the progress of the analysis task in the status.
+
+        The task emits its progress from its own thread, the slot runs in
+        the thread of the dialog.
+
+        :param progress: The progress of the task, in percent.
+        :type progress: float
+        """
+        if self.running_status_item is not None:
+            self.running_status_item.setText(
+                self.tr('Running {progress}%').format(
+                    progress=int(progress)))
+
     def show_parser_results(self, parsed_list, unparsed_list):
         """Compile a formatted list of un/successfully parsed files.
 
@@ -69,6 +69,7 @@ class MultiBufferDialog(QtWidgets.QDialog, FORM_CLASS):
         self.output_form.setPlaceholderText(
             self.tr('[Create a temporary layer]'))
         self.keyword_wizard_checkbox.setChecked(True)
+        self.keep_sources_checkbox.setChecked(False)
 
         # set signal
         self.layer.layerChanged.connect(self.directory_button_status)
@@ -113,8 +114,12 @@ class MultiBufferDialog(QtWidgets.QDialog, FORM_CLASS):
         # monkey patch keywords so layer works on multi buffering function
         input_layer.keywords = {'inasafe_fields': {}}
 
-        # run multi buffering
-        self.output_layer = multi_buffering(input_layer, radius)
+        # run multi buffering, the rings are dissolved unless the user wants
+        # to keep the rings and the attributes of each feature
+        self.output_layer = multi_buffering(
+            input_layer,
+            radius,
+            keep_sources=self.keep_sources_checkbox.isChecked())
 
         # save output layer to data store and check whether user
         # provide the output path.
@@ -29,6 +29,7 @@ from safe.common.exceptions import (
 from safe.common.signals import send_error_message
 from safe.definitions.constants import (
     inasafe_keyword_version_key,
+    ANALYSIS_CANCELLED,
     ANALYSIS_FAILED_BAD_INPUT,
     PREPARE_SUCCESS,
     ANALYSIS_FAILED_BAD_CODE,
@@ -57,6 +58,7 @@ from safe.gui.widgets.message import (
     send_static_message,
     ready_message,
 )
+from safe.impact_function.analysis_task import AnalysisTask, run_and_wait
 from safe.impact_function.impact_function_utilities import (
     LAYER_ORIGIN_ROLE,
     FROM_CANVAS,
@@ -489,9 +491,11 @@ class MultiExposureDialog(QDialog, FORM_CLASS):
         if message is not None:
             report.add(m.ImportantText(message['name']))
             report.add(m.Paragraph(message['description']))
-        report.add(
-            self._multi_exposure_if
-                .current_impact_function.performance_log_message())
+        # The progress is relayed from the analysis task, the current
+        # impact function may have finished meanwhile.
+        impact_function = self._multi_exposure_if.current_impact_function
+        if impact_function is not None:
+            report.add(impact_function.performance_log_message())
         send_static_message(self, report)
         self.progress_bar.setMaximum(maximum_value)
         self.progress_bar.setValue(current_value)
@@ -553,9 +557,19 @@ class MultiExposureDialog(QDialog, FORM_CLASS):
         self.set_enabled_buttons(False)
         enable_busy_cursor()
         try:
-            code, message, exposure = self._multi_exposure_if.run()
+            # The analysis runs in a background task, it can be cancelled
+            # from the task manager.
+            task = AnalysisTask(self._multi_exposure_if)
+            task.progressMessage.connect(self.progress_callback)
+            code, message, exposure = run_and_wait(task)
             message = basestring_to_message(message)
-            if code == ANALYSIS_FAILED_BAD_INPUT:
+            if code == ANALYSIS_CANCELLED:
+                LOGGER.info(tr('The analysis has been cancelled.'))
+                send_error_message(self, message)
+                disable_busy_cursor()
+                self.set_enabled_buttons(True)
+                return code, message
+            elif code == ANALYSIS_FAILED_BAD_INPUT:
                 LOGGER.warning(tr(
                     'The impact function could not run because of the inputs.'
                 ))
@@ -47,6 +47,7 @@ from safe.definitions.utilities import (
 from safe.gui.tools.help.options_help import options_help
 from safe.gui.tools.help.welcome_message import welcome_message
 from safe.gui.widgets.profile_widget import ProfileWidget
+from safe.impact_function.partitioned_analysis import partition_cache
 from safe.utilities.default_values import (
     set_inasafe_default_value_qsetting, get_inasafe_default_value_qsetting)
 from safe.utilities.i18n import tr
@@ -449,6 +450,9 @@ class OptionsDialog(QDialog, FORM_CLASS):
         # Save population parameters
         self.save_population_parameters()
 
+        # The outputs of the previous analysis may depend on the options.
+        partition_cache.clear()
+
     def accept(self):
         """Method invoked when OK button is clicked."""
         self.save_state()
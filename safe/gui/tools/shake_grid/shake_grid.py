@@ -49,6 +49,7 @@ from safe.definitions.extra_keywords import (
     extra_keyword_earthquake_event_time,
     extra_keyword_earthquake_event_id,
 )
+from safe.definitions.fields import contour_fields
 from safe.definitions.hazard import hazard_earthquake
 from safe.definitions.hazard_category import hazard_category_single_event
 from safe.definitions.hazard_classifications import (
@@ -60,7 +61,8 @@ from safe.definitions.units import unit_mmi
 from safe.definitions.utilities import default_classification_thresholds
 from safe.definitions.versions import inasafe_keyword_version
 from safe.gis.raster.contour import (
-    gaussian_kernel, convolve, set_contour_properties)
+    gaussian_kernel, convolve, generate_contours)
+from safe.gis.vector.tools import create_ogr_field_from_definition
 from safe.utilities.i18n import tr
 from safe.utilities.keyword_io import KeywordIO
 from safe.utilities.resources import resources_path
@@ -767,58 +769,15 @@ class ShakeGrid():
                 'does not already exist and that you do not have file system '
                 'permissions issues' % output_file)
         layer = ogr_dataset.CreateLayer('contour')
-        field_definition = ogr.FieldDefn('ID', ogr.OFTInteger)
-        layer.CreateField(field_definition)
-        field_definition = ogr.FieldDefn('MMI', ogr.OFTReal)
-        layer.CreateField(field_definition)
-        # So we can fix the x pos to the same x coord as centroid of the
-        # feature so labels line up nicely vertically
-        field_definition = ogr.FieldDefn('X', ogr.OFTReal)
-        layer.CreateField(field_definition)
-        # So we can fix the y pos to the min y coord of the whole contour so
-        # labels line up nicely vertically
-        field_definition = ogr.FieldDefn('Y', ogr.OFTReal)
-        layer.CreateField(field_definition)
-        # So that we can set the html hex colour based on its MMI class
-        field_definition = ogr.FieldDefn('RGB', ogr.OFTString)
-        layer.CreateField(field_definition)
-        # So that we can set the label in it roman numeral form
-        field_definition = ogr.FieldDefn('ROMAN', ogr.OFTString)
-        layer.CreateField(field_definition)
-        # So that we can set the label horizontal alignment
-        field_definition = ogr.FieldDefn('ALIGN', ogr.OFTString)
-        layer.CreateField(field_definition)
-        # So that we can set the label vertical alignment
-        field_definition = ogr.FieldDefn('VALIGN', ogr.OFTString)
-        layer.CreateField(field_definition)
-        # So that we can set feature length to filter out small features
-        field_definition = ogr.FieldDefn('LEN', ogr.OFTReal)
-        layer.CreateField(field_definition)
+        for contour_field in contour_fields:
+            layer.CreateField(create_ogr_field_from_definition(contour_field))
 
         tif_dataset = gdal.Open(tif_path, GA_ReadOnly)
-        # see http://gdal.org/java/org/gdal/gdal/gdal.html for these options
         band = 1
-        contour_interval = 0.5
-        contour_base = 0
-        fixed_level_list = []
-        use_no_data_flag = 0
-        no_data_value = -9999
-        id_field = 0  # first field defined above
-        elevation_field = 1  # second (MMI) field defined above
         try:
-            gdal.ContourGenerate(
-                tif_dataset.GetRasterBand(band),
-                contour_interval,
-                contour_base,
-                fixed_level_list,
-                use_no_data_flag,
-                no_data_value,
-                layer,
-                id_field,
-                elevation_field)
-        except Exception as e:
-            LOGGER.exception('Contour creation failed')
-            raise ContourCreationError(str(e))
+            # The X, Y, RGB, ROMAN, ALIGN, VALIGN and LEN attributes are
+            # written with the contours.
+            generate_contours(tif_dataset.GetRasterBand(band), layer)
         finally:
             del tif_dataset
             ogr_dataset.Release()
@@ -839,12 +798,6 @@ class ShakeGrid():
         source_qml_path = resources_path('converter_data', 'mmi-contours.qml')
         shutil.copyfile(source_qml_path, qml_path)
 
-        # Now update the additional columns - X,Y, ROMAN and RGB
-        try:
-            set_contour_properties(output_file)
-        except InvalidLayerError:
-            raise
-
         return output_file
 
     def create_keyword_file(self, algorithm):
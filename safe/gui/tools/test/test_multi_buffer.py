@@ -33,12 +33,15 @@ class MultiBufferTest(unittest.TestCase):
             # With the test_temp_output test, these files don't exist.
             pass
 
-    def multi_buffer_test(self, output_path):
+    def multi_buffer_test(self, output_path, keep_sources=False):
         """Function to test the functionality of multi buffer tool.
 
         :param output_path: The output path given by user on multi buffer
                             dialog.
         :type output_path: str
+
+        :param keep_sources: If the rings of each feature are kept.
+        :type keep_sources: bool
         """
         dialog = MultiBufferDialog(PARENT, IFACE)
         layer = load_test_vector_layer('hazard', 'volcano_point.geojson')
@@ -66,6 +69,10 @@ class MultiBufferTest(unittest.TestCase):
         # don't launch keyword wizard. otherwise, the test will hang
         dialog.keyword_wizard_checkbox.setChecked(False)
 
+        # the rings are dissolved by default
+        self.assertFalse(dialog.keep_sources_checkbox.isChecked())
+        dialog.keep_sources_checkbox.setChecked(keep_sources)
+
         dialog.accept()
 
         layer = dialog.data_store.layer(dialog.output_filename)
@@ -82,6 +89,11 @@ class MultiBufferTest(unittest.TestCase):
 
         self.assertEqual(expected_fields_name, new_field_names)
 
+        if keep_sources:
+            source = next(dialog.layer.currentLayer().getFeatures())
+            for feature in layer.getFeatures():
+                self.assertEqual(feature[0], source[0])
+
         # We need to clean generated files
 
     def test_temp_output(self):
@@ -94,6 +106,12 @@ class MultiBufferTest(unittest.TestCase):
         """Test the multi buffer tool if user provide specific output path."""
         self.multi_buffer_test(self.output_path)
 
+    def test_keep_sources(self):
+        """Test the multi buffer tool if user keeps the rings of each
+           feature.
+        """
+        self.multi_buffer_test('', keep_sources=True)
+
     # This test is failing on some QGIS docker image used for testing.
     @unittest.skipIf(
         os.environ.get('ON_TRAVIS', False),
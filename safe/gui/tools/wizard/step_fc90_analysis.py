@@ -16,6 +16,7 @@ from qgis.core import (
 from safe import messaging as m
 from safe.common.signals import send_static_message, send_error_message
 from safe.definitions.constants import (
+    ANALYSIS_CANCELLED,
     ANALYSIS_FAILED_BAD_INPUT,
     ANALYSIS_FAILED_BAD_CODE,
     ANALYSIS_SUCCESS,
@@ -31,6 +32,7 @@ from safe.gui.analysis_utilities import add_impact_layers_to_canvas
 from safe.gui.tools.wizard.wizard_step import WizardStep
 from safe.gui.tools.wizard.wizard_step import get_wizard_step_ui_class
 from safe.gui.widgets.message import enable_messaging
+from safe.impact_function.analysis_task import AnalysisTask, run_and_wait
 from safe.impact_function.impact_function import ImpactFunction
 from safe.messaging import styles
 from safe.report.impact_report import ImpactReport
@@ -155,11 +157,19 @@ class StepFcAnalysis(WizardStep, FORM_CLASS):
             send_error_message(self, message)
             return status, message
 
-        # Start the analysis
-        status, message = self.impact_function.run()
+        # Start the analysis in a background task, the wizard stays
+        # responsive and the analysis can be cancelled.
+        task = AnalysisTask(self.impact_function)
+        task.progressMessage.connect(self.progress_callback)
+        status, message = run_and_wait(task)
         message = basestring_to_message(message)
         # Check status
-        if status == ANALYSIS_FAILED_BAD_INPUT:
+        if status == ANALYSIS_CANCELLED:
+            self.hide_busy()
+            LOGGER.info(tr('The analysis has been cancelled.'))
+            send_error_message(self, message)
+            return status, message
+        elif status == ANALYSIS_FAILED_BAD_INPUT:
             self.hide_busy()
             LOGGER.warning(tr(
                 'The impact function could not run because of the inputs.'))
@@ -7,10 +7,10 @@ import logging
 # noinspection PyPackageRequirements
 from qgis.PyQt import QtCore
 from qgis.PyQt.QtWidgets import QListWidgetItem
-from qgis.core import QgsRasterBandStats
 
 from safe.gui.tools.wizard.wizard_step import (
     get_wizard_step_ui_class, WizardStep)
+from safe.utilities.field_statistics import field_statistics
 from safe.utilities.i18n import tr
 
 LOGGER = logging.getLogger('InaSAFE')
@@ -36,6 +36,7 @@ class StepKwBandSelector(WizardStep, FORM_CLASS):
         WizardStep.__init__(self, parent)
         self.lstBands.itemSelectionChanged.connect(
             self.update_band_description)
+        field_statistics.statisticsReady.connect(self.statistics_ready)
 
     def is_ready_to_next_step(self):
         """Check if the step is complete.
@@ -58,20 +59,39 @@ class StepKwBandSelector(WizardStep, FORM_CLASS):
     def update_band_description(self):
         """Helper to update band description."""
         self.clear_further_steps()
-        # Set widgets
+        self.describe_band()
+
+    def describe_band(self):
+        """Describe the selected band.
+
+        The range is computed on a sample of a large raster first, the
+        description is updated when the exact range is computed.
+        """
         selected_band = self.selected_band()
-        statistics = self.parent.layer.dataProvider().bandStatistics(
-            selected_band,
-            QgsRasterBandStats.All,
-            self.parent.layer.extent(),
-            0)
+        min_value, max_value, is_exact = field_statistics.value_range(
+            self.parent.layer, selected_band)
         band_description = tr(
             'This band contains data from {min_value} to {max_value}').format(
-            min_value=statistics.minimumValue,
-            max_value=statistics.maximumValue
+            min_value=min_value,
+            max_value=max_value
         )
+        if not is_exact:
+            band_description += tr(
+                ' (from a sample of the layer, computing the exact '
+                'range...)')
         self.lblDescribeBandSelector.setText(band_description)
 
+    def statistics_ready(self, key):
+        """Update the description when the exact statistics are computed.
+
+        :param key: The key of the statistics.
+        :type key: tuple
+        """
+        del key
+        if (self.parent.get_current_step() == self
+                and self.lstBands.currentItem()):
+            self.describe_band()
+
     def selected_band(self):
         """Obtain the layer mode selected by user.
 
@@ -29,6 +29,7 @@ from safe.gui.tools.wizard.wizard_strings import (
     field_question_subcategory_unit,
     field_question_subcategory_classified,
     field_question_aggregation)
+from safe.utilities.field_statistics import field_statistics
 from safe.utilities.i18n import tr
 
 LOGGER = logging.getLogger('InaSAFE')
@@ -57,6 +58,7 @@ class StepKwField(WizardStep, FORM_CLASS):
         """
         WizardStep.__init__(self, parent)
         self.mode = SINGLE_MODE
+        field_statistics.statisticsReady.connect(self.statistics_ready)
 
     def is_ready_to_next_step(self):
         """Check if the step is complete.
@@ -129,6 +131,24 @@ class StepKwField(WizardStep, FORM_CLASS):
            executed when the field_names selection changes.
         """
         self.clear_further_steps()
+        self.describe_fields()
+
+    def statistics_ready(self, key):
+        """Update the description when the exact statistics are computed.
+
+        :param key: The key of the statistics.
+        :type key: tuple
+        """
+        del key
+        if self.parent.get_current_step() == self:
+            self.describe_fields()
+
+    def describe_fields(self):
+        """Describe the selected fields and unlock the Next button.
+
+        The unique values are computed on a sample of a large layer first,
+        the description is updated when the exact values are computed.
+        """
         field_names = self.selected_fields()
         layer_purpose = self.parent.step_kw_purpose.selected_purpose()
         # Exit if no selection
@@ -152,17 +172,22 @@ class StepKwField(WizardStep, FORM_CLASS):
             # Generate description for the field.
             field_type = layer_fields.field(field_name).typeName()
             field_index = layer_fields.indexFromName(field_name)
-            unique_values = self.parent.layer.uniqueValues(field_index)
+            unique_values, is_exact = field_statistics.unique_values(
+                self.parent.layer, field_index)
             unique_values_str = [
                 i is not None and str(i) or 'NULL'
                 for i in list(unique_values)[0:48]]
             unique_values_str = ', '.join(unique_values_str)
+            if not is_exact:
+                unique_values_str += tr(
+                    ' (from a sample of the layer, computing all the '
+                    'values...)')
             field_descriptions += tr('<b>Field name</b>: {field_name}').format(
                 field_name=field_name)
             field_descriptions += tr(
                 '<br><b>Field type</b>: {field_type}').format(
                 field_type=field_type)
-            if (feature_count != -1 and (
+            if (is_exact and feature_count != -1 and (
                     layer_purpose == layer_purpose_aggregation)):
                 if len(unique_values) == feature_count:
                     unique = tr('Yes')
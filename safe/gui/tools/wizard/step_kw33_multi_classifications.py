@@ -6,7 +6,6 @@ import logging
 from collections import OrderedDict
 from functools import partial
 
-import numpy
 from qgis.PyQt.QtCore import Qt
 from qgis.PyQt.QtWidgets import (
     QLabel,
@@ -24,9 +23,6 @@ from qgis.PyQt.QtWidgets import (
 )
 from qgis.PyQt.QtGui import QFont
 from qgis.PyQt.QtWebKitWidgets import QWebView
-from osgeo import gdal
-from osgeo.gdalconst import GA_ReadOnly
-from qgis.core import QgsRasterBandStats
 
 import safe.messaging as m
 from safe.definitions.exposure import exposure_all, exposure_population
@@ -56,6 +52,7 @@ from safe.gui.tools.wizard.wizard_strings import (
     multiple_classified_hazard_classifications_raster,
     multiple_continuous_hazard_classifications_raster)
 from safe.messaging import styles
+from safe.utilities.field_statistics import field_statistics
 from safe.utilities.gis import is_raster_layer
 from safe.utilities.i18n import tr
 from safe.utilities.resources import html_footer, html_header
@@ -578,20 +575,19 @@ class StepKwMultiClassifications(WizardStep, FORM_CLASS):
 
         if is_raster_layer(self.parent.layer):
             active_band = self.parent.step_kw_band_selector.selected_band()
-            layer_extent = self.parent.layer.extent()
-            statistics = self.parent.layer.dataProvider().bandStatistics(
-                active_band, QgsRasterBandStats.All, layer_extent, 0)
+            min_value_layer, max_value_layer, _ = field_statistics.value_range(
+                self.parent.layer, active_band, exact=True)
             description_text = continuous_raster_question % (
                 layer_purpose['name'],
                 layer_subcategory['name'],
                 classification['name'],
-                statistics.minimumValue,
-                statistics.maximumValue)
+                min_value_layer,
+                max_value_layer)
         else:
             field_name = self.parent.step_kw_field.selected_fields()
             field_index = self.parent.layer.fields().lookupField(field_name)
-            min_value_layer = self.parent.layer.minimumValue(field_index)
-            max_value_layer = self.parent.layer.maximumValue(field_index)
+            min_value_layer, max_value_layer, _ = field_statistics.value_range(
+                self.parent.layer, field_index, exact=True)
             description_text = continuous_vector_question % (
                 layer_purpose['name'],
                 layer_subcategory['name'],
@@ -807,16 +803,11 @@ class StepKwMultiClassifications(WizardStep, FORM_CLASS):
                 layer_purpose['name'],
                 classification['name'])
 
-            dataset = gdal.Open(self.parent.layer.source(), GA_ReadOnly)
             active_band = self.parent.step_kw_band_selector.selected_band()
-            unique_values = numpy.unique(numpy.array(
-                dataset.GetRasterBand(active_band).ReadAsArray()))
+            # The values are json serializable Python numbers.
+            unique_values, _ = field_statistics.unique_values(
+                self.parent.layer, active_band, exact=True)
             field_type = 0
-            # Convert datatype to a json serializable type
-            if numpy.issubdtype(unique_values.dtype, float):
-                unique_values = [float(i) for i in unique_values]
-            else:
-                unique_values = [int(i) for i in unique_values]
         else:
             field = self.parent.step_kw_field.selected_fields()
             field_index = self.parent.layer.fields().indexFromName(field)
@@ -826,7 +817,8 @@ class StepKwMultiClassifications(WizardStep, FORM_CLASS):
                 layer_purpose['name'],
                 classification['name'],
                 field.upper())
-            unique_values = list(self.parent.layer.uniqueValues(field_index))
+            unique_values, _ = field_statistics.unique_values(
+                self.parent.layer, field_index, exact=True)
 
         # Set description
         description_label = QLabel(description_text)
@@ -5,15 +5,12 @@
 import json
 from copy import deepcopy
 
-import numpy
 from qgis.PyQt.QtCore import Qt
 from qgis.PyQt.QtWidgets import (
     QListWidgetItem,
     QAbstractItemView,
     QTreeWidgetItem
 )
-from osgeo import gdal
-from osgeo.gdalconst import GA_ReadOnly
 
 from safe import messaging as m
 from safe.definitions.exposure_classifications import data_driven_classes
@@ -26,6 +23,7 @@ from safe.gui.tools.wizard.wizard_step import (
     WizardStep, get_wizard_step_ui_class)
 from safe.gui.tools.wizard.wizard_strings import (
     classify_raster_question, classify_vector_question)
+from safe.utilities.field_statistics import field_statistics
 from safe.utilities.gis import is_raster_layer
 from safe.utilities.i18n import tr
 
@@ -157,16 +155,11 @@ class StepKwClassify(WizardStep, FORM_CLASS):
         if is_raster_layer(self.parent.layer):
             self.lblClassify.setText(classify_raster_question % (
                 subcategory['name'], purpose['name'], classification_name))
-            dataset = gdal.Open(self.parent.layer.source(), GA_ReadOnly)
             active_band = self.parent.step_kw_band_selector.selected_band()
-            unique_values = numpy.unique(numpy.array(
-                dataset.GetRasterBand(active_band).ReadAsArray()))
+            # The values are json serializable Python numbers.
+            unique_values, _ = field_statistics.unique_values(
+                self.parent.layer, active_band, exact=True)
             field_type = 0
-            # Convert datatype to a json serializable type
-            if numpy.issubdtype(unique_values.dtype, float):
-                unique_values = [float(i) for i in unique_values]
-            else:
-                unique_values = [int(i) for i in unique_values]
         else:
             field = self.parent.step_kw_field.selected_fields()
             field_index = self.parent.layer.fields().indexFromName(field)
@@ -174,7 +167,8 @@ class StepKwClassify(WizardStep, FORM_CLASS):
             self.lblClassify.setText(classify_vector_question % (
                 subcategory['name'], purpose['name'],
                 classification_name, field.upper()))
-            unique_values = self.parent.layer.uniqueValues(field_index)
+            unique_values, _ = field_statistics.unique_values(
+                self.parent.layer, field_index, exact=True)
 
         clean_unique_values = []
         for unique_value in unique_values:
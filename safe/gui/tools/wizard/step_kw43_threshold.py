@@ -6,7 +6,6 @@ from collections import OrderedDict
 from functools import partial
 
 from qgis.PyQt.QtWidgets import QDoubleSpinBox, QHBoxLayout, QLabel
-from qgis.core import QgsRasterBandStats
 
 from safe import messaging as m
 from safe.definitions.layer_geometry import layer_geometry_raster
@@ -17,6 +16,7 @@ from safe.gui.tools.wizard.wizard_step import (
     WizardStep, get_wizard_step_ui_class)
 from safe.gui.tools.wizard.wizard_strings import (
     continuous_raster_question, continuous_vector_question)
+from safe.utilities.field_statistics import field_statistics
 from safe.utilities.gis import is_raster_layer
 from safe.utilities.i18n import tr
 
@@ -102,19 +102,19 @@ class StepKwThreshold(WizardStep, FORM_CLASS):
             selected_classification()
 
         if is_raster_layer(self.parent.layer):
-            statistics = self.parent.layer.dataProvider().bandStatistics(
-                1, QgsRasterBandStats.All, self.parent.layer.extent(), 0)
+            min_value_layer, max_value_layer, _ = field_statistics.value_range(
+                self.parent.layer, 1, exact=True)
             text = continuous_raster_question % (
                 layer_purpose['name'],
                 layer_subcategory['name'],
                 classification['name'],
-                statistics.minimumValue,
-                statistics.maximumValue)
+                min_value_layer,
+                max_value_layer)
         else:
             field_name = self.parent.step_kw_field.selected_fields()
             field_index = self.parent.layer.fields().lookupField(field_name)
-            min_value_layer = self.parent.layer.minimumValue(field_index)
-            max_value_layer = self.parent.layer.maximumValue(field_index)
+            min_value_layer, max_value_layer, _ = field_statistics.value_range(
+                self.parent.layer, field_index, exact=True)
             text = continuous_vector_question % (
                 layer_purpose['name'],
                 layer_subcategory['name'],
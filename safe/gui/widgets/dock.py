@@ -7,6 +7,7 @@ import logging
 import os
 import shutil
 from datetime import datetime
+from functools import partial
 from numbers import Number
 
 from qgis.core import (
@@ -19,7 +20,7 @@ from qgis.core import (
     QgsRectangle,
     QgsApplication
 )
-from qgis.PyQt.QtCore import Qt, QUrl, pyqtSlot
+from qgis.PyQt.QtCore import Qt, QTimer, QUrl, pyqtSlot
 from qgis.PyQt.QtGui import QDesktopServices, QPixmap
 from qgis.PyQt.QtWidgets import (
     QAction,
@@ -42,6 +43,7 @@ from safe.common.signals import send_error_message, send_static_message
 from safe.common.version import get_version
 from safe.defaults import supporters_logo_path
 from safe.definitions.constants import (
+    ANALYSIS_CANCELLED,
     ANALYSIS_FAILED_BAD_CODE,
     ANALYSIS_FAILED_BAD_INPUT,
     ANALYSIS_SUCCESS, EXPOSURE,
@@ -106,6 +108,7 @@ from safe.gui.widgets.message import (
     show_keyword_version_message,
     show_no_keywords_message
 )
+from safe.impact_function.analysis_task import AnalysisTask, analysis_queue
 from safe.impact_function.impact_function import ImpactFunction
 from safe.impact_function.multi_exposure_wrapper import \
     MultiExposureImpactFunction
@@ -148,6 +151,10 @@ FORM_CLASS = get_ui_class('dock_base.ui')
 
 LOGGER = logging.getLogger('InaSAFE')
 
+# Delay in milliseconds before the layer combos are refreshed, so a burst of
+# layer signals, e.g. when a project is loaded, triggers a single refresh.
+LAYERS_REFRESH_INTERVAL = 100
+
 
 # noinspection PyArgumentList
 # noinspection PyUnresolvedReferences
@@ -190,6 +197,18 @@ class Dock(QDockWidget, FORM_CLASS):
         # Flag used to prevent recursion and allow bulk loads of layers to
         # trigger a single event only
         self.get_layers_lock = False
+
+        # The title and the purpose of each layer read from its keywords,
+        # by layer id, with the keywords file state they were read from.
+        self._layer_classifications = {}
+        # Changes of the project layers to apply to the combos.
+        self._added_layer_ids = []
+        self._removed_layer_ids = set()
+        self._full_layers_refresh = True
+        self._layers_refresh_timer = QTimer(self)
+        self._layers_refresh_timer.setSingleShot(True)
+        self._layers_refresh_timer.setInterval(LAYERS_REFRESH_INTERVAL)
+        self._layers_refresh_timer.timeout.connect(self.refresh_layers)
         # Flag so we can see if the dock is busy processing
         self.busy = False
 
@@ -461,11 +480,11 @@ class Dock(QDockWidget, FORM_CLASS):
         ..seealso:: disconnect_layer_listener
         """
         project = QgsProject.instance()
-        project.layersWillBeRemoved.connect(self.get_layers)
-        project.layersAdded.connect(self.get_layers)
-        project.layersRemoved.connect(self.get_layers)
+        project.layersWillBeRemoved.connect(self.layers_removed)
+        project.layersAdded.connect(self.layers_added)
 
-        self.iface.mapCanvas().layersChanged.connect(self.get_layers)
+        self.iface.mapCanvas().layersChanged.connect(
+            self.visible_layers_changed)
         self.iface.currentLayerChanged.connect(self.layer_changed)
 
     def extents_changed(self):
@@ -488,13 +507,180 @@ class Dock(QDockWidget, FORM_CLASS):
         ..seealso:: connect_layer_listener
         """
         project = QgsProject.instance()
-        project.layersWillBeRemoved.disconnect(self.get_layers)
-        project.layersAdded.disconnect(self.get_layers)
-        project.layersRemoved.disconnect(self.get_layers)
+        project.layersWillBeRemoved.disconnect(self.layers_removed)
+        project.layersAdded.disconnect(self.layers_added)
 
-        self.iface.mapCanvas().layersChanged.disconnect(self.get_layers)
+        self.iface.mapCanvas().layersChanged.disconnect(
+            self.visible_layers_changed)
         self.iface.currentLayerChanged.disconnect(self.layer_changed)
 
+    def layers_added(self, layers):
+        """Slot called when layers are added to the project.
+
+        :param layers: The added layers.
+        :type layers: list(QgsMapLayer)
+        """
+        for layer in layers:
+            self._added_layer_ids.append(layer.id())
+        self._layers_refresh_timer.start()
+
+    def layers_removed(self, layer_ids):
+        """Slot called when layers are about to be removed from the project.
+
+        :param layer_ids: The ids of the removed layers.
+        :type layer_ids: list(str)
+        """
+        for layer_id in layer_ids:
+            self._removed_layer_ids.add(layer_id)
+            self._layer_classifications.pop(layer_id, None)
+        self._layers_refresh_timer.start()
+
+    def visible_layers_changed(self):
+        """Slot called when the layers displayed in the map canvas change."""
+        if self.show_only_visible_layers_flag:
+            self._full_layers_refresh = True
+            self._layers_refresh_timer.start()
+
+    def refresh_layers(self):
+        """Apply the changes of the project layers to the layer combos.
+
+        Added and removed layers are added to or removed from the combos,
+        the combos are rebuilt only if they have not been filled yet or if
+        the visible layers have changed.
+
+        .. versionadded:: 5.0
+        """
+        if self.get_layers_lock:
+            return
+        if self._full_layers_refresh:
+            self.get_layers()
+            return
+
+        project = QgsProject.instance()
+        added_layers = [
+            project.mapLayer(layer_id) for layer_id in self._added_layer_ids
+            if layer_id not in self._removed_layer_ids]
+        removed_layer_ids = self._removed_layer_ids
+        self._added_layer_ids = []
+        self._removed_layer_ids = set()
+
+        if not project.mapLayers():
+            self.get_layers()
+            return
+
+        combos = [
+            self.hazard_layer_combo,
+            self.exposure_layer_combo,
+            self.aggregation_layer_combo]
+        selection = [combo.currentData() for combo in combos]
+
+        for combo in combos:
+            combo.blockSignals(True)
+        for combo in combos:
+            for index in reversed(list(range(combo.count()))):
+                if combo.itemData(index) in removed_layer_ids:
+                    combo.removeItem(index)
+        canvas_layers = self.iface.mapCanvas().layers()
+        for layer in added_layers:
+            if layer is not None:
+                self.add_layer_to_combos(layer, canvas_layers)
+        for combo in combos:
+            combo.blockSignals(False)
+        self.toggle_aggregation_layer_combo()
+
+        if selection != [combo.currentData() for combo in combos]:
+            self.validate_impact_function()
+        self.layer_changed(self.iface.activeLayer())
+
+    def layer_classification(self, layer):
+        """The title and the purpose of a layer, from its keywords.
+
+        The result is cached until the keywords file of the layer changes, or
+        until the keywords are written for a layer which is not file based.
+
+        .. versionadded:: 5.0
+
+        :param layer: The layer.
+        :type layer: QgsMapLayer
+
+        :return: A tuple with the title and the layer purpose, or None if the
+            layer has no supported keywords.
+        :rtype: tuple
+        """
+        source = layer.source()
+        xml_path = os.path.splitext(source)[0] + '.xml'
+        if xml_path.startswith('file:'):
+            xml_path = xml_path[len('file:'):]
+        revision = self.keyword_io.keywords_revision(layer)
+        try:
+            stat = os.stat(xml_path)
+            state = source, stat.st_mtime, stat.st_size, revision
+        except OSError:
+            state = source, None, None, revision
+
+        cached = self._layer_classifications.get(layer.id())
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        classification = None
+        # noinspection PyBroadException
+        try:
+            keywords = self.keyword_io.read_keywords(layer)
+            keyword_version = str(keywords[inasafe_keyword_version_key])
+            if is_keyword_version_supported(keyword_version):
+                classification = (
+                    keywords['title'], keywords['layer_purpose'])
+        except BaseException:  # pylint: disable=W0702
+            # The layer is ignored.
+            pass
+
+        self._layer_classifications[layer.id()] = state, classification
+        return classification
+
+    def add_layer_to_combos(self, layer, canvas_layers):
+        """Add a layer to the hazard, exposure or aggregation combo.
+
+        .. versionadded:: 5.0
+
+        :param layer: The layer.
+        :type layer: QgsMapLayer
+
+        :param canvas_layers: The layers displayed in the map canvas.
+        :type canvas_layers: list(QgsMapLayer)
+        """
+        if (self.show_only_visible_layers_flag and
+                (layer not in canvas_layers)):
+            return
+
+        classification = self.layer_classification(layer)
+        if classification is None:
+            return
+        title, layer_purpose = classification
+
+        # Lookup internationalised title if available
+        title = self.tr(title)
+        # Register title with layer
+        if title and self.set_layer_from_title_flag:
+            if qgis_version() >= 21800:
+                layer.setName(title)
+            else:
+                # QGIS 2.14
+                layer.setLayerName(title)
+
+        # store uuid in user property of list widget for layers
+        layer_id = layer.id()
+        icon = layer_icon(layer)
+
+        if layer_purpose == layer_purpose_hazard['key']:
+            add_ordered_combo_item(
+                self.hazard_layer_combo, title, layer_id, icon=icon)
+        elif layer_purpose == layer_purpose_exposure['key']:
+            add_ordered_combo_item(
+                self.exposure_layer_combo, title, layer_id, icon=icon)
+        elif layer_purpose == layer_purpose_aggregation['key']:
+            add_ordered_combo_item(
+                self.aggregation_layer_combo, title, layer_id, icon=icon)
+
     @pyqtSlot(QgsMapLayer, str)
     def save_auxiliary_files(self, layer, destination):
         """Save auxiliary files when using the 'save as' function.
@@ -662,6 +848,12 @@ class Dock(QDockWidget, FORM_CLASS):
         if self.get_layers_lock:
             return
 
+        # The combos are rebuilt, the pending changes are not needed.
+        self._layers_refresh_timer.stop()
+        self._added_layer_ids = []
+        self._removed_layer_ids = set()
+        self._full_layers_refresh = False
+
         # Map registry may be invalid if QGIS is shutting down
         project = QgsProject.instance()
         canvas_layers = self.iface.mapCanvas().layers()
@@ -670,6 +862,7 @@ class Dock(QDockWidget, FORM_CLASS):
 
         # For issue #618
         if len(layers) == 0:
+            self._full_layers_refresh = True
             if self.conflicting_plugin_detected:
                 send_static_message(self, conflicting_plugin_message())
             else:
@@ -687,62 +880,7 @@ class Dock(QDockWidget, FORM_CLASS):
         self.aggregation_layer_combo.clear()
 
         for layer in layers:
-            if (self.show_only_visible_layers_flag and
-                    (layer not in canvas_layers)):
-                continue
-
-            # store uuid in user property of list widget for layers
-            layer_id = layer.id()
-            # Avoid uninitialized variable
-            title = None
-            # See if there is a title for this layer, if not,
-            # fallback to the layer's filename
-            # noinspection PyBroadException
-            try:
-                title = self.keyword_io.read_keywords(layer, 'title')
-            except (NoKeywordsFoundError,
-                    KeywordNotFoundError, MetadataReadError):
-                # Skip if there are no keywords at all, or missing keyword
-                continue
-            except BaseException:  # pylint: disable=W0702
-                pass
-            else:
-                # Lookup internationalised title if available
-                title = self.tr(title)
-            # Register title with layer
-            if title and self.set_layer_from_title_flag:
-                if qgis_version() >= 21800:
-                    layer.setName(title)
-                else:
-                    # QGIS 2.14
-                    layer.setLayerName(title)
-
-            # Find out if the layer is a hazard or an exposure
-            # layer by querying its keywords. If the query fails,
-            # the layer will be ignored.
-            # noinspection PyBroadException
-            try:
-                layer_purpose = self.keyword_io.read_keywords(
-                    layer, 'layer_purpose')
-                keyword_version = str(self.keyword_io.read_keywords(
-                    layer, inasafe_keyword_version_key))
-                if not is_keyword_version_supported(keyword_version):
-                    continue
-            except BaseException:  # pylint: disable=W0702
-                # continue ignoring this layer
-                continue
-
-            icon = layer_icon(layer)
-
-            if layer_purpose == layer_purpose_hazard['key']:
-                add_ordered_combo_item(
-                    self.hazard_layer_combo, title, layer_id, icon=icon)
-            elif layer_purpose == layer_purpose_exposure['key']:
-                add_ordered_combo_item(
-                    self.exposure_layer_combo, title, layer_id, icon=icon)
-            elif layer_purpose == layer_purpose_aggregation['key']:
-                add_ordered_combo_item(
-                    self.aggregation_layer_combo, title, layer_id, icon=icon)
+            self.add_layer_to_combos(layer, canvas_layers)
 
         self.unblock_signals()
         # handle the aggregation_layer_combo combo
@@ -1301,6 +1439,14 @@ class Dock(QDockWidget, FORM_CLASS):
 
         Please update the code in step_fc990_analysis.py in function
         setup_and_run_analysis(). It should follow approximately the same code.
+
+        The analysis runs in a background task, the result is displayed by
+        analysis_finished. In debug mode, the analysis runs in the main
+        thread, so the exception is not caught.
+
+        :return: The status and the error message, or None if the analysis
+            is running in a background task.
+        :rtype: tuple
         """
         if self.conflicting_plugin_detected:
             display_critical_message_bar(
@@ -1316,15 +1462,31 @@ class Dock(QDockWidget, FORM_CLASS):
             LOGGER.info(tr('The impact function should not have been ready.'))
             return ANALYSIS_FAILED_BAD_CODE, None
 
+        # The validation used the cached aggregation footprint.
+        status, message = self.impact_function.prepare()
+        if status != PREPARE_SUCCESS:
+            send_error_message(self, message)
+            self.impact_function = None
+            return ANALYSIS_FAILED_BAD_INPUT, message
+
         self.show_busy()
         self.impact_function.callback = self.progress_callback
         self.impact_function.debug_mode = self.use_debug_action.isChecked()
         self.impact_function.use_rounding = (
             not self.disable_rounding_action.isChecked())
 
+        if not self.impact_function.debug_mode:
+            # The analysis runs in a background task, it can be cancelled
+            # from the task manager.
+            task = AnalysisTask(self.impact_function)
+            task.progressMessage.connect(self.progress_callback)
+            task.analysisFinished.connect(
+                partial(self.analysis_finished, self.impact_function))
+            analysis_queue.add(task)
+            return None
+
         try:
-            status, message = self.impact_function.run()
-            message = basestring_to_message(message)
+            result = self.impact_function.run()
         except BaseException:
             # We have an exception only if we are in debug mode.
             # We want to display the datastore and then
@@ -1332,7 +1494,35 @@ class Dock(QDockWidget, FORM_CLASS):
             add_debug_layers_to_canvas(self.impact_function)
             disable_busy_cursor()
             raise
-        if status == ANALYSIS_FAILED_BAD_INPUT:
+        return self.analysis_finished(self.impact_function, result)
+
+    def analysis_finished(self, impact_function, result):
+        """Display the result of the analysis when it is finished.
+
+        The impact function of the dock may have been replaced while the
+        analysis was running in the background, e.g. if an output layer has
+        been selected, so the impact function which ran is given.
+
+        .. versionadded:: 5.0
+
+        :param impact_function: The impact function which ran.
+        :type impact_function: ImpactFunction
+
+        :param result: The status of the analysis and an error message if
+            needed, as returned by ImpactFunction.run.
+        :type result: tuple
+
+        :return: The status and the error message.
+        :rtype: tuple
+        """
+        status, message = result
+        message = basestring_to_message(message)
+        if status == ANALYSIS_CANCELLED:
+            self.hide_busy()
+            LOGGER.info(tr('The analysis has been cancelled.'))
+            send_error_message(self, message)
+            return status, message
+        elif status == ANALYSIS_FAILED_BAD_INPUT:
             self.hide_busy()
             LOGGER.warning(tr(
                 'The impact function could not run because of the inputs.'))
@@ -1348,9 +1538,10 @@ class Dock(QDockWidget, FORM_CLASS):
             return status, message
 
         LOGGER.info(tr('The impact function could run without errors.'))
+        self.impact_function = impact_function
 
         # Add result layer to QGIS
-        add_impact_layers_to_canvas(self.impact_function, iface=self.iface)
+        add_impact_layers_to_canvas(impact_function, iface=self.iface)
 
         # execute this before generating report
         if self.zoom_to_impact_flag:
@@ -1367,7 +1558,7 @@ class Dock(QDockWidget, FORM_CLASS):
             LOGGER.info('Reports are going to be generated the analysis.')
             # we only want to generate non pdf/qpt report
             html_components = [standard_impact_report_metadata_html]
-            error_code, message = self.impact_function.generate_report(
+            error_code, message = impact_function.generate_report(
                 html_components)
 
             if error_code == ImpactReport.REPORT_GENERATION_FAILED:
@@ -1387,15 +1578,15 @@ class Dock(QDockWidget, FORM_CLASS):
                 duration=10
             )
 
-        if self.impact_function.debug_mode:
-            add_debug_layers_to_canvas(self.impact_function)
+        if impact_function.debug_mode:
+            add_debug_layers_to_canvas(impact_function)
 
         if self.aggregation:
             crs = self.aggregation.crs()
         else:
             crs = self.extent.crs
         self.extent.set_next_analysis_extent(
-            self.impact_function.analysis_extent, crs)
+            impact_function.analysis_extent, crs)
 
         # We do not want to check the state of the next IF
         self.hide_busy(check_next_impact=False)
@@ -1466,7 +1657,8 @@ class Dock(QDockWidget, FORM_CLASS):
                 impact_function.requested_extent = (
                     self.iface.mapCanvas().extent())
 
-        status, message = impact_function.prepare()
+        # The full preparation is only done when the analysis is launched.
+        status, message = impact_function.prepare(lightweight=True)
         if status == PREPARE_SUCCESS:
 
             show_confirmations = setting(
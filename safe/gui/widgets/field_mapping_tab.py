@@ -38,6 +38,7 @@ from safe.definitions.constants import (
     GLOBAL
 )
 from safe.utilities.default_values import get_inasafe_default_value_qsetting
+from safe.utilities.field_statistics import field_statistics
 from safe.utilities.i18n import tr
 
 __copyright__ = "Copyright 2017, The InaSAFE Project"
@@ -92,6 +93,7 @@ class FieldMappingTab(QWidget, object):
             QSizePolicy.Maximum, QSizePolicy.Expanding)
         # noinspection PyUnresolvedReferences
         self.field_list.itemSelectionChanged.connect(self.update_footer)
+        field_statistics.statisticsReady.connect(self.statistics_ready)
 
         # Footer
         self.footer_label = QLabel()
@@ -340,13 +342,26 @@ class FieldMappingTab(QWidget, object):
         field = self.layer.fields().field(field_name)
 
         index = self.layer.fields().lookupField(field_name)
-        unique_values = list(self.layer.uniqueValues(index))
+        unique_values, is_exact = field_statistics.unique_values(
+            self.layer, index)
         pretty_unique_values = ', '.join([str(v) for v in unique_values[:10]])
+        if not is_exact:
+            pretty_unique_values += tr(' (from a sample of the layer)')
 
         footer_text = tr('Field type: {0}\n').format(field.typeName())
         footer_text += tr('Unique values: {0}').format(pretty_unique_values)
         self.footer_label.setText(footer_text)
 
+    def statistics_ready(self, key):
+        """Update the footer when the exact statistics are computed.
+
+        :param key: The key of the statistics.
+        :type key: tuple
+        """
+        del key
+        if self.layer is not None:
+            self.update_footer()
+
     def connect_drop_remove_parameter(self):
         parameter_widgets = self.parameter_container.get_parameter_widgets()
         for parameter_widget in parameter_widgets:
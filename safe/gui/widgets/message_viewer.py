@@ -39,6 +39,8 @@ DYNAMIC_MESSAGE_SIGNAL = 'ImpactFunctionMessage'
 STATIC_MESSAGE_SIGNAL = 'ApplicationMessage'
 HTML_FILE_MODE = 1
 HTML_STR_MODE = 2
+# Minimum time in milliseconds between two renderings of dynamic messages.
+RENDER_INTERVAL = 100
 LOGGER = logging.getLogger('InaSAFE')
 
 
@@ -70,6 +72,11 @@ class MessageViewer(QtWebKitWidgets.QWebView):
         # then cleared
         self.dynamic_messages = []
         self.dynamic_messages_log = []
+        # Dynamic messages are rendered in batch when the timer times out.
+        self._render_timer = QtCore.QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(RENDER_INTERVAL)
+        self._render_timer.timeout.connect(self.show_messages)
         # self.show()
 
         self.action_show_log = QAction(self.tr('Show log'), None)
@@ -200,6 +207,7 @@ class MessageViewer(QtWebKitWidgets.QWebView):
             return
         # LOGGER.debug('Static message event %i' % self.static_message_count)
         _ = sender  # NOQA
+        self._render_timer.stop()
         self.dynamic_messages = []
         self.static_message = message
         self.show_messages()
@@ -218,11 +226,14 @@ class MessageViewer(QtWebKitWidgets.QWebView):
         """
         # LOGGER.debug('Error message event')
         self.dynamic_message_event(sender, message)
+        # We don't wait to show an error.
+        self.flush_messages()
 
     def dynamic_message_event(self, sender, message):
         """Dynamic event handler - set message state based on event.
 
-        Dynamic messages don't clear the message buffer.
+        Dynamic messages don't clear the message buffer. They are rendered
+        in batch, at most every RENDER_INTERVAL milliseconds.
 
         :param sender: Unused - the object that sent the message.
         :type sender: Object, None
@@ -235,7 +246,8 @@ class MessageViewer(QtWebKitWidgets.QWebView):
         self.dynamic_messages.append(message)
         self.dynamic_messages_log.append(message)
         # Old way (works but causes full page refresh)
-        self.show_messages()
+        if not self._render_timer.isActive():
+            self._render_timer.start()
         return
 
         # New way add html snippet to end of page, not currently working
@@ -252,6 +264,12 @@ class MessageViewer(QtWebKitWidgets.QWebView):
         # self.page().mainFrame().evaluateJavaScript(js)
         # self.scrollToDiv()
 
+    def flush_messages(self):
+        """Render the dynamic messages waiting for the next batch, if any."""
+        if self._render_timer.isActive():
+            self._render_timer.stop()
+            self.show_messages()
+
     def clear_dynamic_messages_log(self):
         """Clear dynamic message log."""
         self.dynamic_messages_log = []
@@ -327,6 +345,7 @@ class MessageViewer(QtWebKitWidgets.QWebView):
 
     def save_report_to_html(self):
         """Save report in the dock to html."""
+        self.flush_messages()
         html = self.page().mainFrame().toHtml()
         if self.report_path is not None:
             html_to_file(html, self.report_path)
@@ -422,14 +441,16 @@ class MessageViewer(QtWebKitWidgets.QWebView):
             raise InvalidParameterError('The mode is not supported.')
 
         counter = 0
-        sleep_period = 0.1  # sec
+        sleep_period = 0.01  # sec
         timeout = 20  # it's generous enough!
         while not self._html_loaded_flag and counter < timeout:
             # Block until the event loop is done
-            counter += sleep_period
-            time.sleep(sleep_period)
             # noinspection PyArgumentList
             QgsApplication.processEvents()
+            if self._html_loaded_flag:
+                break
+            counter += sleep_period
+            time.sleep(sleep_period)
 
     def html_loaded_slot(self, ok):
         """Slot called when the page is loaded.
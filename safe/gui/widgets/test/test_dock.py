@@ -120,6 +120,8 @@ class TestDock(unittest.TestCase):
         """Layers can be loaded and list widget was updated appropriately."""
 
         hazard_layer_count, exposure_layer_count = load_standard_layers()
+        # The layer combos are refreshed after a delay, refresh them now.
+        self.dock.refresh_layers()
         message = 'Expect %s layer(s) in hazard list widget but got %s' % (
             hazard_layer_count, self.dock.hazard_layer_combo.count())
         # pylint: disable=W0106
@@ -133,6 +135,33 @@ class TestDock(unittest.TestCase):
             exposure_layer_count, message)
         # pylint: disable=W0106
 
+    def test_layer_classification(self):
+        """Test the title and the purpose of the layers are cached."""
+        layer = load_test_vector_layer('exposure', 'airports.shp')
+        classification = self.dock.layer_classification(layer)
+        self.assertEqual(classification[1], 'exposure')
+        self.assertIn(layer.id(), self.dock._layer_classifications)
+        self.assertEqual(
+            self.dock.layer_classification(layer), classification)
+
+        layer = load_test_vector_layer('other', 'keywordless_layer.shp')
+        self.assertIsNone(self.dock.layer_classification(layer))
+
+        # The classification of a removed layer is dropped.
+        self.dock.layers_removed([layer.id()])
+        self.assertNotIn(layer.id(), self.dock._layer_classifications)
+
+    def test_layer_classification_not_file_based(self):
+        """Test the classification is updated when keywords are written."""
+        source = load_test_vector_layer('exposure', 'airports.shp')
+        layer = load_test_vector_layer(
+            'other', 'keywordless_layer.shp', clone_to_memory=True)
+        self.assertIsNone(self.dock.layer_classification(layer))
+
+        self.dock.keyword_io.write_keywords(layer, source.keywords)
+        classification = self.dock.layer_classification(layer)
+        self.assertEqual(classification[1], 'exposure')
+
     # @skipIf(sys.platform == 'win32', "Test cannot run on Windows")
     def test_layer_saved_as_with_keywords_and_xml(self):
         """Check that auxiliary files are well copied when they exist and the
@@ -0,0 +1,356 @@
+# coding=utf-8
+
+"""Run an impact function in a background task.
+
+The analysis runs in a QgsTask, so QGIS stays responsive and the analysis can
+be cancelled from the task manager. The progress of the impact function is
+relayed with a signal to the main thread. Cancelling the task cancels the
+feedback of the analysis, and the callback of the impact function raises an
+AnalysisCancelledError, which stops the analysis in the running algorithm.
+
+The input layers of the impact function are cloned in the main thread
+before the task starts, so the analysis does not read the layers rendered by
+the map canvas. The layers created by the analysis in the task thread are
+moved to the main thread before the end of the task, so they can be added to
+the project.
+
+Analyses are queued and run one after the other, as the profiling of an
+analysis is global.
+"""
+
+import logging
+
+from qgis.core import QgsApplication, QgsMapLayer, QgsTask
+from qgis.PyQt.QtCore import QEventLoop, QThread, pyqtSignal
+
+from safe import messaging as m
+from safe.common.exceptions import AnalysisCancelledError
+from safe.definitions.analysis_steps import (
+    analysis_steps,
+    extra_analysis_steps,
+)
+from safe.definitions.constants import (
+    ANALYSIS_CANCELLED,
+    ANALYSIS_FAILED_BAD_CODE,
+)
+from safe.gis.vector.tools import create_memory_layer
+from safe.impact_function.multi_exposure_wrapper import (
+    MultiExposureImpactFunction)
+from safe.messaging import styles
+from safe.utilities.gis import is_vector_layer
+from safe.utilities.i18n import tr
+from safe.utilities.metadata import copy_layer_keywords
+from safe.utilities.utilities import get_error_message
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+LOGGER = logging.getLogger('InaSAFE')
+WARNING_STYLE = styles.RED_LEVEL_4_STYLE
+
+
+class AnalysisTask(QgsTask):
+
+    """Task running an impact function, single or multi exposure.
+
+    .. versionadded:: 5.0
+    """
+
+    # current, maximum, message dictionary, like the impact function callback
+    progressMessage = pyqtSignal(int, int, object)
+
+    # The result of the run method of the impact function.
+    analysisFinished = pyqtSignal(object)
+
+    def __init__(self, impact_function):
+        """Constructor.
+
+        :param impact_function: A prepared impact function.
+        :type impact_function: ImpactFunction, MultiExposureImpactFunction
+        """
+        super(AnalysisTask, self).__init__(
+            tr('InaSAFE analysis: {name}').format(name=impact_function.name),
+            QgsTask.CanCancel)
+        self.impact_function = impact_function
+        self.result = None
+        self._step = 0
+        for single_impact_function in [impact_function] + (
+                self._impact_functions()):
+            clone_input_layers(single_impact_function)
+
+    @property
+    def is_multi_exposure(self):
+        """Whether the task runs a multi exposure impact function.
+
+        :rtype: bool
+        """
+        return isinstance(
+            self.impact_function, MultiExposureImpactFunction)
+
+    def run(self):
+        """Run the impact function, in the task thread.
+
+        :return: True if the analysis succeeded.
+        :rtype: bool
+        """
+        self.impact_function.callback = self._progress
+        for impact_function in self._impact_functions():
+            impact_function.callback = self._progress
+
+        try:
+            self.result = self.impact_function.run()
+        except Exception as e:
+            LOGGER.exception(e)
+            self.result = self._failure(
+                ANALYSIS_FAILED_BAD_CODE, get_error_message(e))
+
+        main_thread = QgsApplication.instance().thread()
+        for layer in self.layers():
+            if layer.thread() == QThread.currentThread():
+                layer.moveToThread(main_thread)
+
+        return self.result[0] == 0
+
+    def cancel(self):
+        """Cancel the task and the feedback of the running analysis.
+
+        The algorithms stop as soon as they check the feedback, the
+        processing algorithms and GDAL included.
+        """
+        super(AnalysisTask, self).cancel()
+        for impact_function in [self.impact_function] + (
+                self._impact_functions()):
+            feedback = getattr(impact_function, 'feedback', None)
+            if feedback is not None:
+                feedback.cancel()
+
+    def finished(self, result):
+        """Emit the result of the analysis, in the main thread.
+
+        :param result: The value returned by run, False if the task has been
+            cancelled before running.
+        :type result: bool
+        """
+        if self.result is None:
+            message = m.Message()
+            message.add(m.Heading(tr('Analysis cancelled'), **WARNING_STYLE))
+            message.add(tr('The analysis has been cancelled.'))
+            self.result = self._failure(ANALYSIS_CANCELLED, message)
+        self.analysisFinished.emit(self.result)
+
+    def layers(self):
+        """All the layers held by the impact function.
+
+        :return: The layers, including the layers of each single exposure
+            impact function.
+        :rtype: list(QgsMapLayer)
+        """
+        layers = []
+        for impact_function in [self.impact_function] + (
+                self._impact_functions()):
+            for value in list(vars(impact_function).values()):
+                if isinstance(value, dict):
+                    value = list(value.values())
+                if not isinstance(value, list):
+                    value = [value]
+                layers.extend(
+                    item for item in value if isinstance(item, QgsMapLayer))
+        return layers
+
+    def _impact_functions(self):
+        """The single exposure impact functions of a multi exposure one.
+
+        :rtype: list(ImpactFunction)
+        """
+        if self.is_multi_exposure:
+            return list(self.impact_function.impact_functions or [])
+        return []
+
+    def _failure(self, status, message):
+        """The failed result, as returned by the run of the impact function.
+
+        :param status: The status of the analysis.
+        :type status: int
+
+        :param message: The error message.
+        :type message: m.Message
+
+        :rtype: tuple
+        """
+        if self.is_multi_exposure:
+            return status, message, None
+        return status, message
+
+    def _progress(self, current, maximum, message=None):
+        """Callback of the impact function.
+
+        The impact function reports the progress of its steps, possibly
+        scaled within a step, see ProgressAggregator.step_callback. The
+        progress of another step, e.g. of a multi exposure analysis, is
+        combined with the progress of the last step.
+
+        :param current: Current progress.
+        :type current: int
+
+        :param maximum: Maximum range.
+        :type maximum: int
+
+        :param message: The message dictionary of the step.
+        :type message: dict
+
+        :raises: AnalysisCancelledError if the task has been cancelled.
+        """
+        if self.isCanceled():
+            raise AnalysisCancelledError(
+                tr('The analysis has been cancelled.'))
+
+        step_count = len(analysis_steps)
+        steps = (
+            list(analysis_steps.values())
+            + list(extra_analysis_steps.values()))
+        if message in steps:
+            self._step = (
+                float(current) * step_count / maximum if maximum else 0)
+            fraction = 0
+        else:
+            fraction = float(current) / maximum if maximum else 0
+        progress = min(1.0, (self._step + fraction) / step_count)
+
+        impact_functions = self._impact_functions()
+        if impact_functions:
+            current_impact_function = (
+                self.impact_function.current_impact_function)
+            index = 0
+            if current_impact_function in impact_functions:
+                index = impact_functions.index(current_impact_function)
+            progress = (index + progress) / len(impact_functions)
+
+        self.setProgress(progress * 100)
+        self.progressMessage.emit(current, maximum, message)
+
+
+def clone_input_layers(impact_function):
+    """Replace the input layers of an impact function by their clones.
+
+    It must be called in the main thread, before the task starts. The setters
+    of the layers are not used, so the impact function stays prepared.
+
+    :param impact_function: A prepared impact function.
+    :type impact_function: ImpactFunction, MultiExposureImpactFunction
+    """
+    for attribute in ['_hazard', '_exposure', '_aggregation']:
+        layer = getattr(impact_function, attribute, None)
+        if isinstance(layer, QgsMapLayer):
+            setattr(impact_function, attribute, clone_input_layer(layer))
+    exposures = getattr(impact_function, '_exposures', None)
+    if exposures:
+        impact_function._exposures = [
+            clone_input_layer(layer) for layer in exposures]
+
+
+def clone_input_layer(layer):
+    """Clone an input layer of an analysis, with its keywords.
+
+    A file or a database layer gets its own data provider. The features of
+    a memory layer are copied, as its provider can not be shared.
+
+    :param layer: The layer.
+    :type layer: QgsMapLayer
+
+    :return: The clone of the layer.
+    :rtype: QgsMapLayer
+    """
+    if layer.providerType() == 'memory':
+        clone = create_memory_layer(
+            layer.name(), layer.geometryType(), layer.crs(), layer.fields())
+        features = []
+        for feature in layer.getFeatures():
+            if feature.hasGeometry():
+                geometry = feature.geometry()
+                geometry.convertToMultiType()
+                feature.setGeometry(geometry)
+            features.append(feature)
+        _, added = clone.dataProvider().addFeatures(features)
+        # The copied features have new ids.
+        selection = set(layer.selectedFeatureIds())
+        clone.selectByIds([
+            copied.id() for feature, copied in zip(features, added)
+            if feature.id() in selection])
+    else:
+        clone = layer.clone()
+        if is_vector_layer(layer) and layer.selectedFeatureCount() > 0:
+            clone.selectByIds(layer.selectedFeatureIds())
+    clone.keywords = copy_layer_keywords(layer.keywords)
+    if hasattr(layer, 'use_selected_features_only'):
+        clone.use_selected_features_only = layer.use_selected_features_only
+    return clone
+
+
+class AnalysisQueue(object):
+
+    """Queue of analysis tasks, running one after the other.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.pending = []
+        self.running = None
+
+    def add(self, task):
+        """Add a task to the queue, it is started if no task is running.
+
+        :param task: The analysis task.
+        :type task: AnalysisTask
+        """
+        self.pending.append(task)
+        if self.running is None:
+            self._start_next()
+
+    def cancel(self):
+        """Cancel the running task and remove the pending tasks."""
+        pending = self.pending
+        self.pending = []
+        for task in pending:
+            task.finished(False)
+        if self.running is not None:
+            self.running.cancel()
+
+    def _start_next(self):
+        """Start the next pending task, if any."""
+        self.running = None
+        if not self.pending:
+            return
+        # We keep a reference to the task, the task manager does not.
+        self.running = self.pending.pop(0)
+        self.running.taskCompleted.connect(self._start_next)
+        self.running.taskTerminated.connect(self._start_next)
+        QgsApplication.taskManager().addTask(self.running)
+
+
+analysis_queue = AnalysisQueue()
+
+
+def run_and_wait(task):
+    """Run an analysis task and wait for its result.
+
+    The event loop keeps running meanwhile, so the progress is displayed and
+    the task can be cancelled.
+
+    .. versionadded:: 5.0
+
+    :param task: The analysis task.
+    :type task: AnalysisTask
+
+    :return: The result of the run method of the impact function.
+    :rtype: tuple
+    """
+    loop = QEventLoop()
+    task.analysisFinished.connect(loop.quit)
+    analysis_queue.add(task)
+    if task.result is None:
+        loop.exec_()
+    return task.result
@@ -6,6 +6,7 @@ import logging
 
 from qgis.core import (
     QgsFeature,
+    QgsGeometry,
     QgsWkbTypes,
 )
 
@@ -212,3 +213,117 @@ def create_valid_aggregation(layer):
 
     copy_layer(layer, cleaned)
     return cleaned
+
+
+def aggregation_footprint(layer):
+    """The union of the aggregation areas, without holes.
+
+    :param layer: The valid aggregation layer.
+    :type layer: QgsVectorLayer
+
+    :return: The footprint.
+    :rtype: QgsGeometry
+    """
+    list_geometry = []
+    for area in layer.getFeatures():
+        list_geometry.append(QgsGeometry(area.geometry()))
+
+    geometry = QgsGeometry.unaryUnion(list_geometry)
+    if geometry.isMultipart():
+        multi_polygon = geometry.asMultiPolygon()
+        for polygon in multi_polygon:
+            for ring in polygon[1:]:
+                polygon.remove(ring)
+        return QgsGeometry.fromMultiPolygonXY(multi_polygon)
+
+    else:
+        polygon = geometry.asPolygon()
+        for ring in polygon[1:]:
+            polygon.remove(ring)
+        return QgsGeometry.fromPolygonXY(polygon)
+
+
+class AggregationFootprints():
+
+    """Cache of the valid copy of aggregation layers and their footprint.
+
+    The dock validates the analysis extent on every pan and zoom. The valid
+    copy of the aggregation layer and its footprint are computed again only
+    if the layer, its CRS or the selection used for the analysis changed.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self):
+        """Constructor."""
+        # Number of modifications of each layer, by layer id.
+        self._counters = {}
+        self._cache = {}
+
+    def _changed(self, layer_id):
+        """Count a modification of a layer.
+
+        :param layer_id: The layer id.
+        :type layer_id: str
+        """
+        self._counters[layer_id] = self._counters.get(layer_id, 0) + 1
+
+    def _removed(self, layer_id):
+        """Forget a layer which is deleted.
+
+        :param layer_id: The layer id.
+        :type layer_id: str
+        """
+        self._counters.pop(layer_id, None)
+        self._cache.pop(layer_id, None)
+
+    def modification_counter(self, layer):
+        """The number of modifications of a layer since it is watched.
+
+        :param layer: The layer.
+        :type layer: QgsVectorLayer
+
+        :return: The counter.
+        :rtype: int
+        """
+        layer_id = layer.id()
+        if layer_id not in self._counters:
+            self._counters[layer_id] = 0
+            layer.dataChanged.connect(lambda: self._changed(layer_id))
+            layer.willBeDeleted.connect(lambda: self._removed(layer_id))
+        return self._counters[layer_id]
+
+    def footprint(self, layer, use_selected_only):
+        """The valid copy of an aggregation layer and its footprint.
+
+        :param layer: The aggregation layer.
+        :type layer: QgsVectorLayer
+
+        :param use_selected_only: If only the selected features are used.
+        :type use_selected_only: bool
+
+        :return: A tuple with the valid memory layer and a copy of its
+            footprint. The layer must not be modified.
+        :rtype: tuple
+        """
+        selection = None
+        if use_selected_only and layer.selectedFeatureCount() > 0:
+            selection = frozenset(layer.selectedFeatureIds())
+        key = (
+            self.modification_counter(layer),
+            layer.crs().authid(),
+            selection)
+
+        cached_key, cleaned, footprint = self._cache.get(
+            layer.id(), (None, None, None))
+        if cached_key != key:
+            layer.use_selected_features_only = use_selected_only
+            cleaned = create_valid_aggregation(layer)
+            footprint = aggregation_footprint(cleaned)
+            # Only the last state of each layer is kept.
+            self._cache[layer.id()] = (key, cleaned, footprint)
+        return cleaned, QgsGeometry(footprint)
+
+
+# The cache used by the lightweight preparation of the impact function.
+aggregation_footprints = AggregationFootprints()
@@ -32,6 +32,7 @@ from qgis.utils import iface as iface_object
 
 from safe import messaging as m
 from safe.common.exceptions import (
+    AnalysisCancelledError,
     InaSAFEError,
     InvalidExtentError,
     WrongEarthquakeFunction,
@@ -39,17 +40,20 @@ from safe.common.exceptions import (
     ProcessingInstallationError,
     SpatialIndexCreationError,
 )
+from safe.common.progress import ProgressAggregator
 from safe.common.utilities import temp_dir
 from safe.common.version import get_version
 from safe.datastore.datastore import DataStore
 from safe.datastore.folder import Folder
 from safe.definitions import count_ratio_mapping
-from safe.definitions.analysis_steps import analysis_steps
+from safe.definitions.analysis_steps import (
+    analysis_steps, extra_analysis_steps)
 from safe.definitions.constants import (
     GLOBAL,
     ANALYSIS_SUCCESS,
     ANALYSIS_FAILED_BAD_INPUT,
     ANALYSIS_FAILED_BAD_CODE,
+    ANALYSIS_CANCELLED,
     PREPARE_SUCCESS,
     PREPARE_FAILED_BAD_INPUT,
     PREPARE_FAILED_INSUFFICIENT_OVERLAP,
@@ -65,6 +69,7 @@ from safe.definitions.exposure import (
 from safe.definitions.fields import (
     size_field,
     exposure_class_field,
+    exposure_type_field,
     hazard_class_field,
     distance_field,
 )
@@ -73,6 +78,7 @@ from safe.definitions.hazard_exposure_specifications import (
     specific_actions, specific_notes)
 from safe.definitions.layer_purposes import (
     layer_purpose_exposure,
+    layer_purpose_hazard,
     layer_purpose_exposure_summary,
     layer_purpose_aggregate_hazard_impacted,
     layer_purpose_aggregation_summary,
@@ -144,6 +150,7 @@ from safe.definitions.utilities import (
     get_provenance,
     update_template_component
 )
+from safe.gis.processing_tools import AnalysisFeedback
 from safe.gis.raster.clip_bounding_box import clip_by_extent
 from safe.gis.raster.polygonize import polygonize
 from safe.gis.raster.reclassify import reclassify as reclassify_raster
@@ -161,6 +168,7 @@ from safe.gis.vector.clip import clip
 from safe.gis.vector.default_values import add_default_values
 from safe.gis.vector.from_counts_to_ratios import from_counts_to_ratios
 from safe.gis.vector.intersection import intersection
+from safe.gis.vector.prepare_exposure import prepare_exposure_layer
 from safe.gis.vector.prepare_vector_layer import prepare_vector_layer
 from safe.gis.vector.reclassify import reclassify as reclassify_vector
 from safe.gis.vector.recompute_counts import recompute_counts
@@ -178,6 +186,8 @@ from safe.gis.vector.update_value_map import update_value_map
 from safe.gui.analysis_utilities import add_layer_to_canvas
 from safe.gui.widgets.message import generate_input_error_message
 from safe.impact_function.create_extra_layers import (
+    aggregation_footprint,
+    aggregation_footprints,
     create_analysis_layer,
     create_virtual_aggregation,
     create_profile_layer,
@@ -185,6 +195,8 @@ from safe.impact_function.create_extra_layers import (
 )
 from safe.impact_function.impact_function_utilities import (
     check_input_layer, report_urls)
+from safe.impact_function.partitioned_analysis import (
+    PartitionedAnalysis, analysis_fingerprint, merge_layers, partition_cache)
 from safe.impact_function.postprocessors import (
     run_single_post_processor, enough_input)
 from safe.impact_function.provenance_utilities import (
@@ -257,6 +269,10 @@ class ImpactFunction():
         self.debug_mode = False
         self.use_rounding = True
 
+        # Partitioned analysis, see safe.impact_function.partitioned_analysis
+        self._partition_owner = None
+        self._partitioned = False
+
         # Requested extent to use (according to the CRS property).
         self._requested_extent = None
         # Analysis CRS if no aggregation layer.
@@ -273,6 +289,13 @@ class ImpactFunction():
 
         # set this to a gui call back / web callback etc as needed.
         self._callback = self.console_progress_callback
+        # The throttled callback used while the analysis is running.
+        self._progress = None
+
+        # Cancellation token of the running analysis, with the optional
+        # maximum duration of the analysis in seconds.
+        self._feedback = None
+        self._timeout = setting('analysis_timeout', 0, float) or None
 
         # Names
         self._name = None  # e.g. Flood Raster on Building Polygon
@@ -487,6 +510,9 @@ class ImpactFunction():
             else:
                 text += '| '
             text += tree.__str__()
+            if tree.counts:
+                text += ' (%s)' % ', '.join(
+                    '%s: %s' % item for item in tree.counts.items())
 
             busy = tr('Busy')
             new_row.add(m.Cell(text))
@@ -885,6 +911,9 @@ class ImpactFunction():
 
             self.progress_callback(current, maximum, message=None)
 
+            While the analysis is running, the callback is called at most
+            PROGRESS_RATE times per second, and at each new step.
+
         :rtype: function()
 
         .. seealso:: console_progress_callback
@@ -904,6 +933,43 @@ class ImpactFunction():
         """
         self._callback = callback
 
+    @property
+    def feedback(self):
+        """Property for the feedback of the running analysis.
+
+        The feedback is shared by all the algorithms of the analysis.
+        Cancelling it stops the analysis.
+
+        .. versionadded:: 5.0
+
+        :returns: The feedback, or None if the analysis has not started.
+        :rtype: AnalysisFeedback
+        """
+        return self._feedback
+
+    @property
+    def timeout(self):
+        """Property for the maximum duration of the analysis in seconds.
+
+        The analysis is stopped when the duration is passed. The default
+        value is taken from the analysis_timeout setting.
+
+        .. versionadded:: 5.0
+
+        :returns: The duration, or None if the analysis has no deadline.
+        :rtype: float
+        """
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, timeout):
+        """Setter for the timeout property.
+
+        :param timeout: The duration in seconds, or None.
+        :type timeout: float
+        """
+        self._timeout = timeout
+
     @staticmethod
     def console_progress_callback(current, maximum, message=None):
         """Simple console based callback implementation for tests.
@@ -984,9 +1050,18 @@ class ImpactFunction():
         LOGGER.info('%s: %s: %s' % (context, key, value))
         self.state[context]["info"][key] = value
 
-    def prepare(self):
+    def prepare(self, lightweight=False):
         """Method to check if the impact function can be run.
 
+        The lightweight preparation is used to validate the analysis extent
+        interactively, on every pan or zoom. The footprint of the aggregation
+        layer comes from a cache. The impact function must be prepared again
+        without this flag before running it.
+
+        :param lightweight: If the footprint of the aggregation layer can come
+            from the cache. Default to False.
+        :type lightweight: bool
+
         :return: A tuple with the status of the IF and an error message if
             needed.
             The status is PREPARE_SUCCESS if everything was fine.
@@ -999,6 +1074,8 @@ class ImpactFunction():
         :rtype: (int, m.Message)
         """
         self._provenance_ready = False
+        self._is_ready = False
+        self._preprocessors = []
         # save layer reference before preparing.
         # used to display it in maps
         original_exposure = self.exposure
@@ -1115,7 +1192,7 @@ class ImpactFunction():
                 message.add(suggestion)
                 return PREPARE_FAILED_BAD_INPUT, message
 
-            status, message = self._compute_analysis_extent()
+            status, message = self._compute_analysis_extent(lightweight)
             if status != PREPARE_SUCCESS:
                 return status, message
 
@@ -1255,12 +1332,17 @@ class ImpactFunction():
 
         return expected
 
-    def _compute_analysis_extent(self):
+    def _compute_analysis_extent(self, lightweight=False):
         """Compute the minimum extent between layers.
 
         This function will set the self._analysis_extent geometry using
         aggregation CRS or crs property.
 
+        :param lightweight: If the footprint of the aggregation layer can come
+            from the cache, without replacing the aggregation layer by its
+            valid copy. Default to False.
+        :type lightweight: bool
+
         :return: A tuple with the status of the IF and an error message if
             needed.
             The status is PREPARE_SUCCESS if everything was fine.
@@ -1331,25 +1413,15 @@ class ImpactFunction():
             # We monkey patch if we use selected features only.
             self.aggregation.use_selected_features_only = (
                 self.use_selected_features_only)
-            self.aggregation = create_valid_aggregation(self.aggregation)
-            list_geometry = []
-            for area in self.aggregation.getFeatures():
-                list_geometry.append(QgsGeometry(area.geometry()))
-
-            geometry = QgsGeometry.unaryUnion(list_geometry)
-            if geometry.isMultipart():
-                multi_polygon = geometry.asMultiPolygon()
-                for polygon in multi_polygon:
-                    for ring in polygon[1:]:
-                        polygon.remove(ring)
-                self._analysis_extent = QgsGeometry.fromMultiPolygonXY(
-                    multi_polygon)
-
+            if lightweight:
+                # The aggregation layer is not replaced, the full preparation
+                # will make the valid copy.
+                _, self._analysis_extent = aggregation_footprints.footprint(
+                    self.aggregation, self.use_selected_features_only)
             else:
-                polygon = geometry.asPolygon()
-                for ring in polygon[1:]:
-                    polygon.remove(ring)
-                self._analysis_extent = QgsGeometry.fromPolygonXY(polygon)
+                self.aggregation = create_valid_aggregation(self.aggregation)
+                self._analysis_extent = aggregation_footprint(
+                    self.aggregation)
             is_empty = self._analysis_extent.isEmpty()
             is_invalid = not self._analysis_extent.isGeosValid()
             if is_empty or is_invalid:
@@ -1431,6 +1503,8 @@ class ImpactFunction():
                 something.
             The status is ANALYSIS_FAILED_BAD_CODE if something went wrong
                 from the code.
+            The status is ANALYSIS_CANCELLED if the callback raised an
+                AnalysisCancelledError.
         :rtype: (int, m.Message)
         """
         self._start_datetime = datetime.now()
@@ -1445,11 +1519,13 @@ class ImpactFunction():
         try:
             self.reset_state()
             clear_prof_data()
+            self._feedback = AnalysisFeedback(self.timeout)
+            self._progress = ProgressAggregator(self.callback)
             self._run()
 
             # Get the profiling log
             self._performance_log = profiling_log()
-            self.callback(8, 8, analysis_steps['profiling'])
+            self._progress(8, 8, analysis_steps['profiling'])
 
             self._profiling_table = create_profile_layer(
                 self.performance_log_message())
@@ -1484,6 +1560,16 @@ class ImpactFunction():
             else:
                 self.aggregation = None
 
+        except AnalysisCancelledError as e:
+            self._is_ready = False
+            warning_heading = m.Heading(
+                tr('Analysis cancelled'), **WARNING_STYLE)
+            warning_message = str(e)
+            message = m.Message()
+            message.add(warning_heading)
+            message.add(warning_message)
+            return ANALYSIS_CANCELLED, message
+
         except NoFeaturesInExtentError:
             warning_heading = m.Heading(
                 tr('No features in the extent'), **WARNING_STYLE)
@@ -1581,7 +1667,7 @@ class ImpactFunction():
         """Internal function to run the impact function with profiling."""
         LOGGER.info('ANALYSIS : The impact function is starting.')
         step_count = len(analysis_steps)
-        self.callback(0, step_count, analysis_steps['initialisation'])
+        self._progress(0, step_count, analysis_steps['initialisation'])
 
         # Set a unique name for this impact
         self._unique_name = self._name.replace(' ', '')
@@ -1596,7 +1682,7 @@ class ImpactFunction():
         if not self._datastore:
             # By default, results will go in a temporary folder.
             # Users are free to set their own datastore with the setter.
-            self.callback(1, step_count, analysis_steps['data_store'])
+            self._progress(1, step_count, analysis_steps['data_store'])
 
             default_user_directory = setting(
                 'defaultUserDirectory', default='')
@@ -1621,10 +1707,11 @@ class ImpactFunction():
 
         self._performance_log = profiling_log()
 
-        self.callback(2, step_count, analysis_steps['pre_processing'])
+        self._progress(2, step_count, analysis_steps['pre_processing'])
         self.pre_process()
 
-        self.callback(3, step_count, analysis_steps['aggregation_preparation'])
+        self._progress(
+            3, step_count, analysis_steps['aggregation_preparation'])
         self.aggregation_preparation()
 
         # Special case for earthquake hazard on population. We need to remove
@@ -1647,32 +1734,44 @@ class ImpactFunction():
 
         step_count = len(analysis_steps)
 
-        self._performance_log = profiling_log()
-        self.callback(4, step_count, analysis_steps['hazard_preparation'])
-        self.hazard_preparation()
+        partition_count = setting('analysis_partitions', 1, int)
+        incremental = setting('incremental_analysis', False, bool)
+        if (partition_count > 1 or incremental) and not self.debug_mode and (
+                is_vector_layer(self.exposure)):
+            self._performance_log = profiling_log()
+            self._progress(
+                4, step_count, extra_analysis_steps['partitioned_analysis'])
+            self.partitioned_analysis(partition_count)
+        else:
+            self._performance_log = profiling_log()
+            self._progress(
+                4, step_count, analysis_steps['hazard_preparation'])
+            self.hazard_preparation()
 
-        self._performance_log = profiling_log()
-        self.callback(
-            5, step_count, analysis_steps['aggregate_hazard_preparation'])
-        self.aggregate_hazard_preparation()
+            self._performance_log = profiling_log()
+            self._progress(
+                5, step_count, analysis_steps['aggregate_hazard_preparation'])
+            self.aggregate_hazard_preparation()
 
-        self._performance_log = profiling_log()
-        self.callback(6, step_count, analysis_steps['exposure_preparation'])
-        self.exposure_preparation()
+            self._performance_log = profiling_log()
+            self._progress(
+                6, step_count, analysis_steps['exposure_preparation'])
+            self.exposure_preparation()
 
-        self._performance_log = profiling_log()
-        self.callback(7, step_count, analysis_steps['combine_hazard_exposure'])
-        self.intersect_exposure_and_aggregate_hazard()
+            self._performance_log = profiling_log()
+            self._progress(
+                7, step_count, analysis_steps['combine_hazard_exposure'])
+            self.intersect_exposure_and_aggregate_hazard()
 
-        self._performance_log = profiling_log()
-        self.callback(8, step_count, analysis_steps['post_processing'])
-        if is_vector_layer(self._exposure_summary):
-            # We post process the exposure summary
-            self.post_process(self._exposure_summary)
-        else:
-            # We post process the aggregate hazard.
-            # Raster continuous exposure.
-            self.post_process(self._aggregate_hazard_impacted)
+            self._performance_log = profiling_log()
+            self._progress(8, step_count, analysis_steps['post_processing'])
+            if is_vector_layer(self._exposure_summary):
+                # We post process the exposure summary
+                self.post_process(self._exposure_summary)
+            else:
+                # We post process the aggregate hazard.
+                # Raster continuous exposure.
+                self.post_process(self._aggregate_hazard_impacted)
 
         # Quick hack if EQ on places, we do some ordering on the distance.
         if self.exposure.keywords.get('exposure') == exposure_place['key']:
@@ -1699,7 +1798,7 @@ class ImpactFunction():
                         self.debug_layer(self._exposure_summary)
 
         self._performance_log = profiling_log()
-        self.callback(9, step_count, analysis_steps['summary_calculation'])
+        self._progress(9, step_count, analysis_steps['summary_calculation'])
         self.summary_calculation()
 
         self._end_datetime = datetime.now()
@@ -1900,10 +1999,43 @@ class ImpactFunction():
             self.set_state_process('pre_processor', pre_processor['name'])
             LOGGER.info('{name} : Running'.format(name=pre_processor['name']))
 
+    def use_exposure_crs(self):
+        """Check if the analysis should run in the exposure CRS.
+
+        The exposure is reprojected to the analysis CRS, which is the
+        aggregation CRS. If the 'analysis_crs_from_exposure' setting is set,
+        it is cheaper to reproject the aggregation, usually a few polygons,
+        than a large vector exposure layer.
+
+        :return: True if the analysis CRS should be the exposure CRS.
+        :rtype: bool
+        """
+        if not setting('analysis_crs_from_exposure', False, bool):
+            return False
+        if not is_vector_layer(self.exposure):
+            return False
+        if self.exposure.crs().authid() == self._crs.authid():
+            return False
+        if self.aggregation:
+            return (
+                self.exposure.featureCount() >
+                self.aggregation.featureCount())
+        return True
+
     @profile
     def aggregation_preparation(self):
         """This function is doing the aggregation preparation."""
         LOGGER.info('ANALYSIS : Aggregation preparation')
+        if self.aggregation:
+            self._crs = self.aggregation.crs()
+        use_exposure_crs = self.use_exposure_crs()
+        if use_exposure_crs:
+            self.set_state_info(
+                'impact function', 'analysis_crs_from_exposure', True)
+            self._analysis_extent.transform(QgsCoordinateTransform(
+                self._crs, self.exposure.crs(), QgsProject.instance()))
+            self._crs = self.exposure.crs()
+
         if not self.aggregation:
             self.set_state_info('aggregation', 'provided', False)
             LOGGER.info(
@@ -1982,14 +2114,24 @@ class ImpactFunction():
 
         else:
             self.set_state_info('aggregation', 'provided', True)
-            self._crs = self._aggregation.crs()
-            self.set_state_info('impact function', 'crs', self._crs.authid())
 
             self.set_state_process(
                 'aggregation', 'Cleaning the aggregation layer')
             self.aggregation = prepare_vector_layer(self.aggregation)
             self.debug_layer(self.aggregation)
 
+            if use_exposure_crs:
+                # The layer is reprojected once prepared, so only the
+                # selected features are reprojected.
+                self.set_state_process(
+                    'aggregation',
+                    'Reproject aggregation layer to exposure CRS')
+                self.aggregation = reproject(self.aggregation, self._crs)
+                self.debug_layer(self.aggregation)
+
+            self._crs = self._aggregation.crs()
+            self.set_state_info('impact function', 'crs', self._crs.authid())
+
             # We need to check if we can add default ratios to the exposure
             # by looking also in the aggregation layer.
             exposure_keywords = self.exposure.keywords
@@ -2147,7 +2289,8 @@ class ImpactFunction():
             self.set_state_process(
                 'hazard', 'Clip raster by analysis bounding box')
             # noinspection PyTypeChecker
-            self.hazard = clip_by_extent(self.hazard, extent)
+            self.hazard = clip_by_extent(
+                self.hazard, extent, feedback=self._feedback)
             self.debug_layer(self.hazard)
 
             if self.hazard.keywords.get('layer_mode') == 'continuous':
@@ -2155,13 +2298,15 @@ class ImpactFunction():
                     'hazard', 'Classify continuous raster hazard')
                 # noinspection PyTypeChecker
                 self.hazard = reclassify_raster(
-                    self.hazard, self.exposure.keywords['exposure'])
+                    self.hazard,
+                    self.exposure.keywords['exposure'],
+                    feedback=self._feedback)
                 self.debug_layer(self.hazard)
 
             self.set_state_process(
                 'hazard', 'Polygonize classified raster hazard')
             # noinspection PyTypeChecker
-            self.hazard = polygonize(self.hazard)
+            self.hazard = polygonize(self.hazard, feedback=self._feedback)
             self.debug_layer(self.hazard)
 
         if not use_same_projection:
@@ -2175,7 +2320,8 @@ class ImpactFunction():
         self.set_state_process(
             'hazard',
             'Clip and mask hazard polygons with the analysis layer')
-        self.hazard = clip(self.hazard, self._analysis_impacted)
+        self.hazard = clip(
+            self.hazard, self._analysis_impacted, feedback=self._feedback)
         self.debug_layer(self.hazard, check_fields=False)
 
         self.set_state_process(
@@ -2192,7 +2338,9 @@ class ImpactFunction():
                 'hazard',
                 'Classify continuous hazard and assign class names')
             self.hazard = reclassify_vector(
-                self.hazard, self.exposure.keywords['exposure'])
+                self.hazard,
+                self.exposure.keywords['exposure'],
+                feedback=self._feedback)
             self.debug_layer(self.hazard)
         else:
             # However, if it's a classified dataset, we only transpose the
@@ -2219,7 +2367,8 @@ class ImpactFunction():
             'aggregation',
             'Union hazard polygons with aggregation areas and assign '
             'hazard class')
-        self._aggregate_hazard_impacted = union(self.hazard, self.aggregation)
+        self._aggregate_hazard_impacted = union(
+            self.hazard, self.aggregation, feedback=self._feedback)
         self.debug_layer(self._aggregate_hazard_impacted)
 
     @profile
@@ -2248,9 +2397,42 @@ class ImpactFunction():
                 self.set_state_process(
                     'exposure', 'Polygonise classified raster exposure')
                 # noinspection PyTypeChecker
-                self.exposure = polygonize(self.exposure)
+                self.exposure = polygonize(
+                    self.exposure, feedback=self._feedback)
                 self.debug_layer(self.exposure)
 
+        if not self.debug_mode:
+            # The same steps in a single pass, without intermediate layers.
+            # Intermediate layers are only needed in debug mode.
+            fields = self.exposure.keywords['inasafe_fields']
+            exposure = self.exposure.keywords.get('exposure')
+            indivisible_keys = [f['key'] for f in indivisible_exposure]
+            processes = [
+                'Smart clip',
+                'Cleaning the vector exposure attribute table']
+            if not use_same_projection:
+                processes.append('Reproject exposure layer to aggregation CRS')
+            processes.append('Compute ratios from counts')
+            if exposure not in indivisible_keys and (
+                    self.exposure.geometryType() !=
+                    QgsWkbTypes.PointGeometry):
+                processes.append(
+                    'Clip the exposure layer with the analysis layer')
+            processes.append('Add default values')
+            if exposure_type_field['key'] in fields and (
+                    exposure_class_field['key'] not in fields):
+                processes.append('Assign classes based on value map')
+            for process in processes:
+                self.set_state_process('exposure', process)
+
+            self.exposure = prepare_exposure_layer(
+                self.exposure,
+                self._analysis_impacted,
+                self._crs,
+                owner=self._partition_owner)
+            self.debug_layer(self.exposure)
+            return
+
         # We may need to add the size of the original feature. So don't want to
         # split the feature yet.
         if use_same_projection:
@@ -2291,7 +2473,10 @@ class ImpactFunction():
             self.set_state_process(
                 'exposure',
                 'Clip the exposure layer with the analysis layer')
-            self.exposure = clip(self.exposure, self._analysis_impacted)
+            self.exposure = clip(
+                self.exposure,
+                self._analysis_impacted,
+                feedback=self._feedback)
             self.debug_layer(self.exposure)
 
         self.set_state_process('exposure', 'Add default values')
@@ -2324,7 +2509,9 @@ class ImpactFunction():
             # rasters.
             # noinspection PyTypeChecker
             self._aggregate_hazard_impacted = zonal_stats(
-                self.exposure, self._aggregate_hazard_impacted)
+                self.exposure,
+                self._aggregate_hazard_impacted,
+                feedback=self._feedback)
             self.debug_layer(self._aggregate_hazard_impacted)
 
             self.set_state_process('impact function', 'Add default values')
@@ -2360,8 +2547,13 @@ class ImpactFunction():
                 self.set_state_process(
                     'impact function',
                     'Intersect divisible features with the aggregate hazard')
+                sizes = {}
                 self._exposure_summary = intersection(
-                    self._exposure, self._aggregate_hazard_impacted)
+                    self._exposure,
+                    self._aggregate_hazard_impacted,
+                    callback=self._progress.step_callback(),
+                    sizes=sizes,
+                    feedback=self._feedback)
                 self.debug_layer(self._exposure_summary)
 
                 # If the layer has the size field, it means we need to
@@ -2375,7 +2567,7 @@ class ImpactFunction():
                         'InaSAFE will not use these counts, as we have ratios '
                         'since the exposure preparation step.')
                     self._exposure_summary = recompute_counts(
-                        self._exposure_summary)
+                        self._exposure_summary, new_sizes=sizes)
                     self.debug_layer(self._exposure_summary)
 
             else:
@@ -2383,7 +2575,9 @@ class ImpactFunction():
                     'impact function',
                     'Highest class of hazard is assigned to the exposure')
                 self._exposure_summary = assign_highest_value(
-                    self._exposure, self._aggregate_hazard_impacted)
+                    self._exposure,
+                    self._aggregate_hazard_impacted,
+                    feedback=self._feedback)
                 self.debug_layer(self._exposure_summary)
 
             # set title using definition
@@ -2398,6 +2592,137 @@ class ImpactFunction():
                 self._exposure_summary.setLayerName(
                     self._exposure_summary.keywords['title'])
 
+    @profile
+    def partitioned_analysis(self, partition_count):
+        """Prepare and intersect the hazard and the exposure by partition.
+
+        It replaces the hazard preparation, the aggregate hazard preparation,
+        the exposure preparation, their intersection, the post processing and
+        the aggregate hazard summary. The outputs of the partitions are merged
+        in the aggregate hazard and the exposure summary layers.
+
+        For an incremental analysis, each aggregation area is a partition and
+        the outputs of the areas analysed by the previous analysis, with the
+        same hazard and exposure, are reused.
+
+        :param partition_count: The number of tiles of the partition grid.
+        :type partition_count: int
+        """
+        LOGGER.info('ANALYSIS : Partitioned analysis')
+        cache = None
+        if setting('incremental_analysis', False, bool):
+            inputs = analysis_fingerprint(
+                self.hazard, self.exposure, self.aggregation, self._crs)
+            if inputs:
+                partition_cache.use(inputs)
+                cache = partition_cache
+            else:
+                LOGGER.info(
+                    'The analysis is not incremental with a memory layer.')
+        analysis = PartitionedAnalysis(
+            self.hazard,
+            self.exposure,
+            self.aggregation,
+            self.analysis_extent,
+            self._crs,
+            self.name,
+            partition_count,
+            workers=setting('analysis_partition_workers', 1, int),
+            callback=self._progress.step_callback(),
+            cache=cache,
+            feedback=self._feedback)
+        self.set_state_info(
+            'impact function', 'partitions', len(analysis.partitions))
+        results = analysis.run()
+        if cache is not None:
+            self.set_state_info(
+                'impact function',
+                'cached partitions',
+                analysis.cached_count)
+
+        for result in results:
+            for context, processes in list(result['state'].items()):
+                for process in processes:
+                    if process not in self.state[context]['process']:
+                        self.set_state_process(context, process)
+
+        # Without any partition, the keywords of the inputs are used.
+        if results:
+            hazard_keywords = results[0]['hazard_keywords']
+            exposure_keywords = results[0]['exposure_keywords']
+        else:
+            hazard_keywords = copy_layer_keywords(self.hazard.keywords)
+            exposure_keywords = copy_layer_keywords(self.exposure.keywords)
+        keywords = {
+            'hazard_keywords': hazard_keywords,
+            'exposure_keywords': exposure_keywords,
+            'aggregation_keywords': copy_layer_keywords(
+                self.aggregation.keywords),
+            'inasafe_fields': {},
+        }
+
+        aggregate_hazard_key = layer_purpose_aggregate_hazard_impacted['key']
+        exposure_summary_key = layer_purpose_exposure_summary['key']
+        keywords['layer_purpose'] = aggregate_hazard_key
+        self._aggregate_hazard_impacted = merge_layers(
+            [result['layers'][aggregate_hazard_key] for result in results],
+            layer_purpose_aggregate_hazard_impacted['name'],
+            missing_value=0,
+            geometry_type=QgsWkbTypes.PolygonGeometry,
+            crs=self._crs,
+            keywords=keywords)
+        self.debug_layer(self._aggregate_hazard_impacted)
+        keywords['layer_purpose'] = exposure_summary_key
+        self._exposure_summary = merge_layers(
+            [result['layers'][exposure_summary_key] for result in results],
+            layer_purpose_exposure_summary['name'],
+            geometry_type=self.exposure.geometryType(),
+            crs=self._crs,
+            keywords=keywords)
+        self.debug_layer(self._exposure_summary)
+
+        # The reports and the impact layers need the prepared layers.
+        self._hazard = self._merge_prepared_layers(
+            results,
+            layer_purpose_hazard,
+            hazard_keywords,
+            QgsWkbTypes.PolygonGeometry)
+        self._exposure = self._merge_prepared_layers(
+            results,
+            layer_purpose_exposure,
+            exposure_keywords,
+            self.exposure.geometryType())
+        self._partitioned = True
+
+    def _merge_prepared_layers(
+            self, results, purpose, keywords, geometry_type):
+        """Merge the prepared hazard or exposure layers of the partitions.
+
+        :param results: The outputs of the partitions.
+        :type results: list(dict)
+
+        :param purpose: The layer purpose, hazard or exposure.
+        :type purpose: dict
+
+        :param keywords: The keywords of the prepared layer.
+        :type keywords: dict
+
+        :param geometry_type: The geometry type of the layer if no partition
+            has a prepared layer.
+        :type geometry_type: QgsWkbTypes.GeometryType
+
+        :return: The merged layer, with the keywords of the prepared layer.
+        :rtype: QgsVectorLayer
+        """
+        layer = merge_layers(
+            [result['layers'].get(purpose['key']) for result in results],
+            purpose['key'],
+            geometry_type=geometry_type,
+            crs=self._crs)
+        layer.keywords = copy_layer_keywords(keywords)
+        self.debug_layer(layer)
+        return layer
+
     @profile
     def post_process(self, layer):
         """More process after getting the impact layer with data.
@@ -2440,33 +2765,42 @@ class ImpactFunction():
         We do not check layers here, we will check them in the next step.
         """
         LOGGER.info('ANALYSIS : Summary calculation')
-        if is_vector_layer(self._exposure_summary):
+        if is_vector_layer(self._exposure_summary) and not self._partitioned:
+            # The partitioned analysis already aggregated the impact summary.
             # With continuous exposure, we don't have an exposure summary layer
             self.set_state_process(
                 'impact function',
                 'Aggregate the impact summary')
             self._aggregate_hazard_impacted = aggregate_hazard_summary(
-                self.exposure_summary, self._aggregate_hazard_impacted)
+                self.exposure_summary,
+                self._aggregate_hazard_impacted,
+                feedback=self._feedback)
             self.debug_layer(self._exposure_summary, add_to_datastore=False)
 
         self.set_state_process(
             'impact function', 'Aggregate the aggregation summary')
         self._aggregation_summary = aggregation_summary(
-            self._aggregate_hazard_impacted, self.aggregation)
+            self._aggregate_hazard_impacted,
+            self.aggregation,
+            feedback=self._feedback)
         self.debug_layer(
             self._aggregation_summary, add_to_datastore=False)
 
         self.set_state_process(
             'impact function', 'Aggregate the analysis summary')
         self._analysis_impacted = analysis_summary(
-            self._aggregate_hazard_impacted, self._analysis_impacted)
+            self._aggregate_hazard_impacted,
+            self._analysis_impacted,
+            feedback=self._feedback)
         self.debug_layer(self._analysis_impacted)
 
         if self._exposure.keywords.get('classification'):
             self.set_state_process(
                 'impact function', 'Build the exposure summary table')
             self._exposure_summary_table = exposure_summary_table(
-                self._aggregate_hazard_impacted, self._exposure_summary)
+                self._aggregate_hazard_impacted,
+                self._exposure_summary,
+                feedback=self._feedback)
             self.debug_layer(
                 self._exposure_summary_table, add_to_datastore=False)
 
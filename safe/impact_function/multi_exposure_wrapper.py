@@ -915,6 +915,8 @@ class MultiExposureImpactFunction():
                 something. The exposure key is returned if needed.
             The status is ANALYSIS_FAILED_BAD_CODE if something went wrong
                 from the code. The exposure key is returned if needed.
+            The status is ANALYSIS_CANCELLED if the analysis of an exposure
+                has been cancelled by the callback.
         :rtype: (int, m.Message, str)
         """
         self._start_datetime = datetime.now()
@@ -0,0 +1,1077 @@
+# coding=utf-8
+
+"""Partitioned analysis for very large extents.
+
+The analysis extent is split into partitions. A partition is either a group
+of whole aggregation areas, when the aggregation layer has enough areas, or
+a tile of a regular grid over the analysis extent, the aggregation areas
+being clipped by the tile.
+
+The hazard preparation, the exposure preparation, their intersection, the
+post processors and the aggregate hazard summary run for each partition
+separately, so only the features of one partition are in memory at a time.
+Partitions can run in worker processes. The per-partition aggregate hazard
+and exposure summary layers are merged at the end, and the other summaries
+run on the merged layers.
+
+Features crossing the boundary of a partition are:
+* clipped by each partition if the exposure is divisible,
+* assigned to a single partition, according to their centroid, if the
+  exposure is indivisible or made of points.
+
+For an incremental analysis, each aggregation area is a partition and the
+outputs of the partitions are cached. The key of a partition is computed from
+the fingerprints of the hazard and the exposure layers, the geometry and the
+attributes of the area and of its neighbours, as a feature crossing areas
+belongs to one of them only. When the analysis extent or the selection of
+aggregation areas changes, only the new or changed areas are analysed again.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from math import ceil, sqrt
+from tempfile import mkdtemp
+
+from qgis.core import (
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsFields,
+    QgsGeometry,
+    QgsProject,
+    QgsRectangle,
+    QgsSpatialIndex,
+    QgsWkbTypes,
+)
+
+from safe.common.utilities import temp_dir
+from safe.datastore.folder import Folder
+from safe.definitions.analysis_steps import extra_analysis_steps
+from safe.definitions.exposure import indivisible_exposure
+from safe.definitions.fields import aggregation_id_field
+from safe.definitions.layer_purposes import (
+    layer_purpose_aggregate_hazard_impacted,
+    layer_purpose_exposure,
+    layer_purpose_exposure_summary,
+    layer_purpose_hazard,
+)
+from safe.gis.processing_tools import check_cancelled
+from safe.gis.tools import full_layer_uri, load_layer
+from safe.gis.vector.summary_1_aggregate_hazard import (
+    aggregate_hazard_summary)
+from safe.gis.vector.tools import (
+    AttributeWriter,
+    create_memory_layer,
+    geometry_part,
+)
+from safe.impact_function.create_extra_layers import create_analysis_layer
+from safe.report.processors.atlas_scheduler import worker_python_executable
+from safe.utilities.metadata import copy_layer_keywords
+from safe.utilities.profiling import profile
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+LOGGER = logging.getLogger('InaSAFE')
+
+BATCH_SIZE = 10000
+
+# Contexts of the impact function state recorded by a partition.
+PARTITION_STATE_CONTEXTS = [
+    'hazard', 'exposure', 'impact function', 'post_processor']
+
+
+def tile_extent(extent, tile_count):
+    """Split an extent into a grid of tiles.
+
+    The grid has as many columns as rows, or one column more.
+
+    :param extent: The extent to split.
+    :type extent: QgsRectangle
+
+    :param tile_count: The minimum number of tiles.
+    :type tile_count: int
+
+    :return: List of tiles, row by row.
+    :rtype: list(QgsRectangle)
+    """
+    tile_count = max(1, tile_count)
+    columns = int(ceil(sqrt(tile_count)))
+    rows = int(ceil(tile_count / float(columns)))
+    width = extent.width() / columns
+    height = extent.height() / rows
+    tiles = []
+    for row in range(rows):
+        for column in range(columns):
+            x_minimum = extent.xMinimum() + column * width
+            y_minimum = extent.yMinimum() + row * height
+            tiles.append(QgsRectangle(
+                x_minimum,
+                y_minimum,
+                x_minimum + width,
+                y_minimum + height))
+    return tiles
+
+
+def create_partitions(aggregation, analysis_geometry, partition_count):
+    """Split the analysis into partitions.
+
+    If the aggregation layer has at least as many areas as partitions, the
+    areas are grouped, without being split, according to the tile of the
+    grid containing their centroid. Otherwise, the areas are clipped by each
+    tile.
+
+    :param aggregation: The prepared aggregation layer, in the analysis CRS.
+    :type aggregation: QgsVectorLayer
+
+    :param analysis_geometry: The analysis extent.
+    :type analysis_geometry: QgsGeometry
+
+    :param partition_count: The number of tiles of the grid.
+    :type partition_count: int
+
+    :return: List of tuples with the geometry of the partition and the list
+        of aggregation features in the partition. Empty partitions are not
+        returned.
+    :rtype: list
+    """
+    tiles = tile_extent(analysis_geometry.boundingBox(), partition_count)
+    partitions = []
+
+    if aggregation.featureCount() >= len(tiles):
+        groups = [[] for _ in tiles]
+        for feature in aggregation.getFeatures():
+            centroid = feature.geometry().centroid().asPoint()
+            index = 0
+            for i, tile in enumerate(tiles):
+                if tile.contains(centroid):
+                    index = i
+                    break
+            groups[index].append(feature)
+
+        for group in groups:
+            if not group:
+                continue
+            geometry = QgsGeometry.unaryUnion(
+                [feature.geometry() for feature in group])
+            geometry = geometry_part(
+                geometry.intersection(analysis_geometry),
+                QgsWkbTypes.PolygonGeometry)
+            if geometry:
+                partitions.append((geometry, group))
+        return partitions
+
+    for tile in tiles:
+        tile_geometry = QgsGeometry.fromRect(tile)
+        geometry = geometry_part(
+            analysis_geometry.intersection(tile_geometry),
+            QgsWkbTypes.PolygonGeometry)
+        if not geometry:
+            continue
+        features = []
+        for feature in aggregation.getFeatures(QgsFeatureRequest(tile)):
+            clipped = geometry_part(
+                feature.geometry().intersection(tile_geometry),
+                QgsWkbTypes.PolygonGeometry)
+            if clipped:
+                clipped.convertToMultiType()
+                piece = QgsFeature(feature)
+                piece.setGeometry(clipped)
+                features.append(piece)
+        if features:
+            partitions.append((geometry, features))
+    return partitions
+
+
+def area_partitions(aggregation, analysis_geometry):
+    """Split the analysis into one partition for each aggregation area.
+
+    The partitions are sorted by fingerprint, so a feature crossing two
+    areas always has the same owner, whatever the other areas are.
+
+    :param aggregation: The prepared aggregation layer, in the analysis CRS.
+    :type aggregation: QgsVectorLayer
+
+    :param analysis_geometry: The analysis extent.
+    :type analysis_geometry: QgsGeometry
+
+    :return: A tuple with the list of partitions, like create_partitions,
+        and the list of their fingerprints.
+    :rtype: tuple
+    """
+    # noinspection PyArgumentList
+    engine = QgsGeometry.createGeometryEngine(analysis_geometry.constGet())
+    engine.prepareGeometry()
+
+    partitions = []
+    for feature in aggregation.getFeatures():
+        if engine.contains(feature.geometry().constGet()):
+            # The geometry must not change if the analysis extent changes
+            # somewhere else.
+            geometry = QgsGeometry(feature.geometry())
+        else:
+            geometry = geometry_part(
+                feature.geometry().intersection(analysis_geometry),
+                QgsWkbTypes.PolygonGeometry)
+        if geometry:
+            partitions.append((
+                partition_fingerprint(geometry, [feature]),
+                (geometry, [feature])))
+    partitions.sort(key=lambda partition: partition[0])
+    return (
+        [partition for _, partition in partitions],
+        [fingerprint for fingerprint, _ in partitions])
+
+
+def partition_fingerprint(geometry, features):
+    """The fingerprint of a partition.
+
+    The aggregation ID is not part of the fingerprint. It is generated when
+    the aggregation layer is prepared, so it changes with the selection of
+    aggregation areas.
+
+    :param geometry: The geometry of the partition.
+    :type geometry: QgsGeometry
+
+    :param features: The aggregation features of the partition.
+    :type features: list(QgsFeature)
+
+    :return: The fingerprint.
+    :rtype: str
+    """
+    hasher = hashlib.sha1()
+    hasher.update(bytes(geometry.asWkb()))
+    for feature in features:
+        attributes = feature.attributes()
+        index = feature.fieldNameIndex(aggregation_id_field['field_name'])
+        if index >= 0:
+            attributes[index] = None
+        hasher.update(repr(attributes).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def update_aggregation_id(result, feature):
+    """Update the aggregation ID in the cached outputs of a partition.
+
+    :param result: The outputs of the partition, see partition_result.
+    :type result: dict
+
+    :param feature: The aggregation feature of the partition, from the
+        prepared aggregation layer of the current analysis.
+    :type feature: QgsFeature
+    """
+    value = feature[aggregation_id_field['field_name']]
+    for layer in list(result['layers'].values()):
+        if layer is None:
+            continue
+        field = layer.keywords['inasafe_fields'].get(
+            aggregation_id_field['key'])
+        index = layer.fields().lookupField(field) if field else -1
+        if index < 0:
+            continue
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([index])
+        changes = {
+            output.id(): value for output in layer.getFeatures(request)
+            if output[index] != value}
+        if changes:
+            writer = AttributeWriter(layer)
+            writer.changeColumn(index, changes)
+            writer.commitChanges()
+
+
+def layer_fingerprint(layer):
+    """The fingerprint of a layer with its keywords.
+
+    The fingerprint changes if the files of the layer are modified.
+
+    :param layer: The layer with its keywords.
+    :type layer: QgsMapLayer
+
+    :return: The fingerprint or None for a memory layer.
+    :rtype: str
+    """
+    if layer.providerType() == 'memory':
+        return None
+    hasher = hashlib.sha1()
+    path = layer.source().split('|')[0]
+    if os.path.isfile(path):
+        # Also the sidecar files, like the dbf of a shapefile.
+        for sidecar in sorted(glob.glob(os.path.splitext(path)[0] + '.*')):
+            hasher.update(
+                ('%s %s' % (sidecar, os.path.getmtime(sidecar))).encode(
+                    'utf-8'))
+    subset = layer.subsetString() if hasattr(layer, 'subsetString') else ''
+    keywords = json.dumps(layer.keywords, sort_keys=True, default=str)
+    for value in [layer.providerType(), layer.source(), subset, keywords]:
+        hasher.update(value.encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def analysis_fingerprint(hazard, exposure, aggregation, crs):
+    """The fingerprint of the inputs of an analysis.
+
+    :param hazard: The hazard layer.
+    :type hazard: QgsMapLayer
+
+    :param exposure: The exposure layer.
+    :type exposure: QgsVectorLayer
+
+    :param aggregation: The prepared aggregation layer.
+    :type aggregation: QgsVectorLayer
+
+    :param crs: The CRS of the analysis.
+    :type crs: QgsCoordinateReferenceSystem
+
+    :return: The fingerprint or None if an input can not be fingerprinted.
+    :rtype: str
+    """
+    fingerprints = [layer_fingerprint(hazard), layer_fingerprint(exposure)]
+    if None in fingerprints:
+        return None
+    fingerprints.append(crs.authid())
+    fingerprints.append(
+        json.dumps(aggregation.keywords, sort_keys=True, default=str))
+    hasher = hashlib.sha1()
+    for fingerprint in fingerprints:
+        hasher.update(fingerprint.encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def partition_keys(partitions, fingerprints):
+    """The cache key of each partition, with the partitions around it.
+
+    :param partitions: The partitions, see area_partitions.
+    :type partitions: list
+
+    :param fingerprints: The fingerprints of the partitions.
+    :type fingerprints: list(str)
+
+    :return: The keys.
+    :rtype: list(str)
+    """
+    index = QgsSpatialIndex()
+    for i, (geometry, _) in enumerate(partitions):
+        feature = QgsFeature()
+        feature.setId(i)
+        feature.setGeometry(QgsGeometry.fromRect(geometry.boundingBox()))
+        index.insertFeature(feature)
+
+    keys = []
+    for i, (geometry, _) in enumerate(partitions):
+        hasher = hashlib.sha1()
+        for j in sorted(index.intersects(geometry.boundingBox())):
+            hasher.update(fingerprints[j].encode('utf-8'))
+        hasher.update(fingerprints[i].encode('utf-8'))
+        keys.append(hasher.hexdigest())
+    return keys
+
+
+class PartitionCache():
+
+    """Outputs of the partitions of the previous incremental analysis.
+
+    Only the outputs for the same hazard, exposure and aggregation keywords
+    are kept.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.inputs = None
+        self.results = {}
+
+    def use(self, inputs):
+        """Set the fingerprint of the inputs of the analysis.
+
+        The cache is cleared if the inputs are not the same.
+
+        :param inputs: The fingerprint of the inputs, see
+            analysis_fingerprint.
+        :type inputs: str
+        """
+        if inputs != self.inputs:
+            self.results = {}
+            self.inputs = inputs
+
+    def get(self, key):
+        """The outputs of a partition.
+
+        :param key: The key of the partition.
+        :type key: str
+
+        :return: The outputs, see partition_result, or None.
+        :rtype: dict
+        """
+        return self.results.get(key)
+
+    def keep(self, results):
+        """Keep the outputs of the last analysis only.
+
+        :param results: Dictionary of partition keys and outputs.
+        :type results: dict
+        """
+        self.results = dict(results)
+
+    def clear(self):
+        """Clear the cache."""
+        self.inputs = None
+        self.results = {}
+
+
+# The cache of the incremental analysis.
+partition_cache = PartitionCache()
+
+
+class PartitionOwner():
+
+    """Decide which partition owns an indivisible feature.
+
+    The owner is the first partition intersecting the centroid of the
+    feature. If no partition intersects the centroid, e.g. for a concave
+    feature, the owner is the first partition intersecting the feature.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, geometries, index):
+        """Constructor.
+
+        :param geometries: The geometries of all the partitions.
+        :type geometries: list(QgsGeometry)
+
+        :param index: The index of the current partition.
+        :type index: int
+        """
+        self.index = index
+        self.engines = []
+        for geometry in geometries:
+            # noinspection PyArgumentList
+            engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+            engine.prepareGeometry()
+            self.engines.append(engine)
+
+    def owner(self, geometry):
+        """The index of the partition owning the geometry.
+
+        :param geometry: The geometry of the feature.
+        :type geometry: QgsGeometry
+
+        :return: The index of the partition or None.
+        :rtype: int
+        """
+        centroid = geometry.centroid()
+        for i, engine in enumerate(self.engines):
+            if engine.intersects(centroid.constGet()):
+                return i
+        for i, engine in enumerate(self.engines):
+            if engine.intersects(geometry.constGet()):
+                return i
+        return None
+
+    def __call__(self, geometry):
+        """Check if the current partition owns the geometry.
+
+        :param geometry: The geometry of the feature.
+        :type geometry: QgsGeometry
+
+        :return: True if the feature belongs to the current partition.
+        :rtype: bool
+        """
+        return self.owner(geometry) == self.index
+
+
+def aggregation_layer(aggregation, features):
+    """Create the aggregation layer of a partition.
+
+    :param aggregation: The prepared aggregation layer.
+    :type aggregation: QgsVectorLayer
+
+    :param features: The aggregation features of the partition.
+    :type features: list(QgsFeature)
+
+    :return: A memory layer with the keywords of the aggregation.
+    :rtype: QgsVectorLayer
+    """
+    layer = create_memory_layer(
+        aggregation.keywords.get('title', 'aggregation'),
+        QgsWkbTypes.PolygonGeometry,
+        aggregation.crs(),
+        aggregation.fields())
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+    layer.keywords = copy_layer_keywords(aggregation.keywords)
+    return layer
+
+
+def needs_owner(exposure):
+    """Check if the features of the exposure must have a single owner.
+
+    :param exposure: The exposure layer.
+    :type exposure: QgsVectorLayer
+
+    :return: True if the exposure is indivisible or made of points.
+    :rtype: bool
+    """
+    indivisible_keys = [f['key'] for f in indivisible_exposure]
+    return exposure.keywords.get('exposure') in indivisible_keys or (
+        exposure.geometryType() == QgsWkbTypes.PointGeometry)
+
+
+@profile
+def analyse_partition(
+        hazard,
+        exposure,
+        aggregation,
+        geometries,
+        index,
+        crs,
+        name,
+        feedback=None):
+    """Run the analysis of a single partition.
+
+    :param hazard: The hazard layer, with its keywords.
+    :type hazard: QgsMapLayer
+
+    :param exposure: The vector exposure layer, with its keywords.
+    :type exposure: QgsVectorLayer
+
+    :param aggregation: The aggregation layer of the partition.
+    :type aggregation: QgsVectorLayer
+
+    :param geometries: The geometries of all the partitions.
+    :type geometries: list(QgsGeometry)
+
+    :param index: The index of the partition.
+    :type index: int
+
+    :param crs: The CRS of the analysis.
+    :type crs: QgsCoordinateReferenceSystem
+
+    :param name: The name of the analysis.
+    :type name: str
+
+    :param feedback: The feedback of the whole analysis.
+    :type feedback: AnalysisFeedback
+
+    :return: The impact function of the partition, its aggregate hazard
+        layer is already summarised.
+    :rtype: ImpactFunction
+    """
+    # Avoid a circular import, the impact function uses this module.
+    from safe.impact_function.impact_function import ImpactFunction
+
+    impact_function = ImpactFunction()
+    impact_function._hazard = hazard
+    impact_function._exposure = exposure
+    impact_function._aggregation = aggregation
+    impact_function._crs = crs
+    impact_function._name = name
+    impact_function._feedback = feedback
+    impact_function._analysis_impacted = create_analysis_layer(
+        geometries[index], crs, name)
+    impact_function._analysis_impacted.keywords['exposure_keywords'] = (
+        copy_layer_keywords(exposure.keywords))
+    impact_function._analysis_impacted.keywords['hazard_keywords'] = (
+        copy_layer_keywords(hazard.keywords))
+    if needs_owner(exposure):
+        impact_function._partition_owner = PartitionOwner(geometries, index)
+
+    impact_function.hazard_preparation()
+    impact_function.aggregate_hazard_preparation()
+    impact_function.exposure_preparation()
+    impact_function.intersect_exposure_and_aggregate_hazard()
+    impact_function.post_process(impact_function.exposure_summary)
+
+    impact_function.set_state_process(
+        'impact function', 'Aggregate the impact summary')
+    impact_function._aggregate_hazard_impacted = aggregate_hazard_summary(
+        impact_function.exposure_summary,
+        impact_function.aggregate_hazard_impacted,
+        feedback=feedback)
+    return impact_function
+
+
+class AnalysisPartition():
+
+    """Description of a partition a worker has to analyse.
+
+    The job only holds plain python values so it can be sent to another
+    process.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(
+            self,
+            index,
+            geometries,
+            crs,
+            name,
+            hazard,
+            exposure,
+            aggregation,
+            output_directory,
+            prefix_path=None):
+        """Create a job.
+
+        :param index: The index of the partition.
+        :type index: int
+
+        :param geometries: The WKT of all the partitions.
+        :type geometries: list(str)
+
+        :param crs: The authority identifier of the analysis CRS.
+        :type crs: str
+
+        :param name: The name of the analysis.
+        :type name: str
+
+        :param hazard: Tuple with the full URI and the keywords of the
+            hazard layer.
+        :type hazard: tuple
+
+        :param exposure: Tuple with the full URI and the keywords of the
+            exposure layer.
+        :type exposure: tuple
+
+        :param aggregation: Tuple with the full URI and the keywords of the
+            aggregation layer of the partition.
+        :type aggregation: tuple
+
+        :param output_directory: Directory where the outputs are written.
+        :type output_directory: str
+
+        :param prefix_path: The QGIS prefix path used by the worker to find
+            the data providers, default to the prefix path of the current
+            application.
+        :type prefix_path: str
+        """
+        self.index = index
+        self.geometries = list(geometries)
+        self.crs = crs
+        self.name = name
+        self.hazard = hazard
+        self.exposure = exposure
+        self.aggregation = aggregation
+        self.output_directory = output_directory
+        if prefix_path is None:
+            prefix_path = QgsApplication.prefixPath()
+        self.prefix_path = prefix_path
+
+
+def _load_job_layer(uri_and_keywords):
+    """Load a layer of a job and set its keywords.
+
+    :param uri_and_keywords: Tuple with the full URI and the keywords.
+    :type uri_and_keywords: tuple
+
+    :return: The layer.
+    :rtype: QgsMapLayer
+    """
+    uri, keywords = uri_and_keywords
+    layer = load_layer(uri)[0]
+    layer.keywords = keywords
+    return layer
+
+
+def analyse_partition_job(job):
+    """Analyse a partition and write its outputs in its directory.
+
+    :param job: The job to analyse.
+    :type job: AnalysisPartition
+
+    :return: Dictionary with the outputs of the partition, see
+        partition_result.
+    :rtype: dict
+    """
+    impact_function = analyse_partition(
+        _load_job_layer(job.hazard),
+        _load_job_layer(job.exposure),
+        _load_job_layer(job.aggregation),
+        [QgsGeometry.fromWkt(wkt) for wkt in job.geometries],
+        job.index,
+        QgsCoordinateReferenceSystem(job.crs),
+        job.name)
+
+    datastore = Folder(job.output_directory)
+    datastore.default_vector_format = 'geojson'
+    outputs = {}
+    for purpose, layer in list(partition_layers(impact_function).items()):
+        result, name = datastore.add_layer(layer, purpose)
+        outputs[purpose] = datastore.layer_uri(name) if result else None
+    return partition_result(impact_function, outputs)
+
+
+def analyse_partition_process(job):
+    """Worker process entry point, analyse a job in a new QGIS application.
+
+    :param job: The job to analyse.
+    :type job: AnalysisPartition
+
+    :return: Dictionary with the outputs of the partition.
+    :rtype: dict
+    """
+    application = QgsApplication([], False)
+    # Without the prefix path, the worker has no data providers and can not
+    # load the layers of the job.
+    QgsApplication.setPrefixPath(job.prefix_path, True)
+    application.initQgis()
+    try:
+        return analyse_partition_job(job)
+    finally:
+        QgsProject.instance().clear()
+        application.exitQgis()
+
+
+def partition_layers(impact_function):
+    """The output layers of the analysis of a partition.
+
+    :param impact_function: The impact function of the partition.
+    :type impact_function: ImpactFunction
+
+    :return: Dictionary of layer purpose and layer: the aggregate hazard,
+        the exposure summary and the prepared hazard and exposure.
+    :rtype: dict
+    """
+    return {
+        layer_purpose_aggregate_hazard_impacted['key']:
+            impact_function.aggregate_hazard_impacted,
+        layer_purpose_exposure_summary['key']:
+            impact_function.exposure_summary,
+        layer_purpose_hazard['key']: impact_function.hazard,
+        layer_purpose_exposure['key']: impact_function.exposure,
+    }
+
+
+def partition_result(impact_function, layers):
+    """Outputs of the analysis of a partition.
+
+    :param impact_function: The impact function of the partition.
+    :type impact_function: ImpactFunction
+
+    :param layers: Dictionary of layer purpose and layer, or path of the
+        layer when the partition ran in a worker process.
+    :type layers: dict
+
+    :return: Dictionary with the layers, the prepared hazard and exposure
+        keywords and the state of the impact function.
+    :rtype: dict
+    """
+    return {
+        'layers': layers,
+        'hazard_keywords': copy_layer_keywords(
+            impact_function.hazard.keywords),
+        'exposure_keywords': copy_layer_keywords(
+            impact_function.exposure.keywords),
+        'state': {
+            context: impact_function.state[context]['process']
+            for context in PARTITION_STATE_CONTEXTS
+        }
+    }
+
+
+def merge_layers(
+        layers,
+        name,
+        missing_value=None,
+        geometry_type=None,
+        crs=None,
+        keywords=None):
+    """Merge the features of several layers with the same purpose.
+
+    The fields of the output are the union of the fields of the layers, in
+    order. The keywords are the keywords of the first layer, with the union
+    of the inasafe_fields keywords.
+
+    Without any layer, the output is an empty layer with the geometry type,
+    the CRS and the keywords given.
+
+    :param layers: List of vector layers with their keywords. None values
+        are ignored.
+    :type layers: list(QgsVectorLayer)
+
+    :param name: The name of the output layer.
+    :type name: str
+
+    :param missing_value: The value of a numeric field for a feature coming
+        from a layer without this field. Default to None.
+    :type missing_value: int, float
+
+    :param geometry_type: The geometry type of the output if there is no
+        layer to merge.
+    :type geometry_type: QgsWkbTypes.GeometryType
+
+    :param crs: The CRS of the output if there is no layer to merge.
+    :type crs: QgsCoordinateReferenceSystem
+
+    :param keywords: The keywords of the output if there is no layer to
+        merge.
+    :type keywords: dict
+
+    :return: The merged memory layer.
+    :rtype: QgsVectorLayer
+    """
+    layers = [layer for layer in layers if layer]
+    if not layers:
+        output = create_memory_layer(name, geometry_type, crs)
+        if keywords is not None:
+            output.keywords = copy_layer_keywords(keywords)
+            output.keywords.setdefault('inasafe_fields', {})
+        return output
+
+    fields = QgsFields()
+    inasafe_fields = {}
+    for layer in layers:
+        for field in layer.fields():
+            if fields.lookupField(field.name()) == -1:
+                fields.append(field)
+        inasafe_fields.update(layer.keywords['inasafe_fields'])
+
+    output = create_memory_layer(
+        name, layers[0].geometryType(), layers[0].crs(), fields)
+    output.keywords = copy_layer_keywords(layers[0].keywords)
+    output.keywords['inasafe_fields'] = inasafe_fields
+    provider = output.dataProvider()
+
+    defaults = [
+        missing_value if field.isNumeric() else None for field in fields]
+    for layer in layers:
+        indexes = [
+            layer.fields().lookupField(field.name()) for field in fields]
+        features = []
+        for source_feature in layer.getFeatures():
+            attributes = source_feature.attributes()
+            feature = QgsFeature()
+            feature.setGeometry(source_feature.geometry())
+            feature.setAttributes([
+                attributes[index] if index != -1 else defaults[i]
+                for i, index in enumerate(indexes)])
+            features.append(feature)
+            if len(features) == BATCH_SIZE:
+                provider.addFeatures(features)
+                features = []
+        provider.addFeatures(features)
+    output.updateExtents()
+    return output
+
+
+class PartitionedAnalysis():
+
+    """Run the analysis partition by partition.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(
+            self,
+            hazard,
+            exposure,
+            aggregation,
+            analysis_geometry,
+            crs,
+            name,
+            partition_count,
+            workers=1,
+            callback=None,
+            cache=None,
+            feedback=None):
+        """Constructor.
+
+        :param hazard: The hazard layer.
+        :type hazard: QgsMapLayer
+
+        :param exposure: The vector exposure layer.
+        :type exposure: QgsVectorLayer
+
+        :param aggregation: The prepared aggregation layer.
+        :type aggregation: QgsVectorLayer
+
+        :param analysis_geometry: The analysis extent.
+        :type analysis_geometry: QgsGeometry
+
+        :param crs: The CRS of the analysis.
+        :type crs: QgsCoordinateReferenceSystem
+
+        :param name: The name of the analysis.
+        :type name: str
+
+        :param partition_count: The number of tiles of the grid.
+        :type partition_count: int
+
+        :param workers: Number of worker processes. With one worker, or if
+            an input layer is a memory layer, the partitions are analysed in
+            the current process.
+        :type workers: int
+
+        :param callback: Progress callback with the same signature as
+            ImpactFunction.callback: callback(current, maximum, message).
+        :type callback: function
+
+        :param cache: The cache for an incremental analysis. Each aggregation
+            area is then a partition and partition_count is not used.
+        :type cache: PartitionCache
+
+        :param feedback: The feedback of the analysis. It is checked after
+            each partition and given to the partitions analysed in the
+            current process.
+        :type feedback: AnalysisFeedback
+        """
+        self.hazard = hazard
+        self.exposure = exposure
+        self.aggregation = aggregation
+        self.crs = crs
+        self.name = name
+        self.workers = workers
+        self.callback = callback
+        self.cache = cache
+        self.feedback = feedback
+        if cache is None:
+            self.partitions = create_partitions(
+                aggregation, analysis_geometry, partition_count)
+            self.keys = [None] * len(self.partitions)
+        else:
+            self.partitions, fingerprints = area_partitions(
+                aggregation, analysis_geometry)
+            self.keys = partition_keys(self.partitions, fingerprints)
+        self.geometries = [geometry for geometry, _ in self.partitions]
+        self.cached_count = 0
+
+    def _progress(self, current, maximum):
+        """Relay progress to the callback if any.
+
+        :param current: Number of partitions done.
+        :type current: int
+
+        :param maximum: Number of partitions.
+        :type maximum: int
+        """
+        if self.callback:
+            self.callback(
+                current, maximum, extra_analysis_steps['partitioned_analysis'])
+
+    def use_workers(self):
+        """Check if the partitions can be analysed in worker processes.
+
+        :return: True if the workers can be used.
+        :rtype: bool
+        """
+        if self.workers <= 1 or len(self.partitions) <= 1:
+            return False
+        if not worker_python_executable():
+            return False
+        for layer in [self.hazard, self.exposure]:
+            if layer.providerType() == 'memory':
+                return False
+        return True
+
+    def jobs(self, indexes):
+        """Write the aggregation of each partition and create the jobs.
+
+        :param indexes: The indexes of the partitions to analyse.
+        :type indexes: list(int)
+
+        :return: List of jobs.
+        :rtype: list(AnalysisPartition)
+        """
+        working_directory = mkdtemp(dir=temp_dir('partitions'))
+        datastore = Folder(working_directory)
+        datastore.default_vector_format = 'geojson'
+        geometries = [geometry.asWkt() for geometry in self.geometries]
+        hazard = (
+            full_layer_uri(self.hazard),
+            copy_layer_keywords(self.hazard.keywords))
+        exposure = (
+            full_layer_uri(self.exposure),
+            copy_layer_keywords(self.exposure.keywords))
+
+        jobs = []
+        for index in indexes:
+            features = self.partitions[index][1]
+            layer = aggregation_layer(self.aggregation, features)
+            _, name = datastore.add_layer(layer, 'aggregation_%s' % index)
+            output_directory = os.path.join(
+                working_directory, 'partition_%s' % index)
+            os.makedirs(output_directory)
+            jobs.append(AnalysisPartition(
+                index,
+                geometries,
+                self.crs.authid(),
+                self.name,
+                hazard,
+                exposure,
+                (datastore.layer_uri(name),
+                 copy_layer_keywords(layer.keywords)),
+                output_directory,
+                QgsApplication.prefixPath()))
+        return jobs
+
+    def run(self):
+        """Analyse all the partitions.
+
+        With a cache, the partitions already analysed by the previous
+        analysis are not analysed again.
+
+        :return: List of the outputs of each partition, see
+            partition_result. The layers are loaded.
+        :rtype: list(dict)
+        """
+        count = len(self.partitions)
+        results = [None] * count
+        indexes = []
+        for index, key in enumerate(self.keys):
+            if self.cache is not None:
+                results[index] = self.cache.get(key)
+                if results[index] is not None:
+                    update_aggregation_id(
+                        results[index], self.partitions[index][1][0])
+            if results[index] is None:
+                indexes.append(index)
+        self.cached_count = count - len(indexes)
+        done = self.cached_count
+        self._progress(done, count)
+
+        if len(indexes) > 1 and self.use_workers():
+            context = multiprocessing.get_context('spawn')
+            context.set_executable(worker_python_executable())
+            jobs = self.jobs(indexes)
+            with context.Pool(processes=min(self.workers, count)) as pool:
+                for index, result in zip(
+                        indexes, pool.imap(analyse_partition_process, jobs)):
+                    for purpose, path in list(result['layers'].items()):
+                        result['layers'][purpose] = (
+                            load_layer(path)[0] if path else None)
+                    results[index] = result
+                    done += 1
+                    # Leaving the pool terminates the other workers.
+                    check_cancelled(self.feedback)
+                    self._progress(done, count)
+        else:
+            for index in indexes:
+                impact_function = analyse_partition(
+                    self.hazard,
+                    self.exposure,
+                    aggregation_layer(
+                        self.aggregation, self.partitions[index][1]),
+                    self.geometries,
+                    index,
+                    self.crs,
+                    self.name,
+                    self.feedback)
+                results[index] = partition_result(
+                    impact_function, partition_layers(impact_function))
+                done += 1
+                self._progress(done, count)
+
+        if self.cache is not None:
+            self.cache.keep(dict(zip(self.keys, results)))
+        return results
@@ -21,7 +21,7 @@ from safe.processors import (
     layer_property_input_type,
     size_calculator_input_value
 )
-from safe.utilities.i18n import tr
+from safe.utilities.i18n import tr, TranslationTable
 from safe.utilities.profiling import profile
 from functools import reduce
 
@@ -228,6 +228,9 @@ def run_single_post_processor(layer, post_processor):
         inputs = input_indexes.copy()
         inputs.update(input_properties)
 
+        # Boolean results are translated once for the whole layer.
+        boolean_translations = TranslationTable()
+
         # Iterate all feature
         for feature in iterator:
             attributes = feature.attributes()
@@ -257,7 +260,8 @@ def run_single_post_processor(layer, post_processor):
 
             # The affected postprocessor returns a boolean.
             if isinstance(post_processor_result, bool):
-                post_processor_result = tr(str(post_processor_result))
+                post_processor_result = boolean_translations[
+                    post_processor_result]
 
             layer.changeAttributeValue(
                 feature.id(),
@@ -0,0 +1,115 @@
+# coding=utf-8
+
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import (
+    get_qgis_app,
+    load_test_vector_layer)
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import QgsApplication
+
+from safe.common.exceptions import AnalysisCancelledError
+from safe.definitions.analysis_steps import analysis_steps
+from safe.definitions.constants import (
+    ANALYSIS_CANCELLED,
+    ANALYSIS_SUCCESS,
+    PREPARE_SUCCESS,
+)
+from safe.impact_function.analysis_task import AnalysisTask, run_and_wait
+from safe.impact_function.impact_function import ImpactFunction
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+def prepared_impact_function():
+    """A prepared impact function with small layers."""
+    impact_function = ImpactFunction()
+    impact_function.hazard = load_test_vector_layer(
+        'gisv4', 'hazard', 'classified_vector.geojson')
+    impact_function.exposure = load_test_vector_layer(
+        'gisv4', 'exposure', 'building-points.geojson')
+    impact_function.aggregation = load_test_vector_layer(
+        'gisv4', 'aggregation', 'small_grid.geojson')
+    return impact_function
+
+
+class TestAnalysisTask(unittest.TestCase):
+
+    def test_run_and_wait(self):
+        """Test the analysis runs in a task and the layers are usable."""
+        impact_function = prepared_impact_function()
+        status, message = impact_function.prepare()
+        self.assertEqual(PREPARE_SUCCESS, status, message)
+
+        task = AnalysisTask(impact_function)
+        progress = []
+        task.progressMessage.connect(
+            lambda current, maximum, step: progress.append(step))
+        status, message = run_and_wait(task)
+        self.assertEqual(ANALYSIS_SUCCESS, status, message)
+        self.assertIn(analysis_steps['initialisation'], progress)
+
+        # The outputs belong to the main thread.
+        main_thread = QgsApplication.instance().thread()
+        for layer in task.layers():
+            self.assertEqual(layer.thread(), main_thread)
+        self.assertTrue(impact_function.impact.isValid())
+
+    def test_clone_input_layers(self):
+        """Test the task reads clones of the input layers."""
+        impact_function = prepared_impact_function()
+        status, message = impact_function.prepare()
+        self.assertEqual(PREPARE_SUCCESS, status, message)
+        hazard = impact_function.hazard
+        exposure = impact_function.exposure
+        aggregation = impact_function.aggregation
+
+        AnalysisTask(impact_function)
+        self.assertTrue(impact_function.is_ready)
+        for layer, clone in [
+                (hazard, impact_function.hazard),
+                (exposure, impact_function.exposure),
+                (aggregation, impact_function.aggregation)]:
+            self.assertIsNot(layer, clone)
+            self.assertEqual(layer.featureCount(), clone.featureCount())
+            self.assertEqual(
+                layer.keywords['layer_purpose'],
+                clone.keywords['layer_purpose'])
+
+    def test_progress(self):
+        """Test the progress of the task within a step."""
+        task = AnalysisTask(prepared_impact_function())
+        step_count = len(analysis_steps)
+        task._progress(
+            7, step_count, analysis_steps['combine_hazard_exposure'])
+        self.assertAlmostEqual(task.progress(), 70)
+        task._progress(
+            step_count * 75,
+            step_count * 100,
+            analysis_steps['combine_hazard_exposure'])
+        self.assertAlmostEqual(task.progress(), 75)
+
+    def test_cancel(self):
+        """Test a cancelled task stops the analysis."""
+        impact_function = prepared_impact_function()
+        status, message = impact_function.prepare()
+        self.assertEqual(PREPARE_SUCCESS, status, message)
+
+        task = AnalysisTask(impact_function)
+        task.cancel()
+        with self.assertRaises(AnalysisCancelledError):
+            task._progress(0, 1, analysis_steps['initialisation'])
+
+        # The impact function catches the cancellation.
+        impact_function.callback = task._progress
+        status, message = impact_function.run()
+        self.assertEqual(ANALYSIS_CANCELLED, status)
+
+
+if __name__ == '__main__':
+    unittest.main()
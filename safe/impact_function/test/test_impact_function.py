@@ -119,6 +119,7 @@ from safe.gis.sanity_check import check_inasafe_fields
 from safe.utilities.unicode import byteify
 from safe.utilities.gis import wkt_to_rectangle
 from safe.utilities.utilities import readable_os_version
+from safe.impact_function.create_extra_layers import aggregation_footprints
 from safe.impact_function.impact_function import ImpactFunction
 from safe.impact_function.impact_function_utilities import check_input_layer
 from safe.definitions.exposure import exposure_population
@@ -415,6 +416,45 @@ class TestImpactFunction(unittest.TestCase):
             message
         )
 
+    def test_lightweight_prepare(self):
+        """Test the lightweight preparation uses the cached footprint."""
+        hazard_layer = load_test_vector_layer(
+            'gisv4', 'hazard', 'classified_vector.geojson')
+        exposure_layer = load_test_vector_layer(
+            'gisv4', 'exposure', 'building-points.geojson')
+        aggregation_layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+
+        impact_function = ImpactFunction()
+        impact_function.aggregation = aggregation_layer
+        impact_function.exposure = exposure_layer
+        impact_function.hazard = hazard_layer
+        impact_function.use_selected_features_only = True
+        aggregation_layer.select(0)
+        status, message = impact_function.prepare(lightweight=True)
+        self.assertEqual(PREPARE_SUCCESS, status, message)
+        # The aggregation layer is not replaced by its valid copy.
+        self.assertIs(impact_function.aggregation, aggregation_layer)
+        lightweight_extent = impact_function.analysis_extent
+
+        cleaned, _ = aggregation_footprints.footprint(aggregation_layer, True)
+        self.assertEqual(cleaned.featureCount(), 1)
+        cached, _ = aggregation_footprints.footprint(aggregation_layer, True)
+        self.assertIs(cached, cleaned)
+
+        # A new selection is a new footprint.
+        aggregation_layer.select(1)
+        cached, _ = aggregation_footprints.footprint(aggregation_layer, True)
+        self.assertIsNot(cached, cleaned)
+        self.assertEqual(cached.featureCount(), 2)
+        aggregation_layer.deselect(1)
+
+        status, message = impact_function.prepare()
+        self.assertEqual(PREPARE_SUCCESS, status, message)
+        self.assertTrue(compare_wkt(
+            lightweight_extent.asWkt(),
+            impact_function.analysis_extent.asWkt()))
+
     def test_not_exposed_exposure(self):
         """Test if we can run 0 exposed features over a raster hazard."""
         hazard_layer = load_test_raster_layer(
@@ -0,0 +1,220 @@
+# coding=utf-8
+
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import (
+    get_qgis_app,
+    load_test_vector_layer)
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import (
+    QgsApplication, QgsGeometry, QgsPointXY, QgsRectangle, QgsWkbTypes)
+
+from safe.definitions.fields import aggregation_id_field
+from safe.gis.vector.prepare_vector_layer import prepare_vector_layer
+from safe.impact_function.partitioned_analysis import (
+    PartitionCache,
+    PartitionedAnalysis,
+    PartitionOwner,
+    area_partitions,
+    create_partitions,
+    layer_fingerprint,
+    merge_layers,
+    partition_keys,
+    tile_extent,
+)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestPartitionedAnalysis(unittest.TestCase):
+
+    def test_tile_extent(self):
+        """Test the grid covers the extent."""
+        extent = QgsRectangle(0, 0, 10, 20)
+        tiles = tile_extent(extent, 5)
+        self.assertEqual(len(tiles), 6)
+        self.assertAlmostEqual(
+            sum(tile.area() for tile in tiles), extent.area())
+        self.assertEqual(tiles[0], QgsRectangle(0, 0, 10 / 3., 10))
+
+        self.assertEqual(tile_extent(extent, 1), [extent])
+
+    def test_partition_owner(self):
+        """Test a feature crossing partitions has a single owner."""
+        geometries = [
+            QgsGeometry.fromRect(QgsRectangle(0, 0, 10, 10)),
+            QgsGeometry.fromRect(QgsRectangle(10, 0, 20, 10)),
+        ]
+        owners = [PartitionOwner(geometries, i) for i in range(2)]
+
+        # Centroid in the second partition.
+        feature = QgsGeometry.fromRect(QgsRectangle(8, 2, 14, 4))
+        self.assertListEqual(
+            [owner(feature) for owner in owners], [False, True])
+
+        # Centroid on the boundary, the first partition wins.
+        point = QgsGeometry.fromPointXY(QgsPointXY(10, 5))
+        self.assertListEqual(
+            [owner(point) for owner in owners], [True, False])
+
+        # Outside of all the partitions.
+        point = QgsGeometry.fromPointXY(QgsPointXY(30, 5))
+        self.assertIsNone(owners[0].owner(point))
+
+    def test_create_partitions(self):
+        """Test the partitions and merging the aggregation back."""
+        aggregation = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+        aggregation.keywords['title'] = 'aggregation'
+        analysis = QgsGeometry.unaryUnion(
+            [f.geometry() for f in aggregation.getFeatures()])
+
+        # Whole aggregation areas.
+        partitions = create_partitions(aggregation, analysis, 2)
+        self.assertEqual(
+            sum(len(features) for _, features in partitions),
+            aggregation.featureCount())
+
+        # Tiles clipping the aggregation areas.
+        partitions = create_partitions(
+            aggregation, analysis, aggregation.featureCount() + 1)
+        area = sum(geometry.area() for geometry, _ in partitions)
+        self.assertAlmostEqual(area, analysis.area())
+
+        layers = []
+        for _, features in partitions:
+            layer = load_test_vector_layer(
+                'gisv4',
+                'aggregation',
+                'small_grid.geojson',
+                clone_to_memory=True)
+            layer.dataProvider().truncate()
+            layer.dataProvider().addFeatures(features)
+            layers.append(layer)
+        merged = merge_layers(layers, 'merged')
+        self.assertEqual(
+            merged.featureCount(),
+            sum(len(features) for _, features in partitions))
+        self.assertListEqual(
+            merged.fields().names(), aggregation.fields().names())
+
+    def test_merge_no_layers(self):
+        """Test merging no layer gives an empty layer."""
+        aggregation = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+        merged = merge_layers(
+            [None, None],
+            'merged',
+            geometry_type=QgsWkbTypes.PolygonGeometry,
+            crs=aggregation.crs(),
+            keywords=aggregation.keywords)
+        self.assertEqual(merged.featureCount(), 0)
+        self.assertEqual(
+            merged.geometryType(), QgsWkbTypes.PolygonGeometry)
+        self.assertEqual(merged.crs(), aggregation.crs())
+        self.assertDictEqual(merged.keywords, aggregation.keywords)
+        self.assertIsNot(merged.keywords, aggregation.keywords)
+
+    def test_area_partitions(self):
+        """Test the cache keys only change around a changed area."""
+        aggregation = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+        self.assertIsNotNone(layer_fingerprint(aggregation))
+        analysis = QgsGeometry.unaryUnion(
+            [f.geometry() for f in aggregation.getFeatures()])
+
+        partitions, fingerprints = area_partitions(aggregation, analysis)
+        self.assertEqual(len(partitions), aggregation.featureCount())
+        self.assertListEqual(fingerprints, sorted(fingerprints))
+        keys = partition_keys(partitions, fingerprints)
+
+        # Remove the first area from the analysis.
+        first = partitions[0][0]
+        smaller = analysis.difference(first)
+        partitions, fingerprints = area_partitions(aggregation, smaller)
+        self.assertEqual(len(partitions), aggregation.featureCount() - 1)
+        new_keys = partition_keys(partitions, fingerprints)
+        for (geometry, _), key in zip(partitions, new_keys):
+            if geometry.boundingBox().intersects(first.boundingBox()):
+                self.assertNotIn(key, keys)
+            else:
+                self.assertIn(key, keys)
+
+    def test_area_partitions_selection(self):
+        """Test the cache keys do not depend on the aggregation ID."""
+        aggregation = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson',
+            clone_to_memory=True)
+        # The aggregation ID is generated when the layer is prepared.
+        del aggregation.keywords['inasafe_fields'][
+            aggregation_id_field['key']]
+        # Move the first area away from the other ones.
+        first = next(aggregation.getFeatures())
+        geometry = QgsGeometry(first.geometry())
+        geometry.translate(-1, 0)
+        aggregation.dataProvider().changeGeometryValues(
+            {first.id(): geometry})
+        analysis = QgsGeometry.unaryUnion(
+            [f.geometry() for f in aggregation.getFeatures()])
+
+        partitions, fingerprints = area_partitions(
+            prepare_vector_layer(aggregation), analysis)
+        keys = partition_keys(partitions, fingerprints)
+
+        # Deselect the first area, the other areas get new IDs when the
+        # aggregation is prepared.
+        aggregation.use_selected_features_only = True
+        ids = aggregation.allFeatureIds()
+        ids.remove(first.id())
+        aggregation.selectByIds(ids)
+        prepared = prepare_vector_layer(aggregation)
+        partitions, fingerprints = area_partitions(prepared, analysis)
+        self.assertEqual(len(partitions), aggregation.featureCount() - 1)
+        for key in partition_keys(partitions, fingerprints):
+            self.assertIn(key, keys)
+
+    def test_partition_cache(self):
+        """Test the cache is cleared when the inputs change."""
+        cache = PartitionCache()
+        cache.use('inputs')
+        cache.keep({'a': {'layers': {}}})
+        self.assertIsNotNone(cache.get('a'))
+        cache.use('inputs')
+        self.assertIsNotNone(cache.get('a'))
+        cache.use('other inputs')
+        self.assertIsNone(cache.get('a'))
+
+    def test_jobs(self):
+        """Test the jobs carry what the worker needs to start QGIS."""
+        hazard = load_test_vector_layer(
+            'gisv4', 'hazard', 'classified_vector.geojson')
+        exposure = load_test_vector_layer(
+            'gisv4', 'exposure', 'buildings.geojson')
+        aggregation = prepare_vector_layer(load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson',
+            clone_to_memory=True))
+        analysis = QgsGeometry.unaryUnion(
+            [f.geometry() for f in aggregation.getFeatures()])
+
+        partitioned = PartitionedAnalysis(
+            hazard,
+            exposure,
+            aggregation,
+            analysis,
+            aggregation.crs(),
+            'analysis',
+            2)
+        jobs = partitioned.jobs(list(range(len(partitioned.partitions))))
+        self.assertEqual(len(jobs), len(partitioned.partitions))
+        for job in jobs:
+            self.assertEqual(job.prefix_path, QgsApplication.prefixPath())
+            self.assertEqual(job.crs, aggregation.crs().authid())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,11 +13,10 @@ from qgis.core import (
     QgsRectangle,
     QgsRasterLayer,
     QgsMapLayer,
-    QgsExpression,
     QgsProject,
 )
 # noinspection PyPackageRequirements
-from qgis.PyQt.QtCore import QCoreApplication, Qt
+from qgis.PyQt.QtCore import QCoreApplication, Qt, QTimer
 # noinspection PyPackageRequirements
 from qgis.PyQt.QtWidgets import (
     QAction,
@@ -30,23 +29,9 @@ from qgis.PyQt.QtWidgets import (
 from qgis.PyQt.QtGui import QIcon
 
 from safe.common.custom_logging import LOGGER
-from safe.utilities.expressions import qgis_expressions
 from safe.definitions.versions import inasafe_release_status, inasafe_version
-from safe.common.exceptions import (
-    KeywordNotFoundError,
-    NoKeywordsFoundError,
-    MetadataReadError,
-)
-from safe.common.signals import send_static_message
 from safe.utilities.resources import resources_path
-from safe.utilities.gis import is_raster_layer
-from safe.definitions.layer_purposes import (
-    layer_purpose_exposure, layer_purpose_hazard
-)
-from safe.definitions.utilities import get_field_groups
 from safe.utilities.i18n import tr
-from safe.utilities.keyword_io import KeywordIO
-from safe.utilities.utilities import is_keyword_version_supported
 from safe.utilities.settings import setting, set_setting
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
@@ -78,7 +63,7 @@ class Plugin():
         """
         # Save reference to the QGIS interface
         self.iface = iface
-        self.dock_widget = None
+        self._dock_widget = None
 
         # Actions
         self.action_add_layers = None
@@ -167,6 +152,16 @@ class Plugin():
                 QgsMapLayer.RasterLayer,
                 True)
 
+    @property
+    def dock_widget(self):
+        """The InaSAFE dock, created on first use.
+
+        :rtype: Dock
+        """
+        if self._dock_widget is None:
+            self._create_dock()
+        return self._dock_widget
+
     def _create_dock_toggle_action(self):
         """Create action for plugin dockable window (show/hide)."""
         # pylint: disable=W0201
@@ -458,7 +453,7 @@ class Plugin():
         self.action_toggle_rubberbands.setChecked(flag)
         # noinspection PyUnresolvedReferences
         self.action_toggle_rubberbands.triggered.connect(
-            self.dock_widget.toggle_rubber_bands)
+            self.toggle_rubber_bands)
         self.add_action(self.action_toggle_rubberbands)
 
     def _create_analysis_extent_action(self):
@@ -533,17 +528,35 @@ class Plugin():
         self.add_action(self.action_select_package, add_to_toolbar=False)
 
     def _create_dock(self):
-        """Create dockwidget and tabify it with the legend."""
+        """Create dockwidget and tabify it with the legend.
+
+        The dock is created after the start of QGIS, or before if an action
+        needs it.
+        """
+        if self._dock_widget is not None or self.toolbar is None:
+            return
         # Import dock here as it needs to be imported AFTER i18n is set up
         from safe.gui.widgets.dock import Dock
-        self.dock_widget = Dock(self.iface)
-        self.dock_widget.setObjectName('InaSAFE-Dock')
-        self.iface.addDockWidget(Qt.RightDockWidgetArea, self.dock_widget)
-        legend_tab = self.iface.mainWindow().findChild(QApplication, 'Legend')
-        if legend_tab:
-            self.iface.mainWindow().tabifyDockWidget(
-                legend_tab, self.dock_widget)
-            self.dock_widget.raise_()
+        dock_widget = Dock(self.iface)
+        dock_widget.setObjectName('InaSAFE-Dock')
+        self._dock_widget = dock_widget
+        self.iface.addDockWidget(Qt.RightDockWidgetArea, dock_widget)
+        main_window = self.iface.mainWindow()
+        # The state of the main window may have been restored before the
+        # dock existed.
+        if not main_window.restoreDockWidget(dock_widget):
+            legend_tab = main_window.findChild(QApplication, 'Legend')
+            if legend_tab:
+                main_window.tabifyDockWidget(legend_tab, dock_widget)
+                dock_widget.raise_()
+
+        # Hook up a slot for when the dock is hidden using its close button
+        # or  view-panels
+        #
+        dock_widget.visibilityChanged.connect(self.toggle_inasafe_action)
+        # Also deal with the fact that on start of QGIS dock may already be
+        # hidden.
+        self.action_dock.setChecked(dock_widget.isVisible())
 
     # noinspection PyPep8Naming
     def initGui(self):
@@ -558,9 +571,10 @@ class Plugin():
         """
         self.toolbar = self.iface.addToolBar('InaSAFE')
         self.toolbar.setObjectName('InaSAFEToolBar')
-        self.dock_widget = None
-        # Now create the actual dock
-        self._create_dock()
+        self._dock_widget = None
+        # The dock is created when the event loop runs, so it does not delay
+        # the start of QGIS.
+        QTimer.singleShot(0, self._create_dock)
         # And all the menu actions
         # Configuration Group
         self._create_dock_toggle_action()
@@ -590,13 +604,10 @@ class Plugin():
         self._add_spacer_to_menu()
         self._create_show_definitions_action()
 
-        # Hook up a slot for when the dock is hidden using its close button
-        # or  view-panels
-        #
-        self.dock_widget.visibilityChanged.connect(self.toggle_inasafe_action)
-        # Also deal with the fact that on start of QGIS dock may already be
-        # hidden.
-        self.action_dock.setChecked(self.dock_widget.isVisible())
+        # The expression functions are registered when the event loop runs,
+        # for a new project, and again when a project is loaded.
+        QTimer.singleShot(0, self.register_expressions)
+        QgsProject.instance().readProject.connect(self.register_expressions)
 
         self.iface.initializationCompleted.connect(
             partial(self.show_welcome_message)
@@ -660,15 +671,40 @@ class Plugin():
             self.iface.removePluginMenu(self.tr('InaSAFE'), myAction)
             self.iface.removeToolBarIcon(myAction)
             self.iface.removeCustomActionForLayerType(myAction)
-        self.iface.mainWindow().removeDockWidget(self.dock_widget)
+        if self._dock_widget is not None:
+            self.iface.mainWindow().removeDockWidget(self._dock_widget)
+            self._dock_widget.setVisible(False)
+            self._dock_widget.destroy()
         self.iface.mainWindow().removeToolBar(self.toolbar)
-        self.dock_widget.setVisible(False)
-        self.dock_widget.destroy()
+        self.toolbar = None
         self.iface.currentLayerChanged.disconnect(self.layer_changed)
+        QgsProject.instance().readProject.disconnect(
+            self.register_expressions)
 
         # Unload QGIS expressions loaded by the plugin.
-        for qgis_expression in list(qgis_expressions().keys()):
-            QgsExpression.unregisterFunction(qgis_expression)
+        from safe.utilities.expressions import unregister_expressions
+        unregister_expressions()
+
+    @staticmethod
+    def register_expressions(*args):
+        """Register the InaSAFE expression functions in QGIS.
+
+        The functions are registered after the start of QGIS and when a
+        project is loaded, not when the plugin module is imported.
+
+        .. versionadded:: 5.0
+        """
+        _ = args  # NOQA
+        from safe.utilities.expressions import register_expressions
+        register_expressions()
+
+    def toggle_rubber_bands(self, flag):
+        """Disabled/enable the rendering of rubber bands of the dock.
+
+        :param flag: Flag to indicate if drawing of bands is active.
+        :type flag: bool
+        """
+        self.dock_widget.toggle_rubber_bands(flag)
 
     def toggle_inasafe_action(self, checked):
         """Check or un-check the toggle inaSAFE toolbar button.
@@ -788,6 +824,7 @@ class Plugin():
         dialog.show_option_dialog()
         if dialog.exec_():  # modal
             self.dock_widget.read_settings()
+            from safe.common.signals import send_static_message
             from safe.gui.widgets.message import getting_started_message
             send_static_message(self.dock_widget, getting_started_message())
             # Issue #4734, make sure to update the combobox after update the
@@ -992,6 +1029,19 @@ class Plugin():
         :param layer: The layer that is now active.
         :type layer: QgsMapLayer
         """
+        from safe.common.exceptions import (
+            KeywordNotFoundError,
+            NoKeywordsFoundError,
+            MetadataReadError,
+        )
+        from safe.definitions.layer_purposes import (
+            layer_purpose_exposure, layer_purpose_hazard
+        )
+        from safe.definitions.utilities import get_field_groups
+        from safe.utilities.gis import is_raster_layer
+        from safe.utilities.keyword_io import KeywordIO
+        from safe.utilities.utilities import is_keyword_version_supported
+
         if not layer:
             enable_keyword_wizard = False
         elif not hasattr(layer, 'providerType'):
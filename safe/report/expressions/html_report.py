@@ -32,6 +32,7 @@ from safe.definitions.reports.components import (
     aggregation_result_component,
     aggregation_postprocessors_component,
     analysis_provenance_details_simplified_component)
+from safe.utilities.expression_cache import expression_cache
 from safe.utilities.i18n import tr
 from safe.utilities.keyword_io import KeywordIO
 from safe.utilities.utilities import generate_expression_help
@@ -53,6 +54,21 @@ def get_analysis_dir(exposure_key=None):
     """Retrieve an output directory of an analysis/ImpactFunction from a
     multi exposure analysis/ImpactFunction based on exposure type.
 
+    The result is cached until the layers of the project change.
+
+    :param exposure_key: An exposure keyword.
+    :type exposure_key: str
+
+    :return: A directory contains analysis outputs.
+    :rtype: str
+    """
+    return expression_cache.get(
+        ('analysis_dir', exposure_key), _find_analysis_dir, exposure_key)
+
+
+def _find_analysis_dir(exposure_key=None):
+    """Walk the layer tree to find the output directory of an analysis.
+
     :param exposure_key: An exposure keyword.
     :type exposure_key: str
 
@@ -146,10 +162,7 @@ def get_impact_report_as_string(analysis_dir):
         return None
 
     # We can display an impact report.
-    # We need to open the file in UTF-8, the HTML may have some accents
-    with open(table_report_path, 'r', encoding='utf-8') as table_report_file:
-        report = table_report_file.read()
-        return report
+    return expression_cache.read_file(table_report_path)
 
 
 def get_report_section(
@@ -168,17 +181,26 @@ def get_report_section(
     :return: Requested report section as an html.
     :rtype: basestring
     """
-    no_element_error = tr('No element match the tag or component id.')
-
-    root_element, dict_of_elements = ET.XMLID(html_report)
-    section_element = dict_of_elements.get(component_id)
-
-    if section_element:
-        requested_section = container_wrapper_format.format(
-            section_content=str(ET.tostring(section_element)))
-        return requested_section
-    else:
-        return no_element_error
+    def parse_section():
+        """Parse the report and extract the section."""
+        no_element_error = tr('No element match the tag or component id.')
+
+        root_element, dict_of_elements = ET.XMLID(html_report)
+        section_element = dict_of_elements.get(component_id)
+
+        if section_element:
+            requested_section = container_wrapper_format.format(
+                section_content=str(ET.tostring(section_element)))
+            return requested_section
+        else:
+            return no_element_error
+
+    # The report string returned by the cache is always the same object,
+    # its hash is computed only once.
+    return expression_cache.get(
+        ('report_section', html_report, component_id,
+         container_wrapper_format),
+        parse_section)
 
 
 ##
@@ -5,7 +5,6 @@
 from copy import deepcopy
 
 from safe.definitions.exposure import exposure_population
-from safe.definitions.utilities import definition
 from safe.definitions.utilities import get_displacement_rate, is_affected
 from safe.report.extractors.composer import QGISComposerContext
 from safe.report.extractors.util import (
@@ -73,7 +72,8 @@ def notes_assumptions_extractor(impact_report, component_metadata):
     extra_args = component_metadata.extra_args
     hazard_keywords = provenance['hazard_keywords']
     exposure_keywords = provenance['exposure_keywords']
-    exposure_type = definition(exposure_keywords['exposure'])
+    exposure_type = impact_report.data.definition(
+        exposure_keywords['exposure'])
 
     analysis_note_dict = resolve_from_dictionary(extra_args, 'analysis_notes')
     context['items'] = [analysis_note_dict]
@@ -83,7 +83,7 @@ def notes_assumptions_extractor(impact_report, component_metadata):
     context['items'] += provenance['notes']
 
     # Get hazard classification
-    hazard_classification = definition(
+    hazard_classification = impact_report.data.definition(
         active_classification(hazard_keywords, exposure_keywords['exposure']))
 
     # Check hazard affected class
@@ -17,9 +17,7 @@ from safe.definitions.fields import (
     displaced_field,
     additional_minimum_needs)
 from safe.definitions.minimum_needs import minimum_needs_fields
-from safe.definitions.utilities import (
-    postprocessor_output_field,
-    definition)
+from safe.definitions.utilities import postprocessor_output_field
 from safe.processors.population_post_processors import (
     age_postprocessors,
     gender_postprocessors)
@@ -59,9 +57,9 @@ def aggregation_postprocessors_extractor(impact_report, component_metadata):
 
     extra_args = component_metadata.extra_args
     # Find out aggregation report type
-    aggregation_summary = impact_report.aggregation_summary
-    analysis_layer = impact_report.analysis
-    analysis_layer_fields = impact_report.analysis.keywords['inasafe_fields']
+    aggregation_summary = impact_report.data.aggregation_summary
+    analysis_layer = impact_report.data.analysis
+    analysis_layer_fields = analysis_layer.keywords['inasafe_fields']
     use_rounding = impact_report.impact_function.use_rounding
     use_aggregation = bool(impact_report.impact_function.provenance[
         'aggregation_layer'])
@@ -69,7 +67,8 @@ def aggregation_postprocessors_extractor(impact_report, component_metadata):
     exposure_keywords = provenance['exposure_keywords']
 
     # Get exposure type definition
-    exposure_type = definition(exposure_keywords['exposure'])
+    exposure_type = impact_report.data.definition(
+        exposure_keywords['exposure'])
 
     # this entire section is only for population exposure type
     if not exposure_type == exposure_population:
@@ -9,7 +9,6 @@ from safe.definitions.fields import (
     total_affected_field,
     exposure_type_field,
     exposure_class_field)
-from safe.definitions.utilities import definition
 from safe.gis.vector.tools import read_dynamic_inasafe_field
 from safe.report.extractors.util import (
     resolve_from_dictionary,
@@ -46,14 +45,14 @@ def aggregation_result_extractor(impact_report, component_metadata):
 
     extra_args = component_metadata.extra_args
     # Find out aggregation report type
-    analysis_layer = impact_report.analysis
+    analysis_layer = impact_report.data.analysis
     provenance = impact_report.impact_function.provenance
     exposure_keywords = provenance['exposure_keywords']
-    exposure_summary_table = impact_report.exposure_summary_table
+    exposure_summary_table = impact_report.data.exposure_summary_table
     if exposure_summary_table:
         exposure_summary_table_fields = exposure_summary_table.keywords[
             'inasafe_fields']
-    aggregation_summary = impact_report.aggregation_summary
+    aggregation_summary = impact_report.data.aggregation_summary
     aggregation_summary_fields = aggregation_summary.keywords[
         'inasafe_fields']
     use_rounding = impact_report.impact_function.use_rounding
@@ -66,7 +65,8 @@ def aggregation_result_extractor(impact_report, component_metadata):
 
     # Only process for applicable exposure types
     # Get exposure type definition
-    exposure_type = definition(exposure_keywords['exposure'])
+    exposure_type = impact_report.data.definition(
+        exposure_keywords['exposure'])
     # Only round the number when it is population exposure and we use rounding
     is_population = exposure_type is exposure_population
 
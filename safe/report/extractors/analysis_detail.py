@@ -19,7 +19,6 @@ from safe.definitions.fields import (
     affected_field,
     exposed_population_count_field,
     population_count_field)
-from safe.definitions.utilities import definition
 from safe.report.extractors.util import (
     resolve_from_dictionary,
     value_from_field_name,
@@ -57,10 +56,10 @@ def analysis_detail_extractor(impact_report, component_metadata):
     context = {}
     extra_args = component_metadata.extra_args
 
-    analysis_layer = impact_report.analysis
+    analysis_layer = impact_report.data.analysis
     analysis_layer_fields = analysis_layer.keywords['inasafe_fields']
     analysis_feature = next(analysis_layer.getFeatures())
-    exposure_summary_table = impact_report.exposure_summary_table
+    exposure_summary_table = impact_report.data.exposure_summary_table
     if exposure_summary_table:
         exposure_summary_table_fields = exposure_summary_table.keywords[
             'inasafe_fields']
@@ -72,11 +71,12 @@ def analysis_detail_extractor(impact_report, component_metadata):
     """Initializations."""
 
     # Get hazard classification
-    hazard_classification = definition(
+    hazard_classification = impact_report.data.definition(
         active_classification(hazard_keywords, exposure_keywords['exposure']))
 
     # Get exposure type definition
-    exposure_type = definition(exposure_keywords['exposure'])
+    exposure_type = impact_report.data.definition(
+        exposure_keywords['exposure'])
     # Only round the number when it is population exposure and we use rounding
     is_population = exposure_type is exposure_population
 
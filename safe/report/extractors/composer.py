@@ -432,7 +432,7 @@ def qgis_composer_extractor(impact_report, component_metadata):
     reference_name = spatial_reference_format.format(
         crs=impact_report.impact_function.crs.authid())
 
-    analysis_layer = impact_report.analysis
+    analysis_layer = impact_report.data.analysis
     analysis_name = value_from_field_name(
         analysis_name_field['field_name'], analysis_layer)
 
@@ -8,7 +8,6 @@ from safe.definitions.fields import (
     exposure_hazard_count_field,
     exposure_total_exposed_field,
     displaced_field)
-from safe.definitions.utilities import definition
 from safe.report.extractors.util import (
     resolve_from_dictionary,
     value_from_field_name)
@@ -47,13 +46,14 @@ def general_report_extractor(impact_report, component_metadata):
     extra_args = component_metadata.extra_args
 
     # figure out analysis report type
-    analysis_layer = impact_report.analysis
+    analysis_layer = impact_report.data.analysis
     provenance = impact_report.impact_function.provenance
     use_rounding = impact_report.impact_function.use_rounding
     hazard_keywords = provenance['hazard_keywords']
     exposure_keywords = provenance['exposure_keywords']
 
-    exposure_type = definition(exposure_keywords['exposure'])
+    exposure_type = impact_report.data.definition(
+        exposure_keywords['exposure'])
     # Only round the number when it is population exposure and we use rounding
     is_population = exposure_type is exposure_population
 
@@ -71,7 +71,7 @@ def general_report_extractor(impact_report, component_metadata):
         value_header = '{name}'.format(**exposure_unit)
 
     # Get hazard classification
-    hazard_classification = definition(
+    hazard_classification = impact_report.data.definition(
         active_classification(hazard_keywords, exposure_keywords['exposure']))
 
     # in case there is a classification
@@ -226,7 +226,7 @@ def multi_exposure_general_report_extractor(impact_report, component_metadata):
     extra_args = component_metadata.extra_args
 
     multi_exposure = impact_report.multi_exposure_impact_function
-    analysis_layer = impact_report.analysis
+    analysis_layer = impact_report.data.analysis
     provenances = [
         impact_function.provenance for impact_function in (
             multi_exposure.impact_functions)]
@@ -249,7 +249,8 @@ def multi_exposure_general_report_extractor(impact_report, component_metadata):
         map_legend_titles.append(map_legend_title)
         exposure_stats = {}
         exposure_keywords = provenance['exposure_keywords']
-        exposure_type = definition(exposure_keywords['exposure'])
+        exposure_type = impact_report.data.definition(
+            exposure_keywords['exposure'])
         exposure_stats['exposure'] = exposure_type
         # Only round the number when it is population exposure and it is not
         # in debug mode
@@ -272,7 +273,7 @@ def multi_exposure_general_report_extractor(impact_report, component_metadata):
         exposure_stats['value_header'] = value_header
 
         # Get hazard classification
-        hazard_classification = definition(
+        hazard_classification = impact_report.data.definition(
             active_classification(hazard_keywords,
                                   exposure_keywords['exposure']))
         hazard_classifications[exposure_type['key']] = hazard_classification
@@ -409,7 +410,7 @@ def multi_exposure_general_report_extractor(impact_report, component_metadata):
         hazard_classification_groups = {}
         for exposure_key, hazard_classification in (
                 iter(list(hazard_classifications.items()))):
-            exposure_type = definition(exposure_key)
+            exposure_type = impact_report.data.definition(exposure_key)
             if hazard_classification['key'] not in (
                     hazard_classification_groups):
                 hazard_classification_groups[hazard_classification['key']] = [
@@ -436,7 +437,8 @@ def multi_exposure_general_report_extractor(impact_report, component_metadata):
                 custom_total_values.append(total_value)
 
             hazard_stats = []
-            hazard_classification = definition(hazard_classification_key)
+            hazard_classification = impact_report.data.definition(
+                hazard_classification_key)
             for hazard_class in hazard_classification['classes']:
                 values = []
                 for exposure_stats in exposures_stats:
@@ -3,7 +3,6 @@
 """
 
 from safe.definitions.concepts import concepts
-from safe.definitions.utilities import definition
 from safe.report.extractors.util import (
     resolve_from_dictionary)
 from safe.utilities.metadata import active_classification
@@ -109,7 +108,7 @@ def infographic_people_section_notes_extractor(
         }
         context['notes'].append(note)
 
-    hazard_classification = definition(
+    hazard_classification = impact_report.data.definition(
         active_classification(hazard_keywords, exposure_keywords['exposure']))
 
     # generate rate description
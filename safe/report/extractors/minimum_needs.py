@@ -36,7 +36,7 @@ def minimum_needs_extractor(impact_report, component_metadata):
     """
     context = {}
     extra_args = component_metadata.extra_args
-    analysis_layer = impact_report.analysis
+    analysis_layer = impact_report.data.analysis
     analysis_keywords = analysis_layer.keywords['inasafe_fields']
     use_rounding = impact_report.impact_function.use_rounding
 
@@ -6,7 +6,6 @@ from safe.definitions.hazard import hazard_earthquake
 from safe.definitions.layer_geometry import (
     layer_geometry_raster,
     layer_geometry)
-from safe.definitions.utilities import definition
 from safe.report.extractors.util import (
     resolve_from_dictionary,
     value_from_field_name)
@@ -38,7 +37,7 @@ def mmi_detail_extractor(impact_report, component_metadata):
     .. versionadded:: 4.0
     """
     context = {}
-    analysis_layer = impact_report.analysis
+    analysis_layer = impact_report.data.analysis
     analysis_layer_keywords = analysis_layer.keywords
     extra_args = component_metadata.extra_args
     use_rounding = impact_report.impact_function.use_rounding
@@ -47,7 +46,7 @@ def mmi_detail_extractor(impact_report, component_metadata):
     exposure_keywords = provenance['exposure_keywords']
 
     # check if this is EQ raster with population
-    hazard_type = definition(hazard_keywords['hazard'])
+    hazard_type = impact_report.data.definition(hazard_keywords['hazard'])
     if not hazard_type == hazard_earthquake:
         return context
 
@@ -55,7 +54,8 @@ def mmi_detail_extractor(impact_report, component_metadata):
     if not hazard_geometry == layer_geometry_raster['key']:
         return context
 
-    exposure_type = definition(exposure_keywords['exposure'])
+    exposure_type = impact_report.data.definition(
+        exposure_keywords['exposure'])
     if not exposure_type == exposure_population:
         return context
 
@@ -3,7 +3,6 @@
 from safe.definitions.fields import (
     hazard_count_field, total_not_affected_field)
 from safe.definitions.styles import green
-from safe.definitions.utilities import definition
 from safe.report.extractors.infographic_elements.svg_charts import \
     DonutChartContext
 from safe.report.extractors.util import (
@@ -38,7 +37,7 @@ def population_chart_extractor(impact_report, component_metadata):
     context = {}
     extra_args = component_metadata.extra_args
 
-    analysis_layer = impact_report.analysis
+    analysis_layer = impact_report.data.analysis
     analysis_layer_fields = analysis_layer.keywords['inasafe_fields']
     provenance = impact_report.impact_function.provenance
     hazard_keywords = provenance['hazard_keywords']
@@ -49,7 +48,7 @@ def population_chart_extractor(impact_report, component_metadata):
     # create context for the donut chart
 
     # retrieve hazard classification from hazard layer
-    hazard_classification = definition(
+    hazard_classification = impact_report.data.definition(
         active_classification(hazard_keywords, exposure_keywords['exposure']))
 
     if not hazard_classification:
@@ -8,6 +8,7 @@ from jinja2.exceptions import TemplateError
 from qgis.core import QgsFeature
 from safe.definitions.hazard_classifications import hazard_classes_all
 from safe.definitions.utilities import definition
+from safe.report.report_data import LayerSnapshot
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
 __license__ = "GPL version 3"
@@ -116,12 +117,17 @@ def value_from_field_name(field_name, analysis_layer):
     :type field_name: str
 
     :param analysis_layer: Analysis layer.
-    :type analysis_layer: qgis.core.QgsVectorLayer
+    :type analysis_layer: qgis.core.QgsVectorLayer,
+        safe.report.report_data.LayerSnapshot
 
     :return: return the value of a given field name of the analysis.
 
     .. versionadded:: 4.0
+
+    .. versionchanged:: 5.0 - accept a report data snapshot.
     """
+    if isinstance(analysis_layer, LayerSnapshot):
+        return analysis_layer.value(field_name)
     field_index = analysis_layer.fields().lookupField(field_name)
     if field_index < 0:
         return None
@@ -12,7 +12,7 @@ import logging
 import os
 import shutil
 
-from qgis.core import QgsRasterLayer, QgsMapSettings
+from qgis.core import QgsFeature, QgsRasterLayer, QgsMapSettings
 
 from safe import messaging as m
 from safe.common.exceptions import (
@@ -24,6 +24,8 @@ from safe.defaults import (
     default_north_arrow_path)
 from safe.definitions.messages import disclaimer
 from safe.messaging import styles
+from safe.report.report_data import ReportData
+from safe.utilities.expressions import register_expressions
 from safe.utilities.i18n import tr
 from safe.utilities.keyword_io import KeywordIO
 from safe.utilities.utilities import get_error_message
@@ -330,6 +332,7 @@ class ImpactReport():
             map_settings,
             ImpactReport.DEFAULT_PAGE_DPI)
         self._keyword_io = KeywordIO()
+        self._data = None
 
     @property
     def inasafe_context(self):
@@ -465,11 +468,31 @@ class ImpactReport():
             if isinstance(layer, QgsRasterLayer):
                 # can't check feature count of raster layer
                 return
-            feature_count = len([f for f in layer.getFeatures()])
+            feature_count = layer.featureCount()
+            if feature_count < 0:
+                # Unknown count from the provider, fetch a single feature.
+                feature_count = int(
+                    layer.getFeatures().nextFeature(QgsFeature()))
             if feature_count == 0:
                 raise ImpactReport.LayerException(
                     'Layer contains no features')
 
+    @property
+    def data(self):
+        """Report data model shared by all extractors.
+
+        It is built once per impact report. Extractors should read the
+        analysis, aggregation summary and exposure summary table from it
+        instead of iterating the layers again.
+
+        :rtype: safe.report.report_data.ReportData
+
+        .. versionadded:: 5.0
+        """
+        if self._data is None:
+            self._data = ReportData(self)
+        return self._data
+
     @property
     def hazard(self):
         """Getter to hazard layer.
@@ -541,6 +564,7 @@ class ImpactReport():
         :type layer: qgis.core.QgsVectorLayer
         """
         self._analysis = layer
+        self._data = None
 
     @property
     def exposure_summary_table(self):
@@ -560,6 +584,7 @@ class ImpactReport():
         :return:
         """
         self._exposure_summary_table = value
+        self._data = None
 
     @property
     def aggregation_summary(self):
@@ -578,6 +603,7 @@ class ImpactReport():
         :type value: qgis.core.QgsVectorLayer
         """
         self._aggregation_summary = value
+        self._data = None
 
     @property
     def extra_layers(self):
@@ -720,6 +746,9 @@ class ImpactReport():
 
         .. versionadded:: 4.0
         """
+        # The layouts use the InaSAFE expression functions.
+        register_expressions()
+
         message = m.Message()
         warning_heading = m.Heading(
             tr('Report Generation issue'), **WARNING_STYLE)
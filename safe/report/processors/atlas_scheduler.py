@@ -0,0 +1,500 @@
+# coding=utf-8
+
+"""Export scheduler for atlas reports.
+
+An atlas report over all the aggregation areas of a province can have
+hundreds of pages. The scheduler splits the atlas features into chunks and
+renders each chunk in a separate worker process. Every worker loads the
+saved layout template (.qpt) and the saved project, then renders each page
+of its chunk to PDF and to a PNG thumbnail in a single pass. The pages are
+merged into the final PDF at the end.
+"""
+
+import logging
+import multiprocessing
+import os
+import sys
+from tempfile import mkdtemp
+
+from qgis.PyQt import QtXml
+from qgis.core import (
+    QgsApplication,
+    QgsFeatureRequest,
+    QgsLayoutExporter,
+    QgsPrintLayout,
+    QgsProject,
+    QgsReadWriteContext,
+)
+
+from safe.common.utilities import temp_dir
+from safe.definitions.analysis_steps import extra_analysis_steps
+
+try:
+    from PyPDF2 import PdfFileMerger
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+LOGGER = logging.getLogger('InaSAFE')
+
+PDF_FORMAT = 'pdf'
+PNG_FORMAT = 'png'
+
+
+class AtlasExportJob():
+
+    """Description of the atlas pages a worker has to render.
+
+    The job only holds plain python values so it can be sent to another
+    process.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(
+            self,
+            template_path,
+            project_path,
+            coverage_layer_id,
+            output_directory,
+            feature_ids,
+            output_formats=(PDF_FORMAT, ),
+            dpi=300,
+            thumbnail_dpi=72,
+            file_name_format='output_{feature_id}',
+            thumbnail_directory=None,
+            prefix_path=None):
+        """Create a job.
+
+        :param template_path: Path to the saved layout template.
+        :type template_path: str
+
+        :param project_path: Path to the saved QGIS project.
+        :type project_path: str
+
+        :param coverage_layer_id: The id of the atlas coverage layer in the
+            project.
+        :type coverage_layer_id: str
+
+        :param output_directory: Directory where the pages are written.
+        :type output_directory: str
+
+        :param feature_ids: List of feature ids of the coverage layer to
+            render.
+        :type feature_ids: list
+
+        :param output_formats: Formats to produce, 'pdf' and/or 'png'.
+        :type output_formats: tuple
+
+        :param dpi: DPI used for the PDF pages.
+        :type dpi: int
+
+        :param thumbnail_dpi: DPI used for the PNG thumbnails.
+        :type thumbnail_dpi: int
+
+        :param file_name_format: Format of the output file name, without
+            extension. It can use the 'feature_id' key.
+        :type file_name_format: str
+
+        :param thumbnail_directory: Directory where the PNG thumbnails are
+            written, default to the output directory.
+        :type thumbnail_directory: str
+
+        :param prefix_path: The QGIS prefix path used by the worker to find
+            the providers and the resources, default to the prefix path of
+            the current application.
+        :type prefix_path: str
+        """
+        self.template_path = template_path
+        self.project_path = project_path
+        self.coverage_layer_id = coverage_layer_id
+        self.output_directory = output_directory
+        self.feature_ids = list(feature_ids)
+        self.output_formats = tuple(output_formats)
+        self.dpi = dpi
+        self.thumbnail_dpi = thumbnail_dpi
+        self.file_name_format = file_name_format
+        self.thumbnail_directory = thumbnail_directory or output_directory
+        if prefix_path is None:
+            prefix_path = QgsApplication.prefixPath()
+        self.prefix_path = prefix_path
+
+    def output_path(self, feature_id, file_format):
+        """Path of the output file of a page.
+
+        :param feature_id: The feature id of the page.
+        :type feature_id: int
+
+        :param file_format: The file format, 'pdf' or 'png'.
+        :type file_format: str
+
+        :return: The path of the output file.
+        :rtype: str
+        """
+        file_name = self.file_name_format.format(feature_id=feature_id)
+        if file_format == PNG_FORMAT:
+            directory = self.thumbnail_directory
+        else:
+            directory = self.output_directory
+        return os.path.join(
+            directory, '{name}.{extension}'.format(
+                name=file_name, extension=file_format))
+
+
+def split_features(feature_ids, chunk_count):
+    """Split a list of feature ids into contiguous chunks.
+
+    :param feature_ids: List of feature ids.
+    :type feature_ids: list
+
+    :param chunk_count: The maximum number of chunks.
+    :type chunk_count: int
+
+    :return: List of chunks, each chunk is a list of feature ids.
+    :rtype: list
+    """
+    feature_ids = list(feature_ids)
+    chunk_count = max(1, min(chunk_count, len(feature_ids)))
+    chunk_size, remainder = divmod(len(feature_ids), chunk_count)
+    chunks = []
+    start = 0
+    for index in range(chunk_count):
+        end = start + chunk_size + (1 if index < remainder else 0)
+        chunks.append(feature_ids[start:end])
+        start = end
+    return [chunk for chunk in chunks if chunk]
+
+
+def atlas_feature_ids(layout, coverage_layer):
+    """The feature ids of the atlas pages, in the order of the atlas.
+
+    The filter and the sort expression of the atlas are applied like in a
+    serial export.
+
+    :param layout: The layout, its atlas must be set up.
+    :type layout: QgsPrintLayout
+
+    :param coverage_layer: The atlas coverage layer.
+    :type coverage_layer: QgsVectorLayer
+
+    :return: The feature ids of the pages.
+    :rtype: list
+    """
+    atlas = layout.atlas()
+    request = QgsFeatureRequest()
+    request.setExpressionContext(layout.createExpressionContext())
+    if atlas.filterFeatures() and atlas.filterExpression():
+        request.setFilterExpression(atlas.filterExpression())
+    if atlas.sortFeatures() and atlas.sortExpression():
+        request.addOrderBy(atlas.sortExpression(), atlas.sortAscending())
+    else:
+        request.addOrderBy('$id')
+    return [feature.id() for feature in coverage_layer.getFeatures(request)]
+
+
+def load_layout_template(template_path, project):
+    """Load a layout from a saved template.
+
+    :param template_path: Path to the .qpt template.
+    :type template_path: str
+
+    :param project: The project owning the layout.
+    :type project: QgsProject
+
+    :return: The layout.
+    :rtype: QgsPrintLayout
+    """
+    layout = QgsPrintLayout(project)
+    with open(template_path) as template_file:
+        document = QtXml.QDomDocument()
+        document.setContent(template_file.read())
+    context = QgsReadWriteContext()
+    context.setPathResolver(project.pathResolver())
+    layout.loadFromTemplate(document, context)
+    return layout
+
+
+def render_atlas_pages(job, project=None):
+    """Render the atlas pages of a job in all the requested formats.
+
+    Each page is visited once, the PDF page and the PNG thumbnail are
+    exported in the same pass.
+
+    :param job: The job to render.
+    :type job: AtlasExportJob
+
+    :param project: The project to use. If not provided, the project of the
+        job is read in the current QgsProject instance.
+    :type project: QgsProject
+
+    :return: Dictionary of output format and list of output paths.
+    :rtype: dict
+    """
+    if project is None:
+        project = QgsProject.instance()
+        project.read(job.project_path)
+
+    layout = load_layout_template(job.template_path, project)
+    atlas = layout.atlas()
+    atlas.setCoverageLayer(project.mapLayer(job.coverage_layer_id))
+    atlas.setEnabled(True)
+    atlas.setFilterFeatures(True)
+    atlas.setFilterExpression('$id IN ({ids})'.format(
+        ids=', '.join([str(feature_id) for feature_id in job.feature_ids])))
+
+    pdf_settings = QgsLayoutExporter.PdfExportSettings()
+    pdf_settings.dpi = job.dpi
+    image_settings = QgsLayoutExporter.ImageExportSettings()
+    image_settings.dpi = job.thumbnail_dpi
+
+    exporter = QgsLayoutExporter(layout)
+    outputs = {file_format: [] for file_format in job.output_formats}
+    if not atlas.beginRender():
+        return outputs
+    for page in range(atlas.count()):
+        if not atlas.seekTo(page):
+            continue
+        feature_id = atlas.layout().reportContext().feature().id()
+        for file_format in job.output_formats:
+            output_path = job.output_path(feature_id, file_format)
+            if file_format == PDF_FORMAT:
+                result = exporter.exportToPdf(output_path, pdf_settings)
+            else:
+                result = exporter.exportToImage(output_path, image_settings)
+            if result == QgsLayoutExporter.Success:
+                outputs[file_format].append(output_path)
+            else:
+                LOGGER.error('Error exporting to {}'.format(
+                    exporter.errorFile()))
+    atlas.endRender()
+    return outputs
+
+
+def export_atlas_chunk(job):
+    """Worker process entry point, render a job in a new QGIS application.
+
+    :param job: The job to render.
+    :type job: AtlasExportJob
+
+    :return: Dictionary of output format and list of output paths.
+    :rtype: dict
+    """
+    application = QgsApplication([], False)
+    # Without the prefix path, the worker has no data providers and no
+    # SVG or font paths, and the layout is rendered blank.
+    QgsApplication.setPrefixPath(job.prefix_path, True)
+    application.initQgis()
+    try:
+        return render_atlas_pages(job)
+    finally:
+        QgsProject.instance().clear()
+        application.exitQgis()
+
+
+def merge_pdf_files(input_paths, output_path):
+    """Merge several PDF files into one.
+
+    :param input_paths: List of PDF files, in order.
+    :type input_paths: list
+
+    :param output_path: The merged PDF file.
+    :type output_path: str
+
+    :return: The output path or None if PyPDF2 is not available.
+    :rtype: str
+    """
+    if not HAS_PYPDF2:
+        return None
+    merger = PdfFileMerger()
+    for input_path in input_paths:
+        merger.append(input_path)
+    with open(output_path, 'wb') as output_file:
+        merger.write(output_file)
+    merger.close()
+    return output_path
+
+
+def worker_python_executable():
+    """Python interpreter used to spawn the workers.
+
+    Inside QGIS desktop, sys.executable is the QGIS binary, so we look for
+    the python interpreter next to it.
+
+    :return: The path to the python interpreter or None if not found.
+    :rtype: str
+    """
+    executable = sys.executable
+    if os.path.basename(executable).lower().startswith('python'):
+        return executable
+    directory = os.path.dirname(executable)
+    for name in ['python3', 'python3.exe', 'python', 'python.exe']:
+        candidate = os.path.join(directory, name)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+class AtlasExportScheduler():
+
+    """Render atlas pages in parallel worker processes.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(
+            self,
+            layout,
+            coverage_layer,
+            output_path,
+            output_formats=(PDF_FORMAT, ),
+            dpi=300,
+            thumbnail_dpi=72,
+            thumbnail_directory=None,
+            workers=None,
+            callback=None):
+        """Create a scheduler.
+
+        :param layout: The layout to export, its atlas must be set up.
+        :type layout: QgsPrintLayout
+
+        :param coverage_layer: The atlas coverage layer.
+        :type coverage_layer: QgsVectorLayer
+
+        :param output_path: Path of the merged PDF.
+        :type output_path: str
+
+        :param output_formats: Formats to produce, 'pdf' and/or 'png'.
+        :type output_formats: tuple
+
+        :param dpi: DPI used for the PDF pages.
+        :type dpi: int
+
+        :param thumbnail_dpi: DPI used for the PNG thumbnails.
+        :type thumbnail_dpi: int
+
+        :param thumbnail_directory: Directory of the PNG thumbnails, default
+            to the directory of the output path.
+        :type thumbnail_directory: str
+
+        :param workers: Number of worker processes, default to the number
+            of CPUs. With one worker, the pages are rendered in the current
+            process.
+        :type workers: int
+
+        :param callback: Progress callback with the same signature as
+            ImpactFunction.callback: callback(current, maximum, message).
+        :type callback: function
+        """
+        self.layout = layout
+        self.coverage_layer = coverage_layer
+        self.output_path = output_path
+        self.output_formats = tuple(output_formats)
+        self.dpi = dpi
+        self.thumbnail_dpi = thumbnail_dpi
+        self.thumbnail_directory = (
+            thumbnail_directory or os.path.dirname(output_path))
+        self.workers = workers or multiprocessing.cpu_count()
+        self.callback = callback
+        self.working_directory = mkdtemp(dir=temp_dir('atlas'))
+
+    def _progress(self, current, maximum):
+        """Relay progress to the callback if any.
+
+        :param current: Number of chunks done.
+        :type current: int
+
+        :param maximum: Number of chunks.
+        :type maximum: int
+        """
+        if self.callback:
+            self.callback(
+                current, maximum, extra_analysis_steps['report_export'])
+
+    def jobs(self):
+        """Split the coverage layer into jobs, one per chunk.
+
+        :return: List of jobs.
+        :rtype: list(AtlasExportJob)
+        """
+        project = QgsProject.instance()
+        project_path = os.path.join(self.working_directory, 'atlas.qgs')
+        # Writing the project changes its file name, we write a copy and
+        # keep the user's project file name and its modified state.
+        file_name = project.fileName()
+        is_dirty = project.isDirty()
+        try:
+            project.write(project_path)
+        finally:
+            project.setFileName(file_name)
+            project.setDirty(is_dirty)
+
+        context = QgsReadWriteContext()
+        context.setPathResolver(project.pathResolver())
+        template_path = os.path.join(self.working_directory, 'atlas.qpt')
+        self.layout.saveAsTemplate(template_path, context)
+
+        feature_ids = atlas_feature_ids(self.layout, self.coverage_layer)
+        jobs = []
+        for index, chunk in enumerate(
+                split_features(feature_ids, self.workers)):
+            jobs.append(AtlasExportJob(
+                template_path,
+                project_path,
+                self.coverage_layer.id(),
+                os.path.join(self.working_directory, 'chunk_%s' % index),
+                chunk,
+                output_formats=self.output_formats,
+                dpi=self.dpi,
+                thumbnail_dpi=self.thumbnail_dpi,
+                thumbnail_directory=self.thumbnail_directory))
+        for job in jobs:
+            os.makedirs(job.output_directory)
+        if PNG_FORMAT in self.output_formats and not os.path.exists(
+                self.thumbnail_directory):
+            os.makedirs(self.thumbnail_directory)
+        return jobs
+
+    def run(self):
+        """Render all the pages and merge them.
+
+        :return: Dictionary of output format and output paths. The PDF
+            output is the merged file if it could be merged, otherwise the
+            list of pages. The PNG output is always the list of thumbnails.
+        :rtype: dict
+        """
+        jobs = self.jobs()
+        self._progress(0, len(jobs))
+        python_executable = worker_python_executable()
+        results = []
+        if self.workers > 1 and len(jobs) > 1 and python_executable:
+            context = multiprocessing.get_context('spawn')
+            context.set_executable(python_executable)
+            with context.Pool(processes=len(jobs)) as pool:
+                for result in pool.imap(export_atlas_chunk, jobs):
+                    results.append(result)
+                    self._progress(len(results), len(jobs))
+        else:
+            for job in jobs:
+                results.append(
+                    render_atlas_pages(job, project=QgsProject.instance()))
+                self._progress(len(results), len(jobs))
+
+        outputs = {}
+        for file_format in self.output_formats:
+            outputs[file_format] = []
+            for result in results:
+                outputs[file_format].extend(result.get(file_format, []))
+
+        if PDF_FORMAT in outputs and outputs[PDF_FORMAT]:
+            merged = merge_pdf_files(outputs[PDF_FORMAT], self.output_path)
+            if merged:
+                outputs[PDF_FORMAT] = merged
+            else:
+                LOGGER.info(
+                    'PyPDF2 is not available, atlas pages are not merged.')
+        return outputs
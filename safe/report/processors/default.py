@@ -44,7 +44,13 @@ from qgis.core import (
 from safe.common.exceptions import TemplateLoadingError
 from safe.common.utilities import temp_dir
 from safe.definitions.reports.infographic import map_overview
+from safe.report.processors.atlas_scheduler import (
+    AtlasExportScheduler,
+    HAS_PYPDF2,
+    PDF_FORMAT,
+    PNG_FORMAT)
 from safe.report.report_metadata import QgisComposerComponentsMetadata
+from safe.utilities.expression_cache import expression_cache
 from safe.utilities.i18n import tr
 from safe.utilities.settings import general_setting, setting
 
@@ -184,7 +190,12 @@ def create_qgis_pdf_output(
     if layout.atlas().enabled() and (
             print_atlas and aggregation_summary_layer):
         output_path = atlas_renderer(
-            layout, aggregation_summary_layer, output_path, file_format)
+            layout,
+            aggregation_summary_layer,
+            output_path,
+            file_format,
+            dpi=metadata.page_dpi,
+            callback=impact_report.impact_function.callback)
     # for QGIS layout only pdf and png output are available
     elif file_format == QgisComposerComponentsMetadata.OutputFormat.PDF:
         try:
@@ -403,6 +414,9 @@ def qgis_composer_renderer(impact_report, component):
     context = component.context
     qgis_composition_context = impact_report.qgis_composition_context
 
+    # the expressions used in the layout are memoized for this render only
+    expression_cache.clear()
+
     # load composition object
     layout = QgsPrintLayout(QgsProject.instance())
 
@@ -713,9 +727,19 @@ def qt_svg_to_png_renderer(impact_report, component):
     return component.output
 
 
-def atlas_renderer(layout, coverage_layer, output_path, file_format):
+def atlas_renderer(
+        layout,
+        coverage_layer,
+        output_path,
+        file_format,
+        dpi=300,
+        callback=None):
     """Extract composition using atlas generation.
 
+    If the 'atlas_export_workers' setting is more than one, or if the PNG
+    thumbnails are requested, the pages are rendered by the atlas export
+    scheduler in worker processes and merged in a single PDF.
+
     :param layout: QGIS Print Layout object used for producing the report.
     :type layout: qgis.core.QgsPrintLayout
 
@@ -728,6 +752,12 @@ def atlas_renderer(layout, coverage_layer, output_path, file_format):
     :param file_format: File format of map output, 'pdf' or 'png'.
     :type file_format: str
 
+    :param dpi: DPI of the pages exported by the scheduler.
+    :type dpi: int
+
+    :param callback: Progress callback, see ImpactFunction.callback.
+    :type callback: function
+
     :return: Generated output path(s).
     :rtype: str, list
     """
@@ -763,6 +793,29 @@ def atlas_renderer(layout, coverage_layer, output_path, file_format):
                 project_scales.append(float(parts[1]))
         layout.reportContext().setPredefinedScales(project_scales)
 
+        workers = setting('atlas_export_workers', 1, int)
+        export_thumbnails = setting('atlas_export_thumbnails', False, bool)
+        if atlas_on_single_file and HAS_PYPDF2 and (
+                workers > 1 or export_thumbnails):
+            output_formats = [PDF_FORMAT]
+            if export_thumbnails:
+                output_formats.append(PNG_FORMAT)
+            LOGGER.info('Exporting Atlas with %s workers' % workers)
+            scheduler = AtlasExportScheduler(
+                layout,
+                coverage_layer,
+                output_path,
+                output_formats=output_formats,
+                dpi=dpi,
+                thumbnail_directory=os.path.join(
+                    output_directory, 'thumbnails'),
+                workers=workers,
+                callback=callback)
+            outputs = scheduler.run()
+            if outputs[PDF_FORMAT] == output_path:
+                return [output_path]
+            LOGGER.error('Atlas pages could not be merged.')
+
         settings = QgsLayoutExporter.PdfExportSettings()
 
         LOGGER.info('Exporting Atlas')
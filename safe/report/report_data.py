@@ -0,0 +1,270 @@
+# coding=utf-8
+"""Precomputed report data shared by every report extractor.
+
+The analysis, aggregation summary and exposure summary table layers are
+small (one feature per analysis, aggregation area or exposure class) but
+every extractor used to re-open them, iterate their features and resolve
+the same definitions again. This module reads them once per ImpactReport
+into an in-memory columnar snapshot that exposes the same read API the
+extractors use on a QgsVectorLayer.
+"""
+
+import logging
+
+from safe.definitions.utilities import definition
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+LOGGER = logging.getLogger('InaSAFE')
+
+
+class SnapshotFeature():
+
+    """A read only row of a layer snapshot.
+
+    It behaves like a QgsFeature for the subscript access used in
+    the extractors: ``feature[index]`` and ``feature[field_name]``.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, snapshot, row):
+        """Create a row proxy.
+
+        :param snapshot: The snapshot this row belongs to.
+        :type snapshot: LayerSnapshot
+
+        :param row: The row number in the snapshot.
+        :type row: int
+        """
+        self._snapshot = snapshot
+        self._row = row
+
+    def id(self):
+        """The feature id in the source layer.
+
+        :rtype: int
+        """
+        return self._snapshot.feature_ids[self._row]
+
+    def attributes(self):
+        """List of attributes of this row.
+
+        :rtype: list
+        """
+        return [column[self._row] for column in self._snapshot.columns]
+
+    def attribute(self, field):
+        """Value of a field in this row.
+
+        :param field: Field index or field name.
+        :type field: int, str
+
+        :return: The value of the field.
+        """
+        return self[field]
+
+    def __getitem__(self, field):
+        """Value of a field in this row.
+
+        :param field: Field index or field name.
+        :type field: int, str
+
+        :return: The value of the field.
+
+        :raises: KeyError if the field is not in the snapshot, like a
+            QgsFeature.
+        """
+        field_names = self._snapshot.field_names
+        if isinstance(field, str):
+            if field not in field_names:
+                raise KeyError(field)
+            index = field_names.index(field)
+        else:
+            index = field
+            if not 0 <= index < len(field_names):
+                raise KeyError(field)
+        return self._snapshot.columns[index][self._row]
+
+
+class LayerSnapshot():
+
+    """Columnar in-memory copy of a small vector layer.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, layer):
+        """Read all the features of the layer once.
+
+        :param layer: The vector layer to copy.
+        :type layer: qgis.core.QgsVectorLayer
+        """
+        self._fields = layer.fields()
+        self._title = layer.title()
+        self._name = layer.name()
+        self._id = layer.id()
+        self.keywords = getattr(layer, 'keywords', {})
+        self.field_names = [field.name() for field in self._fields]
+        self.columns = [[] for _ in self.field_names]
+        self.feature_ids = []
+
+        for feature in layer.getFeatures():
+            self.feature_ids.append(feature.id())
+            for index, value in enumerate(feature.attributes()):
+                self.columns[index].append(value)
+
+    def id(self):
+        """The source layer id.
+
+        :rtype: str
+        """
+        return self._id
+
+    def name(self):
+        """The source layer name.
+
+        :rtype: str
+        """
+        return self._name
+
+    def title(self):
+        """The source layer title.
+
+        :rtype: str
+        """
+        return self._title
+
+    def fields(self):
+        """The fields of the source layer.
+
+        :rtype: qgis.core.QgsFields
+        """
+        return self._fields
+
+    def featureCount(self):
+        """Number of rows in the snapshot.
+
+        :rtype: int
+        """
+        return len(self.feature_ids)
+
+    def getFeatures(self):
+        """Iterate over the rows of the snapshot.
+
+        :return: An iterator of read only rows.
+        :rtype: iterator(SnapshotFeature)
+        """
+        return iter(
+            [SnapshotFeature(self, row) for row in range(
+                self.featureCount())])
+
+    def column(self, field_name):
+        """Get all values of a field.
+
+        :param field_name: The field name.
+        :type field_name: str
+
+        :return: List of values, None if the field does not exist.
+        :rtype: list
+        """
+        try:
+            return self.columns[self.field_names.index(field_name)]
+        except ValueError:
+            return None
+
+    def value(self, field_name, row=0):
+        """Get a single value of a field.
+
+        :param field_name: The field name.
+        :type field_name: str
+
+        :param row: The row number, the first one by default.
+        :type row: int
+
+        :return: The value, None if the field or the row does not exist.
+        """
+        column = self.column(field_name)
+        if column is None or row >= len(column):
+            return None
+        return column[row]
+
+
+class ReportData():
+
+    """Data model built once per ImpactReport and read by the extractors.
+
+    Snapshots are created lazily, the first time an extractor needs them.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, impact_report):
+        """Create the report data model.
+
+        :param impact_report: The impact report owning this data.
+        :type impact_report: safe.report.impact_report.ImpactReport
+        """
+        self._impact_report = impact_report
+        self._snapshots = {}
+        self._definitions = {}
+
+    def _snapshot(self, key):
+        """Get or build the snapshot of an impact report layer.
+
+        :param key: The ImpactReport property name of the layer.
+        :type key: str
+
+        :return: The snapshot or None if there is no layer.
+        :rtype: LayerSnapshot
+        """
+        if key not in self._snapshots:
+            layer = getattr(self._impact_report, key)
+            if layer:
+                self._snapshots[key] = LayerSnapshot(layer)
+                LOGGER.debug(
+                    'Report snapshot of %s: %s rows' % (
+                        key, self._snapshots[key].featureCount()))
+            else:
+                self._snapshots[key] = None
+        return self._snapshots[key]
+
+    @property
+    def analysis(self):
+        """Snapshot of the analysis layer.
+
+        :rtype: LayerSnapshot
+        """
+        return self._snapshot('analysis')
+
+    @property
+    def aggregation_summary(self):
+        """Snapshot of the aggregation summary layer.
+
+        :rtype: LayerSnapshot
+        """
+        return self._snapshot('aggregation_summary')
+
+    @property
+    def exposure_summary_table(self):
+        """Snapshot of the exposure summary table.
+
+        :rtype: LayerSnapshot
+        """
+        return self._snapshot('exposure_summary_table')
+
+    def definition(self, keyword):
+        """Resolved definition for a keyword, computed once per report.
+
+        :param keyword: A keyword key.
+        :type keyword: str
+
+        :returns: The matching definition or None.
+        :rtype: dict, None
+        """
+        if keyword not in self._definitions:
+            self._definitions[keyword] = definition(keyword)
+        return self._definitions[keyword]
@@ -0,0 +1,120 @@
+# coding=utf-8
+"""Unittest for the atlas export scheduler."""
+
+import os
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import get_qgis_app, load_test_vector_layer
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import QgsPrintLayout, QgsProject  # NOQA
+
+from safe.common.utilities import temp_dir  # NOQA
+from safe.report.processors.atlas_scheduler import (  # NOQA
+    AtlasExportJob,
+    AtlasExportScheduler,
+    PDF_FORMAT,
+    PNG_FORMAT,
+    split_features)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestAtlasScheduler(unittest.TestCase):
+
+    """Test the atlas export scheduler."""
+
+    def test_split_features(self):
+        """Test we split the atlas features in balanced chunks."""
+        chunks = split_features(list(range(10)), 3)
+        self.assertListEqual(
+            chunks, [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]])
+
+        # More workers than features
+        chunks = split_features([1, 2], 4)
+        self.assertListEqual(chunks, [[1], [2]])
+
+        self.assertListEqual(split_features([], 4), [])
+
+    def test_job_output_path(self):
+        """Test the output paths of a job."""
+        job = AtlasExportJob(
+            'template.qpt',
+            'project.qgs',
+            'layer_id',
+            '/tmp/pages',
+            [1, 2],
+            output_formats=(PDF_FORMAT, PNG_FORMAT),
+            thumbnail_directory='/tmp/thumbnails')
+        self.assertEqual(
+            job.output_path(2, PDF_FORMAT), '/tmp/pages/output_2.pdf')
+        self.assertEqual(
+            job.output_path(2, PNG_FORMAT), '/tmp/thumbnails/output_2.png')
+
+    def test_page_order(self):
+        """Test the pages follow the atlas order of a serial export."""
+        layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+        project = QgsProject.instance()
+        project.addMapLayer(layer)
+        file_name = project.fileName()
+
+        layout = QgsPrintLayout(project)
+        layout.initializeDefaults()
+        atlas = layout.atlas()
+        atlas.setCoverageLayer(layer)
+        atlas.setEnabled(True)
+        atlas.setSortFeatures(True)
+        atlas.setSortExpression('$id')
+        atlas.setSortAscending(False)
+        atlas.setFilterFeatures(True)
+        atlas.setFilterExpression('$id != 1')
+
+        # The order of a serial export.
+        serial_ids = []
+        atlas.beginRender()
+        for page in range(atlas.count()):
+            atlas.seekTo(page)
+            serial_ids.append(layout.reportContext().feature().id())
+        atlas.endRender()
+        self.assertGreater(len(serial_ids), 1)
+
+        output_directory = temp_dir('test_atlas')
+        scheduler = AtlasExportScheduler(
+            layout,
+            layer,
+            os.path.join(output_directory, 'atlas.pdf'),
+            output_formats=(PNG_FORMAT, ),
+            thumbnail_dpi=10,
+            workers=3)
+        job_ids = []
+        for job in scheduler.jobs():
+            job_ids.extend(job.feature_ids)
+        self.assertListEqual(job_ids, serial_ids)
+        # The user's project is not moved to the working directory.
+        self.assertEqual(project.fileName(), file_name)
+
+        scheduler = AtlasExportScheduler(
+            layout,
+            layer,
+            os.path.join(output_directory, 'atlas.pdf'),
+            output_formats=(PNG_FORMAT, ),
+            thumbnail_dpi=10,
+            workers=1)
+        outputs = scheduler.run()
+        page_ids = [
+            int(os.path.splitext(os.path.basename(path))[0].split('_')[-1])
+            for path in outputs[PNG_FORMAT]]
+        self.assertListEqual(page_ids, serial_ids)
+        self.assertEqual(project.fileName(), file_name)
+
+        project.removeMapLayer(layer.id())
+
+
+if __name__ == '__main__':
+    unittest.main()
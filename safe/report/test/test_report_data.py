@@ -0,0 +1,79 @@
+# coding=utf-8
+"""Unittest for report data model."""
+
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.definitions.exposure import exposure_structure
+from safe.test.utilities import (
+    get_qgis_app,
+    load_test_vector_layer)
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from safe.report.extractors.util import value_from_field_name  # NOQA
+from safe.report.report_data import LayerSnapshot, ReportData  # NOQA
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestReportData(unittest.TestCase):
+
+    """Test the report data model."""
+
+    def test_layer_snapshot(self):
+        """Test the snapshot is a faithful copy of the layer."""
+        layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+        snapshot = LayerSnapshot(layer)
+
+        self.assertEqual(snapshot.featureCount(), layer.featureCount())
+        self.assertEqual(snapshot.keywords, layer.keywords)
+        self.assertEqual(snapshot.fields(), layer.fields())
+
+        snapshot_rows = [f.attributes() for f in snapshot.getFeatures()]
+        layer_rows = [f.attributes() for f in layer.getFeatures()]
+        self.assertListEqual(snapshot_rows, layer_rows)
+
+        field_name = layer.fields().at(0).name()
+        first_feature = next(layer.getFeatures())
+        self.assertEqual(
+            snapshot.value(field_name), first_feature[field_name])
+        self.assertEqual(
+            value_from_field_name(field_name, snapshot),
+            value_from_field_name(field_name, layer))
+        self.assertIsNone(snapshot.value('not_a_field'))
+        self.assertIsNone(snapshot.value(field_name, row=1000))
+
+        # Like a QgsFeature, an unknown field is a KeyError.
+        feature = next(snapshot.getFeatures())
+        self.assertEqual(feature[0], first_feature[0])
+        with self.assertRaises(KeyError):
+            feature[-1]
+        with self.assertRaises(KeyError):
+            feature[len(snapshot.field_names)]
+        with self.assertRaises(KeyError):
+            feature['missing']
+
+    def test_report_data(self):
+        """Test the report data model is built once and cached."""
+        layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson')
+
+        class FakeImpactReport():
+            analysis = layer
+            aggregation_summary = layer
+            exposure_summary_table = None
+
+        data = ReportData(FakeImpactReport())
+        self.assertIs(data.analysis, data.analysis)
+        self.assertIsNone(data.exposure_summary_table)
+        self.assertIs(
+            data.definition(exposure_structure['key']), exposure_structure)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# coding=utf-8
+
+"""Tests for the start-up of the plugin."""
+
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import QgsExpression  # NOQA
+from qgis.PyQt.QtCore import QCoreApplication, pyqtSignal  # NOQA
+from qgis.PyQt.QtWidgets import QMainWindow  # NOQA
+
+from safe.plugin import Plugin  # NOQA
+from safe.test.qgis_interface import QgisInterface  # NOQA
+from safe.utilities.expressions import (  # NOQA
+    qgis_expressions,
+    unregister_expressions,
+)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class PluginInterface(QgisInterface):
+
+    """Test interface with a main window, so the plugin can add its GUI."""
+
+    initializationCompleted = pyqtSignal()
+
+    def __init__(self, canvas):
+        """Constructor.
+
+        :param canvas: The map canvas.
+        :type canvas: QgsMapCanvas
+        """
+        super(PluginInterface, self).__init__(canvas)
+        self.main_window = QMainWindow()
+
+    def mainWindow(self):
+        """Return the main window."""
+        return self.main_window
+
+    def addToolBar(self, name):
+        """Add a toolbar to the main window.
+
+        :param name: Name for the toolbar.
+        :type name: str
+        """
+        return self.main_window.addToolBar(name)
+
+    def addDockWidget(self, area, dock_widget):
+        """Add a dock widget to the main window.
+
+        :param area: Where in the ui the dock should be placed.
+        :type area: Qt.DockWidgetArea
+
+        :param dock_widget: A dock widget to add to the UI.
+        :type dock_widget: QDockWidget
+        """
+        self.main_window.addDockWidget(area, dock_widget)
+
+
+class TestPlugin(unittest.TestCase):
+
+    """Tests for the start-up of the plugin."""
+
+    def setUp(self):
+        unregister_expressions()
+        self.plugin = Plugin(PluginInterface(CANVAS))
+
+    def tearDown(self):
+        self.plugin.unload()
+
+    def test_deferred_dock(self):
+        """Test the dock is created when the event loop runs."""
+        self.plugin.initGui()
+        self.assertIsNone(self.plugin._dock_widget)
+
+        QCoreApplication.processEvents()
+        dock_widget = self.plugin._dock_widget
+        self.assertIsNotNone(dock_widget)
+        self.assertIs(self.plugin.dock_widget, dock_widget)
+
+    def test_dock_on_first_use(self):
+        """Test the dock is created if an action needs it before."""
+        self.plugin.initGui()
+        dock_widget = self.plugin.dock_widget
+        self.assertIsNotNone(dock_widget)
+
+        # The deferred creation does not replace it.
+        QCoreApplication.processEvents()
+        self.assertIs(self.plugin.dock_widget, dock_widget)
+
+    def test_register_expressions(self):
+        """Test the expressions are registered for a new project."""
+        names = list(qgis_expressions().keys())
+        self.assertFalse(QgsExpression.isFunctionName(names[0]))
+
+        self.plugin.initGui()
+        QCoreApplication.processEvents()
+        for name in names:
+            self.assertTrue(QgsExpression.isFunctionName(name))
+
+
+if __name__ == '__main__':
+    unittest.main()
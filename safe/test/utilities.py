@@ -187,6 +187,8 @@ def get_qgis_app(requested_locale='en_US', qsetting=''):
                 raise Exception(message)
             # noinspection PyTypeChecker,PyCallByClass
             QCoreApplication.installTranslator(translator)
+            from safe.utilities.i18n import clear_translation_cache
+            clear_translation_cache()
 
         # at the end, reload InaSAFE modules so it will get translated too
         reload_inasafe_modules()
@@ -0,0 +1,136 @@
+# coding=utf-8
+
+"""Cache for the values computed by the InaSAFE QGIS expressions.
+
+QGIS evaluates expression functions many times per layout render and per
+atlas page. Most InaSAFE functions only read the analysis summary layers or
+the HTML report written on disk, which do not change while a layout is
+rendered. The cache is keyed by the project variable, the layer id and the
+layer revision (incremented when the layer data changes) and it is cleared
+whenever layers are added to or removed from the project.
+"""
+
+import logging
+import os
+
+from qgis.core import QgsProject
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+LOGGER = logging.getLogger('InaSAFE')
+
+
+class ExpressionCache():
+
+    """Memoize values used by the expression functions.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self):
+        """Create an empty cache."""
+        self._values = {}
+        self._revisions = {}
+        self._project = None
+
+    def _connect_project(self):
+        """Clear the cache when the project layers change."""
+        project = QgsProject.instance()
+        if self._project is project:
+            return
+        self._project = project
+        project.layersAdded.connect(self.clear)
+        project.layersRemoved.connect(self.clear)
+        project.cleared.connect(self.clear)
+        project.readProject.connect(self.clear)
+        layer_tree_root = project.layerTreeRoot()
+        layer_tree_root.addedChildren.connect(self.clear)
+        layer_tree_root.removedChildren.connect(self.clear)
+
+    def clear(self, *args):
+        """Remove all cached values.
+
+        The signature accepts the arguments of the QgsProject signals.
+        """
+        _ = args  # NOQA
+        self._values = {}
+
+    def layer_revision(self, layer):
+        """The number of time the data of the layer changed.
+
+        :param layer: The layer.
+        :type layer: QgsMapLayer
+
+        :return: The revision of the layer.
+        :rtype: int
+        """
+        layer_id = layer.id()
+        if layer_id not in self._revisions:
+            self._revisions[layer_id] = 0
+
+            def increment():
+                """Increment the revision of the layer."""
+                self._revisions[layer_id] = (
+                    self._revisions.get(layer_id, 0) + 1)
+
+            layer.dataChanged.connect(increment)
+        return self._revisions[layer_id]
+
+    def layer_key(self, layer):
+        """Cache key for a layer.
+
+        :param layer: The layer.
+        :type layer: QgsMapLayer
+
+        :return: A tuple (layer id, layer revision).
+        :rtype: tuple
+        """
+        return layer.id(), self.layer_revision(layer)
+
+    def get(self, key, function, *args):
+        """Get a cached value or compute it.
+
+        :param key: Hashable cache key.
+        :type key: tuple
+
+        :param function: The function computing the value.
+        :type function: function
+
+        :param args: Arguments for the function.
+
+        :return: The result of the function for this key.
+        """
+        self._connect_project()
+        try:
+            return self._values[key]
+        except KeyError:
+            value = function(*args)
+            self._values[key] = value
+            return value
+
+    def read_file(self, path):
+        """Read a text file, memoized on the path and its modified time.
+
+        :param path: The path to the file.
+        :type path: str
+
+        :return: The content of the file, None if it does not exist.
+        :rtype: str
+        """
+        try:
+            modified_time = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        def read():
+            """Read the file in UTF-8, the HTML may have some accents."""
+            with open(path, 'r', encoding='utf-8') as text_file:
+                return text_file.read()
+
+        return self.get(('read_file', path, modified_time), read)
+
+
+expression_cache = ExpressionCache()
@@ -1,17 +1,24 @@
 # coding=utf-8
 
-"""Utilities module related to QGIS Expressions."""
+"""Utilities module related to QGIS Expressions.
+
+The expression functions are registered in QGIS when their modules are
+imported. These modules are imported on the first call of
+qgis_expressions or register_expressions, not when the plugin is loaded.
+"""
 
 from inspect import getmembers
 
-from safe.gis import generic_expressions
-from safe.report.expressions import infographic, map_report, html_report
+from qgis.core import QgsExpression
 
 __copyright__ = "Copyright 2016, The InaSAFE Project"
 __license__ = "GPL version 3"
 __email__ = "info@inasafe.org"
 __revision__ = '$Format:%H$'
 
+# The expression functions by name, once their modules are imported.
+_expressions = {}
+
 
 def qgis_expressions():
     """Retrieve all QGIS Expressions provided by InaSAFE.
@@ -19,16 +26,36 @@ def qgis_expressions():
     :return: Dictionary of expression name and the expression itself.
     :rtype: dict
     """
-    all_expressions = {
-        fct[0]: fct[1] for fct in getmembers(generic_expressions)
-        if fct[1].__class__.__name__ == 'QgsExpressionFunction'}
-    all_expressions.update({
-        fct[0]: fct[1] for fct in getmembers(infographic)
-        if fct[1].__class__.__name__ == 'QgsExpressionFunction'})
-    all_expressions.update({
-        fct[0]: fct[1] for fct in getmembers(map_report)
-        if fct[1].__class__.__name__ == 'QgsExpressionFunction'})
-    all_expressions.update({
-        fct[0]: fct[1] for fct in getmembers(html_report)
-        if fct[1].__class__.__name__ == 'QgsExpressionFunction'})
-    return all_expressions
+    if not _expressions:
+        from safe.gis import generic_expressions
+        from safe.report.expressions import (
+            infographic, map_report, html_report)
+
+        modules = [generic_expressions, infographic, map_report, html_report]
+        for module in modules:
+            _expressions.update({
+                fct[0]: fct[1] for fct in getmembers(module)
+                if fct[1].__class__.__name__ == 'QgsExpressionFunction'})
+    return dict(_expressions)
+
+
+def register_expressions():
+    """Register the InaSAFE expression functions in QGIS.
+
+    The functions which are already registered are skipped, so it can be
+    called before each use of the expressions.
+
+    .. versionadded:: 5.0
+    """
+    for name, function in list(qgis_expressions().items()):
+        if not QgsExpression.isFunctionName(name):
+            QgsExpression.registerFunction(function)
+
+
+def unregister_expressions():
+    """Unregister the InaSAFE expression functions from QGIS.
+
+    .. versionadded:: 5.0
+    """
+    for name in list(_expressions.keys()):
+        QgsExpression.unregisterFunction(name)
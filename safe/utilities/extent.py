@@ -2,6 +2,7 @@
 
 """Related to the extent (with or without an aggregation layer."""
 
+import math
 
 from qgis.core import (
     QgsCoordinateTransform,
@@ -26,6 +27,10 @@ __license__ = "GPL version 3"
 __email__ = "info@inasafe.org"
 __revision__ = '$Format:%H$'
 
+# Below this canvas scale, the rubber bands are drawn with the full resolution
+# extents. Above it, the extents are simplified to the size of a pixel.
+FULL_RESOLUTION_SCALE = 10000
+
 
 def singleton(class_):
     """Singleton definition.
@@ -42,6 +47,79 @@ def singleton(class_):
     return get_instance
 
 
+class Footprint(object):
+
+    """An extent in the canvas CRS, with its simplified versions.
+
+    The extent is transformed once, from its CRS to the canvas CRS, and the
+    simplified geometries are cached by tolerance, so the rubber bands can be
+    drawn again on each zoom without processing the full geometry.
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, geometry, crs, canvas_crs):
+        """Constructor.
+
+        :param geometry: The extent.
+        :type geometry: QgsGeometry
+
+        :param crs: The CRS of the extent.
+        :type crs: QgsCoordinateReferenceSystem
+
+        :param canvas_crs: The CRS of the map canvas.
+        :type canvas_crs: QgsCoordinateReferenceSystem
+        """
+        self.source = QgsGeometry(geometry)
+        self.crs = crs
+        self.canvas_crs = canvas_crs
+        self.geometry = QgsGeometry(geometry)
+        transform = QgsCoordinateTransform(
+            crs, canvas_crs, QgsProject.instance())
+        self.geometry.transform(transform)
+        self._simplified = {}
+
+    def matches(self, geometry, crs, canvas_crs):
+        """Whether the footprint is the one of an extent.
+
+        :param geometry: The extent.
+        :type geometry: QgsGeometry
+
+        :param crs: The CRS of the extent.
+        :type crs: QgsCoordinateReferenceSystem
+
+        :param canvas_crs: The CRS of the map canvas.
+        :type canvas_crs: QgsCoordinateReferenceSystem
+
+        :return: True if the footprint is the extent in the canvas CRS.
+        :rtype: bool
+        """
+        return (
+            crs == self.crs
+            and canvas_crs == self.canvas_crs
+            and geometry.equals(self.source))
+
+    def simplified(self, tolerance):
+        """The footprint simplified with a tolerance.
+
+        :param tolerance: The tolerance in the units of the canvas CRS, or
+            None for the full resolution footprint.
+        :type tolerance: float
+
+        :return: The simplified footprint.
+        :rtype: QgsGeometry
+        """
+        if tolerance is None:
+            return self.geometry
+        geometry = self._simplified.get(tolerance)
+        if geometry is None:
+            geometry = self.geometry.simplify(tolerance)
+            if geometry.isNull() or geometry.isEmpty():
+                geometry = self.geometry
+            self._simplified[tolerance] = geometry
+        return geometry
+
+
 @singleton
 class Extent():
     """Extent class to handle analysis extent.
@@ -50,7 +128,8 @@ class Extent():
     Note that rubber bands are transient but their associated extents are
     persistent for the session.
 
-    Rubberbands are stored in the map canvas CRS.
+    Rubberbands are stored in the map canvas CRS. They are drawn with the
+    extents simplified according to the canvas scale, see Footprint.
     """
 
     def __init__(self, iface):
@@ -60,19 +139,23 @@ class Extent():
 
         # Last analysis extents
         self._last_analysis_rubberband = None
-        self._last_analysis_extent = None  # QgsGeometry
+        self._last_analysis_extent = None  # Footprint
 
         # The AOI of the next analysis.
         self._next_analysis_rubberband = None
-        self._next_analysis_extent = None  # QgsGeometry
+        self._next_analysis_extent = None  # Footprint
 
         # Rectangle defining the user's preferred extent for the analysis
         self._user_analysis_rubberband = None
-        self._user_extent = None  # QgsRectangle
+        self._user_extent = None  # Footprint
 
         # Whether to show rubber band of last and next scenario
         self._show_rubber_bands = False
 
+        # The tolerance used to simplify the extents of the rubber bands.
+        self._tolerance = self.tolerance()
+        self._map_canvas.scaleChanged.connect(self._scale_changed)
+
     @property
     def show_rubber_bands(self):
         """Return if we display rubberbands.
@@ -109,6 +192,57 @@ class Extent():
         """
         return self._map_canvas.mapSettings().destinationCrs()
 
+    def tolerance(self):
+        """The tolerance to simplify the extents at the canvas scale.
+
+        The tolerance is the size of a pixel, rounded down to a power of two
+        so the simplified extents are reused between close scales.
+
+        .. versionadded:: 5.0
+
+        :return: The tolerance in the units of the canvas CRS, or None if the
+            extents are drawn with their full resolution.
+        :rtype: float
+        """
+        if self._map_canvas.scale() < FULL_RESOLUTION_SCALE:
+            return None
+        units_per_pixel = self._map_canvas.mapUnitsPerPixel()
+        if units_per_pixel <= 0:
+            return None
+        return 2.0 ** math.floor(math.log(units_per_pixel, 2))
+
+    def _scale_changed(self):
+        """Slot called when the canvas scale changes."""
+        tolerance = self.tolerance()
+        if tolerance == self._tolerance:
+            return
+        self._tolerance = tolerance
+        if self._show_rubber_bands:
+            self.display_last_analysis()
+            self.display_next_analysis()
+            self.display_user_extent()
+
+    def _footprint(self, footprint, extent, crs):
+        """The footprint of an extent, reusing the current one if possible.
+
+        :param footprint: The current footprint, may be None.
+        :type footprint: Footprint
+
+        :param extent: The extent.
+        :type extent: QgsGeometry
+
+        :param crs: The CRS of the extent.
+        :type crs: QgsCoordinateReferenceSystem
+
+        :return: The footprint of the extent.
+        :rtype: Footprint
+        """
+        canvas_crs = self.crs
+        if footprint is not None and footprint.matches(
+                extent, crs, canvas_crs):
+            return footprint
+        return Footprint(extent, crs, canvas_crs)
+
     @property
     def user_extent(self):
         """The user extent in the canvas CRS.
@@ -116,7 +250,9 @@ class Extent():
         :return: The user extent.
         :rtype: QgsGeometry
         """
-        return self._user_extent
+        if self._user_extent is None:
+            return None
+        return self._user_extent.geometry
 
     def set_user_extent(self, extent, crs):
         """Setter for the user requested extent.
@@ -129,12 +265,11 @@ class Extent():
         :param crs: The CRS of the extent.
         :type crs: QgsCoordinateReferenceSystem
         """
-        extent = QgsGeometry(extent)
-        transform = QgsCoordinateTransform(
-            crs, self.crs, QgsProject.instance())
-        extent.transform(transform)
-        self._user_extent = extent
-        set_setting('user_extent', extent.asWkt())
+        footprint = self._footprint(self._user_extent, extent, crs)
+        if footprint is self._user_extent:
+            return
+        self._user_extent = footprint
+        set_setting('user_extent', footprint.geometry.asWkt())
         set_setting('user_extent_crs', crs.authid())
         if self._show_rubber_bands:
             self.display_user_extent()
@@ -146,7 +281,9 @@ class Extent():
         :return: The last analysis extent.
         :rtype: QgsGeometry
         """
-        return self._last_analysis_extent
+        if self._last_analysis_extent is None:
+            return None
+        return self._last_analysis_extent.geometry
 
     def set_last_analysis_extent(self, extent, crs):
         """Setter for the last analysis extent.
@@ -159,11 +296,10 @@ class Extent():
         :param crs: The CRS of the extent.
         :type crs: QgsCoordinateReferenceSystem
         """
-        extent = QgsGeometry(extent)
-        transform = QgsCoordinateTransform(
-            crs, self.crs, QgsProject.instance())
-        extent.transform(transform)
-        self._last_analysis_extent = extent
+        footprint = self._footprint(self._last_analysis_extent, extent, crs)
+        if footprint is self._last_analysis_extent:
+            return
+        self._last_analysis_extent = footprint
 
         if self._show_rubber_bands:
             self.display_last_analysis()
@@ -175,7 +311,9 @@ class Extent():
         :return: The next analysis extent.
         :rtype: QgsGeometry
         """
-        return self._next_analysis_extent
+        if self._next_analysis_extent is None:
+            return None
+        return self._next_analysis_extent.geometry
 
     def set_next_analysis_extent(self, extent, crs):
         """Setter for the next analysis extent.
@@ -188,11 +326,10 @@ class Extent():
         :param crs: The CRS of the extent.
         :type crs: QgsCoordinateReferenceSystem
         """
-        extent = QgsGeometry(extent)
-        transform = QgsCoordinateTransform(
-            crs, self.crs, QgsProject.instance())
-        extent.transform(transform)
-        self._next_analysis_extent = extent
+        footprint = self._footprint(self._next_analysis_extent, extent, crs)
+        if footprint is self._next_analysis_extent:
+            return
+        self._next_analysis_extent = footprint
 
         if self._show_rubber_bands:
             self.display_next_analysis()
@@ -203,7 +340,7 @@ class Extent():
         .. versionadded: 2.2.0
 
         :param geometry: Extent that the rubber band should be drawn for.
-        :type geometry: QgsGeometry
+        :type geometry: Footprint
 
         :param colour: Colour for the rubber band.
         :type colour: QColor
@@ -220,7 +357,7 @@ class Extent():
         rubber_band.setBrushStyle(Qt.NoBrush)
         rubber_band.setColor(colour)
         rubber_band.setWidth(width)
-        rubber_band.setToGeometry(geometry, None)
+        rubber_band.setToGeometry(geometry.simplified(self._tolerance), None)
         return rubber_band
 
     def display_user_extent(self):
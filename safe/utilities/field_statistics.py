@@ -0,0 +1,331 @@
+# coding=utf-8
+
+"""Statistics of the fields and the bands of a layer for the keyword wizard.
+
+Reading the unique values or the range of a field, or of a raster band, on a
+whole layer can take a long time with a large layer. The approximate
+statistics are computed first on a sample: the first features of a vector
+layer, or the raster read at a lower resolution, from its overviews if any.
+The exact statistics are computed in a background task.
+
+The exact statistics are cached by layer source, field or band, and
+modification time of the files of the layer, so going back and forth between
+the steps of the wizard does not compute them again. Layers which are not
+file based, or with unsaved edits, are not cached, their statistics are
+computed exactly when requested.
+"""
+
+import glob
+import logging
+import os
+from collections import OrderedDict
+from math import sqrt
+
+import numpy
+from osgeo import gdal
+from qgis.core import (
+    QgsApplication,
+    QgsFeatureRequest,
+    QgsRasterLayer,
+    QgsTask,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QEventLoop, QObject, pyqtSignal
+
+from safe.utilities.gis import is_raster_layer
+from safe.utilities.i18n import tr
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+LOGGER = logging.getLogger('InaSAFE')
+
+# Number of features or pixels used for the approximate statistics.
+SAMPLE_SIZE = 10000
+
+# Maximum number of statistics kept in the cache.
+CACHE_SIZE = 50
+
+UNIQUE_VALUES = 'unique_values'
+VALUE_RANGE = 'value_range'
+
+
+class FieldStatistics(QObject):
+
+    """Cached statistics of fields and raster bands.
+
+    The statistics are the list of unique values, or the minimum and the
+    maximum as a tuple.
+
+    .. versionadded:: 5.0
+    """
+
+    # Emitted with the key of the statistics when the exact statistics have
+    # been computed in the background.
+    statisticsReady = pyqtSignal(object)
+
+    def __init__(self):
+        """Constructor."""
+        super(FieldStatistics, self).__init__()
+        self._cache = OrderedDict()
+        self._tasks = {}
+
+    @staticmethod
+    def key(layer, kind, index):
+        """The key of the statistics of a field or a band in the cache.
+
+        :param layer: The vector or raster layer.
+        :type layer: QgsMapLayer
+
+        :param kind: UNIQUE_VALUES or VALUE_RANGE.
+        :type kind: str
+
+        :param index: The field index or the band number.
+        :type index: int
+
+        :return: The key, or None if the layer is not file based or has
+            unsaved edits.
+        :rtype: tuple
+        """
+        path = layer.source().split('|')[0]
+        if not os.path.isfile(path):
+            return None
+        if isinstance(layer, QgsVectorLayer) and layer.isModified():
+            return None
+        # Also the sidecar files, like the dbf of a shapefile which is
+        # modified by an attribute edit.
+        files = sorted(glob.glob(
+            glob.escape(os.path.splitext(path)[0]) + '.*'))
+        if path not in files:
+            files.append(path)
+        modified = tuple(
+            (name, os.path.getmtime(name)) for name in files
+            if os.path.isfile(name))
+        return layer.source(), kind, index, modified
+
+    def unique_values(self, layer, index, exact=False):
+        """The unique values of a field or a band.
+
+        :param layer: The vector or raster layer.
+        :type layer: QgsMapLayer
+
+        :param index: The field index or the band number.
+        :type index: int
+
+        :param exact: If True, wait for the exact values. Default to False.
+        :type exact: bool
+
+        :return: A tuple with the list of unique values and a flag if the
+            values are exact.
+        :rtype: (list, bool)
+        """
+        return self._statistics(layer, UNIQUE_VALUES, index, exact)
+
+    def value_range(self, layer, index, exact=False):
+        """The minimum and the maximum of a field or a band.
+
+        :param layer: The vector or raster layer.
+        :type layer: QgsMapLayer
+
+        :param index: The field index or the band number.
+        :type index: int
+
+        :param exact: If True, wait for the exact range. Default to False.
+        :type exact: bool
+
+        :return: A tuple with the minimum, the maximum and a flag if they
+            are exact.
+        :rtype: (float, float, bool)
+        """
+        (minimum, maximum), is_exact = self._statistics(
+            layer, VALUE_RANGE, index, exact)
+        return minimum, maximum, is_exact
+
+    def clear(self):
+        """Remove all the cached statistics."""
+        self._cache.clear()
+
+    def _statistics(self, layer, kind, index, exact):
+        """Cached, approximate or exact statistics.
+
+        :return: A tuple with the statistics and a flag if they are exact.
+        :rtype: tuple
+        """
+        key = self.key(layer, kind, index)
+        if key is None:
+            return compute_statistics(layer, kind, index), True
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key], True
+
+        if not exact:
+            statistics, is_exact = sample_statistics(layer, kind, index)
+            if is_exact:
+                self._keep(key, statistics)
+            else:
+                self._start(key, layer, kind, index)
+            return statistics, is_exact
+
+        if key in self._tasks:
+            # The exact statistics are being computed, we wait for them.
+            loop = QEventLoop()
+            self._tasks[key].taskCompleted.connect(loop.quit)
+            self._tasks[key].taskTerminated.connect(loop.quit)
+            loop.exec_()
+            if key in self._cache:
+                return self._cache[key], True
+
+        statistics = compute_statistics(layer, kind, index)
+        self._keep(key, statistics)
+        return statistics, True
+
+    def _keep(self, key, statistics):
+        """Add statistics to the cache.
+
+        :param key: The key of the statistics.
+        :type key: tuple
+
+        :param statistics: The statistics.
+        :type statistics: list, tuple
+        """
+        self._cache[key] = statistics
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _start(self, key, layer, kind, index):
+        """Compute the exact statistics in a background task.
+
+        The layer is opened again in the task, a layer can not be used in
+        two threads.
+        """
+        if key in self._tasks:
+            return
+
+        source = layer.source()
+        provider = layer.providerType()
+        raster = is_raster_layer(layer)
+
+        def compute(task):
+            """Compute the statistics, in the task thread."""
+            if raster:
+                task_layer = QgsRasterLayer(source, 'statistics', provider)
+            else:
+                task_layer = QgsVectorLayer(source, 'statistics', provider)
+            return compute_statistics(task_layer, kind, index)
+
+        def finished(exception, statistics=None):
+            """Keep the statistics, in the main thread."""
+            self._tasks.pop(key, None)
+            if exception is not None:
+                LOGGER.debug(
+                    'Statistics of {source} failed: {error}'.format(
+                        source=source, error=exception))
+                return
+            self._keep(key, statistics)
+            self.statisticsReady.emit(key)
+
+        task = QgsTask.fromFunction(
+            tr('Statistics of {name}').format(name=layer.name()),
+            compute,
+            on_finished=finished)
+        # We keep a reference to the task, the task manager does not.
+        self._tasks[key] = task
+        QgsApplication.taskManager().addTask(task)
+
+
+def compute_statistics(layer, kind, index):
+    """Compute the exact statistics of a field or a band.
+
+    .. versionadded:: 5.0
+
+    :param layer: The vector or raster layer.
+    :type layer: QgsMapLayer
+
+    :param kind: UNIQUE_VALUES or VALUE_RANGE.
+    :type kind: str
+
+    :param index: The field index or the band number.
+    :type index: int
+
+    :return: The list of unique values or the minimum and the maximum.
+    :rtype: list, tuple
+    """
+    if is_raster_layer(layer):
+        dataset = gdal.Open(layer.source(), gdal.GA_ReadOnly)
+        band = dataset.GetRasterBand(index)
+        if kind == UNIQUE_VALUES:
+            return numpy.unique(band.ReadAsArray()).tolist()
+        minimum, maximum = band.ComputeRasterMinMax(False)
+        return minimum, maximum
+
+    if kind == UNIQUE_VALUES:
+        return list(layer.uniqueValues(index))
+    return layer.minimumValue(index), layer.maximumValue(index)
+
+
+def sample_statistics(layer, kind, index):
+    """Compute the statistics of a field or a band on a sample.
+
+    .. versionadded:: 5.0
+
+    :param layer: The vector or raster layer.
+    :type layer: QgsMapLayer
+
+    :param kind: UNIQUE_VALUES or VALUE_RANGE.
+    :type kind: str
+
+    :param index: The field index or the band number.
+    :type index: int
+
+    :return: A tuple with the statistics and a flag if the sample is the
+        whole layer, so the statistics are exact.
+    :rtype: tuple
+    """
+    if is_raster_layer(layer):
+        dataset = gdal.Open(layer.source(), gdal.GA_ReadOnly)
+        band = dataset.GetRasterBand(index)
+        width, height = dataset.RasterXSize, dataset.RasterYSize
+        is_exact = width * height <= SAMPLE_SIZE
+        if is_exact:
+            values = band.ReadAsArray()
+        else:
+            # GDAL reads the overviews, if any, to fill a smaller buffer.
+            ratio = sqrt(float(SAMPLE_SIZE) / (width * height))
+            values = band.ReadAsArray(
+                buf_xsize=max(1, int(width * ratio)),
+                buf_ysize=max(1, int(height * ratio)))
+        if kind == UNIQUE_VALUES:
+            return numpy.unique(values).tolist(), is_exact
+        no_data = band.GetNoDataValue()
+        if no_data is not None:
+            values = values[values != no_data]
+        if not values.size:
+            return (None, None), is_exact
+        return (
+            numpy.nanmin(values).item(), numpy.nanmax(values).item()), is_exact
+
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes([index])
+    request.setLimit(SAMPLE_SIZE)
+    values = set()
+    count = 0
+    for feature in layer.getFeatures(request):
+        count += 1
+        values.add(feature.attributes()[index])
+    is_exact = count < SAMPLE_SIZE
+    if kind == UNIQUE_VALUES:
+        return list(values), is_exact
+
+    values = [
+        value for value in values if value is not None and not (
+            hasattr(value, 'isNull') and value.isNull())]
+    if not values:
+        return (None, None), is_exact
+    return (min(values), max(values)), is_exact
+
+
+field_statistics = FieldStatistics()
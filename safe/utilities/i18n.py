@@ -4,6 +4,8 @@
 
 
 import logging
+import os
+from functools import lru_cache
 
 # This import is to enable SIP API V2
 # noinspection PyUnresolvedReferences
@@ -20,6 +22,9 @@ __revision__ = '$Format:%H$'
 
 LOGGER = logging.getLogger('InaSAFE')
 
+# Maximum number of translations kept in memory.
+TRANSLATION_CACHE_SIZE = 4096
+
 
 def tr(text, context='@default'):
     """We define a tr function alias here since the utilities implementation
@@ -27,6 +32,8 @@ def tr(text, context='@default'):
 
     .. note:: see http://tinyurl.com/pyqt-differences
 
+    .. versionchanged:: 5.0 - translations are cached per locale.
+
     :param text: String to be translated
     :type text: str, unicode
 
@@ -41,6 +48,30 @@ def tr(text, context='@default'):
     # noinspection PyCallByClass,PyTypeChecker,PyArgumentList
     if type(text) != str:
         text = str(text)
+    # LANG is set when the translator is installed, see the __init__.py
+    # of the plugin root, which also clears the cache.
+    return _cached_translation(os.environ.get('LANG'), context, text)
+
+
+@lru_cache(maxsize=TRANSLATION_CACHE_SIZE)
+def _cached_translation(language, context, text):
+    """Translate a text, memoized by language, context and text.
+
+    :param language: The language the text is translated to. It is only used
+        as a cache key.
+    :type language: str
+
+    :param context: A context for the translation.
+    :type context: str
+
+    :param text: String to be translated.
+    :type text: str
+
+    :returns: Translated version of the given string if available, otherwise
+        the original string.
+    :rtype: str
+    """
+    _ = language  # NOQA
     translated_text = QCoreApplication.translate(context, text)
     # Check if there is missing container. If so, return the original text.
     # See #3164
@@ -63,6 +94,52 @@ def tr(text, context='@default'):
         return text
 
 
+def clear_translation_cache():
+    """Clear the translation cache.
+
+    It must be called when a new translator is installed.
+
+    .. versionadded:: 5.0
+    """
+    _cached_translation.cache_clear()
+
+
+class TranslationTable(dict):
+
+    """Translate a small set of values, each value is translated once.
+
+    It is meant to be used in loops over features, for enum-like values
+    such as True, False or not exposed:
+
+        translations = TranslationTable()
+        for feature in layer.getFeatures():
+            value = translations[feature['affected']]
+
+    .. versionadded:: 5.0
+    """
+
+    def __init__(self, context='@default'):
+        """Create an empty table.
+
+        :param context: A context for the translation.
+        :type context: str
+        """
+        super(TranslationTable, self).__init__()
+        self.context = context
+
+    def __missing__(self, value):
+        """Translate a value which is not in the table yet.
+
+        :param value: The value to translate.
+
+        :returns: The translated value as a string.
+        :rtype: str
+        """
+        translated_text = tr(str(value), self.context)
+        self[value] = translated_text
+        return translated_text
+
+
 def locale(qsetting=''):
     """Get the name of the currently active locale.
 
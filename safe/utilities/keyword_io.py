@@ -25,6 +25,10 @@ __revision__ = '$Format:%H$'
 
 LOGGER = logging.getLogger('InaSAFE')
 
+# Number of times the keywords of each source have been written, see
+# KeywordIO.keywords_revision.
+_keywords_revisions = {}
+
 
 # Notes(IS): This class can be replaced by safe.utilities.metadata
 # Some methods for viewing the keywords should be put in the other class
@@ -103,6 +107,24 @@ class KeywordIO(QObject):
 
         source = layer.source()
         write_iso19115_metadata(source, keywords)
+        _keywords_revisions[source] = _keywords_revisions.get(source, 0) + 1
+
+    @staticmethod
+    def keywords_revision(layer):
+        """The number of times the keywords of a layer have been written.
+
+        The keywords of a layer which is not file based are stored in a
+        database, without a modification time to check if they changed.
+
+        .. versionadded:: 5.0
+
+        :param layer: A QGIS QgsMapLayer instance.
+        :type layer: qgis.core.QgsMapLayer
+
+        :return: The number of writes since the start of QGIS.
+        :rtype: int
+        """
+        return _keywords_revisions.get(layer.source(), 0)
 
     # methods below here should be considered private
 
@@ -9,6 +9,7 @@ This code was taken from http://stackoverflow.com/a/3620972
 
 import inspect
 import time
+from collections import OrderedDict
 from functools import wraps
 
 from safe.utilities.memory_checker import get_free_memory
@@ -45,6 +46,9 @@ class Tree():
         # Children
         self.children = []
 
+        # Counters reported by the function, like the number of features.
+        self.counts = OrderedDict()
+
     def ended(self):
         """We call this method when the function is finished."""
         self._end_time = time.time()
@@ -80,6 +84,17 @@ class Tree():
         else:
             return None
 
+    @property
+    def running(self):
+        """The deepest node of the tree which is still running.
+
+        ..versionadded:: 5.0
+        """
+        for child in reversed(self.children):
+            if child._end_time is None:
+                return child.running
+        return self
+
     def append(self, node):
         """To append a new child."""
         if node.parent == self.key and not self.elapsed_time:
@@ -137,6 +152,23 @@ def profiling_log():
     return ROOT
 
 
+def profile_count(key, value):
+    """Add a counter to the profiling log of the running function.
+
+    ..versionadded:: 5.0
+
+    :param key: The name of the counter.
+    :type key: str
+
+    :param value: The value to add to the counter.
+    :type value: int
+    """
+    if ROOT is None:
+        return
+    node = ROOT.running
+    node.counts[key] = node.counts.get(key, 0) + value
+
+
 def clear_prof_data():
     global ROOT
     ROOT = None
@@ -0,0 +1,90 @@
+# coding=utf-8
+
+"""Tests for the expression cache."""
+
+import os
+import unittest
+from tempfile import mkstemp
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import get_qgis_app, load_test_vector_layer
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import QgsProject  # NOQA
+
+from safe.utilities.expression_cache import ExpressionCache  # NOQA
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestExpressionCache(unittest.TestCase):
+
+    """Tests for the expression cache."""
+
+    def setUp(self):
+        self.calls = 0
+
+    def compute(self):
+        """Count how many times the value is computed."""
+        self.calls += 1
+        return self.calls
+
+    def test_get(self):
+        """Test values are computed only once until the cache is cleared."""
+        cache = ExpressionCache()
+        self.assertEqual(cache.get(('key', ), self.compute), 1)
+        self.assertEqual(cache.get(('key', ), self.compute), 1)
+        self.assertEqual(cache.get(('other', ), self.compute), 2)
+
+        cache.clear()
+        self.assertEqual(cache.get(('key', ), self.compute), 3)
+
+    def test_clear_on_project_change(self):
+        """Test the cache is cleared when a layer is added to the project."""
+        cache = ExpressionCache()
+        cache.get(('key', ), self.compute)
+
+        layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson', clone=True)
+        QgsProject.instance().addMapLayer(layer)
+        self.assertEqual(cache.get(('key', ), self.compute), 2)
+        QgsProject.instance().removeMapLayer(layer.id())
+
+    def test_layer_revision(self):
+        """Test the layer revision changes when the data changes."""
+        cache = ExpressionCache()
+        layer = load_test_vector_layer(
+            'gisv4', 'aggregation', 'small_grid.geojson', clone=True)
+        key = cache.layer_key(layer)
+
+        layer.startEditing()
+        feature = next(layer.getFeatures())
+        layer.changeAttributeValue(feature.id(), 0, feature[0])
+        layer.commitChanges()
+
+        self.assertNotEqual(key, cache.layer_key(layer))
+
+    def test_read_file(self):
+        """Test reading a file is memoized on its modified time."""
+        cache = ExpressionCache()
+        _, path = mkstemp()
+        with open(path, 'w') as text_file:
+            text_file.write('first')
+        self.assertEqual(cache.read_file(path), 'first')
+
+        with open(path, 'w') as text_file:
+            text_file.write('second')
+        modified_time = os.path.getmtime(path) + 10
+        os.utime(path, (modified_time, modified_time))
+        self.assertEqual(cache.read_file(path), 'second')
+
+        os.remove(path)
+        self.assertIsNone(cache.read_file(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# coding=utf-8
+
+"""Tests for the extent footprints."""
+
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import QgsCoordinateReferenceSystem, QgsGeometry  # NOQA
+from safe.utilities.extent import Footprint  # NOQA
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestFootprint(unittest.TestCase):
+
+    """Tests for the extent footprints."""
+
+    def setUp(self):
+        # A polygon with many vertices, close to a circle.
+        self.geometry = QgsGeometry.fromWkt('POINT(106.8 -6.2)').buffer(
+            0.1, 100)
+        self.crs = QgsCoordinateReferenceSystem('EPSG:4326')
+        self.canvas_crs = QgsCoordinateReferenceSystem('EPSG:3857')
+
+    def test_transform(self):
+        """Test the footprint is transformed to the canvas CRS."""
+        footprint = Footprint(self.geometry, self.crs, self.canvas_crs)
+        self.assertTrue(footprint.matches(
+            self.geometry, self.crs, self.canvas_crs))
+        self.assertFalse(footprint.matches(
+            self.geometry, self.crs, self.crs))
+        self.assertFalse(footprint.matches(
+            self.geometry.buffer(0.1, 5), self.crs, self.canvas_crs))
+        self.assertGreater(footprint.geometry.boundingBox().xMinimum(), 1e6)
+
+    def test_simplified(self):
+        """Test the simplified footprints are cached by tolerance."""
+        footprint = Footprint(self.geometry, self.crs, self.crs)
+        self.assertIs(footprint.simplified(None), footprint.geometry)
+
+        simplified = footprint.simplified(0.05)
+        self.assertIs(footprint.simplified(0.05), simplified)
+        self.assertLess(
+            len(list(simplified.vertices())),
+            len(list(footprint.geometry.vertices())))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# coding=utf-8
+
+"""Tests for the field statistics."""
+
+import os
+import unittest
+
+from safe.definitions.constants import INASAFE_TEST
+from safe.test.utilities import (
+    get_qgis_app,
+    load_test_raster_layer,
+    load_test_vector_layer)
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+import safe.utilities.field_statistics as statistics_module  # NOQA
+from safe.utilities.field_statistics import (  # NOQA
+    FieldStatistics,
+    UNIQUE_VALUES,
+    compute_statistics,
+)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+class TestFieldStatistics(unittest.TestCase):
+
+    """Tests for the field statistics."""
+
+    def setUp(self):
+        self.sample_size = statistics_module.SAMPLE_SIZE
+        self.statistics = FieldStatistics()
+
+    def tearDown(self):
+        statistics_module.SAMPLE_SIZE = self.sample_size
+
+    def test_small_vector_layer(self):
+        """Test the statistics of a small layer are exact and cached."""
+        layer = load_test_vector_layer(
+            'gisv4', 'hazard', 'classified_vector.geojson')
+        index = layer.fields().lookupField('hazard_value')
+
+        values, is_exact = self.statistics.unique_values(layer, index)
+        self.assertTrue(is_exact)
+        self.assertEqual(
+            sorted(values), sorted(layer.uniqueValues(index)))
+
+        key = FieldStatistics.key(layer, UNIQUE_VALUES, index)
+        self.assertIn(key, self.statistics._cache)
+
+        index = layer.fields().lookupField('hazard_id')
+        minimum, maximum, is_exact = self.statistics.value_range(
+            layer, index)
+        self.assertTrue(is_exact)
+        self.assertEqual(minimum, layer.minimumValue(index))
+        self.assertEqual(maximum, layer.maximumValue(index))
+
+    def test_sampled_vector_layer(self):
+        """Test the statistics of a large layer are sampled first."""
+        statistics_module.SAMPLE_SIZE = 2
+        layer = load_test_vector_layer(
+            'gisv4', 'hazard', 'classified_vector.geojson')
+        index = layer.fields().lookupField('hazard_id')
+
+        minimum, maximum, is_exact = self.statistics.value_range(
+            layer, index)
+        self.assertFalse(is_exact)
+        self.assertLessEqual(maximum - minimum, 1)
+
+        # Exact statistics wait for the task computing them.
+        minimum, maximum, is_exact = self.statistics.value_range(
+            layer, index, exact=True)
+        self.assertTrue(is_exact)
+        self.assertEqual(minimum, layer.minimumValue(index))
+        self.assertEqual(maximum, layer.maximumValue(index))
+
+    def test_key(self):
+        """Test the key changes when the attributes of a layer change."""
+        layer = load_test_vector_layer(
+            'hazard', 'floods.shp', clone=True)
+        key = FieldStatistics.key(layer, UNIQUE_VALUES, 0)
+        self.assertIsNotNone(key)
+        self.assertEqual(key, FieldStatistics.key(layer, UNIQUE_VALUES, 0))
+
+        # An attribute edit only modifies the dbf file.
+        dbf = os.path.splitext(layer.source().split('|')[0])[0] + '.dbf'
+        modified = os.path.getmtime(dbf) + 10
+        os.utime(dbf, (modified, modified))
+        self.assertNotEqual(
+            key, FieldStatistics.key(layer, UNIQUE_VALUES, 0))
+
+        # Unsaved edits are not cached.
+        layer.startEditing()
+        layer.changeAttributeValue(next(layer.getFeatures()).id(), 0, None)
+        self.assertIsNone(FieldStatistics.key(layer, UNIQUE_VALUES, 0))
+        layer.rollBack()
+
+    def test_raster_layer(self):
+        """Test the statistics of a raster band."""
+        layer = load_test_raster_layer(
+            'gisv4', 'hazard', 'earthquake.asc')
+        values = compute_statistics(layer, UNIQUE_VALUES, 1)
+        self.assertIsInstance(values[0], float)
+
+        statistics_module.SAMPLE_SIZE = 20
+        minimum, maximum, is_exact = self.statistics.value_range(layer, 1)
+        self.assertFalse(is_exact)
+        exact_minimum, exact_maximum, is_exact = self.statistics.value_range(
+            layer, 1, exact=True)
+        self.assertTrue(is_exact)
+        self.assertGreaterEqual(minimum, exact_minimum)
+        self.assertLessEqual(maximum, exact_maximum)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+# coding=utf-8
+"""Benchmark the vector algorithms writing attributes in bulk.
+
+Each algorithm migrated to the AttributeWriter is run on a synthetic polygon
+memory layer. The first benchmark compares the edit buffer, one
+changeAttributeValue call per cell, with the AttributeWriter on the same
+layer. Run the script on the previous commit to compare the algorithms.
+
+The summaries are not part of this script, they need a full analysis. Their
+time is in the profiling log of an analysis.
+
+Usage, from the root of the repository in a QGIS python environment:
+    python scripts/benchmarks/benchmark_attribute_writer.py [feature_count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from safe.definitions.constants import INASAFE_TEST  # NOQA
+from safe.test.utilities import get_qgis_app  # NOQA
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import (  # NOQA
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsField,
+    QgsGeometry,
+    QgsRectangle,
+    QgsWkbTypes)
+from qgis.PyQt.QtCore import QVariant  # NOQA
+
+from safe.definitions.exposure import exposure_structure  # NOQA
+from safe.definitions.fields import (  # NOQA
+    exposure_type_field,
+    female_count_field,
+    female_ratio_field,
+    hazard_value_field,
+    population_count_field,
+    size_field)
+from safe.gis.vector.default_values import add_default_values  # NOQA
+from safe.gis.vector.from_counts_to_ratios import (  # NOQA
+    from_counts_to_ratios)
+from safe.gis.vector.prepare_vector_layer import _add_id_column  # NOQA
+from safe.gis.vector.recompute_counts import recompute_counts  # NOQA
+from safe.gis.vector.reclassify import reclassify  # NOQA
+from safe.gis.vector.tools import (  # NOQA
+    AttributeWriter, copy_fields, create_memory_layer)
+from safe.gis.vector.update_value_map import update_value_map  # NOQA
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+EXPOSURE_TYPES = ['residential', 'school', 'hospital', 'government']
+
+
+def synthetic_layer(feature_count):
+    """Create a grid of small squares with a few attributes.
+
+    :param feature_count: The number of features.
+    :type feature_count: int
+
+    :return: The memory layer.
+    :rtype: QgsVectorLayer
+    """
+    fields = [
+        QgsField('type', QVariant.String),
+        QgsField('depth', QVariant.Double),
+        QgsField('population', QVariant.Double),
+        QgsField('female', QVariant.Double),
+        QgsField('size', QVariant.Double),
+    ]
+    layer = create_memory_layer(
+        'benchmark',
+        QgsWkbTypes.PolygonGeometry,
+        QgsCoordinateReferenceSystem('EPSG:4326'),
+        fields)
+    layer.keywords = {}
+
+    features = []
+    for i in range(feature_count):
+        x = (i % 1000) * 0.001
+        y = (i // 1000) * 0.001
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromRect(
+            QgsRectangle(x, y, x + 0.001, y + 0.001)))
+        feature.setAttributes([
+            EXPOSURE_TYPES[i % len(EXPOSURE_TYPES)],
+            (i % 30) / 10.0,
+            100.0,
+            50.0,
+            12345.0,
+        ])
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def edit_buffer(layer):
+    """Write a column cell by cell through the edit buffer."""
+    layer.startEditing()
+    layer.addAttribute(QgsField('bench', QVariant.Int))
+    index = layer.fields().lookupField('bench')
+    for feature in layer.getFeatures():
+        layer.changeAttributeValue(feature.id(), index, feature.id())
+    layer.commitChanges()
+
+
+def attribute_writer(layer):
+    """Write a column with the AttributeWriter."""
+    writer = AttributeWriter(layer)
+    index = writer.addAttribute(QgsField('bench', QVariant.Int))
+    for feature in layer.getFeatures():
+        writer.changeAttributeValue(feature.id(), index, feature.id())
+    writer.commitChanges()
+
+
+def run_update_value_map(layer):
+    """Run update_value_map on the exposure type."""
+    layer.keywords = {
+        'layer_purpose': 'exposure',
+        'exposure': exposure_structure['key'],
+        'title': 'benchmark',
+        'inasafe_fields': {exposure_type_field['key']: 'type'},
+        'value_map': {value: [value] for value in EXPOSURE_TYPES},
+    }
+    update_value_map(layer)
+
+
+def run_reclassify(layer):
+    """Run reclassify on the depth."""
+    classes = {
+        1: [None, 0.5],
+        2: [0.5, 1.5],
+        3: [1.5, None]
+    }
+    layer.keywords = {
+        'layer_purpose': 'hazard',
+        'title': 'benchmark',
+        'inasafe_fields': {hazard_value_field['key']: 'depth'},
+        'thresholds': {
+            exposure_structure['key']: {
+                'flood_hazard_classes': {
+                    'active': True,
+                    'classes': classes
+                }
+            }
+        }
+    }
+    reclassify(layer, exposure_structure['key'])
+
+
+def run_from_counts_to_ratios(layer):
+    """Run from_counts_to_ratios on the female count."""
+    layer.keywords = {
+        'exposure': 'population',
+        'inasafe_fields': {
+            population_count_field['key']: 'population',
+            female_count_field['key']: 'female',
+        }
+    }
+    from_counts_to_ratios(layer)
+
+
+def run_recompute_counts(layer):
+    """Run recompute_counts on the population count."""
+    layer.keywords = {
+        'title': 'benchmark',
+        'exposure_keywords': {'exposure': 'population'},
+        'inasafe_fields': {
+            size_field['key']: 'size',
+            population_count_field['key']: 'population',
+        }
+    }
+    recompute_counts(layer)
+
+
+def run_add_default_values(layer):
+    """Run add_default_values with a default female ratio."""
+    layer.keywords = {
+        'layer_purpose': 'exposure',
+        'inasafe_fields': {},
+        'inasafe_default_values': {female_ratio_field['key']: 0.5}
+    }
+    add_default_values(layer)
+
+
+def run_add_id_column(layer):
+    """Run _add_id_column on an aggregation layer."""
+    layer.keywords = {
+        'layer_purpose': 'aggregation',
+        'inasafe_fields': {}
+    }
+    _add_id_column(layer)
+
+
+def run_copy_fields(layer):
+    """Run copy_fields on two fields."""
+    copy_fields(layer, {'population': 'pop_copy', 'female': 'female_copy'})
+
+
+def run(label, function, feature_count):
+    """Time a function on a new synthetic layer."""
+    layer = synthetic_layer(feature_count)
+    start = time.time()
+    function(layer)
+    print('{label:<25} {seconds:.3f} s'.format(
+        label=label, seconds=time.time() - start))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print('Writing attributes on {count} features'.format(count=count))
+
+    run('edit buffer', edit_buffer, count)
+    run('attribute writer', attribute_writer, count)
+
+    run('update_value_map', run_update_value_map, count)
+    run('reclassify', run_reclassify, count)
+    run('from_counts_to_ratios', run_from_counts_to_ratios, count)
+    run('recompute_counts', run_recompute_counts, count)
+    run('add_default_values', run_add_default_values, count)
+    run('_add_id_column', run_add_id_column, count)
+    run('copy_fields', run_copy_fields, count)
@@ -0,0 +1,60 @@
+# coding=utf-8
+"""Benchmark the earthquake fatality estimation over rasters.
+
+It computes the expected fatalities of random MMI and population grids with
+each fatality model, per cell with the fatality rates by MMI class as it is
+done by the fatality post processor, and with the vectorized kernel.
+
+Usage, from the root of the repository in a QGIS python environment:
+    python scripts/benchmarks/benchmark_fatality.py [grid_size]
+"""
+
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from safe.definitions.earthquake import (  # NOQA
+    EARTHQUAKE_FUNCTIONS, earthquake_fatalities, mmi_classes)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+def per_cell(model, mmi, population):
+    """The fatalities computed cell by cell, from the rates by MMI class."""
+    total = 0
+    for mmi_class, count in zip(mmi_classes(mmi).flat, population.flat):
+        rate = model['fatality_rates']().get(mmi_class) or 0
+        total += rate * count
+    return total
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    mmi = numpy.random.uniform(1, 10, (size, size))
+    population = numpy.random.uniform(0, 100, (size, size))
+    print('Fatalities of a {size}x{size} grid'.format(size=size))
+
+    for model in EARTHQUAKE_FUNCTIONS:
+        sample = slice(0, max(1, size // 10))
+        start = time.time()
+        per_cell(model, mmi[sample], population[sample])
+        per_cell_time = (time.time() - start) * size / mmi[sample].shape[0]
+
+        start = time.time()
+        total = earthquake_fatalities(mmi, population, model['key']).sum()
+        kernel_time = time.time() - start
+        print(
+            '{key:<30} per cell (estimated) {per_cell:.3f} s, '
+            'kernel {kernel:.3f} s, {total:.0f} fatalities'.format(
+                key=model['key'],
+                per_cell=per_cell_time,
+                kernel=kernel_time,
+                total=total))
@@ -0,0 +1,118 @@
+# coding=utf-8
+"""Benchmark the size calculator on many polygons.
+
+The polygons are small multipart building footprints around Jakarta, in
+WGS84 and in UTM 48S. The previous implementation, measuring every part on
+the ellipsoid and converting the unit for each feature, is compared with
+measure_many. The maximum relative error of the planar measurement is
+printed as well.
+
+Usage, from the root of the repository in a QGIS python environment:
+    python scripts/benchmarks/benchmark_size_calculator.py [polygon_count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from safe.definitions.constants import INASAFE_TEST  # NOQA
+from safe.test.utilities import get_qgis_app  # NOQA
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import (  # NOQA
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsGeometry,
+    QgsProject,
+    QgsRectangle,
+    QgsWkbTypes)
+
+from safe.gis.vector.tools import SizeCalculator  # NOQA
+from safe.utilities.rounding import convert_unit  # NOQA
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+GEOGRAPHIC = QgsCoordinateReferenceSystem('EPSG:4326')
+UTM = QgsCoordinateReferenceSystem('EPSG:32748')
+
+
+def polygons(count):
+    """Create multipart footprints, two squares each, in WGS84.
+
+    :param count: The number of polygons.
+    :type count: int
+
+    :return: The geometries.
+    :rtype: list(QgsGeometry)
+    """
+    columns = int(count ** 0.5) + 1
+    step = 0.5 / columns
+    geometries = []
+    for i in range(count):
+        x = 106.5 + (i % columns) * step
+        y = -6.5 + (i // columns) * step
+        geometries.append(QgsGeometry.collectGeometry([
+            QgsGeometry.fromRect(
+                QgsRectangle(x, y, x + step / 3, y + step / 3)),
+            QgsGeometry.fromRect(QgsRectangle(
+                x + step / 2, y, x + 5 * step / 6, y + step / 3)),
+        ]))
+    return geometries
+
+
+def legacy_measure(calculator, geometries):
+    """The previous per feature measurement."""
+    sizes = []
+    for geometry in geometries:
+        size = 0
+        for single in geometry.asGeometryCollection():
+            size += calculator.calculator.measureArea(single)
+        size = round(size)
+        if calculator.output_unit != calculator.default_unit:
+            size = convert_unit(
+                size, calculator.default_unit, calculator.output_unit)
+        sizes.append(size)
+    return sizes
+
+
+def run(label, function, *args):
+    """Time a function."""
+    start = time.time()
+    result = function(*args)
+    print('{label:<30} {seconds:.3f} s'.format(
+        label=label, seconds=time.time() - start))
+    return result
+
+
+if __name__ == '__main__':
+    polygon_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print('Size of {count} polygons'.format(count=polygon_count))
+
+    geographic = run('create polygons', polygons, polygon_count)
+    transform = QgsCoordinateTransform(
+        GEOGRAPHIC, UTM, QgsProject.instance())
+    projected = [QgsGeometry(geometry) for geometry in geographic]
+    for geometry in projected:
+        geometry.transform(transform)
+
+    for label, crs, geometries in [
+            ('WGS84', GEOGRAPHIC, geographic), ('UTM', UTM, projected)]:
+        calculator = SizeCalculator(
+            crs, QgsWkbTypes.PolygonGeometry, 'structure')
+        run('legacy measure ' + label, legacy_measure, calculator, geometries)
+        sizes = run(
+            'measure_many ' + label, calculator.measure_many, geometries)
+
+    reference = legacy_measure(calculator, projected)
+    error = max(
+        abs(size / expected - 1)
+        for size, expected in zip(sizes, reference) if expected)
+    print('Maximum relative error of the planar sizes: {error:.6f}'.format(
+        error=error))
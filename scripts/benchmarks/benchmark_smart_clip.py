@@ -0,0 +1,160 @@
+# coding=utf-8
+"""Benchmark smart_clip with a mask made of many districts.
+
+The exposure is a grid of small building footprints. The mask is made of
+districts covering one district out of two, like a selection of districts
+in the aggregation layer. The previous smart_clip only used the first
+feature of the mask, so it is compared with a single prepared geometry of
+all the districts.
+
+Usage, from the root of the repository in a QGIS python environment:
+    python scripts/benchmarks/benchmark_smart_clip.py [building_count] \
+        [district_count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from safe.definitions.constants import INASAFE_TEST  # NOQA
+from safe.test.utilities import get_qgis_app  # NOQA
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app(qsetting=INASAFE_TEST)
+
+from qgis.core import (  # NOQA
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsField,
+    QgsGeometry,
+    QgsRectangle,
+    QgsWkbTypes)
+from qgis.PyQt.QtCore import QVariant  # NOQA
+
+from safe.gis.vector.smart_clip import smart_clip  # NOQA
+from safe.gis.vector.tools import create_memory_layer  # NOQA
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+CRS = QgsCoordinateReferenceSystem('EPSG:4326')
+
+# Size of the area covered by the buildings and the districts, in degrees.
+AREA_SIZE = 1.0
+
+
+def buildings(count):
+    """Create a grid of building footprints.
+
+    :param count: The number of buildings.
+    :type count: int
+
+    :return: The memory layer.
+    :rtype: QgsVectorLayer
+    """
+    layer = create_memory_layer(
+        'buildings',
+        QgsWkbTypes.PolygonGeometry,
+        CRS,
+        [QgsField('type', QVariant.String)])
+    layer.keywords = {}
+
+    columns = int(count ** 0.5) + 1
+    step = AREA_SIZE / columns
+    features = []
+    for i in range(count):
+        x = (i % columns) * step
+        y = (i // columns) * step
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromRect(
+            QgsRectangle(x, y, x + step / 2, y + step / 2)))
+        feature.setAttributes(['residential'])
+        features.append(feature)
+        if len(features) == 10000:
+            layer.dataProvider().addFeatures(features)
+            features = []
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+    return layer
+
+
+def districts(count):
+    """Create a mask of districts, one cell out of two of a grid.
+
+    :param count: The number of districts.
+    :type count: int
+
+    :return: The memory layer.
+    :rtype: QgsVectorLayer
+    """
+    layer = create_memory_layer(
+        'districts', QgsWkbTypes.PolygonGeometry, CRS)
+    columns = int((2 * count) ** 0.5) + 1
+    step = AREA_SIZE / columns
+    features = []
+    for i in range(2 * count):
+        column = i % columns
+        row = i // columns
+        if (column + row) % 2:
+            continue
+        x = column * step
+        y = row * step
+        # A district is not a rectangle, we buffer it a little.
+        geometry = QgsGeometry.fromRect(
+            QgsRectangle(x, y, x + step, y + step)).buffer(step / 20, 8)
+        feature = QgsFeature()
+        feature.setGeometry(geometry)
+        features.append(feature)
+    layer.dataProvider().addFeatures(features[:count])
+    layer.updateExtents()
+    return layer
+
+
+def single_geometry(layer_to_clip, mask_layer):
+    """Smart clip with a single prepared geometry of the whole mask."""
+    request = QgsFeatureRequest().setSubsetOfAttributes([])
+    geometry = QgsGeometry.unaryUnion(
+        [feature.geometry() for feature in mask_layer.getFeatures(request)])
+    # noinspection PyArgumentList
+    engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+    engine.prepareGeometry()
+
+    count = 0
+    for feature in layer_to_clip.getFeatures(
+            QgsFeatureRequest(mask_layer.extent())):
+        if engine.intersects(feature.geometry().constGet()):
+            out_feature = QgsFeature()
+            out_feature.setGeometry(feature.geometry())
+            out_feature.setAttributes(feature.attributes())
+            count += 1
+    return count
+
+
+def run(label, function, *args):
+    """Time a function."""
+    start = time.time()
+    result = function(*args)
+    print('{label:<25} {seconds:.3f} s'.format(
+        label=label, seconds=time.time() - start))
+    return result
+
+
+if __name__ == '__main__':
+    building_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    district_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print('Smart clip of {buildings} buildings with {districts} '
+          'districts'.format(
+              buildings=building_count, districts=district_count))
+
+    exposure = run('create buildings', buildings, building_count)
+    mask = run('create districts', districts, district_count)
+
+    count = run('single geometry', single_geometry, exposure, mask)
+    print('{count} buildings kept'.format(count=count))
+    layer = run('smart_clip', smart_clip, exposure, mask)
+    print('{count} buildings kept'.format(count=layer.featureCount()))
@@ -0,0 +1,115 @@
+# coding=utf-8
+"""Benchmark the start-up of the plugin.
+
+It measures the import time of the plugin module with `python -X importtime`
+and prints the slowest modules, then the wall time of the initGui method of
+the plugin and of the creation of the dock, which is deferred until the
+event loop runs.
+
+Usage, from the root of the repository in a QGIS python environment:
+    python scripts/benchmarks/benchmark_startup.py [module_count]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, ROOT)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+def import_times(module):
+    """Import a module in a new interpreter and collect the import times.
+
+    :param module: The name of the module to import.
+    :type module: str
+
+    :return: A list of tuples with the cumulative time in microseconds and
+        the name of each imported module.
+    :rtype: list
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True)
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        try:
+            times.append((int(cumulative), name.strip()))
+        except ValueError:
+            # The header of the output.
+            continue
+    return times
+
+
+def init_gui_time():
+    """Time initGui and the creation of the dock with a test interface.
+
+    :return: A tuple with the initGui and the dock creation times in seconds.
+    :rtype: tuple
+    """
+    from safe.definitions.constants import INASAFE_TEST
+    from safe.test.utilities import get_qgis_app
+    _, canvas, _, _ = get_qgis_app(qsetting=INASAFE_TEST)
+
+    from qgis.PyQt.QtCore import pyqtSignal
+    from qgis.PyQt.QtWidgets import QMainWindow
+    from safe.test.qgis_interface import QgisInterface
+
+    class StartupInterface(QgisInterface):
+
+        """Test interface with a main window and a toolbar."""
+
+        initializationCompleted = pyqtSignal()
+
+        def __init__(self, canvas):
+            super(StartupInterface, self).__init__(canvas)
+            self.main_window = QMainWindow()
+
+        def mainWindow(self):
+            return self.main_window
+
+        def addToolBar(self, name):
+            return self.main_window.addToolBar(name)
+
+        def addDockWidget(self, area, dock_widget):
+            self.main_window.addDockWidget(area, dock_widget)
+
+    from safe.plugin import Plugin
+    plugin = Plugin(StartupInterface(canvas))
+
+    start = time.time()
+    plugin.initGui()
+    init_gui = time.time() - start
+
+    start = time.time()
+    _ = plugin.dock_widget  # NOQA
+    dock = time.time() - start
+    return init_gui, dock
+
+
+if __name__ == '__main__':
+    module_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    times = import_times('safe.plugin')
+    total = max(times)[0] if times else 0
+    print('Import of safe.plugin: {seconds:.3f} s'.format(
+        seconds=total / 1e6))
+    for cumulative, name in sorted(times, reverse=True)[:module_count]:
+        print('{seconds:>8.3f} s  {name}'.format(
+            seconds=cumulative / 1e6, name=name))
+
+    init_gui, dock = init_gui_time()
+    print('initGui: {seconds:.3f} s'.format(seconds=init_gui))
+    print('Dock, after the start: {seconds:.3f} s'.format(seconds=dock))
@@ -0,0 +1,57 @@
+# coding=utf-8
+"""Benchmark the translation overhead in a post processing loop.
+
+It simulates the translation of the boolean result of the affected post
+processor for a number of features, with the uncached QCoreApplication
+translation, the cached tr() and a TranslationTable.
+
+Usage, from the root of the repository in a QGIS python environment:
+    python scripts/benchmarks/benchmark_translation.py [feature_count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from qgis.PyQt.QtCore import QCoreApplication  # NOQA
+
+from safe.utilities.i18n import (  # NOQA
+    clear_translation_cache, tr, TranslationTable)
+
+__copyright__ = "Copyright 2018, The InaSAFE Project"
+__license__ = "GPL version 3"
+__email__ = "info@inasafe.org"
+__revision__ = '$Format:%H$'
+
+
+def uncached_tr(text, context='@default'):
+    """The translation as it was done before the cache."""
+    text = str(text)
+    translated_text = QCoreApplication.translate(context, text)
+    if text.count('%') == translated_text.count('%'):
+        return translated_text
+    return text
+
+
+def run(label, function, values):
+    """Time a function over the list of values."""
+    start = time.time()
+    for value in values:
+        function(value)
+    print('{label:<20} {seconds:.3f} s'.format(
+        label=label, seconds=time.time() - start))
+
+
+if __name__ == '__main__':
+    feature_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    results = [True, False, None] * (feature_count // 3)
+    print('Translating {count} values'.format(count=len(results)))
+
+    run('uncached', uncached_tr, results)
+    clear_translation_cache()
+    run('cached tr', tr, results)
+    translations = TranslationTable()
+    run('translation table', translations.__getitem__, results)